@@ -0,0 +1,160 @@
+"""**********************************************************************************
+ * Title: admission.py
+ *
+ * @author Isaiah Tadrous
+ * @version 1.0.0
+ * -------------------------------------------------------------------------------
+ * Description:
+ * This module implements admission control and load shedding for the solver
+ * endpoints. The AdmissionController caps the number of Z3 solves running at
+ * once, queues a bounded amount of extra work behind them, and estimates how
+ * long a new request would wait from the expected cost of everything already
+ * admitted. Costs start from a static table per (dim, stars) and are refined
+ * with an exponentially weighted moving average of observed solve times.
+ * Requests whose estimated wait exceeds the configured threshold are rejected
+ * immediately with an AdmissionRejected error, which the Flask app turns into
+ * an HTTP 429 response carrying a 'Retry-After' header. Cheap endpoints never
+ * pass through the controller.
+ **********************************************************************************"""
+
+# --- IMPORTS ---
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from backend import metrics
+
+# --- COST MODEL CONSTANTS ---
+# Seed estimates (in seconds) for one solve, measured on a single core for the
+# puzzle sizes served by the application. Observed durations replace these over time.
+# Costs never decrease with size, and each must stay well below ADMISSION_MAX_WAIT_SECONDS:
+# every prefork worker starts from these seeds with a single solver slot.
+DEFAULT_SOLVE_COST_SECONDS = {
+    (5, 1): 0.02, (6, 1): 0.02, (8, 1): 0.035, (10, 2): 0.06,
+    (14, 3): 0.25, (17, 4): 1.5, (21, 5): 1.75, (25, 6): 2.0,
+}
+
+# Weight given to each new observation in the moving average of solve costs.
+# Slower-than-expected solves are adopted immediately so that the queue is not
+# over-admitted while the machine is saturated; faster ones decay in gradually.
+COST_SMOOTHING = 0.2
+
+# --- EXCEPTIONS ---
+class AdmissionRejected(Exception):
+    """Raised when a solver request is shed because the estimated wait is too long."""
+    def __init__(self, retry_after, estimated_wait):
+        """
+        Initializes the rejection with the back-off hint for the client.
+
+        :param int retry_after: The number of seconds the client should wait before retrying.
+        :param float estimated_wait: The estimated queueing delay that caused the rejection.
+        """
+        super().__init__(f"Solver busy: estimated wait {estimated_wait:.1f} s")
+        self.retry_after, self.estimated_wait = retry_after, estimated_wait
+
+# --- CONTROLLER CLASS ---
+class AdmissionController:
+    """Bounds concurrent and queued solver work, shedding load based on estimated wait."""
+    def __init__(self, slots, max_wait_seconds, max_queue_depth):
+        """
+        Initializes the controller.
+
+        :param int slots: The number of solves allowed to run at the same time.
+        :param float max_wait_seconds: The largest estimated queueing delay that is still admitted.
+        :param int max_queue_depth: The largest number of admitted requests (running plus waiting).
+        """
+        self.slots = max(1, int(slots))
+        self.max_wait_seconds = max_wait_seconds
+        self.max_queue_depth = max(self.slots, int(max_queue_depth))
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.slots)
+        self._costs = dict(DEFAULT_SOLVE_COST_SECONDS)
+        self._outstanding_work = 0.0  # Estimated seconds of admitted, unfinished work.
+        self._depth = 0               # Admitted requests, running or waiting for a slot.
+
+    def estimate_cost(self, dim, stars):
+        """
+        Returns the expected duration of one solve for a puzzle size.
+
+        Unknown sizes are extrapolated from the largest known size of at most
+        the same dimension, scaled by the cube of the dimension ratio.
+
+        :param int dim: The puzzle dimension.
+        :param int stars: The number of stars per region.
+        :returns: The estimated solve time in seconds.
+        :rtype: float
+        """
+        cost = self._costs.get((dim, stars))
+        if cost is not None: return cost
+        known = [(d, c) for (d, _), c in self._costs.items() if d <= dim]
+        if not known: return min(self._costs.values())
+        base_dim, base_cost = max(known)
+        return base_cost * (dim / base_dim) ** 3
+
+    def estimated_wait(self):
+        """
+        Estimates how long a newly admitted request would wait for a free slot.
+
+        :returns: The estimated wait in seconds; zero while a slot is free.
+        :rtype: float
+        """
+        with self._lock:
+            return self._estimated_wait_locked()
+
+    def _estimated_wait_locked(self):
+        """Computes the estimated wait; the caller must hold the lock."""
+        if self._depth < self.slots: return 0.0
+        return self._outstanding_work / self.slots
+
+    @contextmanager
+    def admit(self, dim, stars):
+        """
+        Admits one solver request, or rejects it if the queue is too long.
+
+        The body of the 'with' block runs once a solver slot is free. Its duration
+        feeds back into the cost model for that puzzle size.
+
+        :param int dim: The puzzle dimension.
+        :param int stars: The number of stars per region.
+        :raises AdmissionRejected: If the estimated wait or queue depth exceeds its limit.
+        """
+        cost = self.estimate_cost(dim, stars)
+        with self._lock:
+            wait = self._estimated_wait_locked()
+            if self._depth >= self.max_queue_depth or wait > self.max_wait_seconds:
+                metrics.ADMISSION_REJECTIONS.inc(dim=dim, stars=stars)
+                raise AdmissionRejected(max(1, math.ceil(wait - self.max_wait_seconds + cost)), wait)
+            self._depth += 1
+            self._outstanding_work += cost
+        metrics.ADMISSION_QUEUE_DEPTH.inc()
+        queued_at = time.perf_counter()
+        try:
+            with self._semaphore:
+                started_at = time.perf_counter()
+                metrics.ADMISSION_QUEUE_WAIT.observe(started_at - queued_at)
+                yield
+                self._record_cost(dim, stars, time.perf_counter() - started_at)
+        finally:
+            with self._lock:
+                self._depth -= 1
+                self._outstanding_work = max(0.0, self._outstanding_work - cost)
+            metrics.ADMISSION_QUEUE_DEPTH.dec()
+
+    def _record_cost(self, dim, stars, duration):
+        """
+        Folds an observed solve duration into the moving average for its size.
+
+        Durations above the current estimate replace it outright, durations
+        below it are blended in with 'COST_SMOOTHING'.
+
+        :param int dim: The puzzle dimension.
+        :param int stars: The number of stars per region.
+        :param float duration: The observed duration in seconds.
+        """
+        with self._lock:
+            previous = self._costs.get((dim, stars))
+            if previous is None or duration > previous:
+                self._costs[(dim, stars)] = duration
+            else:
+                self._costs[(dim, stars)] = previous + COST_SMOOTHING * (duration - previous)
@@ -3,7 +3,7 @@
  *
  * @author Joseph Bryant
  * @refactored by Isaiah Tadrous
- * @version 2.0.3
+ * @version 2.2.0
  * -------------------------------------------------------------------------------
  * Description:
  * This script serves as the Flask backend for the Star Battle puzzle application.
@@ -16,19 +16,161 @@
  **********************************************************************************"""
 
 # --- IMPORTS ---
-from flask import Flask, jsonify, request
+import time
+
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
 # Use absolute imports from the 'backend' package.
+from backend import metrics
 from backend import puzzle_handler as pz
+from backend.admission import AdmissionController, AdmissionRejected
 from backend.history_manager import HistoryManager
-from backend.z3_solver import Z3StarBattleSolver, Z3_AVAILABLE
+from backend.session_store import SessionStore, MoveConflict
+from backend.z3_solver import Z3StarBattleSolver, Z3_AVAILABLE, format_duration
+from backend.bitmask_solver import BitmaskStarBattleSolver
+from backend.logic_solver import find_hint, solve_by_logic
 from backend import constants as const
 
 # --- FLASK APP INITIALIZATION ---
 app = Flask(__name__)
 CORS(app)
 
+# Shared admission controller guarding the solver endpoints against overload.
+solver_admission = AdmissionController(
+    const.ADMISSION_SOLVER_SLOTS, const.ADMISSION_MAX_WAIT_SECONDS, const.ADMISSION_MAX_QUEUE_DEPTH)
+
+# In-memory store for the optional server-side game sessions.
+sessions = SessionStore(const.SESSION_MAX_COUNT, const.SESSION_TTL_SECONDS)
+
+def _admission_rejected_response(error):
+    """
+    Builds the HTTP 429 response for a request shed by the admission controller.
+
+    :param AdmissionRejected error: The rejection raised by the controller.
+    :returns: A JSON error response with a 'Retry-After' header.
+    :rtype: tuple[flask.Response, int, dict]
+    """
+    body = {'error': 'Solver is busy, please retry later', 'retryAfter': error.retry_after}
+    return jsonify(body), 429, {'Retry-After': str(error.retry_after)}
+
+class SolverUnavailable(Exception):
+    """Raised when a puzzle needs the Z3 solver but Z3 is not installed on the server."""
+
+def _solver_unavailable_response():
+    """
+    Builds the HTTP 503 response for a puzzle that only Z3 could have decided.
+
+    :returns: A JSON error response.
+    :rtype: tuple[flask.Response, int]
+    """
+    return jsonify({'error': 'Z3 Solver not available on the server'}), 503
+
+def _is_player_solution(player_grid, solutions):
+    """
+    Checks whether the stars on a player's grid match one of the solver's solutions.
+
+    :param list[list[int]] player_grid: The player's grid of cell states.
+    :param list solutions: The solutions found by the solver, as 2D grids of 0s and 1s.
+    :returns: True if the player's stars form one of the solutions.
+    :rtype: bool
+    """
+    player_solution = [[1 if cell == const.STATE_STAR else 0 for cell in row] for row in player_grid]
+    return player_solution in solutions
+
+def _solve_puzzle(region_grid, stars_per_region):
+    """
+    Solves a puzzle with the strategies SOLVER_STRATEGY_TABLE lists for its size.
+
+    The strategies are tried in order until one decides whether the puzzle has
+    no, one or several solutions. Z3 records its own solver metrics; the
+    duration of the other strategies is recorded here under the same labels.
+
+    :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+    :param int stars_per_region: The number of stars required per region/row/column.
+    :returns: A tuple containing a list of up to two solutions and a stats dictionary,
+              as returned by Z3StarBattleSolver.solve(), plus the deciding 'strategy'.
+    :rtype: tuple[list, dict]
+    :raises SolverUnavailable: If the puzzle falls through to Z3 and Z3 is not installed.
+    """
+    dim = len(region_grid)
+    for strategy in const.SOLVER_STRATEGY_TABLE.get((dim, stars_per_region), ('z3',)):
+        if strategy == 'z3': break
+        start = time.monotonic()
+        if strategy == 'logic':
+            status, solution = solve_by_logic(region_grid, stars_per_region)
+            solutions, timed_out = ([solution] if solution else []), False
+        else:
+            solutions, stats = BitmaskStarBattleSolver(region_grid, stars_per_region).solve(
+                timeout_ms=const.SOLVER_TIMEOUT_MS)
+            status, timed_out = None, stats['timed_out']
+        duration = time.monotonic() - start
+        metrics.SOLVER_DURATION.observe(duration, dim=dim, stars=stars_per_region)
+        if status == 'stuck': continue # The logic techniques could not finish the board.
+        if timed_out: metrics.SOLVER_TIMEOUTS.inc(dim=dim, stars=stars_per_region)
+        app.logger.info(f"{strategy} solve time: {format_duration(duration)}")
+        return solutions, {'duration': duration, 'timed_out': timed_out, 'strategy': strategy}
+    # Z3 decides every puzzle, so it also backs up a table entry that got stuck.
+    if not Z3_AVAILABLE: raise SolverUnavailable()
+    solutions, stats = Z3StarBattleSolver(region_grid, stars_per_region).solve()
+    return solutions, dict(stats, strategy='z3')
+
+def _build_export_string(region_grid, stars_per_region, player_grid, manager=None):
+    """
+    Encodes a puzzle, the player's progress and the optional move history as one SBN string.
+
+    :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+    :param int stars_per_region: The number of stars required per region/row/column.
+    :param list[list[int]] player_grid: The player's grid of cell states.
+    :param HistoryManager | UndoTree | None manager: The move history to append, if any.
+    :returns: The export string.
+    :rtype: str
+    """
+    sbn_string = pz.encode_to_sbn(region_grid, stars_per_region, player_grid)
+    if manager and manager.changes:
+        history_str = manager.serialize()
+        if history_str:
+            sbn_string += f"~{history_str}"
+    return sbn_string
+
+# --- REQUEST INSTRUMENTATION ---
+@app.before_request
+def _start_request_timer():
+    """Records the request start time and marks the request as in flight."""
+    g.request_start = time.perf_counter()
+    g.puzzle_dim = ''
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def _record_request_metrics(response):
+    """
+    Records the request count and latency once a response has been produced.
+
+    Requests are labelled by their URL rule rather than the raw path, so that
+    unmatched or parameterised URLs cannot create unbounded label values.
+
+    :param flask.Response response: The outgoing response.
+    :returns: The unmodified response.
+    :rtype: flask.Response
+    """
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+        metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route=route, dim=g.get('puzzle_dim', ''))
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Exposes the application metrics in the Prometheus text exposition format.
+
+    :returns: A plain-text response containing every registered metric.
+    :rtype: flask.Response
+    """
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4')
+
 # --- API ENDPOINTS ---
 @app.route('/api/new_puzzle', methods=['GET'])
 def get_new_puzzle():
@@ -49,6 +191,7 @@ def get_new_puzzle():
         size_id = int(request.args.get('size_id', 5))
         if not 0 <= size_id < len(const.PUZZLE_DEFINITIONS):
             return jsonify({'error': 'Invalid size_id'}), 400
+        g.puzzle_dim = const.PUZZLE_DEFINITIONS[size_id]['dim']
         
         # Call the new function to get a puzzle from local files
         puzzle_data = pz.get_puzzle_from_local_file(size_id)
@@ -71,17 +214,17 @@ def find_solution():
     """
     Handles POST requests to find a valid solution for a given puzzle.
 
-    This endpoint requires the Z3 solver to be available. It takes the puzzle's
-    region layout and the number of stars per region, then uses the solver
-    to find one valid solution.
+    It takes the puzzle's region layout and the number of stars per region,
+    then uses the solver strategies for its size to find one valid solution.
+    If those strategies fall through to Z3 and Z3 is not installed, it answers
+    with HTTP 503. Requests pass through the admission controller
+    and are rejected with HTTP 429 and a 'Retry-After' header under overload.
 
     :param dict request.json: The request body containing 'regionGrid' and 'starsPerRegion'.
     :returns: A JSON response containing the 'solution' as a 2D array, 'solution': None
               if no solution is found, or an 'error' message.
     :rtype: flask.Response
     """
-    if not Z3_AVAILABLE:
-        return jsonify({'error': 'Z3 Solver not available on the server'}), 503
     try:
         data = request.json
         region_grid = data.get('regionGrid')
@@ -89,14 +232,21 @@ def find_solution():
         
         if not all([region_grid, stars_per_region]):
              return jsonify({'error': 'Missing regionGrid or starsPerRegion in request'}), 400
+        g.puzzle_dim = len(region_grid)
              
-        solver = Z3StarBattleSolver(region_grid, stars_per_region)
-        solutions, _ = solver.solve()
+        with solver_admission.admit(len(region_grid), stars_per_region):
+            solutions, stats = _solve_puzzle(region_grid, stars_per_region)
         
         if solutions:
             return jsonify({'solution': solutions[0]})
+        if stats.get('timed_out'):
+            return jsonify({'error': 'Solver timed out'}), 504
             
         return jsonify({'solution': None})
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+    except SolverUnavailable:
+        return _solver_unavailable_response()
     except Exception as e:
         app.logger.error(f"Error in /api/solve: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
@@ -107,7 +257,9 @@ def check_solution():
     Handles POST requests to check if a player's solution is correct.
 
     It compares the player's submitted grid against the valid solution(s)
-    generated by the Z3 solver.
+    found by the solver. Like '/api/solve', it is subject to admission control,
+    may be rejected with HTTP 429 under overload, and answers with HTTP 503 if
+    the puzzle needs Z3 and Z3 is not installed.
 
     :param dict request.json: The request body containing 'regionGrid', 'playerGrid',
                               and 'starsPerRegion'.
@@ -115,8 +267,6 @@ def check_solution():
               player's solution matches a valid one, or an 'error' message.
     :rtype: flask.Response
     """
-    if not Z3_AVAILABLE:
-        return jsonify({'error': 'Z3 Solver not available on the server'}), 503
     try:
         data = request.json
         region_grid = data.get('regionGrid')
@@ -125,21 +275,58 @@ def check_solution():
 
         if not all([region_grid, player_grid, stars_per_region is not None]):
              return jsonify({'error': 'Missing data in request'}), 400
+        g.puzzle_dim = len(region_grid)
 
-        solver = Z3StarBattleSolver(region_grid, stars_per_region)
-        solutions, _ = solver.solve()
+        with solver_admission.admit(len(region_grid), stars_per_region):
+            solutions, stats = _solve_puzzle(region_grid, stars_per_region)
         
-        is_correct = False
-        if solutions:
-            player_solution = [[1 if cell == const.STATE_STAR else 0 for cell in row] for row in player_grid]
-            if player_solution in solutions:
-                is_correct = True
+        is_correct = bool(solutions) and _is_player_solution(player_grid, solutions)
+        if not is_correct and stats.get('timed_out'):
+            return jsonify({'error': 'Solver timed out'}), 504
 
         return jsonify({'isCorrect': is_correct})
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+    except SolverUnavailable:
+        return _solver_unavailable_response()
     except Exception as e:
         app.logger.error(f"Error in /api/check: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
 
+@app.route('/api/hint', methods=['POST'])
+def get_hint():
+    """
+    Handles POST requests for the next deduction on a player's grid.
+
+    The hint comes from the logic solver rather than Z3: it applies the
+    simplest technique that forces new cells, starting from the player's
+    stars and marks. It takes milliseconds, so it does not pass through
+    admission control and works without Z3.
+
+    :param dict request.json: The request body containing 'regionGrid', 'playerGrid',
+                              and 'starsPerRegion'.
+    :returns: A JSON response with the hint's 'status' ('hint', 'solved', 'stuck' or
+              'contradiction') and, for a hint, its 'technique', 'explanation', and the
+              'stars' and 'eliminated' cells as [row, col] pairs, or an 'error' message.
+    :rtype: flask.Response
+    """
+    try:
+        data = request.json
+        region_grid = data.get('regionGrid')
+        player_grid = data.get('playerGrid')
+        stars_per_region = data.get('starsPerRegion')
+
+        if not all([region_grid, player_grid, stars_per_region]):
+             return jsonify({'error': 'Missing data in request'}), 400
+        if len(player_grid) != len(region_grid) or any(len(row) != len(region_grid) for row in region_grid + player_grid):
+             return jsonify({'error': 'regionGrid and playerGrid must be square grids of the same size'}), 400
+        g.puzzle_dim = len(region_grid)
+
+        return jsonify(find_hint(region_grid, stars_per_region, player_grid))
+    except Exception as e:
+        app.logger.error(f"Error in /api/hint: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
 @app.route('/api/export', methods=['POST'])
 def export_puzzle():
     """
@@ -158,18 +345,16 @@ def export_puzzle():
         region_grid, player_grid, stars_per_region, history = data.get('regionGrid'), data.get('playerGrid'), data.get('starsPerRegion'), data.get('history')
         if not all([region_grid, player_grid, stars_per_region is not None]):
             return jsonify({'error': 'Missing data in request'}), 400
+        g.puzzle_dim = len(region_grid)
             
-        sbn_string = pz.encode_to_sbn(region_grid, stars_per_region, player_grid)
-        
+        manager = None
         if history and history.get('changes'):
             # Create a dummy initial_state as it's not needed for serialization
             initial_state = [[]] 
             manager = HistoryManager(initial_state)
             manager.changes = history['changes']
             manager.pointer = history.get('pointer', len(history['changes']))
-            history_str = manager.serialize()
-            if history_str:
-                sbn_string += f"~{history_str}"
+        sbn_string = _build_export_string(region_grid, stars_per_region, player_grid, manager)
                 
         return jsonify({'exportString': sbn_string})
     except Exception as e:
@@ -200,7 +385,8 @@ def import_puzzle():
         if not puzzle_data:
             return jsonify({'error': 'Could not recognize puzzle format'}), 400
             
-        region_grid, _ = pz.parse_and_validate_grid(puzzle_data['task'])
+        region_grid, dim = pz.parse_and_validate_grid(puzzle_data['task'])
+        g.puzzle_dim = dim or ''
         
         return jsonify({
             'regionGrid': region_grid,
@@ -211,3 +397,252 @@ def import_puzzle():
     except Exception as e:
         app.logger.error(f"Error in /api/import: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
+
+# --- SESSION ENDPOINTS ---
+# Optional stateful API: the puzzle is stored once and moves are sent as deltas.
+def _session_not_found():
+    """
+    Builds the response for an unknown or expired session id.
+
+    :returns: A JSON error response with status 404.
+    :rtype: tuple[flask.Response, int]
+    """
+    return jsonify({'error': 'Session not found or expired'}), 404
+
+@app.route('/api/session', methods=['POST'])
+def create_session():
+    """
+    Handles POST requests to start a server-side game session.
+
+    The puzzle can be given in one of three ways: a 'sizeId' to fetch a new
+    puzzle from the local files, an 'importString' in any supported import
+    format (including player progress and history), or an explicit
+    'regionGrid' and 'starsPerRegion' with an optional 'playerGrid'. Setting
+    'undoTree' keeps a branching history; an imported 'ht:' history always
+    restores one.
+
+    :param dict request.json: The request body with 'sizeId', 'importString', or
+                              'regionGrid' and 'starsPerRegion', and an optional 'undoTree' flag.
+    :returns: A JSON response with the session state and its 'sessionId' (status 201),
+              or an 'error' message.
+    :rtype: flask.Response
+    """
+    try:
+        data = request.json or {}
+        player_grid, history = data.get('playerGrid'), None
+        if data.get('sizeId') is not None:
+            size_id = int(data['sizeId'])
+            if not 0 <= size_id < len(const.PUZZLE_DEFINITIONS):
+                return jsonify({'error': 'Invalid sizeId'}), 400
+            puzzle_data = pz.get_puzzle_from_local_file(size_id)
+            region_grid, _ = pz.get_grid_from_puzzle_task(puzzle_data)
+            stars_per_region = puzzle_data['stars'] if puzzle_data else None
+        elif data.get('importString'):
+            puzzle_data = pz.universal_import(data['importString'])
+            if not puzzle_data:
+                return jsonify({'error': 'Could not recognize puzzle format'}), 400
+            region_grid, _ = pz.parse_and_validate_grid(puzzle_data['task'])
+            stars_per_region = puzzle_data.get('stars')
+            player_grid, history = puzzle_data.get('player_grid'), puzzle_data.get('history')
+        else:
+            region_grid, stars_per_region = data.get('regionGrid'), data.get('starsPerRegion')
+
+        if not region_grid or not stars_per_region:
+            return jsonify({'error': 'Missing or invalid puzzle in request'}), 400
+        if any(not isinstance(row, list) or len(row) != len(region_grid) for row in region_grid):
+            return jsonify({'error': 'regionGrid must be square'}), 400
+        if player_grid and (len(player_grid) != len(region_grid) or any(len(row) != len(region_grid) for row in player_grid)):
+            return jsonify({'error': 'playerGrid does not match the puzzle dimension'}), 400
+        g.puzzle_dim = len(region_grid)
+
+        session = sessions.create(region_grid, stars_per_region, player_grid, history, bool(data.get('undoTree')))
+        return jsonify(session.to_dict()), 201
+    except Exception as e:
+        app.logger.error(f"Error in /api/session: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
+@app.route('/api/session/<session_id>', methods=['GET', 'DELETE'])
+def session_state(session_id):
+    """
+    Handles GET requests to read a session's state and DELETE requests to end it.
+
+    :param str session_id: The session identifier from the URL.
+    :returns: A JSON response with the session state, a confirmation, or a 404 error.
+    :rtype: flask.Response
+    """
+    if request.method == 'DELETE':
+        return (jsonify({'deleted': True}) if sessions.delete(session_id) else _session_not_found())
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    with session.lock:
+        return jsonify(session.to_dict())
+
+@app.route('/api/session/<session_id>/moves', methods=['POST'])
+def session_moves(session_id):
+    """
+    Handles POST requests that append one or more moves to a session.
+
+    Each move is a [r, c, from, to] array. The whole batch is rejected with
+    HTTP 409 if any move's 'from' state differs from the stored cell, in which
+    case the response carries the server's value for that cell so the client
+    can resynchronise.
+
+    :param str session_id: The session identifier from the URL.
+    :param dict request.json: The request body containing a 'moves' list.
+    :returns: A JSON response with the new 'pointer' and 'moveCount', or an error.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    moves = (request.json or {}).get('moves')
+    if not isinstance(moves, list) or not moves:
+        return jsonify({'error': 'Missing moves in request'}), 400
+    try:
+        with session.lock:
+            session.apply_moves(moves)
+            return jsonify({'pointer': session.history.pointer, 'moveCount': len(session.history.changes)})
+    except MoveConflict as e:
+        return jsonify({'error': str(e), 'index': e.index, 'r': e.r, 'c': e.c, 'actual': e.actual}), 409
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/session/<session_id>/undo', methods=['POST'])
+@app.route('/api/session/<session_id>/redo', methods=['POST'])
+def session_undo_redo(session_id):
+    """
+    Handles POST requests to undo or redo the latest move of a session.
+
+    :param str session_id: The session identifier from the URL.
+    :returns: A JSON response with the reverted or re-applied 'change' (None if there
+              was nothing to do) and the new 'pointer', or a 404 error.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    with session.lock:
+        change = session.undo() if request.path.endswith('/undo') else session.redo()
+        return jsonify({'change': change, 'pointer': session.history.pointer})
+
+@app.route('/api/session/<session_id>/tree', methods=['GET'])
+def session_tree(session_id):
+    """
+    Handles GET requests for the full undo tree of a session.
+
+    :param str session_id: The session identifier from the URL.
+    :returns: A JSON response with the 'nodes' list ([parent, r, c, from, to] per
+              node id) and the 'current' node id, or an error message.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    with session.lock:
+        if not session.undo_tree:
+            return jsonify({'error': 'Session does not use an undo tree'}), 400
+        return jsonify({'nodes': session.history.branches(), 'current': session.history.current})
+
+@app.route('/api/session/<session_id>/goto', methods=['POST'])
+def session_goto(session_id):
+    """
+    Handles POST requests to switch an undo-tree session to another node.
+
+    Only the changes between the current node and the target, through their
+    common ancestor, are applied.
+
+    :param str session_id: The session identifier from the URL.
+    :param dict request.json: The request body with the target 'node' id.
+    :returns: A JSON response with the changed cells ('updates' as [r, c, state]),
+              the new 'node' and 'pointer', or an error message.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    try:
+        node = int((request.json or {})['node'])
+        with session.lock:
+            updates = session.goto(node)
+            return jsonify({'updates': updates, 'node': session.history.current, 'pointer': session.history.pointer})
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid goto request: {e}'}), 400
+
+@app.route('/api/session/<session_id>/check', methods=['POST'])
+def session_check(session_id):
+    """
+    Handles POST requests to check the stored player grid of a session.
+
+    The solver result is cached on the session, so only the first check of a
+    session runs the solver and passes through admission control.
+
+    :param str session_id: The session identifier from the URL.
+    :returns: A JSON response with 'isCorrect', or an error message.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    try:
+        if session.solutions is None:
+            metrics.CACHE_REQUESTS.inc(cache='session_solutions', result='miss')
+            with solver_admission.admit(session.dim, session.stars_per_region):
+                solutions, stats = _solve_puzzle(session.region_grid, session.stars_per_region)
+            if stats.get('timed_out') and not solutions:
+                return jsonify({'error': 'Solver timed out'}), 504
+            if not stats.get('timed_out'):
+                session.solutions = solutions
+        else:
+            metrics.CACHE_REQUESTS.inc(cache='session_solutions', result='hit')
+            solutions = session.solutions
+        with session.lock:
+            is_correct = bool(solutions) and _is_player_solution(session.player_grid, solutions)
+        return jsonify({'isCorrect': is_correct})
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+    except SolverUnavailable:
+        return _solver_unavailable_response()
+    except Exception as e:
+        app.logger.error(f"Error in /api/session/check: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
+@app.route('/api/session/<session_id>/hint', methods=['GET'])
+def session_hint(session_id):
+    """
+    Handles GET requests for the next deduction on a session's stored player grid.
+
+    :param str session_id: The session identifier from the URL.
+    :returns: A JSON response with the hint, as returned by '/api/hint', or an error message.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    try:
+        with session.lock:
+            player_grid = [list(row) for row in session.player_grid]
+        return jsonify(find_hint(session.region_grid, session.stars_per_region, player_grid))
+    except Exception as e:
+        app.logger.error(f"Error in /api/session/hint: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
+@app.route('/api/session/<session_id>/export', methods=['GET'])
+def session_export(session_id):
+    """
+    Handles GET requests to export a session's puzzle, progress and history.
+
+    :param str session_id: The session identifier from the URL.
+    :returns: A JSON response with the 'exportString', or an error message.
+    :rtype: flask.Response
+    """
+    session = sessions.get(session_id)
+    if session is None: return _session_not_found()
+    g.puzzle_dim = session.dim
+    try:
+        with session.lock:
+            sbn_string = _build_export_string(session.region_grid, session.stars_per_region, session.player_grid, session.history)
+        return jsonify({'exportString': sbn_string})
+    except Exception as e:
+        app.logger.error(f"Error in /api/session/export: {e}")
+        return jsonify({'error': 'An internal error occurred'}), 500
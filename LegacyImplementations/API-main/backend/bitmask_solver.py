@@ -0,0 +1,262 @@
+"""**********************************************************************************
+ * Title: bitmask_solver.py
+ *
+ * @author Isaiah Tadrous
+ * @version 1.0.0
+ * -------------------------------------------------------------------------------
+ * Description:
+ * This module provides a dependency-free Star Battle solver that fills the
+ * grid one row at a time. Each row is an integer bitmask, and the star counts
+ * of every column, region and pair of neighbouring columns are packed into a
+ * single integer with one 8-bit field each, so placing a row is one addition
+ * and checking every quota is one mask test. Up to 17x17 it decides
+ * uniqueness several times faster than Z3, which is why SOLVER_STRATEGY_TABLE
+ * picks it for those sizes. It is a copy of MiscTools/bitmask_solver.py
+ * without the solution counter, and must be kept in sync with it.
+ **********************************************************************************"""
+
+# --- IMPORTS ---
+import time
+from itertools import combinations
+
+# --- PACKED COUNTER LAYOUT ---
+# Every column, every region and every pair of neighbouring columns owns an 8-bit field in
+# one integer. A field starts at (15 - quota), so it reaches 15 exactly when its quota is
+# met and sets bit 4 (0x10) as soon as it goes over. Values stay below 32, so fields
+# cannot carry into each other.
+FIELD_BITS = 8
+FIELD_BIAS = 15
+OVER_BITS = 0xF0  # Set in a field once its count exceeds the quota.
+MET_BIT = 0x10    # Set in a field once (biased count + 1) reaches 16, i.e. the quota is met.
+TIMEOUT_CHECK_INTERVAL = 4096  # Search nodes between deadline checks.
+
+def row_patterns(dim, stars):
+    """
+    Lists every row bitmask with exactly `stars` stars and no two stars side by side.
+
+    Choosing k non-adjacent cells out of n is the same as choosing k cells out of
+    n - k + 1 and then spreading them apart by one cell each.
+
+    :param int dim: The width of the row.
+    :param int stars: The number of stars in the row.
+    :returns: The row bitmasks, bit c set for a star in column c.
+    :rtype: list[int]
+    """
+    patterns = []
+    for chosen in combinations(range(dim - stars + 1), stars):
+        mask = 0
+        for offset, c in enumerate(chosen):
+            mask |= 1 << (c + offset)
+        patterns.append(mask)
+    return patterns
+
+def max_independent_cells(mask):
+    """
+    Returns how many stars can fit in a row segment without touching each other.
+
+    :param int mask: The bitmask of the available cells in the row.
+    :returns: The sum of ceil(run / 2) over the runs of consecutive set bits.
+    :rtype: int
+    """
+    total = run = 0
+    while mask:
+        if mask & 1:
+            run += 1
+        else:
+            total, run = total + (run + 1) // 2, 0
+        mask >>= 1
+    return total + (run + 1) // 2
+
+def block_counts(mask, even_columns):
+    """
+    Counts the 2x2 blocks touched by the cells of a pair of rows.
+
+    :param int mask: The union of the cells of both rows.
+    :param int even_columns: A mask with the bit of every even column set.
+    :returns: The count with blocks starting at even columns, and with blocks
+              starting at odd columns (column 0 then stands alone).
+    :rtype: tuple[int, int]
+    """
+    paired = mask | mask >> 1
+    return (paired & even_columns).bit_count(), (paired & even_columns << 1).bit_count() + (mask & 1)
+
+# --- SOLVER CLASS ---
+class BitmaskStarBattleSolver:
+    """A row-by-row backtracking solver for Star Battle puzzles using packed bitmask counters."""
+    def __init__(self, region_grid, stars_per_region):
+        """
+        Initializes the solver and precomputes the per-row placement tables.
+
+        :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+        :param int stars_per_region: The number of stars required per region/row/column.
+        """
+        self.region_grid = region_grid
+        self.dim = dim = len(region_grid)
+        self.stars_per_region = stars = stars_per_region
+        self.nodes = 0
+
+        region_ids = {}
+        for row in region_grid:
+            for region in row:
+                region_ids.setdefault(region, len(region_ids))
+        # With a different number of regions than rows, the star totals cannot agree.
+        self.consistent = len(region_ids) == dim and all(len(row) == dim for row in region_grid)
+        self.options = []    # Per row: (pattern, packed increment, cells it blocks in the next row).
+        self.lookahead = []  # Per row: packed capacity of the later rows, plus one per field.
+        self.compatible = {} # (row, blocked cells) -> the options that avoid them, filled in lazily.
+        if not self.consistent:
+            return
+
+        # Columns 0..dim-1, then regions, then pairs of neighbouring columns. A pair
+        # holds 2 * stars stars but at most one from any two consecutive rows, which
+        # is a much tighter bound than its two columns give separately.
+        fields = 3 * dim - 1
+        def field(index): return index * FIELD_BITS
+        ones = sum(1 << field(i) for i in range(fields))
+        pair_ones = sum(1 << field(2 * dim + c) for c in range(dim - 1))
+        self.over_mask = OVER_BITS * ones
+        self.met_mask = MET_BIT * ones
+        self.start = (FIELD_BIAS - stars) * ones - stars * pair_ones
+
+        # Cells of each region per row, to bound how many stars it can still collect.
+        region_rows = [[0] * dim for _ in region_ids]
+        for r, row in enumerate(region_grid):
+            for c, region in enumerate(row):
+                region_rows[region_ids[region]][r] |= 1 << c
+        self.region_rows = region_rows
+        self.row_regions = [[(index, rows[r]) for index, rows in enumerate(region_rows) if rows[r]] for r in range(dim)]
+        even_columns = sum(1 << c for c in range(0, dim, 2))
+        # later[i][r]: the stars region i can hold in rows r.. with each row taken on its
+        # own. blocks[i][r]: the 2x2 blocks it touches in rows r.., pairing rows from r.
+        self.later = [[0] * (dim + 2) for _ in region_rows]
+        self.blocks = [[0] * (dim + 2) for _ in region_rows]
+        for index, rows in enumerate(region_rows):
+            later, aligned, shifted = self.later[index], [0] * (dim + 2), [0] * (dim + 2)
+            for r in range(dim - 1, -1, -1):
+                later[r] = later[r + 1] + min(stars, max_independent_cells(rows[r]))
+                counts = block_counts(rows[r] | (rows[r + 1] if r + 1 < dim else 0), even_columns)
+                aligned[r], shifted[r] = aligned[r + 2] + counts[0], shifted[r + 2] + counts[1]
+                self.blocks[index][r] = min(aligned[r], shifted[r])
+
+        patterns = row_patterns(dim, stars)
+        columns_of = {p: [c for c in range(dim) if p >> c & 1] for p in patterns}
+        column_parts = {p: sum((1 << field(c)) + (1 << field(2 * dim + c) if c < dim - 1 else 0)
+                               + (1 << field(2 * dim + c - 1) if c > 0 else 0) for c in columns)
+                        for p, columns in columns_of.items()}
+
+        # Capacity of the rows r.. when nothing in row r is blocked.
+        self.static_capacity = [self._capacity(r, 0) for r in range(dim + 1)]
+        full_row = (1 << dim) - 1
+        for r in range(dim):
+            cell_fields = [field(dim + region_ids[region]) for region in region_grid[r]]
+            self.options.append([
+                (p, column_parts[p] + sum(1 << cell_fields[c] for c in columns), (p | p << 1 | p >> 1) & full_row)
+                for p, columns in columns_of.items()
+            ])
+            self.lookahead.append(self.static_capacity[r + 1] + ones)
+        self.ones = ones
+
+    def _region_capacity(self, index, r, first_row):
+        """
+        Bounds the stars a region can still receive in rows r.. .
+
+        :param int index: The region index.
+        :param int r: The first row that is still empty.
+        :param int first_row: The cells of the region in row r that are still available.
+        :returns: The bound, capped at the quota.
+        :rtype: int
+        """
+        if r >= self.dim:
+            return 0
+        stars = self.stars_per_region
+        first = min(stars, max_independent_cells(first_row))
+        return min(stars, first + self.later[index][r + 1], first + self.blocks[index][r + 1], self.blocks[index][r])
+
+    def _capacity(self, r, blocked):
+        """
+        Packs an upper bound on the stars each column, region and column pair can still receive.
+
+        :param int r: The first row that is still empty.
+        :param int blocked: The cells of row r that touch a star in row r - 1.
+        :returns: The capacities in the packed counter layout, each capped at the quota.
+        :rtype: int
+        """
+        dim, stars = self.dim, self.stars_per_region
+        remaining = dim - r
+        # A column (or a pair of neighbouring columns) takes at most one star from any
+        # two consecutive rows, and one fewer row is open to it if row r is blocked.
+        open_rows, closed_rows = min(stars, (remaining + 1) // 2), min(stars, remaining // 2)
+        open_pairs, closed_pairs = min(2 * stars, (remaining + 1) // 2), min(2 * stars, remaining // 2)
+        if not blocked:
+            capacity = sum(open_rows << (c * FIELD_BITS) for c in range(dim))
+            capacity += sum(open_pairs << ((2 * dim + c) * FIELD_BITS) for c in range(dim - 1))
+            for index, rows in enumerate(self.region_rows):
+                capacity += self._region_capacity(index, r, rows[r] if r < dim else 0) << ((dim + index) * FIELD_BITS)
+            return capacity
+
+        capacity = self.static_capacity[r]
+        for c in range(dim):
+            if blocked >> c & 1:
+                capacity -= (open_rows - closed_rows) << (c * FIELD_BITS)
+            if c < dim - 1 and blocked >> c & 3 == 3:
+                capacity -= (open_pairs - closed_pairs) << ((2 * dim + c) * FIELD_BITS)
+        for index, mask in self.row_regions[r]:
+            if mask & blocked:
+                shift = (dim + index) * FIELD_BITS
+                capacity -= (self._region_capacity(index, r, mask) - self._region_capacity(index, r, mask & ~blocked)) << shift
+        return capacity
+
+    def solve(self, max_solutions=2, timeout_ms=None):
+        """
+        Searches for solutions, stopping once `max_solutions` have been found.
+
+        :param int | None max_solutions: The number of solutions to stop at. The default
+                                         of two is enough to decide uniqueness; None
+                                         searches exhaustively.
+        :param int | None timeout_ms: A time budget for the search in milliseconds. If it
+                                      runs out, the search stops and 'timed_out' is set.
+        :returns: A tuple containing a list of solutions (each a 2D grid of 0s and 1s)
+                  and a stats dictionary with 'timed_out' (bool) and 'nodes' (int) keys.
+        :rtype: tuple[list, dict]
+        """
+        self.nodes = 0
+        if not self.consistent:
+            return [], {'timed_out': False, 'nodes': 0}
+
+        dim, options, lookahead = self.dim, self.options, self.lookahead
+        over_mask, met_mask = self.over_mask, self.met_mask
+        compatible, ones = self.compatible, self.ones
+        deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        rows, found, timed_out = [0] * dim, [], False
+
+        class Stop(Exception): pass
+
+        def search(r, blocked, counts):
+            nonlocal timed_out
+            entry = compatible.get((r, blocked))
+            if entry is None:
+                entry = compatible[(r, blocked)] = (
+                    [option for option in options[r] if not option[0] & blocked],
+                    self._capacity(r, blocked) + ones)
+            choices, bound = entry
+            if (counts + bound) & met_mask != met_mask: return
+            for pattern, increment, shadow in choices:
+                placed = counts + increment
+                if placed & over_mask or (placed + lookahead[r]) & met_mask != met_mask: continue
+                self.nodes += 1
+                rows[r] = pattern
+                if r + 1 == dim:
+                    found.append(list(rows))
+                    if max_solutions is not None and len(found) >= max_solutions: raise Stop
+                    continue
+                if deadline is not None and self.nodes % TIMEOUT_CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+                    timed_out = True
+                    raise Stop
+                search(r + 1, shadow, placed)
+
+        try:
+            search(0, 0, self.start)
+        except Stop:
+            pass
+        solutions = [[[row >> c & 1 for c in range(dim)] for row in solution] for solution in found]
+        return solutions, {'timed_out': timed_out, 'nodes': self.nodes}
@@ -3,7 +3,7 @@
  *
  * @author Joseph Bryant
  * @refactored by Isaiah Tadrous
- * @version 2.0.1
+ * @version 2.0.2
  * -------------------------------------------------------------------------------
  * Description:
  * This file contains all the static data and constants for the Star Battle
@@ -14,12 +14,55 @@
  * number of stars.
  **********************************************************************************"""
 
+import os
+
 # --- GAME STATE CONSTANTS ---
 # Defines the possible states for a single cell on the puzzle grid.
 STATE_EMPTY = 0
 STATE_STAR = 1
 STATE_SECONDARY_MARK = 2
 
+# --- SOLVER CONSTANTS ---
+# The maximum time in milliseconds that a single Z3 check may run before it gives up.
+# A timed-out solve is reported to the client as an error rather than holding a worker forever.
+SOLVER_TIMEOUT_MS = 60000
+# Solvers tried in order for each (dim, stars) until one decides the puzzle, taken from races
+# run with MiscTools/portfolio_solver.py: 'bitmask' (backend/bitmask_solver.py), 'logic' (the
+# hint techniques, which can prove a puzzle unique but never that it is not) and 'z3'.
+# Sizes missing from the table are solved with Z3 alone.
+SOLVER_STRATEGY_TABLE = {
+    (5, 1): ('bitmask',),
+    (6, 1): ('bitmask',),
+    (8, 1): ('bitmask',),
+    (9, 1): ('bitmask',),
+    (9, 2): ('bitmask',),
+    (10, 2): ('bitmask',),
+    (11, 2): ('bitmask',),
+    (14, 3): ('bitmask',),
+    (17, 4): ('bitmask',),
+    (21, 5): ('logic', 'z3'),
+    (25, 6): ('logic', 'z3'),
+}
+
+# --- HINT CONSTANTS ---
+# Puzzles whose hint solver (and its cached search results) is kept between '/api/hint' requests.
+HINT_SOLVER_CACHE_SIZE = 256
+# Search results a cached hint solver keeps before they are discarded, bounding its memory.
+HINT_FIT_MEMO_LIMIT = 100000
+
+# --- ADMISSION CONTROL CONSTANTS ---
+# Limits applied to the solver endpoints ('/api/solve' and '/api/check') only.
+# Requests beyond these limits are rejected with HTTP 429 and a 'Retry-After' header.
+ADMISSION_SOLVER_SLOTS = os.cpu_count() or 1  # Solves allowed to run at the same time.
+ADMISSION_MAX_WAIT_SECONDS = 10.0            # Largest estimated queueing delay still admitted.
+ADMISSION_MAX_QUEUE_DEPTH = 64               # Largest number of running plus waiting solves.
+
+# --- SESSION CONSTANTS ---
+# Limits for the optional server-side game sessions ('/api/session').
+SESSION_MAX_COUNT = 10000    # Sessions kept in memory; the least recently used is evicted first.
+SESSION_TTL_SECONDS = 3600   # Idle time after which a session expires.
+UNDO_TREE_MAX_NODES = 20000  # Nodes kept by a session's undo tree before old branches are pruned.
+
 # --- SBN (STAR BATTLE NOTATION) CONSTANTS ---
 # These constants are used for encoding and decoding the puzzle state to and from
 # the compact Star Battle Notation string format.
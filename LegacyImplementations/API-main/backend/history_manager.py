@@ -9,19 +9,165 @@
  * This file defines the HistoryManager class, which is responsible for managing
  * the state changes of the puzzle grid. It provides a robust undo/redo
  * functionality by tracking a list of changes applied to an initial state.
- * The class can reconstruct the grid at any point in its history and includes
- * methods to serialize the entire history into a compact string format and
- * deserialize it back into a manager instance, allowing for easy saving and
- * loading of game progress.
+ * The grid at the current position is maintained incrementally, with periodic
+ * snapshots so that any point in a long history can be reached cheaply. It
+ * also includes methods to serialize the entire history into a compact string
+ * format and deserialize it back into a manager instance, allowing for easy
+ * saving and loading of game progress.
  **********************************************************************************"""
 
 # --- IMPORTS ---
 import copy
+from array import array
 from backend.constants import SBN_CHAR_TO_INT, SBN_INT_TO_CHAR
 
+# A full copy of the grid is kept every this many changes, so that seeking to an
+# arbitrary history position never replays more than this many changes.
+SNAPSHOT_INTERVAL = 256
+
+# Bit layout of one packed change word: row (5 bits), column (5 bits), from (2 bits), to (2 bits).
+_ROW_SHIFT, _COL_SHIFT, _FROM_SHIFT = 9, 4, 2
+
+def pack_change(r, c, from_state, to_state):
+    """
+    Packs one change into a 14-bit integer.
+
+    :param int r: The row, below 32.
+    :param int c: The column, below 32.
+    :param int from_state: The previous cell state, below 4.
+    :param int to_state: The new cell state, below 4.
+    :returns: The packed change word.
+    :rtype: int
+    :raises ValueError: If a field does not fit its bit width.
+    """
+    if not (0 <= r < 32 and 0 <= c < 32 and 0 <= from_state < 4 and 0 <= to_state < 4):
+        raise ValueError(f"Change out of range: {(r, c, from_state, to_state)}")
+    return (r << _ROW_SHIFT) | (c << _COL_SHIFT) | (from_state << _FROM_SHIFT) | to_state
+
+def unpack_change(word):
+    """
+    Unpacks a change word into its fields.
+
+    :param int word: The packed change word.
+    :returns: A tuple of (r, c, from_state, to_state).
+    :rtype: tuple[int, int, int, int]
+    """
+    return word >> _ROW_SHIFT, (word >> _COL_SHIFT) & 31, (word >> _FROM_SHIFT) & 3, word & 3
+
+# --- CHANGE LOG CLASS ---
+class ChangeLog:
+    """
+    A compact, list-like log of changes stored as one 16-bit word per change.
+
+    Reading an entry returns a fresh {'r', 'c', 'from', 'to'} dictionary, so
+    existing callers keep working, while the storage costs two bytes per move.
+    Truncation only moves the logical length, so branching after an undo does
+    not copy the discarded tail.
+    """
+    __slots__ = ('words', '_length')
+
+    def __init__(self, changes=()):
+        """
+        Initializes the log, optionally from an iterable of change dictionaries.
+
+        :param iterable changes: The initial changes.
+        """
+        self.words, self._length = array('H'), 0
+        self.extend(changes)
+
+    def __len__(self):
+        """Returns the number of changes in the log."""
+        return self._length
+
+    def __iter__(self):
+        """Yields every change as a dictionary, oldest first."""
+        for i in range(self._length):
+            yield self._to_dict(self.words[i])
+
+    def __getitem__(self, index):
+        """Returns the change dictionary at an index, or a list of them for a slice."""
+        if isinstance(index, slice):
+            return [self._to_dict(self.words[i]) for i in range(*index.indices(self._length))]
+        if index < 0: index += self._length
+        if not 0 <= index < self._length: raise IndexError("change index out of range")
+        return self._to_dict(self.words[index])
+
+    def __eq__(self, other):
+        """Compares the changes with another log or list of change dictionaries."""
+        return list(self) == list(other)
+
+    def __repr__(self):
+        """Returns a readable representation listing every change."""
+        return f"ChangeLog({list(self)!r})"
+
+    @staticmethod
+    def _to_dict(word):
+        """Expands a packed word into a change dictionary."""
+        r, c, from_state, to_state = unpack_change(word)
+        return {'r': r, 'c': c, 'from': from_state, 'to': to_state}
+
+    def append(self, change):
+        """
+        Appends a change, reusing storage left behind by an earlier truncation.
+
+        :param dict change: A {'r', 'c', 'from', 'to'} dictionary.
+        """
+        word = pack_change(change['r'], change['c'], change['from'], change['to'])
+        if self._length < len(self.words):
+            self.words[self._length] = word
+        else:
+            self.words.append(word)
+        self._length += 1
+
+    def extend(self, changes):
+        """
+        Appends several changes.
+
+        :param iterable changes: The change dictionaries to append.
+        """
+        for change in changes:
+            self.append(change)
+
+    def truncate(self, length):
+        """
+        Drops every change from 'length' onwards in constant time.
+
+        :param int length: The number of changes to keep.
+        """
+        self._length = max(0, min(length, self._length))
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Creates a log that takes ownership of an array of already packed words.
+
+        :param array words: The packed change words.
+        :returns: The new change log.
+        :rtype: ChangeLog
+        """
+        log = cls()
+        log.words, log._length = words, len(words)
+        return log
+
+    def to_list(self):
+        """
+        Returns the changes as a plain list of dictionaries, e.g. for JSON responses.
+
+        :returns: The change dictionaries.
+        :rtype: list[dict]
+        """
+        return list(self)
+
 # --- CLASS DEFINITION ---
 class HistoryManager:
-    """Manages the history of changes for undo/redo functionality."""
+    """
+    Manages the history of changes for undo/redo functionality.
+
+    The grid at the current pointer is maintained incrementally: adding a change,
+    undoing and redoing each touch a single cell. Snapshots taken every
+    'SNAPSHOT_INTERVAL' changes bound the cost of jumping to a distant pointer,
+    e.g. after the pointer is assigned directly.
+    """
     def __init__(self, initial_state):
         """
         Initializes the HistoryManager with a starting grid state.
@@ -29,8 +175,30 @@ class HistoryManager:
         :param list[list[int]] initial_state: The initial 2D grid of the puzzle.
         """
         self.initial_state = copy.deepcopy(initial_state)
-        self.changes = []
+        self._changes = ChangeLog()
         self.pointer = 0
+        self._reset_cache()
+
+    @property
+    def changes(self):
+        """
+        The packed log of changes; each entry reads as a {'r', 'c', 'from', 'to'} dictionary.
+
+        Appending to the log keeps the cached grid valid. Assigning any iterable
+        of change dictionaries packs it into a new log and resets the cache.
+        """
+        return self._changes
+
+    @changes.setter
+    def changes(self, changes):
+        self._changes = changes if isinstance(changes, ChangeLog) else ChangeLog(changes)
+        self._reset_cache()
+
+    def _reset_cache(self):
+        """Discards the cached grid and snapshots, restarting from the initial state."""
+        self._grid = copy.deepcopy(self.initial_state)
+        self._grid_pointer = 0
+        self._snapshots = {}
 
     def add_change(self, change):
         """
@@ -42,36 +210,79 @@ class HistoryManager:
         :param dict change: A dictionary representing the change, e.g.,
                             {'r': row, 'c': col, 'from': old_state, 'to': new_state}.
         """
-        if self.pointer < len(self.changes):
-            self.changes = self.changes[:self.pointer]
-        self.changes.append(change)
+        if self.pointer < len(self._changes):
+            if self._grid_pointer > self.pointer:
+                self._seek(self.pointer)
+            self._changes.truncate(self.pointer)
+            for index in [i for i in self._snapshots if i > self.pointer]:
+                del self._snapshots[index]
+        self._changes.append(change)
         self.pointer += 1
 
     def get_current_grid(self):
         """
-        Reconstructs and returns the current grid based on the history.
+        Returns a copy of the grid at the current history pointer.
 
-        It starts with the initial state and applies all changes up to the
-        current history pointer.
+        The grid is maintained incrementally, so this costs one grid copy plus
+        the distance from the previously requested pointer, not a replay of the
+        whole history.
 
         :returns: The reconstructed 2D grid.
         :rtype: list[list[int]]
         """
-        grid = copy.deepcopy(self.initial_state)
-        for i in range(self.pointer):
-            # This needs to access object properties if the format is a list of dicts
-            change = self.changes[i]
-            
-            # --- BEFORE (This is incorrect and will crash) ---
-            # r, c, _, to_state = change['r'], change['c'], change['from'], change['to']
-            
-            # --- AFTER (Corrected logic) ---
-            r = change['r']
-            c = change['c']
-            to_state = change['to']
-            
-            grid[r][c] = to_state
-        return grid
+        self._seek(self.pointer)
+        return [list(row) for row in self._grid]
+
+    def _seek(self, target):
+        """
+        Moves the cached grid to the state after 'target' changes.
+
+        Short distances are walked change by change: forwards by applying each
+        'to' state, backwards by restoring each 'from' state. Longer jumps start
+        from the closest snapshot at or before the target.
+
+        :param int target: The history position to move the cached grid to.
+        """
+        target = max(0, min(target, len(self._changes)))
+        distance = target - self._grid_pointer
+        if distance < 0 and -distance <= SNAPSHOT_INTERVAL:
+            grid, words = self._grid, self._changes.words
+            for i in range(self._grid_pointer - 1, target - 1, -1):
+                word = words[i]
+                grid[word >> _ROW_SHIFT][(word >> _COL_SHIFT) & 31] = (word >> _FROM_SHIFT) & 3
+            self._grid_pointer = target
+            return
+        base = (target // SNAPSHOT_INTERVAL) * SNAPSHOT_INTERVAL
+        while base and base not in self._snapshots:
+            base -= SNAPSHOT_INTERVAL
+        if distance < 0 or base > self._grid_pointer:
+            self._grid = [list(row) for row in self._snapshots[base]] if base else copy.deepcopy(self.initial_state)
+            self._grid_pointer = base
+        grid, words = self._grid, self._changes.words
+        for i in range(self._grid_pointer, target):
+            word = words[i]
+            grid[word >> _ROW_SHIFT][(word >> _COL_SHIFT) & 31] = word & 3
+            if (i + 1) % SNAPSHOT_INTERVAL == 0 and i + 1 not in self._snapshots:
+                self._snapshots[i + 1] = tuple(tuple(row) for row in grid)
+        self._grid_pointer = target
+
+    def peek_undo(self):
+        """
+        Returns the change that undo would revert, without moving.
+
+        :returns: The change dictionary, or None if there is nothing to undo.
+        :rtype: dict | None
+        """
+        return self.changes[self.pointer - 1] if self.can_undo() else None
+
+    def peek_redo(self):
+        """
+        Returns the change that redo would re-apply, without moving.
+
+        :returns: The change dictionary, or None if there is nothing to redo.
+        :rtype: dict | None
+        """
+        return self.changes[self.pointer] if self.can_redo() else None
 
     def undo(self):
         """Moves the history pointer back one step if possible."""
@@ -107,25 +318,52 @@ class HistoryManager:
         """
         self.initial_state, self.changes, self.pointer = copy.deepcopy(initial_state), [], 0
 
-    def serialize(self):
+    def serialize(self, version=2):
         """
         Serializes the history of changes into a compact string format.
 
-        The format is 'h:<changes_string>:<pointer_char>', where each change
-        is encoded into a 4-character string representing (r, c, from, to).
+        Version 2 (the default) is 'h2:<data>', a sequence of base64 varints
+        (5 payload bits per character, the sixth bit marking continuation):
+        the pointer, then runs of consecutive changes sharing the same from/to
+        states. Each run is a header '(length - 1) << 4 | from << 2 | to'
+        followed by one zigzag-encoded delta per change between successive
+        cell indexes 'r << 5 | c'. A drag along a row costs about one
+        character per cell and the pointer is no longer limited to 63.
 
+        Version 1 is the original 'h:<changes_string>:<pointer_char>' format,
+        where each change is encoded into a 4-character string representing
+        (r, c, from, to).
+
+        :param int version: The format version to write, 2 or 1.
         :returns: The serialized history string, or an empty string if no changes.
         :rtype: str
         """
         if not self.changes: return ""
-        # Correctly serialize from a list of dictionaries
-        changes = [
-            f"{SBN_INT_TO_CHAR.get(c['r'], '0')}{SBN_INT_TO_CHAR.get(c['c'], '0')}"
-            f"{SBN_INT_TO_CHAR.get(c['from'], '0')}{SBN_INT_TO_CHAR.get(c['to'], '0')}"
-            for c in self.changes
-        ]
-        pointer = SBN_INT_TO_CHAR.get(self.pointer, '0')
-        return f"h:{''.join(changes)}:{pointer}"
+        words, chars = self._changes.words[:len(self._changes)], SBN_INT_TO_CHAR
+        if version == 1:
+            # Encode straight from the packed words, without building change dictionaries.
+            changes = [
+                f"{chars[w >> _ROW_SHIFT]}{chars[(w >> _COL_SHIFT) & 31]}{chars[(w >> _FROM_SHIFT) & 3]}{chars[w & 3]}"
+                for w in words
+            ]
+            pointer = SBN_INT_TO_CHAR.get(self.pointer, '0')
+            return f"h:{''.join(changes)}:{pointer}"
+
+        out = []
+        write_varint(out, self.pointer)
+        start, previous_cell = 0, 0
+        while start < len(words):
+            states = words[start] & 15
+            end = start + 1
+            while end < len(words) and words[end] & 15 == states: end += 1
+            write_varint(out, (end - start - 1) << 4 | states)
+            for w in words[start:end]:
+                cell = w >> _COL_SHIFT
+                delta = cell - previous_cell
+                write_varint(out, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+                previous_cell = cell
+            start = end
+        return f"h2:{''.join(out)}"
         
     @classmethod
     def deserialize(cls, initial_state, history_string):
@@ -133,7 +371,8 @@ class HistoryManager:
         Creates a HistoryManager instance from a serialized history string.
 
         It parses the string to reconstruct the list of changes and set the
-        history pointer. Returns a fresh manager if the string is invalid.
+        history pointer. Both the 'h2:' and the original 'h:' formats are
+        accepted. Returns a fresh manager if the string is invalid.
 
         :param list[list[int]] initial_state: The initial grid state for the puzzle.
         :param str history_string: The serialized history string to parse.
@@ -142,6 +381,22 @@ class HistoryManager:
         """
         manager = cls(initial_state)
         try:
+            if history_string and history_string.startswith('h2:'):
+                values = read_varints(history_string[3:])
+                pointer, words, cell, i = values[0], array('H'), 0, 1
+                while i < len(values):
+                    header = values[i]
+                    i += 1
+                    for _ in range((header >> 4) + 1):
+                        delta = values[i]
+                        i += 1
+                        cell += (delta >> 1) if not delta & 1 else -((delta + 1) >> 1)
+                        if not 0 <= cell < 1024: raise ValueError(f"Cell index out of range: {cell}")
+                        words.append(cell << _COL_SHIFT | header & 15)
+                manager.changes = ChangeLog.from_words(words)
+                manager.pointer = min(pointer, len(words))
+                return manager
+
             # Check if history_string is valid and has the correct format
             if not history_string or not history_string.startswith('h:'):
                 return manager
@@ -161,7 +416,42 @@ class HistoryManager:
                         manager.changes.append(change)
 
             manager.pointer = SBN_CHAR_TO_INT.get(pointer_data, 0)
-        except (KeyError, IndexError, ValueError) as e:
+        except (KeyError, IndexError, ValueError, TypeError) as e:
             print(f"Error deserializing history: {e}")
             return cls(initial_state) # Return a fresh manager on error
         return manager
+
+# --- VARINT HELPERS ---
+def write_varint(out, value):
+    """
+    Appends a non-negative integer as base64 varint characters.
+
+    :param list[str] out: The list of characters to append to.
+    :param int value: The value to encode.
+    """
+    while value >= 32:
+        out.append(SBN_INT_TO_CHAR[(value & 31) | 32])
+        value >>= 5
+    out.append(SBN_INT_TO_CHAR[value])
+
+def read_varints(data):
+    """
+    Decodes a string of base64 varint characters.
+
+    :param str data: The encoded characters.
+    :returns: The decoded integers.
+    :rtype: list[int]
+    :raises ValueError: If the data ends in the middle of a value.
+    :raises KeyError: If the data contains a character outside the SBN alphabet.
+    """
+    values, value, shift = [], 0, 0
+    for char in data:
+        digit = SBN_CHAR_TO_INT[char]
+        value |= (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    if shift or not values: raise ValueError("Truncated history data")
+    return values
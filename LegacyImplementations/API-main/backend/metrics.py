@@ -0,0 +1,365 @@
+"""**********************************************************************************
+ * Title: metrics.py
+ *
+ * @author Isaiah Tadrous
+ * @version 1.0.0
+ * -------------------------------------------------------------------------------
+ * Description:
+ * This module provides lightweight, dependency-free instrumentation for the
+ * Star Battle backend and renders it in the Prometheus text exposition format.
+ * It defines Counter, Gauge and Histogram metric types that record values into
+ * per-thread shards, so recording a value on the request or solver hot path
+ * never takes a lock. Shards are only merged when the '/metrics' endpoint is
+ * scraped. Shards belonging to threads that have exited are folded into a
+ * retired total so that the thread-per-request development server does not
+ * grow the shard list without bound. The module also declares every metric
+ * exported by the application in one place.
+ **********************************************************************************"""
+
+# --- IMPORTS ---
+import threading
+
+# --- CONSTANTS ---
+# Default latency buckets (in seconds) for HTTP request histograms.
+REQUEST_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Solver buckets reach further, since 21x21 and 25x25 solves can take tens of seconds.
+SOLVER_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Every metric created in this module registers itself here, in declaration order.
+REGISTRY = []
+
+# --- METRIC BASE CLASS ---
+class _Metric:
+    """
+    Base class holding the per-thread shard bookkeeping shared by all metric types.
+
+    Each thread records into its own dictionary mapping a tuple of label values
+    to a list of numbers. The lock is only taken the first time a thread touches
+    a metric and when the metric is scraped.
+    """
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Initializes the metric and adds it to the module registry.
+
+        :param str name: The Prometheus metric name.
+        :param str documentation: The help text exported with the metric.
+        :param tuple[str] labelnames: The names of the labels, in order.
+        """
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []   # List of (thread, shard_dict) pairs for live threads.
+        self._retired = {}  # Merged values from threads that have exited.
+        REGISTRY.append(self)
+
+    def _shard(self):
+        """
+        Returns the calling thread's shard, creating and registering it on first use.
+
+        :returns: The thread-local dictionary of label values to value lists.
+        :rtype: dict
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _new_value(self):
+        """
+        Creates the initial value list for a new label combination.
+
+        :returns: A list of zeros sized for this metric type.
+        :rtype: list[float]
+        """
+        return [0.0]
+
+    def _collect(self):
+        """
+        Merges every shard into a single mapping of label values to value lists.
+
+        Shards owned by threads that are no longer alive are folded into the
+        retired totals and dropped, since those threads can never write again.
+
+        :returns: A dictionary mapping label value tuples to merged value lists.
+        :rtype: dict
+        """
+        with self._lock:
+            live_shards = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live_shards.append((thread, shard))
+                else:
+                    self._merge_into(self._retired, shard)
+            self._shards = live_shards
+            merged = {key: list(values) for key, values in self._retired.items()}
+            for _, shard in live_shards:
+                # dict.copy() runs without releasing the GIL, so it is a safe snapshot.
+                self._merge_into(merged, shard.copy())
+        return merged
+
+    def _merge_into(self, target, shard):
+        """
+        Adds the values of one shard into a target mapping element by element.
+
+        :param dict target: The mapping to accumulate into.
+        :param dict shard: The shard whose values are added.
+        """
+        for key, values in shard.items():
+            existing = target.get(key)
+            if existing is None:
+                target[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    existing[i] += value
+
+    def _label_key(self, labels):
+        """
+        Converts keyword labels into the ordered tuple used as a shard key.
+
+        :param dict labels: The label values keyed by label name.
+        :returns: The label values ordered like 'labelnames'.
+        :rtype: tuple[str]
+        """
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=()):
+        """
+        Renders a label value tuple in Prometheus '{name="value"}' syntax.
+
+        :param tuple[str] key: The label values.
+        :param tuple[tuple[str, str]] extra: Additional (name, value) pairs, e.g. 'le'.
+        :returns: The formatted label block, or an empty string if there are no labels.
+        :rtype: str
+        """
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs: return ""
+        return "{" + ",".join(f'{n}="{_escape_label_value(v)}"' for n, v in pairs) + "}"
+
+    def render(self):
+        """
+        Renders the metric in the Prometheus text exposition format.
+
+        :returns: The HELP, TYPE and sample lines for this metric.
+        :rtype: list[str]
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, values in sorted(self._collect().items()):
+            lines.extend(self._render_samples(key, values))
+        return lines
+
+    def _render_samples(self, key, values):
+        """
+        Renders the sample lines for one label combination.
+
+        :param tuple[str] key: The label values.
+        :param list[float] values: The merged values for those labels.
+        :returns: The sample lines.
+        :rtype: list[str]
+        """
+        return [f"{self.name}{self._format_labels(key)} {_format_number(values[0])}"]
+
+# --- METRIC TYPES ---
+class Counter(_Metric):
+    """A monotonically increasing count, e.g. the number of requests served."""
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Increments the counter for the given labels.
+
+        :param float amount: The non-negative amount to add.
+        :param labels: The label values for this observation.
+        """
+        shard = self._shard()
+        key = self._label_key(labels)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = self._new_value()
+        values[0] += amount
+
+class Gauge(Counter):
+    """
+    A value that can go up and down, e.g. the number of in-flight solver jobs.
+
+    Each thread records its own net delta, so the sum across shards is the
+    current value even when a job is started and finished on different threads.
+    """
+    metric_type = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        """
+        Decrements the gauge for the given labels.
+
+        :param float amount: The amount to subtract.
+        :param labels: The label values for this observation.
+        """
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        """
+        Returns the current merged value of the gauge for the given labels.
+
+        :param labels: The label values to read.
+        :returns: The current value, or 0 if the labels were never recorded.
+        :rtype: float
+        """
+        values = self._collect().get(self._label_key(labels))
+        return values[0] if values else 0.0
+
+class Histogram(_Metric):
+    """A distribution of observed values, bucketed by upper bound, e.g. latencies."""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_LATENCY_BUCKETS):
+        """
+        Initializes the histogram with a fixed, sorted set of bucket bounds.
+
+        :param str name: The Prometheus metric name.
+        :param str documentation: The help text exported with the metric.
+        :param tuple[str] labelnames: The names of the labels, in order.
+        :param tuple[float] buckets: The upper bounds of the finite buckets.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self):
+        """
+        Creates a value list of one slot per bucket plus '+Inf', sum and count.
+
+        :returns: A zeroed value list.
+        :rtype: list[float]
+        """
+        return [0.0] * (len(self.buckets) + 3)
+
+    def observe(self, value, **labels):
+        """
+        Records a single observation for the given labels.
+
+        Only the first matching bucket is incremented; cumulative counts are
+        computed at render time to keep this path short.
+
+        :param float value: The observed value, e.g. a duration in seconds.
+        :param labels: The label values for this observation.
+        """
+        shard = self._shard()
+        key = self._label_key(labels)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = self._new_value()
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        values[index] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def _render_samples(self, key, values):
+        """
+        Renders cumulative bucket lines plus the '_sum' and '_count' samples.
+
+        :param tuple[str] key: The label values.
+        :param list[float] values: The merged bucket counts, sum and count.
+        :returns: The sample lines.
+        :rtype: list[str]
+        """
+        lines, cumulative = [], 0.0
+        for bound, count in zip(self.buckets + (float('inf'),), values):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_number(bound)
+            lines.append(f"{self.name}_bucket{self._format_labels(key, (('le', le),))} {_format_number(cumulative)}")
+        lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_number(values[-2])}")
+        lines.append(f"{self.name}_count{self._format_labels(key)} {_format_number(values[-1])}")
+        return lines
+
+# --- HELPER FUNCTIONS ---
+def _format_number(value):
+    """
+    Formats a sample value, dropping the fractional part of whole numbers.
+
+    :param float value: The value to format.
+    :returns: The formatted number.
+    :rtype: str
+    """
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _escape_label_value(value):
+    """
+    Escapes backslashes, double quotes and newlines in a label value.
+
+    :param str value: The raw label value.
+    :returns: The escaped label value.
+    :rtype: str
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_metrics():
+    """
+    Renders every registered metric in the Prometheus text exposition format.
+
+    :returns: The complete exposition document.
+    :rtype: str
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- APPLICATION METRICS ---
+HTTP_REQUESTS = Counter(
+    'starbattle_http_requests_total',
+    'HTTP requests handled, by route, method and status code.',
+    ('route', 'method', 'status'))
+
+HTTP_REQUEST_DURATION = Histogram(
+    'starbattle_http_request_duration_seconds',
+    'HTTP request latency in seconds, by route and puzzle dimension.',
+    ('route', 'dim'), buckets=REQUEST_LATENCY_BUCKETS)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    'starbattle_http_requests_in_flight',
+    'HTTP requests currently being handled.')
+
+SOLVER_DURATION = Histogram(
+    'starbattle_solver_duration_seconds',
+    'Z3 solve duration in seconds, by puzzle dimension and stars per region.',
+    ('dim', 'stars'), buckets=SOLVER_DURATION_BUCKETS)
+
+SOLVER_TIMEOUTS = Counter(
+    'starbattle_solver_timeouts_total',
+    'Z3 solves that hit the solver timeout, by puzzle dimension and stars per region.',
+    ('dim', 'stars'))
+
+SOLVER_JOBS_IN_FLIGHT = Gauge(
+    'starbattle_solver_jobs_in_flight',
+    'Z3 solves currently running.')
+
+CACHE_REQUESTS = Counter(
+    'starbattle_cache_requests_total',
+    'Cache lookups, by cache name and result (hit or miss).',
+    ('cache', 'result'))
+
+ADMISSION_REJECTIONS = Counter(
+    'starbattle_admission_rejections_total',
+    'Solver requests shed with HTTP 429, by puzzle dimension and stars per region.',
+    ('dim', 'stars'))
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    'starbattle_admission_queue_depth',
+    'Admitted solver requests that are running or waiting for a solver slot.')
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    'starbattle_admission_queue_wait_seconds',
+    'Time admitted solver requests spent waiting for a free solver slot.',
+    buckets=REQUEST_LATENCY_BUCKETS)
+
+SESSIONS_ACTIVE = Gauge(
+    'starbattle_sessions_active',
+    'Server-side game sessions currently stored.')
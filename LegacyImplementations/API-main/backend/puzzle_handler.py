@@ -24,7 +24,9 @@ import logging
 from collections import deque
 
 # Use absolute imports from the 'backend' package
+from backend import metrics
 from backend.history_manager import HistoryManager
+from backend.undo_tree import UndoTree
 from backend.constants import (
     PUZZLE_DEFINITIONS, STATE_EMPTY, STATE_STAR, STATE_SECONDARY_MARK,
     SBN_B64_ALPHABET, SBN_CHAR_TO_INT, SBN_INT_TO_CHAR,
@@ -32,37 +34,111 @@ from backend.constants import (
 )
 
 # --- PUZZLE FETCHING AND IMPORTING ---
+# Maps a puzzle file path to a (modification_time, puzzle_lines) tuple so that
+# each file is only read again when it changes on disk.
+_PUZZLE_FILE_CACHE = {}
+
+# Maps a size_id to a (puzzle_lines, decoded_grids) tuple filled by preload_puzzle_catalog().
+_DECODED_CATALOG = {}
+
+def _read_puzzle_file(file_path):
+    """
+    Returns the non-empty lines of a puzzle file, served from a cache when possible.
+
+    The cache is keyed by path and invalidated by the file's modification time.
+    Lookups are recorded in the 'puzzle_file' cache metrics.
+
+    :param str file_path: The path to the puzzle '.txt' file.
+    :returns: The list of SBN strings in the file.
+    :rtype: list[str]
+    """
+    mtime = os.path.getmtime(file_path)
+    cached = _PUZZLE_FILE_CACHE.get(file_path)
+    if cached and cached[0] == mtime:
+        metrics.CACHE_REQUESTS.inc(cache='puzzle_file', result='hit')
+        return cached[1]
+    metrics.CACHE_REQUESTS.inc(cache='puzzle_file', result='miss')
+    with open(file_path, 'r') as f:
+        puzzles = [line.strip() for line in f if line.strip()]
+    _PUZZLE_FILE_CACHE[file_path] = (mtime, puzzles)
+    return puzzles
+
+def _puzzle_file_path(size_id):
+    """
+    Returns the path of the puzzle file for a size_id.
+
+    :param int size_id: The identifier for the puzzle size.
+    :returns: The path to the corresponding '.txt' file in the 'puzzles' directory.
+    :rtype: str
+    """
+    # The filename is the size_id directly (e.g., '0.txt', '1.txt').
+    return os.path.join(os.path.dirname(__file__), 'puzzles', f'{size_id}.txt')
+
+def preload_puzzle_catalog(decode=True):
+    """
+    Reads every puzzle file into the cache and optionally decodes all region grids.
+
+    This is intended to run once in a master process before worker processes
+    are forked, so the catalog is shared copy-on-write between workers. Decoded
+    grids are stored as one 'bytes' object per puzzle (one region id per cell),
+    which keeps them compact and outside the garbage collector's tracking.
+
+    :param bool decode: Whether to decode every SBN string into its region grid.
+    :returns: The number of puzzles loaded.
+    :rtype: int
+    """
+    total = 0
+    for size_id in range(len(PUZZLE_DEFINITIONS)):
+        file_path = _puzzle_file_path(size_id)
+        if not os.path.exists(file_path): continue
+        puzzles = _read_puzzle_file(file_path)
+        if decode:
+            grids = []
+            for sbn in puzzles:
+                grids.append(bytes(map(int, decode_sbn(sbn)['task'].split(','))))
+            # The puzzle list itself is stored alongside so a reloaded file invalidates the entry.
+            _DECODED_CATALOG[size_id] = (puzzles, grids)
+        total += len(puzzles)
+    return total
+
 def get_puzzle_from_local_file(size_id):
     """
     Fetches a random puzzle SBN string from a local text file based on size_id.
 
     It constructs the file path to a corresponding '.txt' file inside the
-    'puzzles' directory, reads all puzzle strings, and returns one at random.
-    The SBN string is then decoded into the standard puzzle data dictionary format.
+    'puzzles' directory, reads all puzzle strings (or reuses the cached copy),
+    and returns one at random. The SBN string is then decoded into the standard
+    puzzle data dictionary format, unless the catalog was preloaded with decoded
+    region grids, in which case the stored grid is used directly.
 
     :param int size_id: The identifier for the puzzle size, corresponding to a filename.
     :returns: A dictionary containing the decoded puzzle data, or None if an error occurs.
     :rtype: dict | None
     """
     try:
-        # The filename is the size_id directly (e.g., '0.txt', '1.txt').
-        file_path = os.path.join(os.path.dirname(__file__), 'puzzles', f'{size_id}.txt')
+        file_path = _puzzle_file_path(size_id)
         logging.info(f"Attempting to fetch puzzle from: {file_path}")
 
         if not os.path.exists(file_path):
             logging.error(f"Puzzle file not found at {file_path}")
             return None
 
-        with open(file_path, 'r') as f:
-            puzzles = [line.strip() for line in f if line.strip()]
+        puzzles = _read_puzzle_file(file_path)
         
         if not puzzles:
             logging.error(f"No puzzles found in {file_path}")
             return None
             
-        random_sbn_string = random.choice(puzzles)
+        index = random.randrange(len(puzzles))
+        random_sbn_string = puzzles[index]
         logging.info(f"Selected SBN: {random_sbn_string}")
 
+        decoded = _DECODED_CATALOG.get(size_id)
+        if decoded and decoded[0] is puzzles:
+            metrics.CACHE_REQUESTS.inc(cache='decoded_grid', result='hit')
+            return {'task': ",".join(map(str, decoded[1][index])), 'stars': int(random_sbn_string[2])}
+        metrics.CACHE_REQUESTS.inc(cache='decoded_grid', result='miss')
+
         puzzle_data = decode_sbn(random_sbn_string)
         
         if puzzle_data:
@@ -160,8 +236,13 @@ def universal_import(input_string):
         if dim:
             puzzle_data['player_grid'] = decode_player_annotations(raw_annotation_data, dim)
             if history_part:
-                mgr = HistoryManager.deserialize([[]] * dim, history_part)
-                puzzle_data['history'] = {"changes": mgr.changes, "pointer": mgr.pointer}
+                # Undo trees are linearized along the current branch for stateless
+                # clients; the raw tree is kept so a session can restore every branch.
+                is_tree = history_part.startswith('ht:')
+                if is_tree: mgr = UndoTree.deserialize([[STATE_EMPTY] * dim for _ in range(dim)], history_part)
+                else: mgr = HistoryManager.deserialize([[]] * dim, history_part)
+                puzzle_data['history'] = {"changes": mgr.changes.to_list(), "pointer": mgr.pointer}
+                if is_tree: puzzle_data['history']['tree'] = history_part
         logging.info("Puzzle import successful.")
         return puzzle_data
         
@@ -0,0 +1,259 @@
+"""**********************************************************************************
+ * Title: session_store.py
+ *
+ * @author Isaiah Tadrous
+ * @version 1.0.0
+ * -------------------------------------------------------------------------------
+ * Description:
+ * This module provides optional server-side game sessions for the Flask API.
+ * A GameSession stores a puzzle's region grid once, together with the player's
+ * live grid and a HistoryManager, so that clients can send individual moves as
+ * small (r, c, from, to) deltas instead of resending the whole board on every
+ * request. Each move is checked against the stored cell state, and a mismatch
+ * raises a MoveConflict so the client can resynchronise. Solver results are
+ * cached per session, since the region layout never changes. The SessionStore
+ * keeps sessions in memory with least-recently-used eviction and an idle
+ * timeout. Sessions live in a single process and are not shared between
+ * pre-fork workers. A session can opt into an UndoTree instead of the linear
+ * history, so that moves made after an undo start a new branch.
+ **********************************************************************************"""
+
+# --- IMPORTS ---
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from backend import metrics
+from backend.history_manager import HistoryManager
+from backend.undo_tree import UndoTree
+from backend.constants import STATE_EMPTY, STATE_STAR, STATE_SECONDARY_MARK
+
+VALID_CELL_STATES = (STATE_EMPTY, STATE_STAR, STATE_SECONDARY_MARK)
+
+# --- EXCEPTIONS ---
+class MoveConflict(Exception):
+    """Raised when a move's 'from' state does not match the stored cell state."""
+    def __init__(self, index, r, c, expected, actual):
+        """
+        Initializes the conflict with the details the client needs to resynchronise.
+
+        :param int index: The position of the rejected move within its batch.
+        :param int r: The row of the rejected move.
+        :param int c: The column of the rejected move.
+        :param int expected: The 'from' state the client sent.
+        :param int actual: The state the server holds for that cell.
+        """
+        super().__init__(f"Move {index} expects cell ({r}, {c}) to be {expected}, but it is {actual}")
+        self.index, self.r, self.c, self.expected, self.actual = index, r, c, expected, actual
+
+# --- SESSION CLASS ---
+class GameSession:
+    """The stored puzzle, live player grid and move history of one game."""
+    def __init__(self, session_id, region_grid, stars_per_region, player_grid=None, history=None, undo_tree=False):
+        """
+        Initializes a session from a puzzle and, optionally, imported progress.
+
+        If a history is given, the player grid is taken to be the state at the
+        history pointer, and the initial state of the history is recovered by
+        undoing the applied changes.
+
+        :param str session_id: The unique identifier of the session.
+        :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+        :param int stars_per_region: The number of stars required per region/row/column.
+        :param list[list[int]] | None player_grid: The current player grid, or None for an empty board.
+        :param dict | None history: A {'changes': [...], 'pointer': int} history, as returned by the import.
+                                    An imported undo tree is passed as its serialized string under 'tree'.
+        :param bool undo_tree: If True, the history is a branching UndoTree instead of a HistoryManager.
+        """
+        self.session_id = session_id
+        self.region_grid, self.dim, self.stars_per_region = region_grid, len(region_grid), stars_per_region
+        self.player_grid = [list(row) for row in player_grid] if player_grid else [[STATE_EMPTY] * self.dim for _ in range(self.dim)]
+        self.solutions = None  # Cached solver result, filled on the first check.
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+
+        initial_state = [list(row) for row in self.player_grid]
+        changes = list(history.get('changes') or []) if history else []
+        pointer = min(history.get('pointer', len(changes)), len(changes)) if history else 0
+        for change in reversed(changes[:pointer]):
+            initial_state[change['r']][change['c']] = change['from']
+        if history and history.get('tree'):
+            self.history = UndoTree.deserialize(initial_state, history['tree'])
+            self.history.set_current_grid(self.player_grid)
+        elif undo_tree:
+            self.history = UndoTree.from_linear(initial_state, changes, pointer)
+        else:
+            self.history = HistoryManager(initial_state)
+            self.history.changes, self.history.pointer = changes, pointer
+        self.undo_tree = isinstance(self.history, UndoTree)
+
+    def apply_moves(self, moves):
+        """
+        Applies a batch of moves atomically.
+
+        Every move is a (r, c, from, to) sequence. If any move is out of range or
+        its 'from' state does not match the current cell, no move of the batch is
+        applied.
+
+        :param list moves: The moves to apply, in order.
+        :raises MoveConflict: If a move's 'from' state does not match the board.
+        :raises ValueError: If a move is malformed or out of range.
+        """
+        applied = []
+        try:
+            for index, move in enumerate(moves):
+                r, c, from_state, to_state = (int(value) for value in move)
+                if not (0 <= r < self.dim and 0 <= c < self.dim) or to_state not in VALID_CELL_STATES:
+                    raise ValueError(f"Move {index} is out of range: {list(move)}")
+                actual = self.player_grid[r][c]
+                if actual != from_state:
+                    raise MoveConflict(index, r, c, from_state, actual)
+                self.player_grid[r][c] = to_state
+                applied.append({'r': r, 'c': c, 'from': from_state, 'to': to_state})
+        except Exception:
+            for change in reversed(applied):
+                self.player_grid[change['r']][change['c']] = change['from']
+            raise
+        for change in applied:
+            self.history.add_change(change)
+
+    def undo(self):
+        """
+        Reverts the most recent applied change, if any.
+
+        :returns: The change that was reverted, or None if there was nothing to undo.
+        :rtype: dict | None
+        """
+        change = self.history.peek_undo()
+        if change is None: return None
+        self.player_grid[change['r']][change['c']] = change['from']
+        self.history.undo()
+        return change
+
+    def redo(self):
+        """
+        Re-applies the next change in the history, if any.
+
+        :returns: The change that was re-applied, or None if there was nothing to redo.
+        :rtype: dict | None
+        """
+        change = self.history.peek_redo()
+        if change is None: return None
+        self.player_grid[change['r']][change['c']] = change['to']
+        self.history.redo()
+        return change
+
+    def goto(self, node):
+        """
+        Switches an undo-tree session to another node of its history.
+
+        :param int node: The id of the target node.
+        :returns: The cells that changed, as (r, c, new_state) tuples in order.
+        :rtype: list[tuple[int, int, int]]
+        :raises ValueError: If the session has no undo tree or the node does not exist.
+        """
+        if not self.undo_tree: raise ValueError("Session does not use an undo tree")
+        updates = self.history.goto(node)
+        for r, c, state in updates:
+            self.player_grid[r][c] = state
+        return updates
+
+    def to_dict(self):
+        """
+        Returns the public state of the session for API responses.
+
+        :returns: A dictionary with the session id, puzzle, player grid and history position
+                  (plus the current node and node count for undo-tree sessions).
+        :rtype: dict
+        """
+        state = {
+            'sessionId': self.session_id,
+            'regionGrid': self.region_grid,
+            'starsPerRegion': self.stars_per_region,
+            'playerGrid': self.player_grid,
+            'pointer': self.history.pointer,
+            'moveCount': len(self.history.changes),
+            'undoTree': self.undo_tree,
+        }
+        if self.undo_tree:
+            state['node'], state['nodeCount'] = self.history.current, self.history.node_count
+        return state
+
+# --- STORE CLASS ---
+class SessionStore:
+    """An in-memory, thread-safe session registry with LRU eviction and an idle timeout."""
+    def __init__(self, max_sessions, ttl_seconds):
+        """
+        Initializes an empty store.
+
+        :param int max_sessions: The largest number of sessions kept; the least recently used is evicted.
+        :param float ttl_seconds: How long a session may stay idle before it expires.
+        """
+        self.max_sessions, self.ttl_seconds = max_sessions, ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, region_grid, stars_per_region, player_grid=None, history=None, undo_tree=False):
+        """
+        Creates and stores a new session.
+
+        :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+        :param int stars_per_region: The number of stars required per region/row/column.
+        :param list[list[int]] | None player_grid: The current player grid, or None for an empty board.
+        :param dict | None history: An imported {'changes', 'pointer'} history, if any.
+        :param bool undo_tree: If True, the session keeps a branching undo tree.
+        :returns: The new session.
+        :rtype: GameSession
+        """
+        session = GameSession(secrets.token_urlsafe(12), region_grid, stars_per_region, player_grid, history, undo_tree)
+        with self._lock:
+            self._expire_locked()
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                metrics.SESSIONS_ACTIVE.dec()
+            self._sessions[session.session_id] = session
+        metrics.SESSIONS_ACTIVE.inc()
+        return session
+
+    def get(self, session_id):
+        """
+        Returns a session and marks it as recently used.
+
+        :param str session_id: The session identifier.
+        :returns: The session, or None if it does not exist or has expired.
+        :rtype: GameSession | None
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None: return None
+            now = time.monotonic()
+            if now - session.last_access > self.ttl_seconds:
+                del self._sessions[session_id]
+                metrics.SESSIONS_ACTIVE.dec()
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        """
+        Removes a session.
+
+        :param str session_id: The session identifier.
+        :returns: True if the session existed, False otherwise.
+        :rtype: bool
+        """
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None: return False
+        metrics.SESSIONS_ACTIVE.dec()
+        return True
+
+    def _expire_locked(self):
+        """Drops idle sessions from the least recently used end; the caller must hold the lock."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_access > cutoff: break
+            self._sessions.popitem(last=False)
+            metrics.SESSIONS_ACTIVE.dec()
@@ -0,0 +1,417 @@
+"""**********************************************************************************
+ * Title: undo_tree.py
+ *
+ * @author Isaiah Tadrous
+ * @version 1.0.0
+ * -------------------------------------------------------------------------------
+ * Description:
+ * This module defines the UndoTree class, a branching alternative to the linear
+ * HistoryManager. Making a move after an undo starts a new branch instead of
+ * discarding the redo tail, so exploratory "what-if" play is never lost. Every
+ * node stores only its packed change word and its parent, and the grid at the
+ * current node is maintained incrementally. Jumping to another node walks up to
+ * the common ancestor and down to the target, so the cost is the length of the
+ * path between the two nodes rather than a replay from the initial state. The
+ * tree is bounded by a node cap: old leaves off the current path are pruned
+ * first, and the oldest part of the current path is folded into the initial
+ * state if that is not enough. The tree serializes into the export string with
+ * an 'ht:' prefix, and exposes the same linear 'changes'/'pointer' view as
+ * HistoryManager for clients that only understand linear histories.
+ **********************************************************************************"""
+
+# --- IMPORTS ---
+import copy
+import heapq
+from array import array
+
+from backend.constants import UNDO_TREE_MAX_NODES
+from backend.history_manager import ChangeLog, HistoryManager, pack_change, unpack_change, write_varint, read_varints
+
+# Fraction of the node cap kept after a pruning pass, so pruning runs in batches.
+_PRUNE_TARGET = 0.9
+
+# --- CLASS DEFINITION ---
+class UndoTree:
+    """Manages a branching history of changes with undo, redo and branch switching."""
+    def __init__(self, initial_state, max_nodes=UNDO_TREE_MAX_NODES):
+        """
+        Initializes an empty tree whose root is the initial grid state.
+
+        :param list[list[int]] initial_state: The initial 2D grid of the puzzle.
+        :param int max_nodes: The largest number of nodes kept, including the root.
+        """
+        self.max_nodes = max(2, int(max_nodes))
+        self.reset(initial_state)
+
+    def reset(self, initial_state):
+        """
+        Resets the tree to a single root node for a new initial state.
+
+        :param list[list[int]] initial_state: The new initial 2D grid.
+        """
+        self.initial_state = copy.deepcopy(initial_state)
+        self._grid = copy.deepcopy(initial_state)
+        # Node 0 is the root. Node ids are assigned in creation order, so a
+        # parent always has a smaller id than its children.
+        self._parent = array('l', [-1])
+        self._word = array('H', [0])
+        self._depth = array('l', [0])
+        self._children = [[]]
+        self._redo_child = [-1]  # The child that redo follows: the most recently visited one.
+        self.current = 0
+
+    # --- LINEAR VIEW ---
+    @property
+    def pointer(self):
+        """The number of changes between the root and the current node."""
+        return self._depth[self.current]
+
+    @property
+    def changes(self):
+        """
+        The linear history along the current branch: the path from the root to
+        the current node followed by the redo path. Read-only.
+
+        :returns: The changes as a packed log.
+        :rtype: ChangeLog
+        """
+        path = self._path_to(self.current)
+        node = self._redo_child[self.current]
+        while node != -1:
+            path.append(node)
+            node = self._redo_child[node]
+        return ChangeLog.from_words(array('H', (self._word[n] for n in path)))
+
+    @property
+    def node_count(self):
+        """The number of nodes in the tree, including the root."""
+        return len(self._parent)
+
+    # --- EDITING AND NAVIGATION ---
+    def add_change(self, change):
+        """
+        Records a change as a child of the current node and moves to it.
+
+        If the current node already has a child with the same change, that
+        branch is reused instead of creating a duplicate.
+
+        :param dict change: A {'r', 'c', 'from', 'to'} change dictionary.
+        """
+        word = pack_change(change['r'], change['c'], change['from'], change['to'])
+        node = next((child for child in self._children[self.current] if self._word[child] == word), None)
+        if node is None:
+            node = len(self._parent)
+            self._parent.append(self.current)
+            self._word.append(word)
+            self._depth.append(self._depth[self.current] + 1)
+            self._children.append([])
+            self._redo_child.append(-1)
+            self._children[self.current].append(node)
+        self._redo_child[self.current] = node
+        self._apply(word, forward=True)
+        self.current = node
+        if len(self._parent) > self.max_nodes:
+            self._prune()
+
+    def peek_undo(self):
+        """
+        Returns the change that undo would revert, without moving.
+
+        :returns: The change dictionary, or None at the root.
+        :rtype: dict | None
+        """
+        return ChangeLog._to_dict(self._word[self.current]) if self.current else None
+
+    def peek_redo(self):
+        """
+        Returns the change that redo would re-apply, without moving.
+
+        :returns: The change dictionary, or None if the current node has no children.
+        :rtype: dict | None
+        """
+        child = self._redo_child[self.current]
+        return ChangeLog._to_dict(self._word[child]) if child != -1 else None
+
+    def undo(self):
+        """Moves to the parent of the current node, if any."""
+        if not self.can_undo(): return
+        self._apply(self._word[self.current], forward=False)
+        self.current = self._parent[self.current]
+
+    def redo(self):
+        """Moves to the most recently visited child of the current node, if any."""
+        if not self.can_redo(): return
+        self.current = self._redo_child[self.current]
+        self._apply(self._word[self.current], forward=True)
+
+    def can_undo(self):
+        """
+        Checks if an undo operation can be performed.
+
+        :returns: True if the current node is not the root.
+        :rtype: bool
+        """
+        return self.current != 0
+
+    def can_redo(self):
+        """
+        Checks if a redo operation can be performed.
+
+        :returns: True if the current node has a child to move to.
+        :rtype: bool
+        """
+        return self._redo_child[self.current] != -1
+
+    def goto(self, node):
+        """
+        Switches to any node of the tree, e.g. another branch.
+
+        Only the changes on the path between the current node and the target
+        (through their deepest common ancestor) are applied. Redo pointers along
+        the way are updated so that redo keeps following the visited branch.
+
+        :param int node: The id of the target node.
+        :returns: The cells that changed, as (r, c, new_state) tuples in order.
+        :rtype: list[tuple[int, int, int]]
+        :raises ValueError: If the node does not exist.
+        """
+        if not 0 <= node < len(self._parent):
+            raise ValueError(f"Unknown history node: {node}")
+        updates, up, down = [], self.current, node
+        while self._depth[up] > self._depth[down]:
+            updates.append(self._apply(self._word[up], forward=False))
+            up = self._parent[up]
+        descent = []
+        while self._depth[down] > self._depth[up]:
+            descent.append(down)
+            down = self._parent[down]
+        while up != down:
+            updates.append(self._apply(self._word[up], forward=False))
+            up = self._parent[up]
+            descent.append(down)
+            down = self._parent[down]
+        for target in reversed(descent):
+            self._redo_child[self._parent[target]] = target
+            updates.append(self._apply(self._word[target], forward=True))
+        self.current = node
+        return updates
+
+    def get_current_grid(self):
+        """
+        Returns a copy of the grid at the current node.
+
+        :returns: The 2D grid.
+        :rtype: list[list[int]]
+        """
+        return [list(row) for row in self._grid]
+
+    def set_current_grid(self, grid):
+        """
+        Declares the grid at the current node and derives the initial state from it.
+
+        This is used when a tree is restored next to a known current board, e.g.
+        when a session is created from an export string.
+
+        :param list[list[int]] grid: The grid at the current node.
+        """
+        self._grid = [list(row) for row in grid]
+        initial = [list(row) for row in grid]
+        for node in reversed(self._path_to(self.current)):
+            r, c, from_state, _ = unpack_change(self._word[node])
+            initial[r][c] = from_state
+        self.initial_state = initial
+
+    def branches(self):
+        """
+        Lists every node for clients that display the tree.
+
+        :returns: One [parent, r, c, from, to] list per node id; the root is [-1, 0, 0, 0, 0].
+        :rtype: list[list[int]]
+        """
+        return [[self._parent[n], *unpack_change(self._word[n])] for n in range(len(self._parent))]
+
+    # --- SERIALIZATION ---
+    def serialize(self):
+        """
+        Serializes the whole tree into a compact string.
+
+        The format is 'ht:<data>', a sequence of base64 varints: the current
+        node id, then for every node after the root, in id order, the distance
+        to its parent id (shifted left by one, with the low bit set if redo from
+        the parent follows this node) followed by its packed change word.
+
+        :returns: The serialized tree, or an empty string if it has no changes.
+        :rtype: str
+        """
+        if len(self._parent) == 1: return ""
+        out = []
+        write_varint(out, self.current)
+        for node in range(1, len(self._parent)):
+            parent = self._parent[node]
+            write_varint(out, (node - parent) << 1 | (self._redo_child[parent] == node))
+            write_varint(out, self._word[node])
+        return f"ht:{''.join(out)}"
+
+    @classmethod
+    def deserialize(cls, initial_state, history_string, max_nodes=UNDO_TREE_MAX_NODES):
+        """
+        Creates a tree from a serialized string.
+
+        Linear 'h:' and 'h2:' histories are accepted too and become a single
+        branch, with the redo tail kept as the branch beyond the pointer. A tree
+        larger than 'max_nodes' is pruned the same way as one that grows past it.
+
+        :param list[list[int]] initial_state: The initial grid state for the puzzle.
+        :param str history_string: The serialized history.
+        :param int max_nodes: The node cap of the new tree.
+        :returns: The restored tree, or an empty tree if the string is invalid.
+        :rtype: UndoTree
+        """
+        tree = cls(initial_state, max(max_nodes, 2))
+        if not history_string: return tree
+        if not history_string.startswith('ht:'):
+            linear = HistoryManager.deserialize([[]], history_string)
+            return cls.from_linear(initial_state, linear.changes, linear.pointer, max_nodes)
+        try:
+            values = read_varints(history_string[3:])
+            if len(values) % 2 != 1: raise ValueError("Malformed tree data")
+            for i in range(1, len(values), 2):
+                node, word = len(tree._parent), values[i + 1]
+                parent = node - (values[i] >> 1)
+                if not 0 <= parent < node or word >= 1 << 14: raise ValueError("Malformed tree node")
+                tree._parent.append(parent)
+                tree._word.append(word)
+                tree._depth.append(tree._depth[parent] + 1)
+                tree._children.append([])
+                tree._redo_child.append(-1)
+                tree._children[parent].append(node)
+                if values[i] & 1: tree._redo_child[parent] = node
+            redo_child = list(tree._redo_child)
+            tree.goto(min(values[0], len(tree._parent) - 1))
+            tree._redo_child = redo_child
+            # The string may come from a client or an older, larger cap; enforce this tree's cap.
+            if len(tree._parent) > tree.max_nodes:
+                tree._prune()
+        except (KeyError, IndexError, ValueError) as e:
+            print(f"Error deserializing history tree: {e}")
+            return cls(initial_state, max_nodes)
+        return tree
+
+    @classmethod
+    def from_linear(cls, initial_state, changes, pointer, max_nodes=UNDO_TREE_MAX_NODES):
+        """
+        Builds a single-branch tree from a linear history.
+
+        :param list[list[int]] initial_state: The initial grid state.
+        :param iterable changes: The change dictionaries, oldest first.
+        :param int pointer: The number of applied changes.
+        :param int max_nodes: The node cap of the new tree.
+        :returns: The new tree, positioned at the pointer.
+        :rtype: UndoTree
+        """
+        tree = cls(initial_state, max_nodes)
+        for change in changes:
+            tree.add_change(change)
+        while tree.pointer > pointer and tree.can_undo():
+            tree.undo()
+        return tree
+
+    # --- INTERNAL HELPERS ---
+    def _apply(self, word, forward):
+        """
+        Applies or reverts one packed change on the current grid.
+
+        :param int word: The packed change word.
+        :param bool forward: True to apply the 'to' state, False to restore the 'from' state.
+        :returns: The changed cell as (r, c, new_state).
+        :rtype: tuple[int, int, int]
+        """
+        r, c, from_state, to_state = unpack_change(word)
+        state = to_state if forward else from_state
+        self._grid[r][c] = state
+        return r, c, state
+
+    def _path_to(self, node):
+        """
+        Returns the node ids from the first change below the root down to 'node'.
+
+        :param int node: The last node of the path.
+        :returns: The node ids in root-to-node order, excluding the root.
+        :rtype: list[int]
+        """
+        path = []
+        while node > 0:
+            path.append(node)
+            node = self._parent[node]
+        path.reverse()
+        return path
+
+    def _prune(self):
+        """
+        Shrinks the tree below the node cap.
+
+        Leaves that are not on the path to the current node are removed oldest
+        first. If the current path alone is still too long, its oldest changes
+        are folded into the initial state. Surviving nodes are renumbered so ids
+        stay dense and parents keep smaller ids than their children.
+        """
+        target = max(2, int(self.max_nodes * _PRUNE_TARGET))
+        alive = [True] * len(self._parent)
+        protected = set(self._path_to(self.current))
+        protected.add(0)
+        child_count = [len(children) for children in self._children]
+        excess = len(self._parent) - target
+        # Unprotected leaves, oldest first. A parent becomes a leaf when its last
+        # child goes, so each node is pushed and popped at most once.
+        leaves = [node for node in range(1, len(self._parent)) if child_count[node] == 0 and node not in protected]
+        while excess > 0 and leaves:
+            node = heapq.heappop(leaves)
+            alive[node] = False
+            excess -= 1
+            parent = self._parent[node]
+            child_count[parent] -= 1
+            if child_count[parent] == 0 and parent not in protected:
+                heapq.heappush(leaves, parent)
+
+        # Fold the oldest changes of the current path into the initial state.
+        root = 0
+        path = self._path_to(self.current)
+        while excess > 0 and path:
+            new_root = path.pop(0)
+            r, c, _, to_state = unpack_change(self._word[new_root])
+            self.initial_state[r][c] = to_state
+            stack = [child for child in self._children[root] if child != new_root]
+            alive[root] = False
+            excess -= 1
+            while stack:
+                node = stack.pop()
+                if alive[node]:
+                    alive[node] = False
+                    excess -= 1
+                    stack.extend(self._children[node])
+            root = new_root
+        self._compact(alive, root)
+
+    def _compact(self, alive, root):
+        """
+        Rebuilds the node arrays keeping only live nodes, with 'root' as node 0.
+
+        :param list[bool] alive: Which old node ids survive.
+        :param int root: The old id of the node that becomes the new root.
+        """
+        remap = {root: 0}
+        parent, word, depth, children, redo_child = array('l', [-1]), array('H', [0]), array('l', [0]), [[]], [-1]
+        for node in range(root + 1, len(self._parent)):
+            if not alive[node] or self._parent[node] not in remap: continue
+            new_id, new_parent = len(parent), remap[self._parent[node]]
+            remap[node] = new_id
+            parent.append(new_parent)
+            word.append(self._word[node])
+            depth.append(depth[new_parent] + 1)
+            children.append([])
+            redo_child.append(-1)
+            children[new_parent].append(new_id)
+        for old, new in remap.items():
+            redo_child[new] = remap.get(self._redo_child[old], -1)
+        self._parent, self._word, self._depth, self._children, self._redo_child = parent, word, depth, children, redo_child
+        self.current = remap[self.current]
@@ -17,27 +17,41 @@
 
 # --- IMPORTS AND Z3 AVAILABILITY ---
 import hashlib
+import importlib.util
+import logging
+import threading
 import time
 from collections import defaultdict
+from functools import lru_cache
 
-try:
-    # Attempt to import the required components from the Z3 library.
-    from z3 import Solver, Bool, PbEq, Implies, And, Not, Or, sat
-    Z3_AVAILABLE = True
-except ImportError:
-    # If Z3 is not installed, print a warning and set up dummy objects/functions
-    # to prevent the application from crashing when solver-related code is called.
+from backend import metrics
+from backend.constants import SOLVER_TIMEOUT_MS
+
+# Z3 takes tens of milliseconds to import, which every process importing this
+# module would otherwise pay even if it never solves a puzzle. Availability is
+# therefore checked without importing the package, and the library itself is
+# only loaded by load_z3() on the first solve.
+Z3_AVAILABLE = importlib.util.find_spec('z3') is not None
+if not Z3_AVAILABLE:
     print("Warning: 'z3-solver' library not found.")
-    Z3_AVAILABLE = False
-    # Define placeholder classes and functions to avoid runtime errors.
-    class Solver: pass
-    def Bool(s): return None
-    def PbEq(s, i): return None
-    def Implies(a,b): return None
-    def And(s): return None
-    def Not(s): return None
-    def Or(s): return None
-    sat = "sat"
+
+_z3 = None
+_z3_lock = threading.Lock()
+
+def load_z3():
+    """
+    Imports the Z3 library on first use and returns the module.
+
+    :returns: The 'z3' module, or None if it is not installed.
+    :rtype: module | None
+    """
+    global _z3
+    if _z3 is None and Z3_AVAILABLE:
+        with _z3_lock:
+            if _z3 is None:
+                import z3
+                _z3 = z3
+    return _z3
 
 # --- HELPER FUNCTIONS ---
 def format_duration(seconds):
@@ -72,67 +86,119 @@ def validate_solver_solution_with_hash(solution_grid, puzzle_data):
     print("--- Hash Validation ---")
     print(f"\033[92m✅ MATCHES\033[0m" if calculated_hash == expected_hash else "\033[91m❌ DOES NOT MATCH\033[0m")
 
+@lru_cache(maxsize=None)
+def board_template(dim):
+    """
+    Returns the region-independent cell structure of a board, built once per dimension.
+
+    Z3 expressions cannot be shared between solves because every solve uses its
+    own context, but the index lists they are built from can. A pre-fork master
+    can call this for every served dimension so workers inherit the result.
+
+    :param int dim: The dimension of the board.
+    :returns: A tuple of (rows, columns, neighbors) where rows and columns are tuples
+              of (r, c) cells and neighbors maps each (r, c) to its adjacent cells.
+    :rtype: tuple[tuple, tuple, dict]
+    """
+    rows = tuple(tuple((r, c) for c in range(dim)) for r in range(dim))
+    cols = tuple(tuple((r, c) for r in range(dim)) for c in range(dim))
+    neighbors = {}
+    for r in range(dim):
+        for c in range(dim):
+            neighbors[(r, c)] = tuple((r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                                      if (dr or dc) and 0 <= r + dr < dim and 0 <= c + dc < dim)
+    return rows, cols, neighbors
+
 # --- SOLVER CLASS ---
 class Z3StarBattleSolver:
     """A class to solve Star Battle puzzles using the Z3 SMT solver."""
-    def __init__(self, region_grid, stars_per_region):
+    def __init__(self, region_grid, stars_per_region, timeout_ms=SOLVER_TIMEOUT_MS):
         """
         Initializes the solver with the puzzle's constraints.
 
         :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
         :param int stars_per_region: The number of stars required per region/row/column.
+        :param int | None timeout_ms: The Z3 timeout for each check, or None for no limit.
         """
         self.region_grid, self.dim, self.stars_per_region = region_grid, len(region_grid), stars_per_region
+        self.timeout_ms = timeout_ms
 
     def solve(self):
         """
         Formulates the puzzle constraints and uses Z3 to find up to two solutions.
 
-        :returns: A tuple containing a list of solutions and an empty stats dictionary.
+        The solve duration is recorded in the solver metrics, labelled by the
+        puzzle dimension and star count. If Z3 gives up because the timeout was
+        reached, the solutions found so far are returned and the stats dictionary
+        reports 'timed_out' as True.
+
+        :returns: A tuple containing a list of solutions and a stats dictionary
+                  with 'duration' (seconds) and 'timed_out' (bool) keys.
                   Each solution is a 2D grid of 0s and 1s.
         :rtype: tuple[list, dict]
         """
         if not Z3_AVAILABLE: return [], {}
-        s = Solver()
-        grid_vars = [[Bool(f"c_{r}_{c}") for c in range(self.dim)] for r in range(self.dim)]
+        labels = {'dim': self.dim, 'stars': self.stars_per_region}
+        metrics.SOLVER_JOBS_IN_FLIGHT.inc()
+        try:
+            solutions, timed_out, duration = self._solve()
+        finally:
+            metrics.SOLVER_JOBS_IN_FLIGHT.dec()
+        metrics.SOLVER_DURATION.observe(duration, **labels)
+        if timed_out:
+            metrics.SOLVER_TIMEOUTS.inc(**labels)
+            logging.warning(f"Z3 solve timed out after {format_duration(duration)} ({self.dim}x{self.dim}, {self.stars_per_region} stars)")
+        else:
+            logging.info(f"Z3 solve time: {format_duration(duration)}")
+        return solutions, {'duration': duration, 'timed_out': timed_out}
+
+    def _solve(self):
+        """
+        Builds the Z3 model and searches for up to two solutions.
+
+        :returns: A tuple of (solutions, timed_out, duration_in_seconds).
+        :rtype: tuple[list, bool, float]
+        """
+        # Each solve gets its own Z3 context, since a context must not be shared
+        # by solves running concurrently on different request threads.
+        z3 = load_z3()
+        ctx = z3.Context()
+        s = z3.Solver(ctx=ctx)
+        if self.timeout_ms:
+            s.set("timeout", int(self.timeout_ms))
+        grid_vars = [[z3.Bool(f"c_{r}_{c}", ctx) for c in range(self.dim)] for r in range(self.dim)]
+
+        rows, cols, neighbors = board_template(self.dim)
 
         # Rule: N stars per row and column
-        for i in range(self.dim):
-            s.add(PbEq([(grid_vars[i][c], 1) for c in range(self.dim)], self.stars_per_region))
-            s.add(PbEq([(grid_vars[r][i], 1) for r in range(self.dim)], self.stars_per_region))
+        for line in rows + cols:
+            s.add(z3.PbEq([(grid_vars[r][c], 1) for r, c in line], self.stars_per_region))
 
         # Rule: N stars per region
         regions = defaultdict(list)
         for r in range(self.dim):
             for c in range(self.dim): regions[self.region_grid[r][c]].append(grid_vars[r][c])
         for r_vars in regions.values():
-            s.add(PbEq([(var, 1) for var in r_vars], self.stars_per_region))
+            s.add(z3.PbEq([(var, 1) for var in r_vars], self.stars_per_region))
 
         # Rule: Stars cannot be adjacent (including diagonally)
-        for r in range(self.dim):
-            for c in range(self.dim):
-                neighbors = []
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0: continue
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < self.dim and 0 <= nc < self.dim:
-                            neighbors.append(Not(grid_vars[nr][nc]))
-                if neighbors:
-                    s.add(Implies(grid_vars[r][c], And(neighbors)))
+        for (r, c), adjacent in neighbors.items():
+            if adjacent:
+                s.add(z3.Implies(grid_vars[r][c], z3.And([z3.Not(grid_vars[nr][nc]) for nr, nc in adjacent])))
 
         solutions, start_time = [], time.monotonic()
         # Find the first solution
-        if s.check() == sat:
+        result = s.check()
+        if result == z3.sat:
             model = s.model()
             solution = [[(1 if model.evaluate(grid_vars[r][c]) else 0) for c in range(self.dim)] for r in range(self.dim)]
             solutions.append(solution)
             
             # Block this solution and check for another to test for uniqueness
-            s.add(Or([Not(v) if solution[r][c] else v for r, row in enumerate(grid_vars) for c, v in enumerate(row)]))
-            if s.check() == sat:
+            s.add(z3.Or([z3.Not(v) if solution[r][c] else v for r, row in enumerate(grid_vars) for c, v in enumerate(row)]))
+            result = s.check()
+            if result == z3.sat:
                 model2 = s.model()
                 solutions.append([[(1 if model2.evaluate(grid_vars[r][c]) else 0) for c in range(self.dim)] for r in range(self.dim)])
 
-        print(f"Z3 solve time: {format_duration(time.monotonic() - start_time)}")
-        return solutions, {}
+        return solutions, result == z3.unknown, time.monotonic() - start_time
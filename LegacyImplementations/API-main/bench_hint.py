@@ -0,0 +1,84 @@
+# bench_hint.py
+# This script benchmarks the hint engine behind '/api/hint'. For each puzzle it
+# starts from an empty board and follows the hints to the end, the way a player
+# asking for a hint after every step would: the stars of each hint are placed,
+# its eliminated cells are marked, and the next hint is requested. The time of
+# every request is recorded, and the techniques used and the share of puzzles
+# that hints alone can finish are reported per size.
+#
+# Usage:
+#   python bench_hint.py                      # 5 puzzles of each size from 10x10 to 25x25
+#   python bench_hint.py --size-ids 11 --puzzles 1
+
+import argparse
+import random
+import time
+
+from backend.constants import PUZZLE_DEFINITIONS, STATE_EMPTY, STATE_STAR, STATE_SECONDARY_MARK
+from backend.logic_solver import board_masks, find_hint, _cached_solver
+from backend.puzzle_handler import _puzzle_file_path, _read_puzzle_file, get_grid_from_puzzle_task, decode_sbn
+
+def play_hints(region_grid, stars):
+    """
+    Solves a puzzle by following hints from an empty board.
+
+    :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+    :param int stars: The number of stars per region/row/column.
+    :returns: A tuple of (request durations in seconds, techniques used, final status).
+    :rtype: tuple[list[float], list[str], str]
+    """
+    dim = len(region_grid)
+    player_grid = [[STATE_EMPTY] * dim for _ in range(dim)]
+    durations, techniques = [], []
+    while True:
+        start = time.perf_counter()
+        hint = find_hint(region_grid, stars, player_grid)
+        durations.append(time.perf_counter() - start)
+        if hint['status'] != 'hint': return durations, techniques, hint['status']
+        techniques.append(hint['technique'])
+        for r, c in hint['stars']: player_grid[r][c] = STATE_STAR
+        for r, c in hint['eliminated']: player_grid[r][c] = STATE_SECONDARY_MARK
+
+def percentile(values, fraction):
+    """
+    Returns a percentile of a list of values.
+
+    :param list[float] values: The values.
+    :param float fraction: The percentile as a fraction between 0 and 1.
+    :returns: The value at that percentile.
+    :rtype: float
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the '/api/hint' engine.")
+    parser.add_argument('--size-ids', type=int, nargs='+', default=[5, 8, 9, 10, 11])
+    parser.add_argument('--puzzles', type=int, default=5, help="Puzzles per size.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':<12}{'hints':>7}{'mean ms':>9}{'p50 ms':>8}{'p99 ms':>8}{'max ms':>8}{'first ms':>10}{'finished':>10}")
+    for size_id in args.size_ids:
+        definition = PUZZLE_DEFINITIONS[size_id]
+        puzzles = _read_puzzle_file(_puzzle_file_path(size_id))
+        board_masks(definition['dim']) # Built once per size, before workers fork (see prefork.py)
+        durations, firsts, finished, counts = [], [], 0, {}
+        for sbn in rng.sample(puzzles, min(args.puzzles, len(puzzles))):
+            puzzle_data = decode_sbn(sbn)
+            region_grid, _ = get_grid_from_puzzle_task(puzzle_data)
+            _cached_solver.cache_clear() # Time each puzzle from a cold solver (the per-size masks stay warm)
+            times, techniques, status = play_hints(region_grid, puzzle_data['stars'])
+            durations += times
+            firsts.append(times[0])
+            finished += status == 'solved'
+            for technique in techniques: counts[technique] = counts.get(technique, 0) + 1
+        label = f"{definition['dim']}x{definition['dim']} ({definition['stars']}*)"
+        print(f"{label:<12}{len(durations):>7}{1000 * sum(durations) / len(durations):>9.2f}"
+              f"{1000 * percentile(durations, 0.5):>8.2f}{1000 * percentile(durations, 0.99):>8.2f}"
+              f"{1000 * max(durations):>8.2f}{1000 * max(firsts):>10.2f}{f'{finished}/{len(firsts)}':>10}")
+        print(f"  techniques: {', '.join(f'{name} {count}' for name, count in counts.items())}")
+
+if __name__ == '__main__':
+    main()
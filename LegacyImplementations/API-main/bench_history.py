@@ -0,0 +1,156 @@
+# bench_history.py
+# This script benchmarks the HistoryManager with long move histories on a 25x25
+# board, following the access pattern of the game clients: every move, undo and
+# redo is immediately followed by a request for the current grid.
+#
+# It also reports the memory held by a long change log, the cost of
+# serializing it, the size of the serialized history in both formats, and the
+# cost of switching between branches of an UndoTree.
+#
+# Usage:
+#   python bench_history.py              # 10,000-move history, 100,000-move memory test
+#   python bench_history.py --moves 50000 --memory-moves 200000
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from backend.constants import STATE_EMPTY, STATE_STAR, STATE_SECONDARY_MARK
+from backend.history_manager import HistoryManager
+from backend.undo_tree import UndoTree
+
+def random_moves(count, dim, seed=0):
+    """
+    Generates a realistic sequence of consistent moves (each 'from' matches the board).
+
+    Most moves are short drag strokes of secondary marks along a row or column,
+    mixed with single star placements and removals.
+
+    :param int count: The number of moves to generate.
+    :param int dim: The board dimension.
+    :param int seed: The random seed.
+    :returns: A list of {'r', 'c', 'from', 'to'} changes.
+    :rtype: list[dict]
+    """
+    rng = random.Random(seed)
+    grid = [[STATE_EMPTY] * dim for _ in range(dim)]
+    moves = []
+    while len(moves) < count:
+        r, c = rng.randrange(dim), rng.randrange(dim)
+        if rng.random() < 0.7:
+            dr, dc = rng.choice(((0, 1), (1, 0)))
+            cells = [(r + i * dr, c + i * dc) for i in range(rng.randint(2, 8)) if r + i * dr < dim and c + i * dc < dim]
+            to_state = STATE_SECONDARY_MARK if grid[r][c] != STATE_SECONDARY_MARK else STATE_EMPTY
+        else:
+            cells, to_state = [(r, c)], STATE_STAR if grid[r][c] != STATE_STAR else STATE_EMPTY
+        for r, c in cells:
+            if grid[r][c] != to_state and len(moves) < count:
+                moves.append({'r': r, 'c': c, 'from': grid[r][c], 'to': to_state})
+                grid[r][c] = to_state
+    return moves
+
+def timed(label, operations, func):
+    """
+    Runs a benchmark step and prints the mean time per operation.
+
+    :param str label: The name of the step.
+    :param int operations: The number of operations performed by 'func'.
+    :param callable func: The benchmark step.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{elapsed * 1000:>10.1f} ms total{elapsed / operations * 1e6:>10.1f} us/op")
+
+def main():
+    """Runs the history benchmark and prints the timings."""
+    parser = argparse.ArgumentParser(description="HistoryManager benchmark.")
+    parser.add_argument('--moves', type=int, default=10000, help='Number of moves in the history.')
+    parser.add_argument('--memory-moves', type=int, default=100000, help='Number of moves in the memory test.')
+    parser.add_argument('--dim', type=int, default=25, help='Board dimension.')
+    args = parser.parse_args()
+
+    moves = random_moves(args.moves, args.dim)
+    manager = HistoryManager([[STATE_EMPTY] * args.dim for _ in range(args.dim)])
+    rng = random.Random(1)
+    print(f"{args.moves} moves on a {args.dim}x{args.dim} board")
+
+    def record():
+        for move in moves:
+            manager.add_change(move)
+            manager.get_current_grid()
+
+    def undo_redo():
+        for _ in range(1000):
+            manager.undo()
+            manager.get_current_grid()
+        for _ in range(1000):
+            manager.redo()
+            manager.get_current_grid()
+
+    def seek():
+        for _ in range(1000):
+            manager.pointer = rng.randint(0, len(manager.changes))
+            manager.get_current_grid()
+
+    timed("add_change + get_current_grid", len(moves), record)
+    timed("undo/redo + get_current_grid", 2000, undo_redo)
+    timed("random pointer seek + get_current_grid", 1000, seek)
+
+    moves = random_moves(args.memory_moves, args.dim)
+    print(f"\n{args.memory_moves} moves: change log memory and serialization")
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    manager = HistoryManager([[STATE_EMPTY] * args.dim for _ in range(args.dim)])
+    for move in moves:
+        manager.add_change(dict(move))  # Each change arrives as its own object, as from JSON.
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{'history memory':<40}{held / 1024:>10.1f} KiB total{held / len(moves):>10.1f} B/move")
+    timed("serialize()", 1, manager.serialize)
+    manager.pointer = len(moves) // 2
+    timed("branch after undo (add_change)", 1, lambda: manager.add_change({'r': 0, 'c': 0, 'from': 0, 'to': 0}))
+
+    print("\nSerialized history size ('h:' v1 vs 'h2:' v2)")
+    for count in (500, 5000):
+        manager = HistoryManager([[STATE_EMPTY] * args.dim for _ in range(args.dim)])
+        for move in random_moves(count, args.dim, seed=count):
+            manager.add_change(move)
+        v1, v2 = len(manager.serialize(version=1)), len(manager.serialize())
+        print(f"{f'{count} moves':<40}{v1:>10} chars v1{v2:>10} chars v2  ({v2 / v1:.0%})")
+
+    print(f"\nUndo tree: {args.moves} moves, then 50-move branches every 100 moves of the last 1000")
+    tree = UndoTree([[STATE_EMPTY] * args.dim for _ in range(args.dim)], max_nodes=args.moves * 2)
+    moves = random_moves(args.moves, args.dim)
+    for move in moves:
+        tree.add_change(move)
+    leaves = []
+    for depth in range(max(1, args.moves - 1000), args.moves, 100):
+        tree.goto(depth)  # Node ids of the first branch equal their depth.
+        grid = tree.get_current_grid()
+        for r in range(2):
+            for c in range(25):
+                if r < args.dim and c < args.dim:
+                    to_state = STATE_STAR if grid[r][c] != STATE_STAR else STATE_EMPTY
+                    tree.add_change({'r': r, 'c': c, 'from': grid[r][c], 'to': to_state})
+                    grid[r][c] = to_state
+        leaves.append(tree.current)
+    replay = HistoryManager([[STATE_EMPTY] * args.dim for _ in range(args.dim)])
+    replay.changes = tree.changes
+
+    def switch_branches():
+        for _ in range(1000):
+            tree.goto(rng.choice(leaves))
+            tree.get_current_grid()
+
+    def replay_branches():
+        for _ in range(100):
+            replay.changes = [dict(change) for change in tree.changes]  # Full replay: no snapshots survive.
+            replay.get_current_grid()
+
+    timed("goto(random branch) + get_current_grid", 1000, switch_branches)
+    timed("linear replay of one branch", 100, replay_branches)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# check_import_time.py
+# This script guards the cold-start cost of the backend modules. It imports each
+# entry point in a fresh interpreter under `python -X importtime`, checks that
+# heavy libraries such as z3 are not pulled in before they are needed, and fails
+# if the cumulative import time exceeds its budget.
+#
+# Usage:
+#   python check_import_time.py            # exit code 1 if any budget is exceeded
+#   python check_import_time.py --verbose  # also list the slowest imports
+
+import argparse
+import re
+import subprocess
+import sys
+
+# Each entry point maps to (budget in milliseconds, modules that must not be imported).
+# The codec path is what CLI tools and the puzzle endpoints use; the app path must
+# start without loading Z3, which is only imported on the first solve.
+IMPORT_BUDGETS = {
+    'backend.puzzle_handler': (80, ('z3', 'flask')),
+    'backend.app': (400, ('z3',)),
+}
+
+# Number of fresh interpreters per entry point; the fastest run is reported, since
+# slower runs only measure disk cache and scheduler noise.
+RUNS = 3
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def measure(module):
+    """
+    Imports a module in a fresh interpreter and parses the '-X importtime' report.
+
+    :param str module: The dotted module name to import.
+    :returns: A dictionary mapping every imported module name to its cumulative time in microseconds.
+    :rtype: dict[str, int]
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+def main():
+    """Measures every entry point against its budget and exits non-zero on regression."""
+    parser = argparse.ArgumentParser(description="Import-time budget check for the Star Battle backend.")
+    parser.add_argument('--verbose', action='store_true', help='List the ten slowest imports of each entry point.')
+    args = parser.parse_args()
+
+    failed = False
+    for module, (budget_ms, forbidden) in IMPORT_BUDGETS.items():
+        runs = [measure(module) for _ in range(RUNS)]
+        best = min(runs, key=lambda times: times.get(module, 0))
+        total_ms = best.get(module, 0) / 1000
+        loaded = [name for name in forbidden if name in best]
+        ok = total_ms <= budget_ms and not loaded
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {module:<24} {total_ms:7.1f} ms (budget {budget_ms} ms)"
+              + (f", imports {', '.join(loaded)}" if loaded else ""))
+        if args.verbose:
+            for name, micros in sorted(best.items(), key=lambda item: -item[1])[1:11]:
+                print(f"       {name:<40} {micros / 1000:7.1f} ms")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
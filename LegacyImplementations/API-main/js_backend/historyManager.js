@@ -55,6 +55,9 @@ export class HistoryManager {
 
     static deserialize(initialState, historyString) {
         const manager = new HistoryManager(initialState);
+        if (historyString && historyString.startsWith('h2:')) {
+            return HistoryManager.deserializeV2(manager, historyString.substring(3)) || new HistoryManager(initialState);
+        }
         if (!historyString || !historyString.startsWith('h:')) {
             return manager;
         }
@@ -80,4 +83,42 @@ export class HistoryManager {
         }
         return manager;
     }
-}
\ No newline at end of file
+
+    /**
+     * Decodes the 'h2:' history format written by the Python backends: base64 varints
+     * (5 payload bits per character, bit 6 marks continuation) holding the pointer, then
+     * runs of changes sharing the same from/to states. Each run is a header
+     * '(length - 1) << 4 | from << 2 | to' followed by zigzag deltas of 'r << 5 | c'.
+     * Returns null if the data is malformed.
+     */
+    static deserializeV2(manager, data) {
+        const values = [];
+        let value = 0, shift = 0;
+        for (const ch of data) {
+            const digit = SBN_CHAR_TO_INT[ch];
+            if (digit === undefined) return null;
+            value |= (digit & 31) << shift;
+            if (digit & 32) {
+                shift += 5;
+            } else {
+                values.push(value);
+                value = 0;
+                shift = 0;
+            }
+        }
+        if (shift || values.length === 0) return null;
+        let cell = 0, i = 1;
+        while (i < values.length) {
+            const header = values[i++];
+            for (let n = (header >> 4) + 1; n > 0; n--) {
+                if (i >= values.length) return null;
+                const delta = values[i++];
+                cell += (delta & 1) ? -((delta + 1) >> 1) : (delta >> 1);
+                if (cell < 0 || cell >= 1024) return null;
+                manager.changes.push({ r: cell >> 5, c: cell & 31, from: (header >> 2) & 3, to: header & 3 });
+            }
+        }
+        manager.pointer = Math.min(values[0], manager.changes.length);
+        return manager;
+    }
+}
@@ -0,0 +1,124 @@
+# loadgen.py
+# This script generates open-loop load against a running backend to show how the
+# solver endpoints behave under overload. Requests are fired at a fixed arrival
+# rate regardless of how fast the server answers, which is what real traffic does.
+#
+# Example (start the server with `python run.py` first):
+#   python loadgen.py --rate 20 --duration 30 --size-id 11
+#
+# With admission control, excess '/api/solve' requests are answered quickly with
+# HTTP 429 while the latency of admitted requests stays bounded, and the cheap
+# '/api/new_puzzle' requests mixed into the load keep their normal latency.
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import puzzle_handler as pz
+
+def build_solve_bodies(size_id, count):
+    """
+    Decodes a few random puzzles of one size into '/api/solve' request bodies.
+
+    :param int size_id: The puzzle size to load from the local puzzle files.
+    :param int count: The number of distinct puzzles to prepare.
+    :returns: A list of JSON-encoded request bodies.
+    :rtype: list[bytes]
+    """
+    bodies = []
+    for _ in range(count):
+        puzzle_data = pz.get_puzzle_from_local_file(size_id)
+        region_grid, _ = pz.get_grid_from_puzzle_task(puzzle_data)
+        bodies.append(json.dumps({'regionGrid': region_grid, 'starsPerRegion': puzzle_data['stars']}).encode())
+    return bodies
+
+def send(url, body=None, timeout=120):
+    """
+    Sends a single request and measures its latency.
+
+    :param str url: The full URL to request.
+    :param bytes | None body: The JSON body for a POST request, or None for GET.
+    :param float timeout: The client-side timeout in seconds.
+    :returns: A tuple of (status_code, latency_in_seconds).
+    :rtype: tuple[int, float]
+    """
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0  # Connection error or client timeout.
+    return status, time.perf_counter() - start
+
+def percentile(values, fraction):
+    """
+    Returns the value at a given fraction of a sorted sample.
+
+    :param list[float] values: The sample.
+    :param float fraction: The percentile as a fraction, e.g. 0.95.
+    :returns: The percentile value, or 0.0 for an empty sample.
+    :rtype: float
+    """
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    """Parses arguments, runs the open-loop load, and prints a latency report."""
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the Star Battle backend.")
+    parser.add_argument('--url', default='http://127.0.0.1:5001', help='Base URL of the running backend.')
+    parser.add_argument('--rate', type=float, default=20.0, help='Solver requests started per second.')
+    parser.add_argument('--duration', type=float, default=30.0, help='How long to generate load, in seconds.')
+    parser.add_argument('--size-id', type=int, default=11, help='Puzzle size_id used for solver requests.')
+    parser.add_argument('--cheap-ratio', type=float, default=0.25, help='Fraction of extra /api/new_puzzle requests.')
+    parser.add_argument('--max-clients', type=int, default=512, help='Maximum concurrent client connections.')
+    args = parser.parse_args()
+
+    bodies = build_solve_bodies(args.size_id, 8)
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    def fire(route, body):
+        status, latency = send(args.url + route, body)
+        with lock:
+            results[route].append((status, latency))
+
+    print(f"Sending {args.rate:g} solve req/s (size_id {args.size_id}) for {args.duration:g} s to {args.url} ...")
+    start, sent = time.perf_counter(), 0
+    with ThreadPoolExecutor(max_workers=args.max_clients) as pool:
+        while (elapsed := time.perf_counter() - start) < args.duration:
+            # Open loop: schedule by wall clock, never wait for earlier responses.
+            due = int(elapsed * args.rate) + 1
+            while sent < due:
+                pool.submit(fire, '/api/solve', random.choice(bodies))
+                if random.random() < args.cheap_ratio:
+                    pool.submit(fire, f'/api/new_puzzle?size_id={args.size_id}', None)
+                sent += 1
+            time.sleep(min(0.01, 1.0 / args.rate))
+    wall = time.perf_counter() - start
+
+    print(f"\n{'route':<24}{'status':<10}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for route, samples in sorted(results.items()):
+        by_status = defaultdict(list)
+        for status, latency in samples:
+            by_status[status].append(latency * 1000)
+        for status, latencies in sorted(by_status.items()):
+            print(f"{route.split('?')[0]:<24}{status:<10}{len(latencies):>7}{statistics.median(latencies):>10.1f}"
+                  f"{percentile(latencies, 0.95):>10.1f}{percentile(latencies, 0.99):>10.1f}{max(latencies):>10.1f}")
+    solved = Counter(status for status, _ in results['/api/solve'])
+    print(f"\nSolver goodput: {solved[200] / wall:.2f} req/s, shed: {solved[429]} (HTTP 429), "
+          f"errors: {sum(n for s, n in solved.items() if s not in (200, 429))}")
+
+if __name__ == '__main__':
+    main()
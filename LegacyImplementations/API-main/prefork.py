@@ -0,0 +1,171 @@
+# prefork.py
+# This script launches the Flask application as a pre-fork server for production use.
+# The master process loads everything that is expensive and read-only once: the
+# puzzle corpus (optionally with every region grid pre-decoded), the Z3 library,
+# the per-dimension solver templates and the hint masks. It then freezes the
+# garbage collector, binds the listening socket and forks the worker processes,
+# which share all of that memory copy-on-write and accept connections from the
+# same socket.
+#
+# Example:
+#   python prefork.py --workers 4 --port 5001
+#
+# Send SIGUSR1 to the master to log the resident (RSS) and proportional (PSS)
+# memory of every worker; the PSS column shows how much of the preloaded state
+# is actually shared. SIGTERM or SIGINT stops the master and all workers.
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from werkzeug.serving import make_server
+
+from backend import app as app_module
+from backend import puzzle_handler as pz
+from backend import z3_solver
+from backend import logic_solver
+from backend.admission import AdmissionController
+from backend.constants import (
+    PUZZLE_DEFINITIONS, ADMISSION_SOLVER_SLOTS, ADMISSION_MAX_WAIT_SECONDS, ADMISSION_MAX_QUEUE_DEPTH
+)
+
+def warm(decode=True):
+    """
+    Loads the shared, read-only state in the master before any worker is forked.
+
+    :param bool decode: Whether to pre-decode every puzzle's region grid.
+    """
+    start = time.perf_counter()
+    count = pz.preload_puzzle_catalog(decode=decode)
+    logging.info(f"Preloaded {count} puzzles{' (decoded)' if decode else ''} in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    # Z3 is imported lazily by the solver module, so load it here for the workers to inherit.
+    z3_solver.load_z3()
+    for definition in PUZZLE_DEFINITIONS:
+        z3_solver.board_template(definition['dim'])
+        logic_solver.board_masks(definition['dim'])
+    # A tiny solve initializes the Z3 native library state shared by every worker.
+    puzzle_data = pz.get_puzzle_from_local_file(0)
+    if puzzle_data and z3_solver.Z3_AVAILABLE:
+        region_grid, _ = pz.get_grid_from_puzzle_task(puzzle_data)
+        z3_solver.Z3StarBattleSolver(region_grid, puzzle_data['stars']).solve()
+    logging.info(f"Warmed solver templates in {time.perf_counter() - start:.2f} s")
+
+def read_memory(pid):
+    """
+    Reads the resident and proportional set sizes of a process from /proc.
+
+    :param int pid: The process id.
+    :returns: A tuple of (rss_kib, pss_kib); either is None if unavailable.
+    :rtype: tuple[int | None, int | None]
+    """
+    values = {}
+    for path, key in ((f'/proc/{pid}/status', 'VmRSS:'), (f'/proc/{pid}/smaps_rollup', 'Pss:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(key):
+                        values[key] = int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return values.get('VmRSS:'), values.get('Pss:')
+
+def report_memory(workers):
+    """
+    Logs the memory usage of the master and every worker.
+
+    :param dict workers: Maps worker pids to their slot numbers.
+    """
+    for label, pid in [('master', os.getpid())] + [(f'worker {slot}', pid) for pid, slot in sorted(workers.items(), key=lambda x: x[1])]:
+        rss, pss = read_memory(pid)
+        logging.info(f"{label:<10} pid {pid:<7} RSS {rss or 0:>8} KiB  PSS {pss or 0:>8} KiB")
+
+def run_worker(sock, host, port, slots):
+    """
+    Serves requests in a forked worker until it is terminated. Never returns.
+
+    :param socket.socket sock: The listening socket inherited from the master.
+    :param str host: The host name, used for logging only.
+    :param int port: The port number, used for logging only.
+    :param int slots: The number of concurrent solves this worker admits.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    # Each worker gets its share of the solver slots so the total matches the machine.
+    app_module.solver_admission = AdmissionController(slots, ADMISSION_MAX_WAIT_SECONDS, ADMISSION_MAX_QUEUE_DEPTH)
+    server = make_server(host, port, app_module.app, threaded=True, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+def main():
+    """Parses arguments, warms the shared state, and supervises the worker processes."""
+    parser = argparse.ArgumentParser(description="Pre-fork server for the Star Battle backend.")
+    parser.add_argument('--host', default='0.0.0.0', help='Interface to listen on.')
+    parser.add_argument('--port', type=int, default=5001, help='Port to listen on.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes.')
+    parser.add_argument('--no-decode', action='store_true', help='Preload puzzle files without decoding region grids.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(process)d %(levelname)s %(message)s')
+
+    warm(decode=not args.no_decode)
+    sock = socket.create_server((args.host, args.port), backlog=128, reuse_port=False)
+    sock.set_inheritable(True)
+    slots = max(1, ADMISSION_SOLVER_SLOTS // args.workers)
+
+    # Everything allocated so far lives for the whole process; keeping it out of
+    # the collector's generations stops workers from dirtying those pages.
+    gc.collect()
+    gc.freeze()
+
+    workers, stopping = {}, False
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, args.host, args.port, slots)
+        workers[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: report_memory(workers))
+
+    for slot in range(args.workers):
+        spawn(slot)
+    logging.info(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    report_memory(workers)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = workers.pop(pid, None)
+        if slot is not None and not stopping:
+            logging.warning(f"Worker {slot} (pid {pid}) exited with status {status}; restarting")
+            spawn(slot)
+    sock.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# test_admission.py
+# Tests for the solver admission controller. Run from the API-main directory with
+#   python -m pytest -q tests
+
+import threading
+import time
+
+from backend import constants as const
+from backend.admission import DEFAULT_SOLVE_COST_SECONDS, AdmissionController, AdmissionRejected
+
+def test_seed_costs_never_decrease_with_size():
+    costs = [cost for _, cost in sorted(DEFAULT_SOLVE_COST_SECONDS.items())]
+    assert costs == sorted(costs)
+
+def test_seed_costs_fit_in_the_wait_budget():
+    assert max(DEFAULT_SOLVE_COST_SECONDS.values()) < const.ADMISSION_MAX_WAIT_SECONDS
+
+def test_small_solve_is_admitted_behind_one_large_solve():
+    # One slot, as on a single core or in each prefork worker.
+    controller = AdmissionController(1, const.ADMISSION_MAX_WAIT_SECONDS, const.ADMISSION_MAX_QUEUE_DEPTH)
+    running = controller.admit(21, 5)
+    running.__enter__()
+    result = {}
+
+    def small_solve():
+        try:
+            with controller.admit(8, 1):
+                result['admitted'] = True
+        except AdmissionRejected as e:
+            result['rejected'] = e
+
+    thread = threading.Thread(target=small_solve)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while thread.is_alive() and controller._depth < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    running.__exit__(None, None, None)
+    thread.join(5)
+    assert 'rejected' not in result
+    assert result.get('admitted')
@@ -0,0 +1,48 @@
+# test_undo_tree.py
+# Tests for the branching undo tree. Run from the API-main directory with
+#   python -m pytest -q tests
+
+from backend.undo_tree import UndoTree
+
+DIM = 8
+
+def _change(i, branch=0):
+    """Returns a valid, distinct change for move 'i' of a branch."""
+    return {'r': i % DIM, 'c': (i // DIM) % DIM, 'from': branch % 3, 'to': (branch + 1) % 3}
+
+def _empty_grid():
+    return [[0] * DIM for _ in range(DIM)]
+
+def _replay(tree):
+    """Rebuilds the grid at the current node from the initial state and the linear view."""
+    grid = [row[:] for row in tree.initial_state]
+    for change in tree.changes[:tree.pointer]:
+        grid[change['r']][change['c']] = change['to']
+    return grid
+
+def test_deserialize_prunes_an_oversized_tree():
+    # A tree built under a large cap, e.g. a crafted string or an older server setting.
+    large = UndoTree(_empty_grid(), max_nodes=5000)
+    for i in range(3000):
+        large.add_change(_change(i))
+    for _ in range(1500):
+        large.undo()
+    for i in range(1000):
+        large.add_change(_change(i, branch=1))
+    assert large.node_count > 1000
+    history = large.serialize()
+
+    tree = UndoTree.deserialize(_empty_grid(), history, max_nodes=1000)
+    assert tree.node_count <= 1000
+    assert tree.get_current_grid() == large.get_current_grid()
+    assert _replay(tree) == tree.get_current_grid()
+
+def test_deserialize_keeps_a_tree_within_the_cap():
+    tree = UndoTree(_empty_grid(), max_nodes=100)
+    for i in range(40):
+        tree.add_change(_change(i))
+    for _ in range(10):
+        tree.undo()
+    restored = UndoTree.deserialize(_empty_grid(), tree.serialize(), max_nodes=100)
+    assert restored.serialize() == tree.serialize()
+    assert restored.get_current_grid() == tree.get_current_grid()
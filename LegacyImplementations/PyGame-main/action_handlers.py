@@ -5,7 +5,7 @@
 * Metadata:
 * @author Joseph Bryant
 * @refactored by Isaiah Tadrous
-* @version 1.5.3
+* @version 1.6.0
 * -------------------------------------------------------------------------------
 * Description:
 * This module serves as the central hub for event and action handling in the
@@ -22,11 +22,11 @@
 # Description: Contains all functions that handle UI events and actions.
 
 import pygame
-import time
 import constants as const
 import puzzle_handler as pz
 import ui_manager as ui
-from z3_solver import Z3StarBattleSolver, format_duration, Z3_AVAILABLE
+from z3_solver import format_duration, Z3_AVAILABLE
+from logic_solver import find_hint
 
 # --- BUTTON ACTION HANDLERS ---
 def handle_new_puzzle(game_state):
@@ -61,7 +61,7 @@ def handle_save(game_state):
     """
     comment = ui.get_comment_from_console()
     # FIXED: Call the restored save function from puzzle_handler
-    pz.save_puzzle_entry(game_state.puzzle_data, game_state.player_grid, game_state.history, comment)
+    pz.save_puzzle_entry(game_state.puzzle_data, game_state.player_grid, game_state.history, comment, game_state.strokes)
     game_state.screen = pygame.display.set_mode((const.WINDOW_WIDTH, const.WINDOW_HEIGHT))
 
 def handle_import(game_state):
@@ -88,7 +88,7 @@ def handle_export(game_state):
     Prints export strings for the current puzzle state to the console.
 
     Generates both SBN and Web Task format strings for the current puzzle,
-    including player annotations and history, and prints them to the
+    including player annotations, history and drawings, and prints them to the
     standard output for the user to copy.
 
     :param GameState game_state: The current state of the game.
@@ -98,17 +98,17 @@ def handle_export(game_state):
         sbn_export = pz.encode_to_sbn(game_state.region_grid, game_state.stars_per_region, game_state.player_grid)
         raw_annotation_data = pz.encode_player_annotations(game_state.player_grid)
         web_task_export = f"{game_state.puzzle_data.get('task', '')}{raw_annotation_data}"
-        history_str = game_state.history.serialize()
-        if history_str:
-            sbn_export += f"~{history_str}"
-            web_task_export += f"~{history_str}"
+        for extra_str in (game_state.history.serialize(), game_state.strokes.serialize()):
+            if extra_str:
+                sbn_export += f"~{extra_str}"
+                web_task_export += f"~{extra_str}"
         print(f"\n--- EXPORTED STRINGS ---\nSBN: {sbn_export}\nWeb Task: {web_task_export}\n----------------------")
 
 def handle_clear(game_state):
     """
     Clears either drawings, borders, or player marks depending on the current mode.
 
-    If in draw mode, it clears the drawing surface. If in border mode, it
+    If in draw mode, it clears the drawings (undoably). If in border mode, it
     removes all custom borders. Otherwise, it resets the player's grid and
     the action history.
 
@@ -116,9 +116,9 @@ def handle_clear(game_state):
     :returns None:
     """
     if game_state.is_draw_mode:
-        game_state.draw_surface.fill((0, 0, 0, 0))
+        game_state.strokes.clear()
     elif game_state.is_border_mode:
-        game_state.custom_borders = []
+        game_state.custom_borders.clear()
     else:
         initial_grid = [[const.STATE_EMPTY] * game_state.grid_dim for _ in range(game_state.grid_dim)]
         game_state.history.reset(initial_grid)
@@ -157,32 +157,36 @@ def handle_toggle_border_mode(game_state):
 
 def handle_undo(game_state):
     """
-    Undoes the last action in the history manager.
+    Undoes the last action in the history manager, or the last stroke in draw mode.
 
     :param GameState game_state: The current state of the game.
     :returns None:
     """
-    if game_state.history.can_undo():
+    if game_state.is_draw_mode:
+        game_state.strokes.undo()
+    elif game_state.history.can_undo():
         game_state.history.undo()
         game_state.update_player_grid_from_history()
 
 def handle_redo(game_state):
     """
-    Redoes the last undone action in the history manager.
+    Redoes the last undone action in the history manager, or the last undone stroke in draw mode.
 
     :param GameState game_state: The current state of the game.
     :returns None:
     """
-    if game_state.history.can_redo():
+    if game_state.is_draw_mode:
+        game_state.strokes.redo()
+    elif game_state.history.can_redo():
         game_state.history.redo()
         game_state.update_player_grid_from_history()
 
 def handle_check_solution(game_state):
     """
-    Uses the Z3 solver to check if the user's solution is correct.
+    Starts a background Z3 solve to check if the user's solution is correct.
 
-    It compares the player's current grid of stars against the set of all
-    valid solutions found by the solver and provides visual feedback.
+    The player's grid is captured now; the result is compared against it in
+    handle_solver_result once the solve finishes.
 
     :param GameState game_state: The current state of the game.
     :returns None:
@@ -190,29 +194,16 @@ def handle_check_solution(game_state):
     if not Z3_AVAILABLE:
         game_state.solution_status = "Z3 Solver not available"
         return
-    solver = Z3StarBattleSolver(game_state.region_grid, game_state.stars_per_region)
-    start_time = time.monotonic()
-    solutions, _ = solver.solve()
-    duration = time.monotonic() - start_time
-    print(f"Z3 solve time: {format_duration(duration)}")
-    player_solution_grid = [[1 if cell == const.STATE_STAR else 0 for cell in row] for row in game_state.player_grid]
-    is_correct = False
-    if not solutions:
-        game_state.solution_status = "Incorrect! (No solution exists)"
-    elif player_solution_grid in solutions:
-        is_correct = True
-        game_state.solution_status = "Correct!" + (" (Multiple solutions exist)" if len(solutions) > 1 else "")
-    else:
-        game_state.solution_status = "Incorrect!"
-    game_state.feedback_overlay_color = const.COLOR_CORRECT if is_correct else const.COLOR_INCORRECT
-    game_state.feedback_overlay_alpha = 128
+    game_state.reset_feedback()
+    player_grid = [list(row) for row in game_state.player_grid]
+    game_state.solver_worker.start('check', game_state.region_grid, game_state.stars_per_region, player_grid)
 
 def handle_find_solution(game_state):
     """
-    Uses the Z3 solver to find a valid solution.
+    Starts a background Z3 solve to find a valid solution.
 
-    If a solution is found, it is printed to the terminal in a grid format.
-    It does not alter the player's current grid.
+    The solution is printed to the terminal by handle_solver_result once the
+    solve finishes. It does not alter the player's current grid.
 
     :param GameState game_state: The current state of the game.
     :returns None:
@@ -220,16 +211,68 @@ def handle_find_solution(game_state):
     if not Z3_AVAILABLE:
         game_state.solution_status = "Z3 Solver not available"
         return
-    solver = Z3StarBattleSolver(game_state.region_grid, game_state.stars_per_region)
-    start_time = time.monotonic()
-    solutions, _ = solver.solve()
-    duration = time.monotonic() - start_time
-    print(f"Z3 solve time: {format_duration(duration)}")
-    if not solutions:
+    game_state.reset_feedback()
+    game_state.solver_worker.start('find', game_state.region_grid, game_state.stars_per_region)
+
+def handle_hint(game_state):
+    """
+    Shows the next deduction on the player's grid.
+
+    The cells forced by the simplest applicable technique are outlined on the
+    board until the grid next changes. The technique is shown in the status
+    line and explained in the terminal. This runs on the main thread, since a
+    hint takes only milliseconds.
+
+    :param GameState game_state: The current state of the game.
+    :returns None:
+    """
+    game_state.reset_feedback()
+    hint = find_hint(game_state.region_grid, game_state.stars_per_region, game_state.player_grid)
+    if hint['status'] == 'hint':
+        game_state.hint_cells = {(r, c): True for r, c in hint['stars']}
+        game_state.hint_cells.update({(r, c): False for r, c in hint['eliminated']})
+        game_state.solution_status = f"Hint: {const.HINT_LABELS[hint['technique']]}"
+        print(f"HINT ({hint['technique']}): {hint['explanation']}")
+    elif hint['status'] == 'solved':
+        game_state.solution_status = "Hint: Every star is placed"
+    elif hint['status'] == 'contradiction':
+        game_state.solution_status = "Hint: A star or mark is wrong"
+    else:
+        game_state.solution_status = "Hint: No simple step left"
+    game_state.invalidate()
+
+def handle_solver_result(game_state, event):
+    """
+    Applies the result of a background solve delivered as a SOLVER_DONE_EVENT.
+
+    For a check, it compares the player's grid (as it was when the check was
+    requested) against the solutions and provides visual feedback. For a find,
+    it prints the first solution to the terminal. Results of cancelled or
+    superseded solves are ignored.
+
+    :param GameState game_state: The current state of the game.
+    :param pygame.event.Event event: The solver result event.
+    :returns None:
+    """
+    if not game_state.solver_worker.is_current(event): return
+    print(f"Z3 solve time: {format_duration(event.duration)}")
+    solutions = event.solutions
+    if event.kind == 'check':
+        player_solution_grid = [[1 if cell == const.STATE_STAR else 0 for cell in row] for row in event.player_grid]
+        is_correct = False
+        if not solutions:
+            game_state.solution_status = "Incorrect! (No solution exists)"
+        elif player_solution_grid in solutions:
+            is_correct = True
+            game_state.solution_status = "Correct!" + (" (Multiple solutions exist)" if len(solutions) > 1 else "")
+        else:
+            game_state.solution_status = "Incorrect!"
+        game_state.feedback_overlay_color = const.COLOR_CORRECT if is_correct else const.COLOR_INCORRECT
+        game_state.feedback_overlay_alpha = 128
+    elif not solutions:
         print("RESULT: No solution found.")
     else:
         print(f"RESULT: Found {len(solutions)} solution(s).")
-        # FIXED: Call the display function from ui_manager
         ui.display_terminal_grid(game_state.region_grid, "Solution 1", solutions[0])
 
 # --- Other UI Handlers ---
@@ -0,0 +1,88 @@
+# bench_loop.py
+# This script measures the CPU usage of the real main loop (main.main) without
+# opening a window. A helper thread posts synthetic input events while the loop
+# runs, and the process CPU time is compared with the wall-clock time of each
+# phase:
+#   idle  - no input at all
+#   hover - the mouse moves over the control panel
+#   drag  - the left button is held and dragged across the board, marking cells
+#
+# Usage (from the PyGame-main directory):
+#   python benchmarks/bench_loop.py                 # 5 seconds per phase
+#   python benchmarks/bench_loop.py --seconds 10
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import constants as const
+import main as app
+
+# Interval between synthetic mouse events, close to a real mouse polled at 125 Hz.
+EVENT_INTERVAL = 0.008
+
+def post(event_type, **attributes):
+    """
+    Posts a synthetic event to the Pygame queue (safe to call from any thread).
+
+    :param int event_type: The Pygame event type.
+    :param attributes: The event attributes, e.g. pos and button.
+    """
+    pygame.event.post(pygame.event.Event(event_type, **attributes))
+
+def drive(seconds, results):
+    """
+    Runs the benchmark phases from a helper thread and stops the main loop.
+
+    :param float seconds: The duration of each phase.
+    :param dict results: Receives the CPU share of every phase.
+    """
+    time.sleep(1.0)  # Let the loop load the puzzle and draw its first frame.
+
+    def phase(name, step):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        i = 0
+        while time.perf_counter() - wall_start < seconds:
+            step(i)
+            i += 1
+            time.sleep(EVENT_INTERVAL)
+        results[name] = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+    phase('idle', lambda i: None)
+    panel_x = const.GRID_AREA_WIDTH + const.PANEL_WIDTH // 2
+    phase('hover', lambda i: post(pygame.MOUSEMOTION, pos=(panel_x, i * 3 % const.WINDOW_HEIGHT), rel=(0, 3), buttons=(0, 0, 0)))
+
+    def drag(i):
+        # Sweep rows back and forth, 4 px per event, pressing the button at the start.
+        width = const.GRID_AREA_WIDTH - 1
+        x, row = i * 4 % (2 * width), i * 4 // (2 * width)
+        pos = (x if x < width else 2 * width - x, (row * 37 + 10) % const.GRID_AREA_HEIGHT)
+        if i == 0: post(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+        post(pygame.MOUSEMOTION, pos=pos, rel=(4, 0), buttons=(1, 0, 0))
+    phase('drag', drag)
+    post(pygame.QUIT)
+
+def main():
+    """Runs the main loop under synthetic input and prints the CPU share per phase."""
+    parser = argparse.ArgumentParser(description="Headless CPU usage benchmark of the PyGame main loop.")
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each phase.')
+    args = parser.parse_args()
+
+    results = {}
+    threading.Thread(target=drive, args=(args.seconds, results), daemon=True).start()
+    try:
+        app.main()
+    except SystemExit:
+        pass
+    for name, share in results.items():
+        print(f"{name:<10}{share:>8.1%} CPU")
+
+if __name__ == '__main__':
+    main()
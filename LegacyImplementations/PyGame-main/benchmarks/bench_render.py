@@ -0,0 +1,80 @@
+# bench_render.py
+# This script measures the frame time of the PyGame renderer without opening a
+# window. It loads a puzzle of each benchmarked size, marks part of the board
+# and times repeated calls to ui_manager.draw_game with the whole window
+# invalidated, i.e. the cost of a full redraw.
+#
+# Usage (from the PyGame-main directory):
+#   python benchmarks/bench_render.py                    # 10x10 and 25x25, half and fully marked
+#   python benchmarks/bench_render.py --frames 2000 --marked 1.0
+
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import constants as const
+import puzzle_handler as pz
+import ui_manager as ui
+from game_state import GameState
+
+# Size ids from PUZZLE_DEFINITIONS: 10x10 medium and 25x25 hard.
+BENCH_SIZE_IDS = (5, 11)
+
+def mark_board(game_state, fraction, seed=0):
+    """
+    Fills a fraction of the cells with stars and secondary marks.
+
+    :param GameState game_state: The loaded game state.
+    :param float fraction: The share of cells to mark, between 0 and 1.
+    :param int seed: The random seed.
+    """
+    rng = random.Random(seed)
+    for r in range(game_state.grid_dim):
+        for c in range(game_state.grid_dim):
+            if rng.random() < fraction:
+                to_state = const.STATE_STAR if rng.random() < 0.2 else const.STATE_SECONDARY_MARK
+                game_state.add_player_grid_change(r, c, game_state.player_grid[r][c], to_state)
+
+def bench_frames(game_state, frames):
+    """
+    Draws a number of full frames and returns the mean frame time.
+
+    :param GameState game_state: The game state to draw.
+    :param int frames: The number of frames to draw.
+    :returns: The mean frame time in milliseconds.
+    :rtype: float
+    """
+    ui.draw_game(game_state)  # Warm-up frame.
+    start = time.perf_counter()
+    for _ in range(frames):
+        game_state.invalidate()
+        ui.draw_game(game_state)
+    return (time.perf_counter() - start) / frames * 1000
+
+def main():
+    """Runs the frame-time benchmark for every benchmarked board size."""
+    parser = argparse.ArgumentParser(description="Headless PyGame frame-time benchmark.")
+    parser.add_argument('--frames', type=int, default=600, help='Frames drawn per board size.')
+    parser.add_argument('--marked', type=float, nargs='+', default=[0.5, 1.0], help='Shares of cells holding a star or mark.')
+    args = parser.parse_args()
+
+    pygame.init()
+    fonts = {'default': pygame.font.Font(None, 32), 'small': pygame.font.Font(None, 24), 'tiny': pygame.font.Font(None, 18)}
+    for size_id in BENCH_SIZE_IDS:
+        for marked in args.marked:
+            game_state = GameState(pz.get_puzzle_from_local_file(size_id), fonts)
+            mark_board(game_state, marked)
+            frame_ms = bench_frames(game_state, args.frames)
+            dim = game_state.grid_dim
+            print(f"{f'{dim}x{dim}, {marked:.0%} marked':<28}{frame_ms:>8.3f} ms/frame{1000 / frame_ms:>10.0f} fps max")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# bench_strokes.py
+# This script compares the vector StrokeLayer used in draw mode with the
+# full-window RGBA surface it replaced. It scribbles random brush and eraser
+# strokes, draws them both ways, compares the composited frames, and reports
+# the memory held by each representation (resident memory, since the
+# RLE-encoded layer frees its pixel buffer), the cost of blitting the drawing
+# layer every frame, the cost of rebuilding the layer on undo and the size of
+# the serialized strokes.
+#
+# Usage (from the PyGame-main directory):
+#   python benchmarks/bench_strokes.py                  # 10, 100 and 500 strokes
+#   python benchmarks/bench_strokes.py --strokes 1000 --frames 2000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import constants as const
+import puzzle_handler as pz
+import ui_manager as ui
+from stroke_layer import StrokeLayer
+
+SIZE = (const.GRID_AREA_WIDTH, const.GRID_AREA_HEIGHT)
+
+def random_strokes(count, seed=0):
+    """
+    Generates brush strokes as they arrive from mouse motion events.
+
+    :param int count: The number of strokes.
+    :param int seed: The random seed.
+    :returns: A list of (color_index, radius, erase, points) strokes.
+    :rtype: list[tuple]
+    """
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(count):
+        x, y = rng.randrange(SIZE[0]), rng.randrange(SIZE[1])
+        points = [(x, y)]
+        for _ in range(rng.randint(5, 60)):
+            x = min(max(x + rng.randint(-12, 12), 0), SIZE[0] - 1)
+            y = min(max(y + rng.randint(-12, 12), 0), SIZE[1] - 1)
+            points.append((x, y))
+        erase = rng.random() < 0.1
+        strokes.append((rng.randrange(len(const.DRAWING_COLORS)), 3 * 6 if erase else 3, erase, points))
+    return strokes
+
+def draw_rgba(strokes):
+    """
+    Draws strokes onto a full-window RGBA surface, as draw mode did before StrokeLayer.
+
+    :param list[tuple] strokes: The strokes from random_strokes.
+    :returns: The drawing surface.
+    :rtype: pygame.Surface
+    """
+    surface = pygame.Surface(SIZE, pygame.SRCALPHA)
+    for color_index, radius, erase, points in strokes:
+        color = (0, 0, 0, 0) if erase else const.DRAWING_COLORS[color_index]
+        for previous, point in zip(points, points[1:]):
+            pygame.draw.line(surface, color, previous, point, radius * 2 + 1)
+            pygame.draw.circle(surface, color, point, radius)
+    return surface
+
+def draw_vector(strokes):
+    """
+    Records strokes in a StrokeLayer through the draw-mode event API.
+
+    :param list[tuple] strokes: The strokes from random_strokes.
+    :returns: The stroke layer.
+    :rtype: StrokeLayer
+    """
+    layer = StrokeLayer(SIZE)
+    for color_index, radius, erase, points in strokes:
+        layer.begin_stroke(points[0], color_index, radius, erase)
+        for point in points[1:]:
+            layer.extend_stroke(point)
+        layer.end_stroke()
+    return layer
+
+def blit_time(screen, background, surface, frames):
+    """
+    Times compositing a drawing layer over the board, once per frame.
+
+    :param pygame.Surface screen: The display surface.
+    :param pygame.Surface background: The board background.
+    :param pygame.Surface surface: The drawing layer.
+    :param int frames: The number of frames to time.
+    :returns: The mean time per frame in milliseconds.
+    :rtype: float
+    """
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.blit(background, (0, 0))
+        ui.draw_user_surface(screen, surface)
+    return (time.perf_counter() - start) / frames * 1000
+
+def resident_bytes():
+    """
+    Returns the resident memory of this process (Linux only).
+
+    :returns: The resident set size in bytes, or 0 if it cannot be read.
+    :rtype: int
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+def built_in_memory(screen, build, copies=20):
+    """
+    Builds several drawing layers and returns the mean memory each one holds.
+
+    :param pygame.Surface screen: The display surface (each layer is blitted once).
+    :param callable build: Returns a (surface to blit, object to keep alive) pair.
+    :param int copies: The number of layers to build.
+    :returns: The mean resident memory per layer in bytes.
+    :rtype: float
+    """
+    kept, before = [], resident_bytes()
+    for _ in range(copies):
+        surface, owner = build()
+        screen.blit(surface, (0, 0))  # RLE encoding happens on the first blit.
+        kept.append(owner)
+    return (resident_bytes() - before) / copies
+
+def main():
+    """Runs the stroke benchmark and prints the results."""
+    parser = argparse.ArgumentParser(description="Draw-mode stroke storage benchmark.")
+    parser.add_argument('--strokes', type=int, nargs='+', default=[10, 100, 500], help='Numbers of strokes to draw.')
+    parser.add_argument('--frames', type=int, default=1000, help='Frames to time per measurement.')
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((const.WINDOW_WIDTH, const.WINDOW_HEIGHT))
+    region_grid, _ = pz.parse_and_validate_grid(pz.get_puzzle_from_local_file(11)['task'])
+    background, _ = ui.render_static_board(region_grid, const.GRID_AREA_WIDTH / len(region_grid))
+
+    print(f"{'':<14}{'RGBA memory':>14}{'vector memory':>16}{'RGBA blit':>12}{'vector blit':>13}{'undo rebuild':>14}{'serialized':>12}")
+    for count in args.strokes:
+        strokes = random_strokes(count)
+        rgba, layer = draw_rgba(strokes), draw_vector(strokes)
+
+        screen.blit(background, (0, 0)); ui.draw_user_surface(screen, rgba)
+        expected = pygame.image.tobytes(screen.subsurface((0, 0) + SIZE), 'RGB')
+        screen.blit(background, (0, 0)); ui.draw_user_surface(screen, layer.display_surface())
+        actual = pygame.image.tobytes(screen.subsurface((0, 0) + SIZE), 'RGB')
+        max_diff = max(abs(a - b) for a, b in zip(expected, actual))
+        rgba_bytes = built_in_memory(screen, lambda: (draw_rgba(strokes),) * 2)
+        vector_bytes = built_in_memory(screen, lambda: (lambda layer: (layer.display_surface(), layer))(draw_vector(strokes)))
+
+        rgba_ms = blit_time(screen, background, rgba, args.frames)
+        vector_ms = blit_time(screen, background, layer.display_surface(), args.frames)
+        start = time.perf_counter()
+        layer.undo()
+        screen.blit(layer.display_surface(), (0, 0))
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        print(f"{f'{count} strokes':<14}{rgba_bytes / 1024:>11.0f} KiB{vector_bytes / 1024:>13.0f} KiB"
+              f"{rgba_ms:>9.3f} ms{vector_ms:>10.3f} ms{rebuild_ms:>11.2f} ms{len(layer.serialize()):>12}"
+              f"  max pixel diff {max_diff}")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
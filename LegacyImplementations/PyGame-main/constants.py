@@ -5,7 +5,7 @@
 * Metadata:
 * @author Joseph Bryant
 * @refactored by Isaiah Tadrous
-* @version 1.3.0
+* @version 1.4.0
 * -------------------------------------------------------------------------------
 * Description:
 * This module contains all the static constants for the Star Battle
@@ -28,6 +28,8 @@ GUTTER = 5
 BORDER_NORMAL = 1
 BORDER_THICK = 4
 BORDER_CUSTOM_THICKNESS = 8
+IDLE_WAIT_MS = 500 # Longest time the main loop sleeps waiting for input when nothing needs redrawing
+SOLVER_PROGRESS_INTERVAL_MS = 100 # How often the solver progress indicator is refreshed while a solve runs
 
 # --- COLORS ---
 COLOR_WHITE = (255, 255, 255)
@@ -43,10 +45,13 @@ COLOR_BUTTON_TEXT = (220, 220, 220)
 COLOR_CORRECT = (0, 200, 0)
 COLOR_INCORRECT = (200, 0, 0)
 COLOR_SELECTED = (100, 180, 255)
+COLOR_HINT_STAR = (0, 200, 0) # Outline of the cells a hint says hold stars
+COLOR_HINT_ELIMINATE = (100, 180, 255) # Outline of the cells a hint says are empty
 COLOR_STAR_NUM = (200, 0, 0)
 COLOR_DISABLED_BUTTON = (60, 60, 70)
 COLOR_DISABLED_TEXT = (100, 100, 110)
 COLOR_CUSTOM_BORDER = (255, 204, 0) # A bold, rich gold/yellow
+COLOR_STATIC_KEY = (255, 0, 255) # Transparent colour key of the pre-rendered grid line layer
 
 # --- DRAWING MODE COLORS (WITH ALPHA) ---
 COLOR_DRAW_RED = (255, 0, 0, 160)
@@ -77,6 +82,15 @@ STATE_EMPTY = 0
 STATE_STAR = 1
 STATE_SECONDARY_MARK = 2
 
+# --- HINT CONSTANTS ---
+HINT_SOLVER_CACHE_SIZE = 4 # Puzzles whose hint solver is kept between hints
+HINT_FIT_MEMO_LIMIT = 100000 # Search results a hint solver keeps before they are discarded
+# Short technique names shown in the status line; the full explanation is printed to the terminal.
+HINT_LABELS = {
+    'singles': 'Last cells', 'no_touch': 'No touching', 'confinement': 'Confinement',
+    'pigeonhole': 'Pigeonhole', 'bands': 'Row/column bands', 'blocks': '2x2 blocks',
+}
+
 # --- UNIVERSAL SBN CONVERSION CONSTANTS ---
 SBN_B64_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
 SBN_CHAR_TO_INT = {c: i for i, c in enumerate(SBN_B64_ALPHABET)}
@@ -0,0 +1,165 @@
+"""
+**********************************************************************************
+* Title: custom_borders.py
+*
+* Metadata:
+* @author Isaiah Tadrous
+* @version 1.0.0
+* -------------------------------------------------------------------------------
+* Description:
+* This module defines the CustomBorders class, which stores the freeform
+* border shapes that users draw in border mode. Each shape is a set of
+* (row, col) cells with a numeric id. Alongside the shapes, the class keeps a
+* cell -> shape id index, so finding or erasing the shapes under the cursor
+* takes constant time instead of scanning every shape, and it caches the
+* outline rectangles of each shape for the current cell size. The finished
+* shapes are rasterised onto a copy of the board background that is only
+* rebuilt when a shape is added or removed, so a frame costs a single blit no
+* matter how many borders have been drawn.
+*
+**********************************************************************************
+"""
+# custom_borders.py
+# Description: Indexed storage and cached outline geometry for user-drawn border shapes.
+
+# --- IMPORTS ---
+import pygame
+from constants import BORDER_CUSTOM_THICKNESS, COLOR_CUSTOM_BORDER
+
+# --- HELPER FUNCTIONS ---
+def outline_rects(shape, cell_size, thickness=BORDER_CUSTOM_THICKNESS):
+    """
+    Computes the rectangles that outline a shape along its boundary edges.
+
+    A cell edge is part of the outline if the neighbouring cell across it is
+    not in the same shape.
+
+    :param set[tuple[int, int]] shape: The (row, col) cells of the shape.
+    :param float cell_size: The size of each cell in pixels.
+    :param int thickness: The thickness of the outline in pixels.
+    :returns list[tuple[float, float, float, float]]: The (x, y, width, height) rectangles.
+    """
+    rects = []
+    for r, c in shape:
+        x, y = c * cell_size, r * cell_size
+        if (r - 1, c) not in shape: rects.append((x, y, cell_size, thickness))
+        if (r + 1, c) not in shape: rects.append((x, y + cell_size - thickness, cell_size, thickness))
+        if (r, c - 1) not in shape: rects.append((x, y, thickness, cell_size))
+        if (r, c + 1) not in shape: rects.append((x + cell_size - thickness, y, thickness, cell_size))
+    return rects
+
+# --- CUSTOM BORDERS CLASS DEFINITION ---
+class CustomBorders:
+    """
+    An indexed collection of user-drawn border shapes.
+
+    Iterating over the collection yields the shapes (sets of cells) in the
+    order they were drawn.
+    """
+    def __init__(self):
+        """
+        Initializes an empty collection.
+        """
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every shape.
+
+        :returns None:
+        """
+        self._shapes = {} # shape id -> set of (r, c) cells, in drawing order
+        self._index = {} # (r, c) -> set of ids of the shapes containing that cell
+        self._outlines = {} # shape id -> (cell_size, outline rects)
+        self._next_id = 0
+        self._layer, self._layer_key = None, None # Background with every shape drawn on it
+
+    def __iter__(self):
+        return iter(self._shapes.values())
+
+    def __len__(self):
+        return len(self._shapes)
+
+    def add(self, shape):
+        """
+        Adds a finished shape to the collection.
+
+        :param set[tuple[int, int]] shape: The (row, col) cells of the shape.
+        :returns int: The id of the new shape, or -1 if the shape was empty.
+        """
+        if not shape: return -1
+        shape_id, self._next_id = self._next_id, self._next_id + 1
+        self._shapes[shape_id] = set(shape)
+        for cell in shape:
+            self._index.setdefault(cell, set()).add(shape_id)
+        self._layer_key = None
+        return shape_id
+
+    def shape_ids_at(self, r, c):
+        """
+        Returns the ids of the shapes that contain a cell.
+
+        :param int r: The row index of the cell.
+        :param int c: The column index of the cell.
+        :returns set[int]: The shape ids (empty if no shape covers the cell).
+        """
+        return self._index.get((r, c), set())
+
+    def remove_at(self, r, c):
+        """
+        Removes every shape that contains a cell.
+
+        :param int r: The row index of the cell.
+        :param int c: The column index of the cell.
+        :returns list[set[tuple[int, int]]]: The removed shapes (empty if none).
+        """
+        removed = []
+        for shape_id in list(self._index.get((r, c), ())):
+            shape = self._shapes.pop(shape_id)
+            self._outlines.pop(shape_id, None)
+            for cell in shape:
+                ids = self._index[cell]
+                ids.discard(shape_id)
+                if not ids: del self._index[cell]
+            removed.append(shape)
+        if removed: self._layer_key = None
+        return removed
+
+    def outlines(self, cell_size):
+        """
+        Returns the cached outline geometry of every shape for a cell size.
+
+        Outlines are computed the first time a shape is drawn and again only
+        when the cell size changes.
+
+        :param float cell_size: The size of each cell in pixels.
+        :returns list[list[tuple]]: The outline rects of each shape, in drawing order.
+        """
+        result = []
+        for shape_id, shape in self._shapes.items():
+            cached = self._outlines.get(shape_id)
+            if cached is None or cached[0] != cell_size:
+                cached = self._outlines[shape_id] = (cell_size, outline_rects(shape, cell_size))
+            result.append(cached[1])
+        return result
+
+    def layer(self, background, cell_size):
+        """
+        Returns the board background with every finished shape drawn on it.
+
+        The layer is cached and only redrawn after shapes are added or removed,
+        or when the background or cell size changes.
+
+        :param pygame.Surface background: The pre-rendered board background.
+        :param float cell_size: The size of each cell in pixels.
+        :returns pygame.Surface: The background itself if there are no shapes, otherwise the cached layer.
+        """
+        if not self._shapes: return background
+        key = (id(background), cell_size)
+        if self._layer_key != key:
+            self._layer = background.copy()
+            for rects in self.outlines(cell_size):
+                for rect in rects:
+                    pygame.draw.rect(self._layer, COLOR_CUSTOM_BORDER, rect)
+            self._layer_key = key
+        return self._layer
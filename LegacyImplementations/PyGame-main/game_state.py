@@ -5,7 +5,7 @@
 * Metadata:
 * @author Joseph Bryant
 * @refactored by Isaiah Tadrous
-* @version 1.5.0
+* @version 1.6.0
 * -------------------------------------------------------------------------------
 * Description:
 * This module defines the GameState class, which serves as the centralized
@@ -25,7 +25,11 @@
 import pygame
 import constants as const
 import puzzle_handler as pz
+import ui_manager as ui
 from history_manager import HistoryManager
+from solver_worker import SolverWorker
+from custom_borders import CustomBorders
+from stroke_layer import StrokeLayer
 
 # --- GAMESTATE CLASS DEFINITION ---
 class GameState:
@@ -52,19 +56,20 @@ class GameState:
         self.player_grid = None
         self.grid_dim = 0
         self.cell_size = 0
+        self.board_surface = None # Pre-rendered region colours, rebuilt on every puzzle load
+        self.grid_lines_surface = None # Pre-rendered grid lines and region borders (colour-keyed)
         self.stars_per_region = 0
         self.history = HistoryManager([[]]) # Dummy init, reset with actual puzzle
 
         # --- DRAWING MODE STATE ---
         self.is_draw_mode = False
-        self.draw_surface = pygame.Surface((const.GRID_AREA_WIDTH, const.GRID_AREA_HEIGHT), pygame.SRCALPHA)
+        self.strokes = StrokeLayer((const.GRID_AREA_WIDTH, const.GRID_AREA_HEIGHT)) # Vector drawings and their undo history
         self.current_color_index = 0
         self.brush_size = 3
-        self.last_pos = None
 
         # --- BORDER MODE STATE ---
         self.is_border_mode = False
-        self.custom_borders = [] # List of sets, where each set contains (r, c) tuples for a shape
+        self.custom_borders = CustomBorders() # Finished shapes, indexed by cell
         self.current_border_path = set() # Holds the (r,c) tuples for the border being drawn
 
         # --- GENERAL GAMEPLAY STATE ---
@@ -72,6 +77,13 @@ class GameState:
         self.solution_status = None
         self.feedback_overlay_alpha = 0
         self.feedback_overlay_color = const.COLOR_CORRECT
+        self.hint_cells = {} # (r, c) -> True for a star or False for an empty cell, outlined until the next change
+        self.solver_worker = SolverWorker() # Runs 'check' and 'find' solves off the main thread
+
+        # --- RENDERING STATE ---
+        self.needs_full_redraw = True # Redraw the whole window on the next frame
+        self.dirty_rects = [] # Screen areas to redraw on the next frame
+        self.last_panel_state = None # What the control panel showed when last drawn
 
         # --- MOUSE AND INPUT STATE ---
         self.is_left_down = False
@@ -119,6 +131,7 @@ class GameState:
         self.grid_dim = dimension
         self.stars_per_region = puzzle_data.get('stars', 1)
         self.cell_size = const.GRID_AREA_WIDTH / self.grid_dim if self.grid_dim > 0 else 0
+        self.board_surface, self.grid_lines_surface = ui.render_static_board(self.region_grid, self.cell_size)
         
         # --- INITIALIZE PLAYER GRID AND HISTORY ---
         # Handle player grid from imported data or create a new one
@@ -133,12 +146,14 @@ class GameState:
             self.history = HistoryManager(self.player_grid)
 
         # --- RESET TEMPORARY VISUALS AND MODES ---
-        self.draw_surface.fill((0, 0, 0, 0))
-        self.custom_borders = []
+        self.solver_worker.cancel() # Results for the previous puzzle are no longer wanted
+        self.strokes = StrokeLayer.deserialize((const.GRID_AREA_WIDTH, const.GRID_AREA_HEIGHT), puzzle_data.get('strokes'))
+        self.custom_borders.clear()
         self.current_border_path = set()
         self.is_draw_mode = False
         self.is_border_mode = False
         self.reset_feedback()
+        self.invalidate()
         print(f"Game state reset for a {self.grid_dim}x{self.grid_dim} puzzle.")
 
 
@@ -165,12 +180,66 @@ class GameState:
         if from_state != to_state:
             self.history.add_change((r, c, from_state, to_state))
             self.update_player_grid_from_history()
+            self.invalidate_cell(r, c)
 
     def reset_feedback(self):
         """
-        Resets the solution feedback overlay, hiding it and clearing the status message.
+        Resets the solution feedback overlay and hint outlines, hiding them and clearing the status message.
 
         :returns None:
         """
+        if self.solution_status or self.feedback_overlay_alpha > 0 or self.hint_cells:
+            self.invalidate()
         self.solution_status = None
         self.feedback_overlay_alpha = 0
+        self.hint_cells = {}
+
+    def invalidate(self, rect=None):
+        """
+        Marks part of the window as needing a redraw on the next frame.
+
+        :param Optional[pygame.Rect] rect: - The area to redraw, or None for the whole window.
+        :returns None:
+        """
+        if rect is None:
+            self.needs_full_redraw = True
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    def invalidate_cell(self, r, c, margin=0):
+        """
+        Marks a grid cell, and optionally its neighbours, as needing a redraw.
+
+        :param int r: - The row index of the cell.
+        :param int c: - The column index of the cell.
+        :param int margin: - The number of neighbouring cells to include on each side.
+        :returns None:
+        """
+        self.invalidate_cells([(r - margin, c - margin), (r + margin, c + margin)])
+
+    def invalidate_cells(self, cells):
+        """
+        Marks the bounding box of a group of grid cells as needing a redraw.
+
+        :param iterable cells: - The (row, col) cells to redraw.
+        :returns None:
+        """
+        rows, cols = zip(*cells)
+        size = self.cell_size
+        rect = pygame.Rect(int(min(cols) * size), int(min(rows) * size),
+                           int((max(cols) - min(cols) + 1) * size) + 2, int((max(rows) - min(rows) + 1) * size) + 2)
+        # Region borders are drawn centred on the cell edges, so include their overhang.
+        self.invalidate(rect.inflate(const.BORDER_THICK, const.BORDER_THICK).clip(self.grid_rect))
+
+    @property
+    def grid_rect(self):
+        """The screen area covered by the puzzle grid."""
+        return pygame.Rect(0, 0, const.GRID_AREA_WIDTH, const.GRID_AREA_HEIGHT)
+
+    def is_idle(self):
+        """
+        Checks whether the next frame would draw nothing, so the loop may sleep.
+
+        :returns bool: True if nothing is waiting to be redrawn or animated.
+        """
+        return not (self.needs_full_redraw or self.dirty_rects or self.feedback_overlay_alpha > 0)
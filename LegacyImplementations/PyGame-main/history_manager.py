@@ -11,8 +11,9 @@
 * This module provides the HistoryManager class, a self-contained system for
 * managing undo and redo functionality. It operates on a differential basis,
 * storing an initial state and a list of subsequent changes. The current grid
-* state is rebuilt on demand by applying these changes, ensuring data
-* integrity. It also includes methods for serializing the entire history
+* state is maintained incrementally as changes are added, undone and redone,
+* with periodic snapshots so that jumping to any point in a long history stays
+* cheap. It also includes methods for serializing the entire history
 * into a compact string for saving and exporting, and deserializing it back
 * into a functional manager instance.
 *
@@ -23,13 +24,128 @@
 
 # --- IMPORTS ---
 import copy
+from array import array
 from constants import SBN_CHAR_TO_INT, SBN_INT_TO_CHAR
 
+# A full copy of the grid is kept every this many changes, so that seeking to an
+# arbitrary history position never replays more than this many changes.
+SNAPSHOT_INTERVAL = 256
+
+# Bit layout of one packed change word: row (5 bits), column (5 bits), from (2 bits), to (2 bits).
+_ROW_SHIFT, _COL_SHIFT, _FROM_SHIFT = 9, 4, 2
+
+def pack_change(r, c, from_state, to_state):
+    """
+    Packs one change into a 14-bit integer.
+
+    :param int r: The row, below 32.
+    :param int c: The column, below 32.
+    :param int from_state: The previous cell state, below 4.
+    :param int to_state: The new cell state, below 4.
+    :returns int: The packed change word.
+    """
+    if not (0 <= r < 32 and 0 <= c < 32 and 0 <= from_state < 4 and 0 <= to_state < 4):
+        raise ValueError(f"Change out of range: {(r, c, from_state, to_state)}")
+    return (r << _ROW_SHIFT) | (c << _COL_SHIFT) | (from_state << _FROM_SHIFT) | to_state
+
+def unpack_change(word):
+    """
+    Unpacks a change word into its fields.
+
+    :param int word: The packed change word.
+    :returns tuple: A (r, c, from_state, to_state) tuple.
+    """
+    return word >> _ROW_SHIFT, (word >> _COL_SHIFT) & 31, (word >> _FROM_SHIFT) & 3, word & 3
+
+# --- CHANGELOG CLASS DEFINITION ---
+class ChangeLog:
+    """
+    A compact, list-like log of changes stored as one 16-bit word per change.
+    Entries read back as (r, c, from_state, to_state) tuples. Truncation only
+    moves the logical length, so branching after an undo copies nothing.
+    """
+    __slots__ = ('words', '_length')
+
+    def __init__(self, changes=()):
+        """
+        Initializes the log, optionally from an iterable of change tuples.
+
+        :param iterable changes: The initial changes.
+        """
+        self.words, self._length = array('H'), 0
+        self.extend(changes)
+
+    def __len__(self):
+        """Returns the number of changes in the log."""
+        return self._length
+
+    def __iter__(self):
+        """Yields every change as a tuple, oldest first."""
+        for i in range(self._length):
+            yield unpack_change(self.words[i])
+
+    def __getitem__(self, index):
+        """Returns the change tuple at an index, or a list of them for a slice."""
+        if isinstance(index, slice):
+            return [unpack_change(self.words[i]) for i in range(*index.indices(self._length))]
+        if index < 0: index += self._length
+        if not 0 <= index < self._length: raise IndexError("change index out of range")
+        return unpack_change(self.words[index])
+
+    def __eq__(self, other):
+        """Compares the changes with another log or list of change tuples."""
+        return list(self) == [tuple(change) for change in other]
+
+    def append(self, change):
+        """
+        Appends a change, reusing storage left behind by an earlier truncation.
+
+        :param tuple change: A (r, c, from_state, to_state) tuple.
+        :returns None:
+        """
+        word = pack_change(*change)
+        if self._length < len(self.words):
+            self.words[self._length] = word
+        else:
+            self.words.append(word)
+        self._length += 1
+
+    def extend(self, changes):
+        """
+        Appends several changes.
+
+        :param iterable changes: The change tuples to append.
+        :returns None:
+        """
+        for change in changes:
+            self.append(change)
+
+    def truncate(self, length):
+        """
+        Drops every change from 'length' onwards in constant time.
+
+        :param int length: The number of changes to keep.
+        :returns None:
+        """
+        self._length = max(0, min(length, self._length))
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Creates a log that takes ownership of an array of already packed words.
+
+        :param array words: The packed change words.
+        :returns ChangeLog: The new change log.
+        """
+        log = cls()
+        log.words, log._length = words, len(words)
+        return log
+
 # --- HISTORYMANAGER CLASS DEFINITION ---
 class HistoryManager:
     """
-    Manages a history of grid changes. It is self-contained and rebuilds the
-    grid state on demand to ensure correctness.
+    Manages a history of grid changes. The grid at the current pointer is kept
+    up to date incrementally, and snapshots bound the cost of larger jumps.
     """
     def __init__(self, initial_state):
         """
@@ -38,8 +154,36 @@ class HistoryManager:
         :param list[list[int]] initial_state: The starting grid configuration.
         """
         self.initial_state = copy.deepcopy(initial_state)
-        self.changes = []  # List of tuples: (row, col, from_state, to_state)
-        self.pointer = 0   # Points to the next position in the changes list to apply.
+        self._changes = ChangeLog()  # Packed (row, col, from_state, to_state) changes.
+        self.pointer = 0    # Points to the next position in the changes list to apply.
+        self._reset_cache()
+
+    @property
+    def changes(self):
+        """
+        The packed log of (row, col, from_state, to_state) changes.
+
+        Appending to the log keeps the cached grid valid; assigning any iterable
+        of change tuples packs it into a new log and resets the cache.
+
+        :returns ChangeLog: The recorded changes.
+        """
+        return self._changes
+
+    @changes.setter
+    def changes(self, changes):
+        self._changes = changes if isinstance(changes, ChangeLog) else ChangeLog(changes)
+        self._reset_cache()
+
+    def _reset_cache(self):
+        """
+        Discards the cached grid and snapshots, restarting from the initial state.
+
+        :returns None:
+        """
+        self._grid = copy.deepcopy(self.initial_state)
+        self._grid_pointer = 0
+        self._snapshots = {}
 
     def add_change(self, change):
         """
@@ -51,25 +195,60 @@ class HistoryManager:
         :param tuple change: A tuple representing the change (r, c, from_state, to_state).
         :returns None:
         """
-        if self.pointer < len(self.changes):
-            self.changes = self.changes[:self.pointer]
-        self.changes.append(change)
+        if self.pointer < len(self._changes):
+            if self._grid_pointer > self.pointer:
+                self._seek(self.pointer)
+            self._changes.truncate(self.pointer)
+            for index in [i for i in self._snapshots if i > self.pointer]:
+                del self._snapshots[index]
+        self._changes.append(change)
         self.pointer += 1
 
     def get_current_grid(self):
         """
-        Builds and returns the grid state at the current history pointer.
+        Returns the grid state at the current history pointer.
 
-        It starts with the initial state and applies all changes sequentially
-        up to the current pointer position.
+        Only the changes between the previously requested pointer and the
+        current one are applied, so this no longer replays the whole history.
 
         :returns list[list[int]]: A deep copy of the grid at the current state.
         """
-        grid = copy.deepcopy(self.initial_state)
-        for i in range(self.pointer):
-            r, c, _, to_state = self.changes[i]
-            grid[r][c] = to_state
-        return grid
+        self._seek(self.pointer)
+        return [list(row) for row in self._grid]
+
+    def _seek(self, target):
+        """
+        Moves the cached grid to the state after 'target' changes.
+
+        Short backward moves restore each change's 'from' state; everything
+        else applies 'to' states forward from the cached grid or from the
+        closest snapshot at or before the target.
+
+        :param int target: The history position to move the cached grid to.
+        :returns None:
+        """
+        target = max(0, min(target, len(self._changes)))
+        distance = target - self._grid_pointer
+        if distance < 0 and -distance <= SNAPSHOT_INTERVAL:
+            grid, words = self._grid, self._changes.words
+            for i in range(self._grid_pointer - 1, target - 1, -1):
+                word = words[i]
+                grid[word >> _ROW_SHIFT][(word >> _COL_SHIFT) & 31] = (word >> _FROM_SHIFT) & 3
+            self._grid_pointer = target
+            return
+        base = (target // SNAPSHOT_INTERVAL) * SNAPSHOT_INTERVAL
+        while base and base not in self._snapshots:
+            base -= SNAPSHOT_INTERVAL
+        if distance < 0 or base > self._grid_pointer:
+            self._grid = [list(row) for row in self._snapshots[base]] if base else copy.deepcopy(self.initial_state)
+            self._grid_pointer = base
+        grid, words = self._grid, self._changes.words
+        for i in range(self._grid_pointer, target):
+            word = words[i]
+            grid[word >> _ROW_SHIFT][(word >> _COL_SHIFT) & 31] = word & 3
+            if (i + 1) % SNAPSHOT_INTERVAL == 0 and i + 1 not in self._snapshots:
+                self._snapshots[i + 1] = tuple(tuple(row) for row in grid)
+        self._grid_pointer = target
 
     def undo(self):
         """
@@ -115,30 +294,55 @@ class HistoryManager:
         :returns None:
         """
         self.initial_state = copy.deepcopy(initial_state)
-        self.changes = []
+        self.changes = ChangeLog()
         self.pointer = 0
 
-    def serialize(self):
+    def serialize(self, version=2):
         """
         Serializes the entire history (changes and pointer) into a compact string.
 
-        The format is "h:<changes_string>:<pointer_char>". Each change is encoded
-        as a 4-character string using the SBN base64 alphabet.
+        Version 2 (the default) is "h2:<data>": base64 varints holding the
+        pointer, then runs of consecutive changes with the same from/to states.
+        Each run is a header "(length - 1) << 4 | from << 2 | to" followed by
+        zigzag deltas between successive cell indexes "r << 5 | c".
+        Version 1 is the original "h:<changes_string>:<pointer_char>" format,
+        where each change is a 4-character string in the SBN base64 alphabet.
 
+        :param int version: The format version to write, 2 or 1.
         :returns str: The serialized history string, or an empty string if no changes exist.
         """
         if not self.changes: return ""
-        change_strings = [f"{SBN_INT_TO_CHAR[r]}{SBN_INT_TO_CHAR[c]}{SBN_INT_TO_CHAR[f]}{SBN_INT_TO_CHAR[t]}" for r, c, f, t in self.changes]
-        pointer_char = SBN_INT_TO_CHAR.get(self.pointer, '0')
-        return f"h:{''.join(change_strings)}:{pointer_char}"
+        words, chars = self._changes.words[:len(self._changes)], SBN_INT_TO_CHAR
+        if version == 1:
+            change_strings = [f"{chars[w >> _ROW_SHIFT]}{chars[(w >> _COL_SHIFT) & 31]}{chars[(w >> _FROM_SHIFT) & 3]}{chars[w & 3]}"
+                              for w in words]
+            pointer_char = SBN_INT_TO_CHAR.get(self.pointer, '0')
+            return f"h:{''.join(change_strings)}:{pointer_char}"
+
+        out = []
+        write_varint(out, self.pointer)
+        start, previous_cell = 0, 0
+        while start < len(words):
+            states = words[start] & 15
+            end = start + 1
+            while end < len(words) and words[end] & 15 == states: end += 1
+            write_varint(out, (end - start - 1) << 4 | states)
+            for w in words[start:end]:
+                cell = w >> _COL_SHIFT
+                delta = cell - previous_cell
+                write_varint(out, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+                previous_cell = cell
+            start = end
+        return f"h2:{''.join(out)}"
 
     @classmethod
     def deserialize(cls, initial_state, history_string):
         """
         Creates a HistoryManager instance from a serialized string.
 
-        This class method parses the history string, reconstructs the list of
-        changes, sets the pointer, and returns a new HistoryManager instance.
+        This class method parses the history string (either the "h2:" or the
+        original "h:" format), reconstructs the list of changes, sets the
+        pointer, and returns a new HistoryManager instance.
 
         :param list[list[int]] initial_state: The initial grid state to apply changes to.
         :param str history_string: The serialized history string to parse.
@@ -146,6 +350,22 @@ class HistoryManager:
         """
         manager = cls(initial_state)
         try:
+            if history_string.startswith('h2:'):
+                values = read_varints(history_string[3:])
+                pointer, words, cell, i = values[0], array('H'), 0, 1
+                while i < len(values):
+                    header = values[i]
+                    i += 1
+                    for _ in range((header >> 4) + 1):
+                        delta = values[i]
+                        i += 1
+                        cell += (delta >> 1) if not delta & 1 else -((delta + 1) >> 1)
+                        if not 0 <= cell < 1024: raise ValueError(f"Cell index out of range: {cell}")
+                        words.append(cell << _COL_SHIFT | header & 15)
+                manager.changes = ChangeLog.from_words(words)
+                manager.pointer = min(pointer, len(words))
+                return manager
+
             parts = history_string.split(':')
             if len(parts) != 3 or parts[0] != 'h':
                 return manager # Return a clean manager if format is wrong
@@ -162,3 +382,36 @@ class HistoryManager:
             # In case of corrupted data, return a fresh manager
             return cls(initial_state)
         return manager
+
+# --- VARINT HELPERS ---
+def write_varint(out, value):
+    """
+    Appends a non-negative integer as base64 varint characters (5 bits each, bit 6 = more follows).
+
+    :param list[str] out: The list of characters to append to.
+    :param int value: The value to encode.
+    :returns None:
+    """
+    while value >= 32:
+        out.append(SBN_INT_TO_CHAR[(value & 31) | 32])
+        value >>= 5
+    out.append(SBN_INT_TO_CHAR[value])
+
+def read_varints(data):
+    """
+    Decodes a string of base64 varint characters.
+
+    :param str data: The encoded characters.
+    :returns list[int]: The decoded integers.
+    """
+    values, value, shift = [], 0, 0
+    for char in data:
+        digit = SBN_CHAR_TO_INT[char]
+        value |= (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    if shift or not values: raise ValueError("Truncated history data")
+    return values
@@ -0,0 +1,387 @@
+"""
+**********************************************************************************
+* Title: logic_solver.py
+*
+* Metadata:
+* @author Isaiah Tadrous
+* @version 1.0.0
+* -------------------------------------------------------------------------------
+* Description:
+* This module finds hints for a puzzle in progress. Starting from the player's
+* stars and marks, it looks for the next deduction a person could make, trying
+* the simplest techniques first (a unit with only as many open cells as
+* missing stars, cells touching every open cell of a unit, row and column
+* confinement and pigeonhole arguments, and 2x2 block counting), and returns
+* the cells it forces. Unlike the Z3 solver it never searches: the board is
+* held as two integers used as bitboards (the stars and the open cells) and
+* every technique is a few integer operations per row, column or region, so a
+* hint takes milliseconds even on 25x25 boards. It is a copy of the backend's
+* hint engine and must be kept in sync with it.
+*
+**********************************************************************************
+"""
+# logic_solver.py
+# Description: Finds the next forced deduction on the player's grid.
+
+# --- IMPORTS ---
+from functools import lru_cache
+
+from constants import STATE_STAR, STATE_SECONDARY_MARK, HINT_SOLVER_CACHE_SIZE, HINT_FIT_MEMO_LIMIT
+
+# --- TECHNIQUES ---
+# The explanation returned with a hint for each technique, simplest first.
+HINT_EXPLANATIONS = {
+    'singles': "A row, column or region has exactly as many open cells as it still needs stars.",
+    'no_touch': "These cells touch every open cell of a row, column or region that needs one more star.",
+    'confinement': "A region's open cells all lie in one row or column, so that line's other cells are empty.",
+    'pigeonhole': "A row or column can only get its stars from regions that need exactly that many, so those regions' other cells are empty.",
+    'bands': "Some regions fit entirely inside a group of rows or columns (or are the only ones that reach it) and use up all of its stars.",
+    'blocks': "A star on these cells would leave a row, column or region without room for its stars, since stars cannot touch.",
+}
+
+class Contradiction(Exception):
+    """Raised when a board can no longer be completed to a solution."""
+
+@lru_cache(maxsize=None)
+def board_masks(dim):
+    """
+    Builds the bitboard masks that depend only on the board dimension.
+
+    Cell (r, c) is bit r * dim + c.
+
+    :param int dim: The dimension of the board.
+    :returns: A tuple of (rows, columns, row_windows, column_windows, halo) where
+              row_windows[k][i] holds rows i..i+k-1 (likewise for columns) and
+              halo[i] holds the up to eight cells touching cell i.
+    :rtype: tuple[list, list, list, list, list]
+    """
+    rows = [((1 << dim) - 1) << (r * dim) for r in range(dim)]
+    column = sum(1 << (r * dim) for r in range(dim))
+    columns = [column << c for c in range(dim)]
+    row_windows, column_windows = [[]], [[]]
+    for size in range(1, dim + 1):
+        row_windows.append([sum(rows[first:first + size]) for first in range(dim - size + 1)])
+        column_windows.append([sum(columns[first:first + size]) for first in range(dim - size + 1)])
+    halo = []
+    for r in range(dim):
+        for c in range(dim):
+            mask = 0
+            for nr in range(max(0, r - 1), min(dim, r + 2)):
+                for nc in range(max(0, c - 1), min(dim, c + 2)):
+                    mask |= 1 << (nr * dim + nc)
+            halo.append(mask & ~(1 << (r * dim + c)))
+    return rows, columns, row_windows, column_windows, halo
+
+def cells(mask):
+    """
+    Yields the index of every set bit of a mask, lowest first.
+
+    :param int mask: A bitboard.
+    :returns: A generator of cell indices.
+    :rtype: Iterator[int]
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+# --- SOLVER CLASS ---
+class LogicSolver:
+    """Applies human solving techniques to a board held as bitboards."""
+    def __init__(self, region_grid, stars_per_region):
+        """
+        Initializes the solver and builds the row, column and region masks.
+
+        :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+        :param int stars_per_region: The number of stars required per region/row/column.
+        """
+        self.dim = dim = len(region_grid)
+        self.stars = stars_per_region
+        self.rows, self.columns, self.row_windows, self.column_windows, self.halo = board_masks(dim)
+        self.row_bits = (1 << dim) - 1
+        regions = {}
+        for r, row in enumerate(region_grid):
+            for c, region in enumerate(row):
+                regions[region] = regions.get(region, 0) | 1 << (r * dim + c)
+        self.regions = list(regions.values())
+        self.units = self.rows + self.columns + self.regions
+        # can_fit() results depend only on its arguments, so they are kept between hints.
+        self.fit_memo = {}
+        self.rules = [
+            ('singles', self._singles),
+            ('no_touch', self._no_touch),
+            ('confinement', lambda stars, open_cells: self._bands(stars, open_cells, 1, 1)),
+            ('pigeonhole', lambda stars, open_cells: self._bands(stars, open_cells, 1, 1, pigeonhole=True)),
+            ('bands', lambda stars, open_cells: self._bands(stars, open_cells, 2, dim - 1)
+                or self._bands(stars, open_cells, 2, dim - 1, pigeonhole=True)),
+            ('blocks', self._blocks),
+        ]
+
+    # --- BOARD STATE ---
+    def state_from_grid(self, player_grid):
+        """
+        Builds the bitboards for a player's grid.
+
+        Stars are placed, and cells marked by the player, cells touching a star
+        and the remaining cells of every full row, column or region are closed.
+
+        :param list[list[int]] player_grid: The player's grid of cell states.
+        :returns: The (stars, open_cells) bitboards.
+        :rtype: tuple[int, int]
+        :raises Contradiction: If the player's stars break a rule.
+        """
+        stars, closed, bit = 0, 0, 1
+        for row in player_grid:
+            for state in row:
+                if state == STATE_STAR: stars |= bit
+                elif state == STATE_SECONDARY_MARK: closed |= bit
+                bit <<= 1
+        return self.place(stars, (bit - 1) & ~closed & ~stars, stars)
+
+    def place(self, stars, open_cells, new_stars):
+        """
+        Places stars and closes the cells they touch and the rest of any full unit.
+
+        :param int stars: The stars already placed.
+        :param int open_cells: The open cells.
+        :param int new_stars: The cells to place stars on.
+        :returns: The new (stars, open_cells).
+        :rtype: tuple[int, int]
+        :raises Contradiction: If two stars touch or a unit gets too many stars.
+        """
+        halo = self.halo
+        for i in cells(new_stars):
+            if stars & halo[i]: raise Contradiction
+            stars |= 1 << i
+            open_cells &= ~(halo[i] | 1 << i)
+        for unit in self.units:
+            placed = (stars & unit).bit_count()
+            if placed >= self.stars:
+                if placed > self.stars: raise Contradiction
+                open_cells &= ~unit
+        return stars, open_cells
+
+    def is_solved(self, stars):
+        """
+        Checks whether every row, column and region has its stars.
+
+        :param int stars: The placed stars.
+        :returns: True if the board is complete.
+        :rtype: bool
+        """
+        return stars.bit_count() == self.dim * self.stars
+
+    def deduce(self, stars, open_cells):
+        """
+        Finds the next deduction using the simplest technique that makes progress.
+
+        :param int stars: The placed stars.
+        :param int open_cells: The open cells.
+        :returns: (technique, new_stars, closed_cells), or None if no technique applies.
+        :rtype: tuple | None
+        :raises Contradiction: If the board cannot be completed.
+        """
+        for name, rule in self.rules:
+            found = rule(stars, open_cells)
+            if found: return (name,) + found
+        return None
+
+    # --- TECHNIQUES ---
+    # Each technique takes (stars, open_cells) and returns (new_stars, closed_cells)
+    # for the first deduction it finds, or None.
+    def _singles(self, stars, open_cells):
+        for unit in self.units:
+            need = self.stars - (stars & unit).bit_count()
+            if need > 0:
+                candidates = open_cells & unit
+                count = candidates.bit_count()
+                if count < need: raise Contradiction
+                if count == need: return candidates, 0
+        return None
+
+    def _no_touch(self, stars, open_cells):
+        halo = self.halo
+        for unit in self.units:
+            if self.stars - (stars & unit).bit_count() != 1: continue
+            touching = open_cells & ~unit
+            for i in cells(open_cells & unit):
+                touching &= halo[i]
+                if not touching: break
+            else:
+                return 0, touching
+        return None
+
+    def _line_masks(self, candidates):
+        """
+        Finds the rows and columns a set of cells lies in.
+
+        :param int candidates: A bitboard.
+        :returns: Bit k of the first (second) value is set if a cell lies in row (column) k.
+        :rtype: tuple[int, int]
+        """
+        dim, row_bits, rows, columns = self.dim, self.row_bits, 0, 0
+        for r in range(dim):
+            row = candidates >> (r * dim) & row_bits
+            if row:
+                rows |= 1 << r
+                columns |= row
+        return rows, columns
+
+    def _bands(self, stars, open_cells, smallest, largest, pigeonhole=False):
+        """
+        Applies confinement (or pigeonhole) to windows of 'smallest' to 'largest' lines.
+
+        Confinement: if the regions lying entirely inside a window need as many
+        stars as the window, the window's other cells are closed. Pigeonhole: if
+        the regions reaching into a window need as many stars as the window, their
+        cells outside it are closed.
+        """
+        quota = self.stars
+        needy = ([], []) # (lines spanned, lines touched, need, open cells) per region missing stars, per axis
+        for region in self.regions:
+            need = quota - (stars & region).bit_count()
+            if need > 0:
+                candidates = open_cells & region
+                if not candidates: raise Contradiction
+                rows, columns = self._line_masks(candidates)
+                needy[0].append((rows.bit_count(), rows, need, candidates))
+                needy[1].append((columns.bit_count(), columns, need, candidates))
+        for axis, lines, windows in ((0, self.rows, self.row_windows), (1, self.columns, self.column_windows)):
+            regions = sorted(needy[axis]) # Narrowest first
+            total = [0] # Prefix sums of the stars missing from each line
+            for line in lines:
+                total.append(total[-1] + quota - (stars & line).bit_count())
+            for size in range(smallest, largest + 1):
+                for first, window in enumerate(windows[size]):
+                    window_need = total[first + size] - total[first]
+                    if not window_need: continue
+                    lines_in = ((1 << size) - 1) << first
+                    if not pigeonhole:
+                        inside_need, inside = 0, 0
+                        for width, touched, need, candidates in regions:
+                            if width > size: break
+                            if not touched & ~lines_in:
+                                inside_need += need
+                                inside |= candidates
+                        if inside_need > window_need: raise Contradiction
+                        closed = open_cells & window & ~inside
+                        if inside_need == window_need and closed: return 0, closed
+                    else:
+                        touching_need, touching = 0, 0
+                        for width, touched, need, candidates in regions:
+                            if touched & lines_in:
+                                touching_need += need
+                                touching |= candidates
+                        if touching_need < window_need: raise Contradiction
+                        closed = touching & ~window
+                        if touching_need == window_need and closed: return 0, closed
+        return None
+
+    def can_fit(self, candidates, count):
+        """
+        Checks whether 'count' stars fit on a set of cells without touching each other.
+
+        A greedy pass settles most cases; the rest are searched exactly.
+
+        :param int candidates: The available cells.
+        :param int count: The number of stars to place.
+        :returns: True if some 'count' of the cells are pairwise non-touching.
+        :rtype: bool
+        """
+        if count <= 0: return True
+        if candidates.bit_count() < count: return False
+        if self._greedy_fit(candidates, count) == count: return True
+        halo, key = self.halo, (candidates, count)
+        memo = self.fit_memo
+        if key not in memo:
+            low = candidates & -candidates
+            i = low.bit_length() - 1
+            memo[key] = (self.can_fit(candidates & ~(halo[i] | low), count - 1)
+                         or self.can_fit(candidates & ~low, count))
+        return memo[key]
+
+    def _greedy_fit(self, candidates, limit):
+        """
+        Counts the non-touching cells picked greedily from a set, lowest first.
+
+        :param int candidates: The available cells.
+        :param int limit: The count at which to stop.
+        :returns: A count of pairwise non-touching cells, at most 'limit'.
+        :rtype: int
+        """
+        halo, count = self.halo, 0
+        while candidates and count < limit:
+            low = candidates & -candidates
+            candidates &= ~(halo[low.bit_length() - 1] | low)
+            count += 1
+        return count
+
+    def _blocks(self, stars, open_cells):
+        halo = self.halo
+        for index, unit in enumerate(self.units):
+            need = self.stars - (stars & unit).bit_count()
+            if need <= 0: continue
+            candidates = open_cells & unit
+            # A star and the cells it touches cover a 3x3 block, which holds at most two
+            # non-touching cells of a row or column and four of a region. A unit with
+            # that much room to spare cannot be cut short by a single star.
+            slack = 2 if index < 2 * self.dim else 4
+            if self._greedy_fit(candidates, need + slack) == need + slack: continue
+            if not self.can_fit(candidates, need): raise Contradiction
+            # Both the unit's own cells and the cells touching them can cost it room.
+            nearby = candidates
+            for i in cells(candidates):
+                nearby |= halo[i]
+            closed = 0
+            for i in cells(nearby & open_cells):
+                if not self.can_fit(candidates & ~(halo[i] | 1 << i), need - (candidates >> i & 1)):
+                    closed |= 1 << i
+            if closed: return 0, closed
+        return None
+
+@lru_cache(maxsize=HINT_SOLVER_CACHE_SIZE)
+def _cached_solver(region_key, stars_per_region):
+    """
+    Returns a LogicSolver for a puzzle, reusing it across hint requests.
+
+    :param tuple region_key: The region grid as a tuple of row tuples.
+    :param int stars_per_region: The number of stars required per region/row/column.
+    :returns: The solver for the puzzle.
+    :rtype: LogicSolver
+    """
+    return LogicSolver(region_key, stars_per_region)
+
+def find_hint(region_grid, stars_per_region, player_grid):
+    """
+    Finds the next cells forced by the simplest applicable technique.
+
+    The player's stars and secondary marks are taken as given. The returned
+    dictionary has a 'status' of 'hint', 'solved', 'stuck' (no technique
+    applies) or 'contradiction' (the player's stars or marks cannot lead to a
+    solution). A hint also has the 'technique', an 'explanation', and the
+    'stars' and 'eliminated' cells as [row, col] pairs.
+
+    :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+    :param int stars_per_region: The number of stars required per region/row/column.
+    :param list[list[int]] player_grid: The player's grid of cell states.
+    :returns: The hint.
+    :rtype: dict
+    """
+    solver = _cached_solver(tuple(map(tuple, region_grid)), stars_per_region)
+    if len(solver.fit_memo) > HINT_FIT_MEMO_LIMIT: solver.fit_memo.clear()
+    dim = solver.dim
+    try:
+        stars, open_cells = solver.state_from_grid(player_grid)
+        if solver.is_solved(stars): return {'status': 'solved'}
+        deduction = solver.deduce(stars, open_cells)
+    except Contradiction:
+        return {'status': 'contradiction'}
+    if deduction is None: return {'status': 'stuck'}
+    technique, new_stars, closed = deduction
+    return {
+        'status': 'hint',
+        'technique': technique,
+        'explanation': HINT_EXPLANATIONS[technique],
+        'stars': [list(divmod(i, dim)) for i in cells(new_stars)],
+        'eliminated': [list(divmod(i, dim)) for i in cells(closed)],
+    }
@@ -5,7 +5,7 @@
 * Metadata:
 * @author Joseph Bryant
 * @refactored by Isaiah Tadrous
-* @version 1.7.3
+* @version 1.8.0
 * -------------------------------------------------------------------------------
 * Description:
 * This script is the main entry point for the Star Battle Playground
@@ -55,6 +55,7 @@ import puzzle_handler as pz
 import ui_manager as ui
 import action_handlers as actions
 from game_state import GameState
+from solver_worker import SOLVER_DONE_EVENT
 from ui_elements import Button
 from z3_solver import Z3_AVAILABLE
 
@@ -97,6 +98,7 @@ def main():
             {'id': 'back', 'text': 'Undo', 'width_ratio': 0.5},
             {'id': 'forward', 'text': 'Redo', 'width_ratio': 0.5}
         ]},
+        {'type': 'button', 'id': 'hint', 'text': 'Hint', 'ideal_height': 45},
         {'type': 'button', 'id': 'toggle_mode', 'text': 'Draw Mode', 'ideal_height': 45},
         {'type': 'button', 'id': 'border_mode', 'text': 'Add Border', 'ideal_height': 45},
         {'type': 'button_group', 'ideal_height': 45, 'items': [
@@ -138,16 +140,30 @@ def main():
         'border_mode': actions.handle_toggle_border_mode,
         'check': actions.handle_check_solution,
         'find': actions.handle_find_solution,
+        'hint': actions.handle_hint,
     }
 
     # --- MAIN GAME LOOP ---
     running = True
     while running:
         # --- EVENT HANDLING ---
-        for event in pygame.event.get():
+        # When nothing is left to redraw or animate, sleep until the next event
+        # instead of spinning at the frame rate.
+        events = pygame.event.get()
+        if not events and game_state.is_idle():
+            # While a solve runs, wake up regularly to refresh its progress indicator.
+            timeout = const.SOLVER_PROGRESS_INTERVAL_MS if game_state.solver_worker.is_busy() else const.IDLE_WAIT_MS
+            events = [pygame.event.wait(timeout)] + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
                 break
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED):
+                game_state.invalidate()
+            if event.type == SOLVER_DONE_EVENT:
+                actions.handle_solver_result(game_state, event)
+                game_state.invalidate()
+                continue
 
             # --- UI BUTTON EVENT HANDLING ---
             action = None
@@ -158,6 +174,7 @@ def main():
 
             if action in action_map:
                 action_map[action](game_state)
+                game_state.invalidate()
                 continue
 
             # --- SIZE AND COLOR SELECTOR EVENT HANDLING ---
@@ -168,6 +185,7 @@ def main():
                     for size_id, b_data in size_buttons.items():
                         if b_data['rect'].collidepoint(pos):
                             actions.handle_select_size(game_state, size_id)
+                            game_state.invalidate()
                             break
 
                 color_map = {'color_r': 0, 'color_b': 1, 'color_y': 2, 'color_g': 3}
@@ -215,23 +233,27 @@ def handle_mouse_input(event, game_state):
         if event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1: # Left-click starts drawing a border
                 game_state.is_left_down = True
+                if game_state.current_border_path: game_state.invalidate(game_state.grid_rect)
                 game_state.current_border_path = {(row, col)}
+                game_state.invalidate_cell(row, col)
             elif event.button == 3: # Right-click erases a border
                 game_state.is_right_down = True
-                game_state.custom_borders = [shape for shape in game_state.custom_borders if (row, col) not in shape]
+                erase_custom_border(game_state, row, col)
 
         elif event.type == pygame.MOUSEMOTION:
             if game_state.is_left_down and 0 <= row < game_state.grid_dim and 0 <= col < game_state.grid_dim:
-                game_state.current_border_path.add((row, col))
+                if (row, col) not in game_state.current_border_path:
+                    game_state.current_border_path.add((row, col))
+                    # Adding a cell also removes the shared edges of its neighbours.
+                    game_state.invalidate_cell(row, col, margin=1)
             elif game_state.is_right_down:
-                 game_state.custom_borders = [shape for shape in game_state.custom_borders if (row, col) not in shape]
+                erase_custom_border(game_state, row, col)
 
 
         elif event.type == pygame.MOUSEBUTTONUP:
             if event.button == 1: # Finish drawing a border
                 game_state.is_left_down = False
-                if game_state.current_border_path:
-                    game_state.custom_borders.append(game_state.current_border_path)
+                game_state.custom_borders.add(game_state.current_border_path)
                 game_state.current_border_path = set()
             elif event.button == 3:
                 game_state.is_right_down = False
@@ -239,22 +261,22 @@ def handle_mouse_input(event, game_state):
 
     # --- DRAW MODE LOGIC ---
     if game_state.is_draw_mode:
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1: game_state.is_left_down = True
-            if event.button == 3: game_state.is_right_down = True # Right-click is eraser
-            game_state.last_pos = pos
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+            if event.button == 1:
+                game_state.is_left_down = True
+                game_state.strokes.begin_stroke(pos, game_state.current_color_index, game_state.brush_size)
+            else: # Right-click is eraser
+                game_state.is_right_down = True
+                game_state.strokes.begin_stroke(pos, 0, game_state.brush_size * 6, erase=True)
+            game_state.invalidate(game_state.grid_rect) # The layer is shown from its raster while drawing
         elif event.type == pygame.MOUSEMOTION and (game_state.is_left_down or game_state.is_right_down):
-            color = const.DRAWING_COLORS[game_state.current_color_index] if game_state.is_left_down else (0,0,0,0)
-            current_brush_size = game_state.brush_size if game_state.is_left_down else game_state.brush_size * 6
-            if game_state.last_pos is not None:
-                # Draw a line to fill gaps between motion events
-                pygame.draw.line(game_state.draw_surface, color, game_state.last_pos, pos, current_brush_size * 2 + 1)
-            pygame.draw.circle(game_state.draw_surface, color, pos, current_brush_size)
-            game_state.last_pos = pos
+            dirty_rect = game_state.strokes.extend_stroke(pos)
+            if dirty_rect: game_state.invalidate(dirty_rect)
         elif event.type == pygame.MOUSEBUTTONUP:
             if event.button == 1: game_state.is_left_down = False
             if event.button == 3: game_state.is_right_down = False
-            game_state.last_pos = None
+            game_state.strokes.end_stroke()
+            game_state.invalidate(game_state.grid_rect) # Switch back to the finished, RLE-encoded layer
         return # Prevent fall-through to other modes
 
     # --- MARK MODE LOGIC ---
@@ -302,6 +324,18 @@ def handle_mouse_input(event, game_state):
         game_state.click_cell = None
         game_state.is_dragging = False
 
+def erase_custom_border(game_state, row, col):
+    """
+    Removes every custom border shape that contains the given cell.
+
+    :param GameState game_state: The current state of the game.
+    :param int row: The row index of the cell under the cursor.
+    :param int col: The column index of the cell under the cursor.
+    :returns None:
+    """
+    for shape in game_state.custom_borders.remove_at(row, col):
+        game_state.invalidate_cells(shape)
+
 # --- SCRIPT ENTRY POINT ---
 if __name__ == "__main__":
     if not Z3_AVAILABLE:
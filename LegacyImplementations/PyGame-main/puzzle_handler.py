@@ -80,14 +80,18 @@ def universal_import(input_string):
 
     This function acts as a universal entry point for loading puzzles from strings.
     It can handle complex strings that include the main puzzle data, player
-    annotations, and a serialized history of moves, separated by a tilde (~).
+    annotations, a serialized history of moves and serialized drawing strokes,
+    separated by tildes (~).
 
     :param str input_string: The string containing the puzzle data to import.
-    :returns Optional[dict]: A comprehensive dictionary with all puzzle data, including player grid and history, or None if the format is not recognized.
+    :returns Optional[dict]: A comprehensive dictionary with all puzzle data, including player grid, history and strokes, or None if the format is not recognized.
     """
     logging.info("Attempting to import puzzle string...")
     parts = input_string.strip().split('~')
-    main_part, history_part = parts[0], parts[1] if len(parts) > 1 else ""
+    main_part, history_part, stroke_part = parts[0], "", ""
+    for part in parts[1:]: # Drawing strokes are tagged 's:'; anything else is the move history
+        if part.startswith('s:'): stroke_part = part
+        elif not history_part: history_part = part
     puzzle_data, raw_annotation_data = None, ""
 
     # --- Try parsing as SBN format first ---
@@ -116,13 +120,15 @@ def universal_import(input_string):
             if history_part:
                 initial_grid = [[STATE_EMPTY] * dim for _ in range(dim)]
                 puzzle_data['history_manager'] = HistoryManager.deserialize(initial_grid, history_part)
+            if stroke_part:
+                puzzle_data['strokes'] = stroke_part
         return puzzle_data
 
     logging.error("Could not recognize puzzle format.")
     return None
 
 # --- PUZZLE SAVING ---
-def save_puzzle_entry(puzzle_data, player_grid, history_manager, comment):
+def save_puzzle_entry(puzzle_data, player_grid, history_manager, comment, stroke_layer=None):
     """
     Formats and appends a puzzle entry with annotations and history to a file.
 
@@ -134,6 +140,7 @@ def save_puzzle_entry(puzzle_data, player_grid, history_manager, comment):
     :param list[list[int]] player_grid: The 2D grid of the player's current state.
     :param HistoryManager history_manager: The history manager instance for the session.
     :param str comment: A user-provided comment to include in the saved entry.
+    :param Optional[StrokeLayer] stroke_layer: The free-form drawings to save with the puzzle.
     :returns None:
     """
     try:
@@ -147,10 +154,10 @@ def save_puzzle_entry(puzzle_data, player_grid, history_manager, comment):
         raw_annotation_data = encode_player_annotations(player_grid)
         web_task_export = f"{puzzle_data.get('task', '')}{raw_annotation_data}"
 
-        history_str = history_manager.serialize()
-        if history_str:
-            sbn_export += f"~{history_str}"
-            web_task_export += f"~{history_str}"
+        for extra_str in (history_manager.serialize(), stroke_layer.serialize() if stroke_layer else ""):
+            if extra_str:
+                sbn_export += f"~{extra_str}"
+                web_task_export += f"~{extra_str}"
 
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         entry = (
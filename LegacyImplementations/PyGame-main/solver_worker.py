@@ -0,0 +1,128 @@
+"""
+**********************************************************************************
+* Title: solver_worker.py
+*
+* Metadata:
+* @author Isaiah Tadrous
+* @version 1.0.0
+* -------------------------------------------------------------------------------
+* Description:
+* This module runs Z3 solves off the main thread so that the Pygame window
+* keeps drawing and responding to input while a large puzzle is solved. The
+* SolverWorker starts one daemon thread per job, runs the solver there, and
+* delivers the result back to the main loop as a SOLVER_DONE_EVENT user event.
+* Z3 releases the GIL while it searches, so the render loop keeps its frame
+* rate. A running job can be cancelled, which interrupts the Z3 search; the
+* results of cancelled or superseded jobs are tagged with their job id so the
+* main loop can discard them.
+*
+**********************************************************************************
+"""
+# solver_worker.py
+# Description: Runs solver jobs on a background thread and reports back via Pygame events.
+
+# --- IMPORTS ---
+import threading
+import time
+import pygame
+from z3_solver import Z3StarBattleSolver
+
+# Posted to the Pygame event queue when a solver job finishes.
+SOLVER_DONE_EVENT = pygame.USEREVENT + 1
+
+# --- SOLVER WORKER CLASS DEFINITION ---
+class SolverWorker:
+    """
+    Runs at most one solver job at a time on a background thread.
+    """
+    def __init__(self):
+        """
+        Initializes an idle worker.
+        """
+        self.job_id = 0
+        self.kind = None
+        self.started_at = None
+        self._solver = None
+        self._lock = threading.Lock()
+
+    def start(self, kind, region_grid, stars_per_region, player_grid=None):
+        """
+        Starts a new solve, cancelling any job that is still running.
+
+        When the solve finishes, a SOLVER_DONE_EVENT is posted with the
+        attributes job_id, kind, solutions, player_grid, duration and cancelled.
+
+        :param str kind: The action that requested the solve (e.g. 'check' or 'find').
+        :param list[list[int]] region_grid: The 2D grid defining the puzzle regions.
+        :param int stars_per_region: The number of stars required per region/row/column.
+        :param Optional[list[list[int]]] player_grid: A snapshot of the player's grid to deliver with the result.
+        :returns int: The id of the new job.
+        """
+        self.cancel()
+        solver = Z3StarBattleSolver(region_grid, stars_per_region)
+        with self._lock:
+            self.job_id += 1
+            self.kind, self.started_at, self._solver = kind, time.monotonic(), solver
+            job_id = self.job_id
+        thread = threading.Thread(target=self._run, args=(job_id, kind, solver, player_grid), daemon=True)
+        thread.start()
+        return job_id
+
+    def cancel(self):
+        """
+        Interrupts the running job, if any. Its result is still posted, marked as cancelled.
+
+        :returns None:
+        """
+        with self._lock:
+            solver, self._solver, self.kind, self.started_at = self._solver, None, None, None
+        if solver is not None: solver.cancel()
+
+    def is_busy(self):
+        """
+        Checks whether a job is currently running.
+
+        :returns bool: True while a solve is in progress.
+        """
+        return self._solver is not None
+
+    def elapsed(self):
+        """
+        Returns how long the current job has been running.
+
+        :returns float: The elapsed time in seconds, or 0 if the worker is idle.
+        """
+        started_at = self.started_at
+        return time.monotonic() - started_at if started_at is not None else 0.0
+
+    def is_current(self, event):
+        """
+        Checks whether a SOLVER_DONE_EVENT belongs to the most recent job.
+
+        :param pygame.event.Event event: The event to check.
+        :returns bool: True if the event is the result of the latest, non-cancelled job.
+        """
+        return event.job_id == self.job_id and not event.cancelled
+
+    def _run(self, job_id, kind, solver, player_grid):
+        """
+        Runs one solve on the worker thread and posts its result.
+
+        :param int job_id: The id of the job.
+        :param str kind: The action that requested the solve.
+        :param Z3StarBattleSolver solver: The solver to run.
+        :param Optional[list[list[int]]] player_grid: The player grid snapshot to deliver.
+        :returns None:
+        """
+        start_time = time.monotonic()
+        try:
+            solutions, stats = solver.solve()
+        except Exception as e:
+            print(f"Solver error: {e}")
+            solutions, stats = [], {'cancelled': True}
+        duration = time.monotonic() - start_time
+        with self._lock:
+            if self._solver is solver: self._solver, self.kind, self.started_at = None, None, None
+        pygame.event.post(pygame.event.Event(SOLVER_DONE_EVENT, job_id=job_id, kind=kind, solutions=solutions,
+                                             player_grid=player_grid, duration=duration,
+                                             cancelled=bool(stats.get('cancelled'))))
@@ -0,0 +1,310 @@
+"""
+**********************************************************************************
+* Title: stroke_layer.py
+*
+* Metadata:
+* @author Isaiah Tadrous
+* @version 1.0.0
+* -------------------------------------------------------------------------------
+* Description:
+* This module defines the StrokeLayer class, which stores the free-form
+* drawings made in draw mode as vector strokes instead of pixels. Each stroke
+* is a brush colour, a radius and a polyline of points packed into an array,
+* and a list of strokes with a pointer gives the same undo/redo behaviour as
+* the HistoryManager. The strokes are rasterised into a cached layer only when
+* they change. Because every drawing colour shares one alpha value, the strokes
+* are drawn onto an 8-bit palette surface, a quarter of the size of a full
+* RGBA surface, that is only allocated while something is visible. When a
+* stroke is finished, the raster is converted once into a run-length encoded
+* per-pixel alpha surface for display, whose memory and blit cost grow with
+* the amount drawn rather than with the window size. Strokes can be
+* serialized into a compact string that is exported alongside the SBN.
+*
+**********************************************************************************
+"""
+# stroke_layer.py
+# Description: Vector storage, undo history and cached rasterisation of free-form drawings.
+
+# --- IMPORTS ---
+from array import array
+import pygame
+from constants import DRAWING_COLORS
+from history_manager import write_varint, read_varints
+
+# --- STROKE KINDS ---
+STROKE_DRAW = 0   # Paints with one of the DRAWING_COLORS
+STROKE_ERASE = 1  # Erases everything under the brush
+STROKE_CLEAR = 2  # Clears the whole layer (recorded so that it can be undone)
+
+# Palette index 0 is the transparent colour key; indices 1-4 hold the drawing colours.
+_KEY_COLOR = (255, 0, 255)
+
+# --- STROKE CLASS DEFINITION ---
+class Stroke:
+    """A single brush stroke: its kind, colour, radius and polyline."""
+    __slots__ = ('kind', 'color_index', 'radius', 'points')
+
+    def __init__(self, kind, color_index=0, radius=0, points=None):
+        """
+        Initializes a stroke.
+
+        :param int kind: STROKE_DRAW, STROKE_ERASE or STROKE_CLEAR.
+        :param int color_index: The index into DRAWING_COLORS (draw strokes only).
+        :param int radius: The brush radius in pixels.
+        :param Optional[array] points: The flattened x, y coordinates of the polyline.
+        """
+        self.kind, self.color_index, self.radius = kind, color_index, radius
+        self.points = points if points is not None else array('h')
+
+    def rasterize(self, surface, start=1):
+        """
+        Draws the stroke, or the part of it from point 'start' on, onto a surface.
+
+        Every point after the first draws a line from the previous point and a
+        round brush tip, exactly as the mouse motion events did when it was drawn.
+
+        :param pygame.Surface surface: The 8-bit layer surface to draw on.
+        :param int start: The index of the first point to draw.
+        :returns Optional[pygame.Rect]: The area that was drawn, or None.
+        """
+        if self.kind == STROKE_CLEAR:
+            surface.fill(_KEY_COLOR)
+            return surface.get_rect()
+        color = _KEY_COLOR if self.kind == STROKE_ERASE else DRAWING_COLORS[self.color_index][:3]
+        points, dirty = self.points, None
+        for i in range(max(start, 1), len(points) // 2):
+            previous, point = (points[2 * i - 2], points[2 * i - 1]), (points[2 * i], points[2 * i + 1])
+            rect = pygame.draw.line(surface, color, previous, point, self.radius * 2 + 1)
+            rect.union_ip(pygame.draw.circle(surface, color, point, self.radius))
+            dirty = rect if dirty is None else dirty.union(rect)
+        return dirty
+
+# --- STROKE LAYER CLASS DEFINITION ---
+class StrokeLayer:
+    """
+    Manages the free-form drawing strokes, their undo history and their cached raster.
+    """
+    def __init__(self, size):
+        """
+        Initializes an empty layer.
+
+        :param tuple[int, int] size: The size of the drawing area in pixels.
+        """
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        """
+        Removes all strokes and their history.
+
+        :returns None:
+        """
+        self.strokes = []
+        self.pointer = 0
+        self.surface = None # Cached 8-bit raster, allocated only while a stroke is visible
+        self._display = None # RLE-encoded copy of the raster for blitting, rebuilt after each change
+        self._active = None # The stroke being drawn, committed by end_stroke
+
+    # --- DRAWING ---
+    def begin_stroke(self, pos, color_index, radius, erase=False):
+        """
+        Starts a new stroke at a position. Nothing is drawn until the brush moves.
+
+        :param tuple[int, int] pos: The starting position.
+        :param int color_index: The index into DRAWING_COLORS.
+        :param int radius: The brush radius in pixels.
+        :param bool erase: True for an eraser stroke.
+        :returns None:
+        """
+        self.end_stroke()
+        self._active = Stroke(STROKE_ERASE if erase else STROKE_DRAW, color_index, radius)
+        self._active.points.extend(pos)
+
+    def extend_stroke(self, pos):
+        """
+        Adds a point to the stroke being drawn and rasterises the new segment.
+
+        :param tuple[int, int] pos: The new brush position.
+        :returns Optional[pygame.Rect]: The area that changed, or None if no stroke is active.
+        """
+        stroke = self._active
+        if stroke is None: return None
+        stroke.points.extend(pos)
+        if self.surface is None:
+            if stroke.kind == STROKE_ERASE: return None # Nothing visible to erase
+            self.surface = self._new_surface()
+        self._display = None
+        return stroke.rasterize(self.surface, len(stroke.points) // 2 - 1)
+
+    def end_stroke(self):
+        """
+        Commits the stroke being drawn as an undoable entry, discarding any redo entries.
+
+        Strokes that never moved draw nothing and are not recorded.
+
+        :returns None:
+        """
+        stroke, self._active = self._active, None
+        if stroke is None or len(stroke.points) < 4: return
+        self._commit(stroke)
+
+    def clear(self):
+        """
+        Clears the layer as an undoable entry.
+
+        :returns bool: True if anything was visible before clearing.
+        """
+        self.end_stroke()
+        if self.surface is None: return False
+        self._commit(Stroke(STROKE_CLEAR))
+        self.surface, self._display = None, None
+        return True
+
+    def display_surface(self):
+        """
+        Returns the surface to blit over the board.
+
+        While a stroke is being drawn this is the raster itself, so each motion
+        event only redraws a small area. Otherwise it is the RLE-encoded copy,
+        which is built on first use after a change. The two blend differently
+        by up to one colour level, so the whole layer should be redrawn when a
+        stroke begins or ends.
+
+        :returns Optional[pygame.Surface]: The drawing layer, or None if nothing is visible.
+        """
+        if self.surface is None or self._active is not None: return self.surface
+        if self._display is None:
+            self._display = self.surface.convert_alpha()
+            self._display.fill((255, 255, 255, DRAWING_COLORS[0][3]), special_flags=pygame.BLEND_RGBA_MULT)
+            self._display.set_alpha(255, pygame.RLEACCEL)
+        return self._display
+
+    # --- UNDO AND REDO ---
+    def can_undo(self):
+        """
+        Checks if an undo operation can be performed.
+
+        :returns bool: True if there are strokes to undo, False otherwise.
+        """
+        return self.pointer > 0
+
+    def can_redo(self):
+        """
+        Checks if a redo operation can be performed.
+
+        :returns bool: True if there are strokes to redo, False otherwise.
+        """
+        return self.pointer < len(self.strokes)
+
+    def undo(self):
+        """Removes the most recent stroke from the drawing if possible."""
+        if self.can_undo():
+            self.pointer -= 1
+            self._rebuild()
+
+    def redo(self):
+        """Restores the next undone stroke if possible."""
+        if self.can_redo():
+            self.pointer += 1
+            self._rebuild()
+
+    # --- SERIALIZATION ---
+    def serialize(self):
+        """
+        Serializes the strokes into a compact string.
+
+        The format is "s:<data>": base64 varints holding the pointer, then for
+        each stroke a header (kind | color << 2 | radius << 4), the number of
+        points and the zigzag-encoded x and y deltas between points.
+
+        :returns str: The serialized strokes, or an empty string if there are none.
+        """
+        if not self.strokes: return ""
+        out = []
+        write_varint(out, self.pointer)
+        for stroke in self.strokes:
+            write_varint(out, stroke.kind | stroke.color_index << 2 | stroke.radius << 4)
+            write_varint(out, len(stroke.points) // 2)
+            previous = [0, 0]
+            for i, value in enumerate(stroke.points):
+                delta = value - previous[i % 2]
+                previous[i % 2] = value
+                write_varint(out, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+        return f"s:{''.join(out)}"
+
+    @classmethod
+    def deserialize(cls, size, stroke_string):
+        """
+        Creates a StrokeLayer from a serialized string.
+
+        :param tuple[int, int] size: The size of the drawing area in pixels.
+        :param str stroke_string: The serialized strokes.
+        :returns StrokeLayer: A new layer, which is empty if the string is invalid.
+        """
+        layer = cls(size)
+        if not stroke_string or not stroke_string.startswith('s:'): return layer
+        try:
+            values = read_varints(stroke_string[2:])
+            pointer, i = values[0], 1
+            while i < len(values):
+                header, count = values[i], values[i + 1]
+                stroke = Stroke(header & 3, header >> 2 & 3, header >> 4)
+                if stroke.kind > STROKE_CLEAR: raise ValueError("Unknown stroke kind")
+                previous = [0, 0]
+                for j, value in enumerate(values[i + 2:i + 2 + 2 * count]):
+                    previous[j % 2] += value >> 1 if not value & 1 else -((value + 1) >> 1)
+                    stroke.points.append(previous[j % 2])
+                if len(stroke.points) != 2 * count: raise ValueError("Truncated stroke data")
+                layer.strokes.append(stroke)
+                i += 2 + 2 * count
+            layer.pointer = min(pointer, len(layer.strokes))
+            layer._rebuild()
+        except (KeyError, IndexError, ValueError, OverflowError) as e:
+            print(f"Error deserializing strokes: {e}")
+            return cls(size)
+        return layer
+
+    # --- INTERNAL HELPERS ---
+    def _commit(self, stroke):
+        """
+        Appends an entry at the pointer, discarding any redo entries.
+
+        :param Stroke stroke: The entry to record.
+        :returns None:
+        """
+        del self.strokes[self.pointer:]
+        self.strokes.append(stroke)
+        self.pointer += 1
+
+    def _new_surface(self):
+        """
+        Allocates an empty 8-bit layer surface with the drawing colours in its palette.
+
+        :returns pygame.Surface: The transparent layer surface.
+        """
+        surface = pygame.Surface(self.size, depth=8)
+        surface.set_palette([_KEY_COLOR] + [color[:3] for color in DRAWING_COLORS])
+        surface.fill(_KEY_COLOR)
+        surface.set_colorkey(_KEY_COLOR)
+        surface.set_alpha(DRAWING_COLORS[0][3])
+        return surface
+
+    def _rebuild(self):
+        """
+        Rasterises the strokes up to the pointer into a fresh layer.
+
+        Strokes before the last clear are skipped, and no surface is kept if
+        nothing is drawn.
+
+        :returns None:
+        """
+        applied = self.strokes[:self.pointer]
+        last_clear = max((i for i, stroke in enumerate(applied) if stroke.kind == STROKE_CLEAR), default=-1)
+        visible = applied[last_clear + 1:]
+        self._display = None
+        if not any(stroke.kind == STROKE_DRAW for stroke in visible):
+            self.surface = None
+            return
+        self.surface = self._new_surface()
+        for stroke in visible:
+            stroke.rasterize(self.surface)
@@ -5,7 +5,7 @@
 * Metadata:
 * @author Joseph Bryant
 * @refactored by Isaiah Tadrous
-* @version 1.5.0
+* @version 1.6.0
 * -------------------------------------------------------------------------------
 * Description:
 * This module is responsible for all visual rendering and UI construction in
@@ -25,18 +25,20 @@
 # --- IMPORTS ---
 import pygame
 import math
+from functools import lru_cache
 from ui_elements import Button
+from custom_borders import outline_rects
 from z3_solver import Z3_AVAILABLE
 
 from constants import (
     GRID_AREA_WIDTH, GRID_AREA_HEIGHT, PANEL_WIDTH, WINDOW_HEIGHT, GUTTER,
     BORDER_NORMAL, BORDER_THICK, PYGAME_UNIFIED_COLORS, COLOR_GRID_LINES,
     COLOR_BLACK, COLOR_STAR, COLOR_X, COLOR_DOT, COLOR_PANEL, COLOR_BUTTON,
-    COLOR_BUTTON_HOVER, COLOR_BUTTON_TEXT, COLOR_CORRECT, COLOR_INCORRECT,
+    COLOR_BUTTON_HOVER, COLOR_STATIC_KEY, COLOR_BUTTON_TEXT, COLOR_CORRECT, COLOR_INCORRECT,
     COLOR_SELECTED, COLOR_STAR_NUM, DIFFICULTY_COLORS, STATE_STAR,
     STATE_SECONDARY_MARK, PUZZLE_DEFINITIONS, COLOR_DISABLED_BUTTON,
     COLOR_DISABLED_TEXT, DRAWING_COLORS, COLOR_CUSTOM_BORDER,
-    BORDER_CUSTOM_THICKNESS, UNIFIED_COLORS_BG, BASE64_DISPLAY_ALPHABET
+    UNIFIED_COLORS_BG, BASE64_DISPLAY_ALPHABET, COLOR_HINT_STAR, COLOR_HINT_ELIMINATE
 )
 
 # --- CONSOLE INTERACTION ---
@@ -97,25 +99,98 @@ def display_terminal_grid(grid, title, content_grid=None):
 # --- UI DRAWING AND LAYOUT ---
 def draw_game(game_state):
     """
-    Main drawing function that orchestrates all visual updates for each frame.
+    Main drawing function that redraws the parts of the window that changed.
+
+    Only the areas recorded with GameState.invalidate (plus the control panel
+    when its contents change and the grid while the feedback overlay fades)
+    are redrawn and sent to the display. Nothing is drawn on idle frames.
 
     :param GameState game_state: The current state of the game.
     :returns None:
     """
-    game_state.screen.fill(COLOR_PANEL)
-    if game_state.region_grid:
-        draw_background_colors(game_state.screen, game_state.region_grid, game_state.cell_size)
-        draw_custom_borders(game_state)
-        draw_grid_lines(game_state.screen, game_state.region_grid, game_state.cell_size)
-        draw_user_surface(game_state.screen, game_state.draw_surface)
-        draw_player_marks(game_state.screen, game_state.player_grid, game_state.mark_is_x, game_state.cell_size)
-        draw_feedback_overlay(game_state)
+    screen = game_state.screen
+    panel_rect = pygame.Rect(GRID_AREA_WIDTH, 0, PANEL_WIDTH, WINDOW_HEIGHT)
+    panel_state = get_panel_state(game_state)
+    if game_state.feedback_overlay_alpha > 0:
+        game_state.invalidate(game_state.grid_rect)
+    if panel_state != game_state.last_panel_state:
+        game_state.invalidate(panel_rect)
+    if game_state.needs_full_redraw:
+        dirty_rects = [screen.get_rect()]
+        pygame.display.set_caption(f"Star Battle ({game_state.stars_per_region} Stars)")
+    else:
+        dirty_rects = game_state.dirty_rects
+    if not dirty_rects: return
+
+    grid_rect = game_state.grid_rect
+    for rect in dirty_rects:
+        area = rect.clip(grid_rect)
+        if not area: continue
+        if game_state.region_grid:
+            draw_board_area(game_state, area)
+        else:
+            screen.fill(COLOR_PANEL, area)
+    if any(rect.colliderect(panel_rect) for rect in dirty_rects):
+        draw_control_panel(game_state)
+        game_state.last_panel_state = panel_state
+    if game_state.needs_full_redraw:
+        pygame.display.flip()
+    else:
+        pygame.display.update(dirty_rects)
+    game_state.needs_full_redraw, game_state.dirty_rects = False, []
+
     if game_state.feedback_overlay_alpha > 0:
         fade_speed = 4
         game_state.feedback_overlay_alpha = max(0, game_state.feedback_overlay_alpha - fade_speed)
-    draw_control_panel(game_state)
-    pygame.display.set_caption(f"Star Battle ({game_state.stars_per_region} Stars)")
-    pygame.display.flip()
+        if game_state.feedback_overlay_alpha == 0: game_state.invalidate(grid_rect)
+
+def draw_board_area(game_state, area):
+    """
+    Redraws every layer of the puzzle grid inside one screen area.
+
+    :param GameState game_state: The current state of the game.
+    :param pygame.Rect area: The part of the grid to redraw.
+    :returns None:
+    """
+    screen = game_state.screen
+    screen.set_clip(area)
+    board_layer = game_state.custom_borders.layer(game_state.board_surface, game_state.cell_size)
+    screen.blit(board_layer, area, area)
+    draw_custom_borders(game_state)
+    screen.blit(game_state.grid_lines_surface, area, area)
+    draw_user_surface(screen, game_state.strokes.display_surface(), area)
+    draw_player_marks(screen, game_state.player_grid, game_state.mark_is_x, game_state.cell_size, area)
+    draw_hint_cells(screen, game_state.hint_cells, game_state.cell_size)
+    draw_feedback_overlay(game_state)
+    screen.set_clip(None)
+
+def get_panel_state(game_state):
+    """
+    Collects everything the control panel displays, to detect when it must be redrawn.
+
+    :param GameState game_state: The current state of the game.
+    :returns tuple: A comparable snapshot of the panel contents.
+    """
+    mouse_pos = pygame.mouse.get_pos()
+    hovered_size = next((size_id for size_id, b in game_state.ui_elements.get('size_selector', {}).items()
+                         if b['rect'].collidepoint(mouse_pos)), None)
+    hovered_buttons = tuple(name for name, elem in game_state.ui_elements.items() if isinstance(elem, Button) and elem.is_hovered)
+    history = game_state.strokes if game_state.is_draw_mode else game_state.history
+    return (hovered_size, hovered_buttons, history.can_undo(), history.can_redo(),
+            game_state.is_draw_mode, game_state.is_border_mode, game_state.mark_is_x, game_state.current_color_index,
+            game_state.current_size_selection, game_state.solution_status, get_solver_progress_text(game_state))
+
+def get_solver_progress_text(game_state):
+    """
+    Builds the progress indicator shown while a background solve runs.
+
+    :param GameState game_state: The current state of the game.
+    :returns Optional[str]: The progress text, or None if no solve is running.
+    """
+    worker = game_state.solver_worker
+    if not worker.is_busy(): return None
+    label = "Checking" if worker.kind == 'check' else "Solving"
+    return f"{label}{'.' * (int(worker.elapsed() * 2) % 3 + 1)} {worker.elapsed():.1f} s"
 
 def draw_control_panel(game_state):
     """
@@ -129,15 +204,16 @@ def draw_control_panel(game_state):
     ui_elements = game_state.ui_elements
     pygame.draw.rect(screen, COLOR_PANEL, (GRID_AREA_WIDTH, 0, PANEL_WIDTH, WINDOW_HEIGHT))
     mouse_pos = pygame.mouse.get_pos()
+    history = game_state.strokes if game_state.is_draw_mode else game_state.history # Undo/redo act on strokes in draw mode
     for name, elem in ui_elements.items():
         if isinstance(elem, Button):
             # Update button text and disabled state based on game state
             if name == 'toggle': elem.text = "Xs" if game_state.mark_is_x else "Dots"
             if name == 'toggle_mode': elem.text = "Mark Mode" if game_state.is_draw_mode else "Draw Mode"
             if name == 'border_mode': elem.text = "Mark Mode" if game_state.is_border_mode else "Add Border"
-            elem.is_disabled = (name in ['find', 'check'] and not Z3_AVAILABLE) or \
-                               (name == 'back' and (not game_state.history.can_undo() or game_state.is_draw_mode or game_state.is_border_mode)) or \
-                               (name == 'forward' and (not game_state.history.can_redo() or game_state.is_draw_mode or game_state.is_border_mode))
+            elem.is_disabled = (name in ['find', 'check'] and (not Z3_AVAILABLE or game_state.solver_worker.is_busy())) or \
+                               (name == 'back' and (not history.can_undo() or game_state.is_border_mode)) or \
+                               (name == 'forward' and (not history.can_redo() or game_state.is_border_mode))
             elem.draw(screen)
     # Draw title text
     if 'size_title' in ui_elements:
@@ -168,11 +244,15 @@ def draw_control_panel(game_state):
     if game_state.is_border_mode and 'border_mode' in ui_elements:
         selected_rect = ui_elements['border_mode'].rect
         pygame.draw.rect(screen, COLOR_SELECTED, selected_rect, 3, border_radius=8)
-    # Draw solution status text
-    if game_state.solution_status:
+    # Draw solution status text, or the progress of a running solve
+    status, color = game_state.solution_status, None
+    if game_state.solver_worker.is_busy():
+        status, color = get_solver_progress_text(game_state), COLOR_BUTTON_TEXT
+    if status:
         bottom_button_y = WINDOW_HEIGHT - 45 - 15 - 45 - 15
-        color = COLOR_CORRECT if "Correct" in game_state.solution_status else COLOR_INCORRECT
-        status_surf = fonts['default'].render(game_state.solution_status, True, color)
+        if status.startswith("Hint"): color = color or COLOR_SELECTED
+        color = color or (COLOR_CORRECT if "Correct" in status else COLOR_INCORRECT)
+        status_surf = fonts['default'].render(status, True, color)
         status_rect = status_surf.get_rect(center=(GRID_AREA_WIDTH + PANEL_WIDTH // 2, bottom_button_y))
         screen.blit(status_surf, status_rect)
 
@@ -264,24 +344,17 @@ def build_panel_from_layout(layout_def, fonts):
 
 def draw_custom_borders(game_state):
     """
-    Draws the user-created freeform borders on top of the grid.
+    Draws the border shape that is currently being drawn on top of the grid.
+
+    Finished shapes are part of the cached board layer (see draw_board_area),
+    so only the shape under construction has its outline computed per frame.
 
     :param GameState game_state: The current state of the game.
     :returns None:
     """
-    screen = game_state.screen
-    cell_size = game_state.cell_size
-    thickness = BORDER_CUSTOM_THICKNESS
-    all_shapes = game_state.custom_borders + [game_state.current_border_path]
-    for shape in all_shapes:
-        if not shape: continue
-        for r, c in shape:
-            x, y = c * cell_size, r * cell_size
-            # Only draw a line if there is no adjacent cell in the same shape
-            if (r - 1, c) not in shape: pygame.draw.rect(screen, COLOR_CUSTOM_BORDER, (x, y, cell_size, thickness))
-            if (r + 1, c) not in shape: pygame.draw.rect(screen, COLOR_CUSTOM_BORDER, (x, y + cell_size - thickness, cell_size, thickness))
-            if (r, c - 1) not in shape: pygame.draw.rect(screen, COLOR_CUSTOM_BORDER, (x, y, thickness, cell_size))
-            if (r, c + 1) not in shape: pygame.draw.rect(screen, COLOR_CUSTOM_BORDER, (x + cell_size - thickness, y, thickness, cell_size))
+    if not game_state.current_border_path: return
+    for rect in outline_rects(game_state.current_border_path, game_state.cell_size):
+        pygame.draw.rect(game_state.screen, COLOR_CUSTOM_BORDER, rect)
 
 def calculate_star_points(center_x, center_y, outer_radius, inner_radius):
     """
@@ -318,6 +391,27 @@ def draw_star_indicator(screen, rect, count, font):
     num_surf = font.render(str(count), True, COLOR_STAR_NUM)
     screen.blit(num_surf, num_surf.get_rect(center=(center_x, center_y + 1)))
 
+def render_static_board(region_grid, cell_size):
+    """
+    Pre-renders the parts of the board that only change when a puzzle is loaded.
+
+    The region colours go on an opaque surface and the grid lines and region
+    borders on a colour-keyed surface, so that custom borders can still be
+    drawn between the two layers every frame.
+
+    :param list[list[int]] region_grid: The 2D grid defining puzzle regions.
+    :param float cell_size: The size of each cell in pixels.
+    :returns tuple[pygame.Surface, pygame.Surface]: The background and grid line surfaces.
+    """
+    background = pygame.Surface((GRID_AREA_WIDTH, GRID_AREA_HEIGHT)).convert()
+    background.fill(COLOR_PANEL)
+    draw_background_colors(background, region_grid, cell_size)
+    grid_lines = pygame.Surface((GRID_AREA_WIDTH, GRID_AREA_HEIGHT)).convert()
+    grid_lines.fill(COLOR_STATIC_KEY)
+    draw_grid_lines(grid_lines, region_grid, cell_size)
+    grid_lines.set_colorkey(COLOR_STATIC_KEY, pygame.RLEACCEL)
+    return background, grid_lines
+
 def draw_background_colors(screen, region_grid, cell_size):
     """
     Fills the background of each grid cell based on its region number.
@@ -359,7 +453,39 @@ def draw_grid_lines(screen, region_grid, cell_size):
     # Draw outer border
     pygame.draw.rect(screen, COLOR_BLACK, (0, 0, GRID_AREA_WIDTH, GRID_AREA_HEIGHT), BORDER_THICK)
 
-def draw_player_marks(screen, player_grid, mark_is_x, cell_size):
+@lru_cache(maxsize=4)
+def get_mark_sprites(cell_size):
+    """
+    Pre-renders the star, X and dot marks for one cell size.
+
+    Each sprite covers a whole cell and uses a colour key, so a mark is drawn
+    with a single blit at the cell's top-left corner. The cache holds the last
+    few cell sizes, so sprites are only rendered again when the board size changes.
+
+    :param float cell_size: The size of each cell in pixels.
+    :returns dict: A mapping from 'star', 'x' and 'dot' to their pygame.Surface sprites.
+    """
+    size = math.ceil(cell_size) + 1
+    center = cell_size / 2
+    sprites = {}
+    for name in ('star', 'x', 'dot'):
+        sprite = pygame.Surface((size, size)).convert()
+        sprite.fill(COLOR_STATIC_KEY)
+        if name == 'star':
+            outer_rad = cell_size / 2 - GUTTER * 1.5
+            pygame.draw.polygon(sprite, COLOR_STAR, calculate_star_points(center, center, outer_rad, outer_rad / 2))
+        elif name == 'x':
+            margin = GUTTER * 2.5
+            line_width = max(1, int(cell_size / 15))
+            pygame.draw.line(sprite, COLOR_X, (margin, margin), (cell_size - margin, cell_size - margin), line_width)
+            pygame.draw.line(sprite, COLOR_X, (cell_size - margin, margin), (margin, cell_size - margin), line_width)
+        else:
+            pygame.draw.circle(sprite, COLOR_DOT, (center, center), cell_size / 6)
+        sprite.set_colorkey(COLOR_STATIC_KEY, pygame.RLEACCEL)
+        sprites[name] = sprite
+    return sprites
+
+def draw_player_marks(screen, player_grid, mark_is_x, cell_size, area=None):
     """
     Draws the stars and secondary marks (X's or dots) based on the player's grid.
 
@@ -367,39 +493,45 @@ def draw_player_marks(screen, player_grid, mark_is_x, cell_size):
     :param list[list[int]] player_grid: The 2D grid of the player's marks.
     :param bool mark_is_x: True to draw X's, False to draw dots.
     :param float cell_size: The size of each cell in pixels.
+    :param Optional[pygame.Rect] area: Only draw the cells overlapping this area (default: all cells).
     :returns None:
     """
     if not player_grid: return
     dim = len(player_grid)
-    for r in range(dim):
-        for c in range(dim):
-            cell_state = player_grid[r][c]
-            center_x, center_y = c * cell_size + cell_size / 2, r * cell_size + cell_size / 2
-            if cell_state == STATE_STAR:
-                outer_rad = cell_size / 2 - GUTTER * 1.5
-                inner_rad = outer_rad / 2
-                pygame.draw.polygon(screen, COLOR_STAR, calculate_star_points(center_x, center_y, outer_rad, inner_rad))
-            elif cell_state == STATE_SECONDARY_MARK:
-                if mark_is_x:
-                    margin = GUTTER * 2.5
-                    line_width = max(1, int(cell_size / 15))
-                    start1, end1 = (c * cell_size + margin, r * cell_size + margin), ((c+1) * cell_size - margin, (r+1) * cell_size - margin)
-                    start2, end2 = ((c+1) * cell_size - margin, r * cell_size + margin), (c * cell_size + margin, (r+1) * cell_size - margin)
-                    pygame.draw.line(screen, COLOR_X, start1, end1, line_width)
-                    pygame.draw.line(screen, COLOR_X, start2, end2, line_width)
-                else:
-                    pygame.draw.circle(screen, COLOR_DOT, (center_x, center_y), cell_size / 6)
+    rows, cols = range(dim), range(dim)
+    if area is not None:
+        rows = range(max(0, int(area.top // cell_size)), min(dim, int((area.bottom - 1) // cell_size) + 1))
+        cols = range(max(0, int(area.left // cell_size)), min(dim, int((area.right - 1) // cell_size) + 1))
+    sprites = get_mark_sprites(cell_size)
+    sprite_for_state = {STATE_STAR: sprites['star'], STATE_SECONDARY_MARK: sprites['x' if mark_is_x else 'dot']}
+    screen.blits([(sprite_for_state[player_grid[r][c]], (int(c * cell_size), int(r * cell_size)))
+                  for r in rows for c in cols if player_grid[r][c] in sprite_for_state], doreturn=False)
+
+def draw_hint_cells(screen, hint_cells, cell_size):
+    """
+    Outlines the cells of the current hint.
+
+    :param pygame.Surface screen: The surface to draw on.
+    :param dict hint_cells: Maps (r, c) to True for a star or False for an empty cell.
+    :param float cell_size: The size of each cell in pixels.
+    :returns None:
+    """
+    for (r, c), is_star in hint_cells.items():
+        rect = pygame.Rect(int(c * cell_size), int(r * cell_size), int(cell_size) + 1, int(cell_size) + 1)
+        pygame.draw.rect(screen, COLOR_HINT_STAR if is_star else COLOR_HINT_ELIMINATE, rect.inflate(-4, -4), 3)
 
-def draw_user_surface(screen, surface):
+def draw_user_surface(screen, surface, area=None):
     """
     Draws the transparent surface used for free-form drawing onto the main screen.
 
     :param pygame.Surface screen: The main screen surface.
     :param pygame.Surface surface: The transparent drawing surface.
+    :param Optional[pygame.Rect] area: Only draw this part of the surface (default: all of it).
     :returns None:
     """
     if surface:
-        screen.blit(surface, (0, 0))
+        if area is None: screen.blit(surface, (0, 0))
+        else: screen.blit(surface, area, area)
 
 def draw_feedback_overlay(_game_state):
     """
@@ -17,27 +17,34 @@
 
 # --- IMPORTS AND Z3 AVAILABILITY ---
 import hashlib
+import importlib.util
+import threading
 import time
 from collections import defaultdict
 
-try:
-    # Attempt to import the required components from the Z3 library.
-    from z3 import Solver, Bool, PbEq, Implies, And, Not, Or, sat
-    Z3_AVAILABLE = True
-except ImportError:
-    # If Z3 is not installed, print a warning and set up dummy objects/functions
-    # to prevent the application from crashing when solver-related code is called.
+# Importing Z3 is slow, so only check that it is installed here and load the
+# library itself the first time a puzzle is solved (see load_z3).
+Z3_AVAILABLE = importlib.util.find_spec('z3') is not None
+if not Z3_AVAILABLE:
     print("Warning: 'z3-solver' library not found.")
-    Z3_AVAILABLE = False
-    # Define placeholder classes and functions to avoid runtime errors.
-    class Solver: pass
-    def Bool(s): return None
-    def PbEq(s, i): return None
-    def Implies(a,b): return None
-    def And(s): return None
-    def Not(s): return None
-    def Or(s): return None
-    sat = "sat"
+
+_z3 = None
+_z3_lock = threading.Lock()
+
+def load_z3():
+    """
+    Imports the Z3 library on first use and returns the module.
+
+    :returns: The 'z3' module, or None if it is not installed.
+    :rtype: module | None
+    """
+    global _z3
+    if _z3 is None and Z3_AVAILABLE:
+        with _z3_lock:
+            if _z3 is None:
+                import z3
+                _z3 = z3
+    return _z3
 
 # --- HELPER FUNCTIONS ---
 def format_duration(seconds):
@@ -63,30 +70,70 @@ class Z3StarBattleSolver:
         :param int stars_per_region: The number of stars required per region/row/column.
         """
         self.region_grid, self.dim, self.stars_per_region = region_grid, len(region_grid), stars_per_region
+        self.cancelled = False
+        self._ctx = None
+        self._lock = threading.Lock()  # Makes the cancel flag and the context handoff atomic.
+
+    def cancel(self):
+        """
+        Interrupts a solve running on another thread.
+
+        The interrupted solve returns early with the solutions found so far and
+        {'cancelled': True} as its stats.
+
+        :returns None:
+        """
+        with self._lock:
+            self.cancelled = True
+            if self._ctx is not None: self._ctx.interrupt()
+
+    def _check(self, s, ctx):
+        """
+        Runs one Z3 check unless the solve has been cancelled.
+
+        The context is registered for cancel() under the lock and the flag is
+        read again afterwards, so a cancel() that arrives just before the check
+        starts still stops it instead of being lost.
+
+        :param z3.Solver s: The solver to check.
+        :param z3.Context ctx: The solver's context.
+        :returns: The check result, or None if the solve was cancelled first.
+        :rtype: z3.CheckSatResult | None
+        """
+        with self._lock:
+            self._ctx = ctx
+            if self.cancelled: return None
+        return s.check()
 
     def solve(self):
         """
         Formulates the puzzle constraints and uses Z3 to find up to two solutions.
 
-        :returns: A tuple containing a list of solutions and an empty stats dictionary.
+        Each solve uses its own Z3 context, so it can run on a worker thread and
+        be interrupted with cancel() without affecting other solves.
+
+        :returns: A tuple containing a list of solutions and a stats dictionary
+                  ({'cancelled': True} if the solve was interrupted).
                   Each solution is a 2D grid of 0s and 1s.
         :rtype: tuple[list, dict]
         """
         if not Z3_AVAILABLE: return [], {}
-        s = Solver()
-        grid_vars = [[Bool(f"c_{r}_{c}") for c in range(self.dim)] for r in range(self.dim)]
+        z3 = load_z3()
+        ctx = z3.Context()
+        s = z3.Solver(ctx=ctx)
+        grid_vars = [[z3.Bool(f"c_{r}_{c}", ctx) for c in range(self.dim)] for r in range(self.dim)]
 
         # Rule: N stars per row and column
         for i in range(self.dim):
-            s.add(PbEq([(grid_vars[i][c], 1) for c in range(self.dim)], self.stars_per_region))
-            s.add(PbEq([(grid_vars[r][i], 1) for r in range(self.dim)], self.stars_per_region))
+            s.add(z3.PbEq([(grid_vars[i][c], 1) for c in range(self.dim)], self.stars_per_region, ctx))
+            s.add(z3.PbEq([(grid_vars[r][i], 1) for r in range(self.dim)], self.stars_per_region, ctx))
 
         # Rule: N stars per region
         regions = defaultdict(list)
         for r in range(self.dim):
             for c in range(self.dim): regions[self.region_grid[r][c]].append(grid_vars[r][c])
         for r_vars in regions.values():
-            s.add(PbEq([(var, 1) for var in r_vars], self.stars_per_region))
+            s.add(z3.PbEq([(var, 1) for var in r_vars], self.stars_per_region, ctx))
 
         # Rule: Stars cannot be adjacent (including diagonally)
         for r in range(self.dim):
@@ -97,21 +144,21 @@ class Z3StarBattleSolver:
                         if dr == 0 and dc == 0: continue
                         nr, nc = r + dr, c + dc
                         if 0 <= nr < self.dim and 0 <= nc < self.dim:
-                            neighbors.append(Not(grid_vars[nr][nc]))
+                            neighbors.append(z3.Not(grid_vars[nr][nc]))
                 if neighbors:
-                    s.add(Implies(grid_vars[r][c], And(neighbors)))
+                    s.add(z3.Implies(grid_vars[r][c], z3.And(neighbors)))
 
         solutions = []
         # Find the first solution
-        if s.check() == sat:
+        if self._check(s, ctx) == z3.sat:
             model = s.model()
             solution = [[(1 if model.evaluate(grid_vars[r][c]) else 0) for c in range(self.dim)] for r in range(self.dim)]
             solutions.append(solution)
             
             # Block this solution and check for another to test for uniqueness
-            s.add(Or([Not(v) if solution[r][c] else v for r, row in enumerate(grid_vars) for c, v in enumerate(row)]))
-            if s.check() == sat:
+            s.add(z3.Or([z3.Not(v) if solution[r][c] else v for r, row in enumerate(grid_vars) for c, v in enumerate(row)]))
+            if self._check(s, ctx) == z3.sat:
                 model2 = s.model()
                 solutions.append([[(1 if model2.evaluate(grid_vars[r][c]) else 0) for c in range(self.dim)] for r in range(self.dim)])
 
-        return solutions, {}
+        return solutions, ({'cancelled': True} if self.cancelled else {})
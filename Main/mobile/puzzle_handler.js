@@ -145,6 +145,9 @@ function serializeHistory(history) {
 function deserializeHistory(historyString) {
     const history = { changes: [], pointer: 0 };
     try {
+        if (historyString && historyString.startsWith('h2:')) {
+            return deserializeHistoryV2(historyString.substring(3)) || history;
+        }
         if (!historyString || !historyString.startsWith('h:')) {
             return history;
         }
@@ -170,6 +173,47 @@ function deserializeHistory(historyString) {
     return history;
 }
 
+/**
+ * Decodes the 'h2:' history format exported by the PyGame and API versions.
+ * The data is a sequence of base64 varints (5 payload bits per character, bit 6
+ * marks continuation): the pointer, then runs of changes sharing the same
+ * from/to states. Each run is a header '(length - 1) << 4 | from << 2 | to'
+ * followed by zigzag deltas of the cell index 'r << 5 | c'.
+ * @param {string} data - The history string without its 'h2:' prefix.
+ * @returns {{changes: object[], pointer: number}|null} The history, or null if malformed.
+ */
+function deserializeHistoryV2(data) {
+    const values = [];
+    let value = 0, shift = 0;
+    for (const ch of data) {
+        const digit = SBN_CHAR_TO_INT[ch];
+        if (digit === undefined) return null;
+        value |= (digit & 31) << shift;
+        if (digit & 32) {
+            shift += 5;
+        } else {
+            values.push(value);
+            value = 0;
+            shift = 0;
+        }
+    }
+    if (shift || values.length === 0) return null;
+
+    const changes = [];
+    let cell = 0, i = 1;
+    while (i < values.length) {
+        const header = values[i++];
+        for (let n = (header >> 4) + 1; n > 0; n--) {
+            if (i >= values.length) return null;
+            const delta = values[i++];
+            cell += (delta & 1) ? -((delta + 1) >> 1) : (delta >> 1);
+            if (cell < 0 || cell >= 1024) return null;
+            changes.push({ r: cell >> 5, c: cell & 31, from: (header >> 2) & 3, to: header & 3 });
+        }
+    }
+    return { changes, pointer: Math.min(values[0], changes.length) };
+}
+
 
 /**
  * Decodes a compact annotation string into a full player grid.
@@ -4,7 +4,7 @@
 #
 #   Author: Isaiah Tadrous
 #   Date: July 7, 2025
-#   Version: 1.0.0
+#   Version: 1.3.0
 #
 # --------------------------------------------------------------------------------------------------
 #
@@ -49,6 +49,17 @@
 #     when enabled, will remove all *checked* puzzles from the source files. This is
 #     useful for iteratively cleaning large candidate lists.
 #
+#   - Per-Size Solver Selection: Each puzzle is checked with the solver that won most
+#     races for its size in `portfolio_solver.py` (STRATEGY_TABLE): the bitmask
+#     backtracker up to 17x17, and the human-logic engine, backed by Z3, above that.
+#
+#   - Solution Counting Mode: `--count-solutions` counts every solution of each puzzle
+#     (up to `--count-limit`, within `--count-timeout`) instead of stopping at two, and
+#     records the count of each non-unique puzzle in `solution_counts.txt`. Counts that
+#     hit the limit or timeout are marked with a '+'. Puzzles up to 21x21 are counted with
+#     the memoized backtracker from `bitmask_solver.py`, which is far faster than asking
+#     Z3 again after every solution; larger ones fall back to Z3.
+#
 #   - Robust & User-Friendly CLI: Built with `argparse` to provide a clear and flexible
 #     command-line interface, including options for controlling worker processes and
 #     search behavior.
@@ -63,20 +74,19 @@ import math
 import platform
 from collections import defaultdict, deque
 
-# External dependencies (required):
-#   - Z3-Solver: The core engine for solving the puzzle constraints.
+# External dependencies:
+#   - Z3-Solver (required): The core engine for solving the puzzle constraints.
 #     (pip install z3-solver)
-#   - TQDM: A library for creating smart, extensible progress bars.
+#   - TQDM (optional): A library for creating smart, extensible progress bars.
 #     (pip install tqdm)
 try:
-    from z3 import Solver, Bool, PbEq, Implies, And, Not, Or, sat
-    from tqdm import tqdm
+    from z3 import Solver, Bool, PbEq, Implies, And, Not, Or, sat, unknown
     Z3_AVAILABLE = True
 except ImportError:
-    # If Z3 or TQDM is not installed, the script cannot function.
+    # If Z3 is not installed, the script cannot function.
     # I created dummy classes and a flag to handle this gracefully.
-    print("FATAL ERROR: Required libraries 'z3-solver' or 'tqdm' are not installed.")
-    print("Please run: pip install z3-solver tqdm")
+    print("FATAL ERROR: Required library 'z3-solver' is not installed.")
+    print("Please run: pip install z3-solver")
     Z3_AVAILABLE = False
     class Solver: pass
     def Bool(s): return None
@@ -86,6 +96,29 @@ except ImportError:
     def Not(s): return None
     def Or(s): return None
     sat = "sat"
+    unknown = "unknown"
+
+try:
+    # The native backtracker from bitmask_solver.py and the human-logic engine from
+    # logic_solver.py (same folder) are faster than Z3 on most puzzle sizes (see
+    # STRATEGY_TABLE). Without them, every puzzle is solved with Z3.
+    from bitmask_solver import BitmaskStarBattleSolver
+except ImportError:
+    BitmaskStarBattleSolver = None
+try:
+    from logic_solver import LogicSolver, Contradiction
+except ImportError:
+    LogicSolver = None
+try:
+    # CNF encoding with a SAT backend (pysat or pycosat if installed, else pure Python).
+    from cnf_solver import CNFStarBattleSolver
+except ImportError:
+    CNFStarBattleSolver = None
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    # The progress bar is optional; without it, results are simply iterated.
     def tqdm(iterable, **kwargs):
         return iterable
 
@@ -158,45 +191,178 @@ class Z3StarBattleSolver:
                 if neighbors:
                     self.solver.add(Implies(self.X[r][c], And([Not(n) for n in neighbors])))
 
-    def solve(self):
+    def _enumerate(self, limit, timeout_ms, on_solution):
+        """
+        Enumerates solutions one Z3 check at a time.
+
+        Every solution has exactly dim * stars stars, so a solution is blocked by
+        forbidding its star set alone ("not all of these cells are stars"): a
+        clause of dim * stars literals instead of one over all dim * dim cells.
+
+        Args:
+            limit (int | None): Stop after this many solutions; None enumerates them all.
+            timeout_ms (int, optional): A time budget for the whole search in milliseconds.
+            on_solution (callable): Called with the set of (r, c) star cells of each solution.
+
+        Returns:
+            tuple: (number of solutions found, True if the time budget ran out).
+        """
+        self._add_constraints()
+        deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        found = 0
+        while limit is None or found < limit:
+            if deadline is not None:
+                # Z3's timeout applies per check() call, so give each call what is left of the budget.
+                self.solver.set(timeout=max(1, int((deadline - time.monotonic()) * 1000)))
+            result = self.solver.check()
+            if result == unknown:
+                return found, True
+            if result != sat:
+                break
+            model = self.solver.model()
+            stars = [(r, c) for r, row in enumerate(self.X) for c, cell in enumerate(row) if model.evaluate(cell)]
+            found += 1
+            on_solution(stars)
+            self.solver.add(Or([Not(self.X[r][c]) for r, c in stars]))
+        return found, False
+
+    def solve(self, timeout_ms=None):
         """
         Runs the Z3 solver to find up to two unique solutions for the puzzle.
 
+        Args:
+            timeout_ms (int, optional): A time budget for the whole search in
+                                        milliseconds. If it runs out, the search
+                                        stops and 'timed_out' is set in the metadata.
+
         Returns:
             A tuple containing:
             - list: A list of solutions found. Each solution is a 2D grid.
-            - dict: A dictionary for metadata (currently unused).
+            - dict: Metadata: {'timed_out': bool}.
         """
         if not Z3_AVAILABLE:
             return [], {}
-        
-        # Add all the defined rules to the solver instance.
-        self._add_constraints()
 
         solutions = []
+        def record(stars):
+            board = [[0] * self.dim for _ in range(self.dim)]
+            for r, c in stars:
+                board[r][c] = 1
+            solutions.append(board)
+
         # It is only necessary to find a maximum of two solutions to determine uniqueness.
-        while len(solutions) < 2 and self.solver.check() == sat:
-            model = self.solver.model()
-            # Reconstruct the solution board from the Z3 model.
-            solution_board = [[(1 if model.evaluate(self.X[r][c]) else 0) for c in range(self.dim)] for r in range(self.dim)]
-            solutions.append(solution_board)
+        _, timed_out = self._enumerate(2, timeout_ms, record)
+        return solutions, {'timed_out': timed_out}
+
+    def count_solutions(self, limit=None, timeout_ms=None):
+        """
+        Counts the puzzle's solutions without keeping them.
+
+        Args:
+            limit (int, optional): Stop once this many solutions are found; None counts
+                                   them all.
+            timeout_ms (int, optional): A time budget for the whole search in milliseconds.
+
+        Returns:
+            A tuple containing:
+            - int: The number of solutions found. If the limit was reached or the search
+                   timed out, this is a lower bound.
+            - dict: Metadata: {'complete': bool, 'timed_out': bool, 'seconds': float}.
+                    'complete' is True if the count is exact.
+        """
+        if not Z3_AVAILABLE:
+            return 0, {}
+        start = time.monotonic()
+        count, timed_out = self._enumerate(limit, timeout_ms, lambda stars: None)
+        complete = not timed_out and (limit is None or count < limit)
+        return count, {'complete': complete, 'timed_out': timed_out, 'seconds': time.monotonic() - start}
+
+
+# --- Solver Strategies ---
+
+VERDICTS = ('none', 'unique', 'multiple')
+
+def run_strategy(name, region_grid, stars, timeout_ms=None):
+    """
+    Decides whether a puzzle has no, one or several solutions with one solver.
+
+    Args:
+        name (str): 'z3', 'bitmask', 'cnf' or 'logic'. A strategy whose module is missing
+                    falls back to Z3.
+        region_grid (list[list[int]]): The puzzle's region layout.
+        stars (int): The number of stars per row, column and region.
+        timeout_ms (int, optional): A time budget in milliseconds.
+
+    Returns:
+        str | None: One of VERDICTS, or None if the strategy could not decide (a
+                    timeout, or the logic engine running out of techniques).
+    """
+    if name == 'logic' and LogicSolver:
+        # Every deduction is forced, so a board solved by logic alone is unique. The
+        # trial technique is left out: it is a search of its own and can take seconds.
+        solver = LogicSolver(region_grid, stars)
+        if len(solver.regions) != len(region_grid):
+            return 'none'
+        try:
+            placed, _ = solver.propagate(*solver.state_from_grid(), max_rule=len(solver.rules) - 1)
+        except Contradiction:
+            return 'none'
+        return 'unique' if solver.is_solved(placed) else None
+    if name == 'bitmask' and BitmaskStarBattleSolver:
+        solutions, meta = BitmaskStarBattleSolver(region_grid, stars).solve(2, timeout_ms)
+    elif name == 'cnf' and CNFStarBattleSolver:
+        solutions, meta = CNFStarBattleSolver(region_grid, stars).solve(timeout_ms)
+    else:
+        solutions, meta = Z3StarBattleSolver(region_grid, stars).solve(timeout_ms)
+    if meta.get('timed_out'):
+        return None
+    return VERDICTS[min(len(solutions), 2)]
+
+def check_puzzle(region_grid, stars, timeout_ms=None):
+    """
+    Decides a puzzle with the strategies STRATEGY_TABLE lists for its size, in order.
 
-            # To find a *different* solution, I added a new constraint that blocks the
-            # current solution. This forces the solver to find an alternative model.
-            blocking_clause = Or([
-                cell if value == 0 else Not(cell)
-                for r, row in enumerate(self.X)
-                for c, cell in enumerate(row)
-                if (value := solution_board[r][c]) is not None
-            ])
-            self.solver.add(blocking_clause)
+    Args:
+        region_grid (list[list[int]]): The puzzle's region layout.
+        stars (int): The number of stars per row, column and region.
+        timeout_ms (int, optional): A time budget per strategy in milliseconds.
 
-        return solutions, {}
+    Returns:
+        tuple: (verdict, strategy) where verdict is one of VERDICTS, or None if no
+               strategy could decide.
+    """
+    for name in STRATEGY_TABLE.get((len(region_grid), stars), DEFAULT_STRATEGIES):
+        verdict = run_strategy(name, region_grid, stars, timeout_ms)
+        if verdict is not None:
+            return verdict, name
+    return None, None
 
 
 # --- Constants & SBN Puzzle Functions ---
 
 OUTPUT_FILE = "found_puzzles.txt"
+COUNTS_FILE = "solution_counts.txt"  # '<sbn> <count>[+] <seconds>' for every non-unique puzzle counted.
+DEFAULT_COUNT_LIMIT = 1000
+DEFAULT_COUNT_TIMEOUT_MS = 60000
+BITMASK_MAX_DIM = 21  # 'auto' counts with the bitmask solver up to this size and with Z3 above it.
+
+# Strategies tried in order for each (dim, stars) until one decides the puzzle. Generated
+# with 'portfolio_solver.py --table' from races over Main/puzzles/Files; a strategy that
+# can only prove uniqueness ('logic') is followed by one that always decides.
+STRATEGY_TABLE = {
+    (5, 1): ('bitmask',),
+    (6, 1): ('bitmask',),
+    (8, 1): ('bitmask',),
+    (9, 1): ('bitmask',),
+    (9, 2): ('bitmask',),
+    (10, 2): ('bitmask',),
+    (11, 2): ('bitmask',),
+    (14, 3): ('bitmask',),
+    (17, 4): ('bitmask',),
+    (21, 5): ('logic', 'z3'),
+    (25, 6): ('logic', 'z3'),
+}
+DEFAULT_STRATEGIES = ('z3',)  # Sizes missing from the table.
 SBN_B64_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_' #
 SBN_CHAR_TO_INT = {c: i for i, c in enumerate(SBN_B64_ALPHABET)} #
 SBN_CODE_TO_DIM_MAP = {
@@ -344,24 +510,78 @@ def solve_sbn_worker(sbn_tuple):
         stars = puzzle_data.get('stars', 1)
         if not region_grid: return None
 
-        # Instantiate and run the solver. This is the most computationally
+        # Run the solvers picked for this size. This is the most computationally
         # intensive part of the process.
-        solver = Z3StarBattleSolver(region_grid, stars)
-        solutions, _ = solver.solve()
-
-        # A puzzle is unique if and only if exactly one solution was found.
-        is_unique = len(solutions) == 1
-        return sbn, filepath, is_unique
+        verdict, _ = check_puzzle(region_grid, stars)
+        return sbn, filepath, verdict == 'unique'
 
     except Exception:
         # Catch any catastrophic failures during processing to prevent a worker from crashing.
         return None
 
 
+def count_sbn_worker(task):
+    """
+    Counts the solutions of a single puzzle. Executed by each worker process in the pool
+    when --count-solutions is given.
+
+    Args:
+        task (tuple): (sbn, filepath, limit, backend, timeout_ms), where backend is
+                      'z3', 'bitmask' or 'auto'.
+
+    Returns:
+        tuple | None: (sbn, filepath, count, complete, seconds), or None if the puzzle
+                      could not be decoded.
+    """
+    sbn, filepath, limit, backend, timeout_ms = task
+    try:
+        puzzle_data = decode_sbn(sbn)
+        if not puzzle_data: return None
+
+        region_grid, dim = parse_and_validate_grid(puzzle_data['task'])
+        stars = puzzle_data.get('stars', 1)
+        if not region_grid: return None
+
+        if backend == 'auto':
+            backend = 'bitmask' if BitmaskStarBattleSolver and dim <= BITMASK_MAX_DIM else 'z3'
+        solver_class = BitmaskStarBattleSolver if backend == 'bitmask' else Z3StarBattleSolver
+        count, meta = solver_class(region_grid, stars).count_solutions(limit=limit, timeout_ms=timeout_ms)
+        return sbn, filepath, count, meta['complete'], meta['seconds']
+
+    except Exception:
+        return None
+
+
+def load_counted_puzzles(filepath):
+    """Loads the SBNs already recorded in the solution counts file."""
+    if not os.path.exists(filepath):
+        return set()
+    with open(filepath, 'r') as f:
+        return {line.split()[0] for line in f if line.strip()}
+
+
+def count_bucket(count, complete):
+    """Names the summary bucket of a solution count."""
+    if not complete:
+        return "limit/timeout"
+    if count <= 1:
+        return "no solution" if count == 0 else "unique"
+    return "2-10" if count <= 10 else "11-100" if count <= 100 else ">100"
+
+
 # --- Main Execution ---
 
-def main(input_path, workers, stop_after_first, delete_from_source):
-    """Main function to set up and run the puzzle processing pipeline."""
+def main(input_path, workers, stop_after_first, delete_from_source,
+         count_solutions=False, count_limit=DEFAULT_COUNT_LIMIT, count_backend='auto',
+         count_timeout_ms=DEFAULT_COUNT_TIMEOUT_MS):
+    """
+    Main function to set up and run the puzzle processing pipeline.
+
+    With count_solutions, every puzzle's solutions are counted (up to count_limit, or
+    all of them if it is None) instead of stopping at two. Unique puzzles are saved as
+    usual, and the count and counting time of every other puzzle is appended to
+    COUNTS_FILE.
+    """
     start_time = time.time()
     
     # Enable color support for Windows terminals, if applicable.
@@ -377,6 +597,16 @@ def main(input_path, workers, stop_after_first, delete_from_source):
 
     existing_puzzles = load_found_puzzles(OUTPUT_FILE)
     print(f"Loaded {len(existing_puzzles)} previously found puzzles from '{OUTPUT_FILE}'.")
+    if count_solutions:
+        counted = load_counted_puzzles(COUNTS_FILE)
+        print(f"Loaded {len(counted)} previously counted puzzles from '{COUNTS_FILE}'.")
+        existing_puzzles |= counted
+        if count_backend in ('auto', 'bitmask') and BitmaskStarBattleSolver is None:
+            print("\033[93m[WARN]\033[0m bitmask_solver.py not found next to this script. Counting with Z3.")
+            count_backend = 'z3'
+        if stop_after_first:
+            print("\033[94m[INFO]\033[0m Counting mode checks every puzzle; 'find-first' is ignored.")
+            stop_after_first = False
 
     sbn_map = read_sbn_by_file(input_path)
 
@@ -399,18 +629,31 @@ def main(input_path, workers, stop_after_first, delete_from_source):
 
     newly_found_tuples = []
     all_checked_puzzles = []
+    counted_results = []
+    if count_solutions:
+        worker = count_sbn_worker
+        tasks = [(sbn, filepath, count_limit, count_backend, count_timeout_ms) for sbn, filepath in puzzles_to_process]
+    else:
+        worker, tasks = solve_sbn_worker, puzzles_to_process
     
     # This is the core of the parallel processing. A pool of worker processes is
     # created, and the list of puzzles is distributed among them.
     with multiprocessing.Pool(processes=workers) as pool:
         # `imap_unordered` is used for efficiency. It returns results as soon as they
         # are completed, rather than waiting for the entire batch.
-        results_iterator = pool.imap_unordered(solve_sbn_worker, puzzles_to_process)
+        results_iterator = pool.imap_unordered(worker, tasks)
 
         try:
             # Wrap the iterator with tqdm to display a live progress bar.
             for result_tuple in tqdm(results_iterator, total=len(puzzles_to_process), desc="Processing Puzzles"):
-                if result_tuple:
+                if result_tuple and count_solutions:
+                    sbn, filepath, count, complete, seconds = result_tuple
+                    all_checked_puzzles.append((sbn, filepath))
+                    if count == 1 and complete:
+                        newly_found_tuples.append((sbn, filepath))
+                    else:
+                        counted_results.append((sbn, count, complete, seconds))
+                elif result_tuple:
                     sbn, filepath, is_unique = result_tuple
                     all_checked_puzzles.append((sbn, filepath))
                     if is_unique:
@@ -438,6 +681,21 @@ def main(input_path, workers, stop_after_first, delete_from_source):
     else:
         print("\033[91m[FAIL]\033[0m No new unique puzzles were found in this run.")
 
+    if count_solutions:
+        buckets = defaultdict(int)
+        buckets["unique"] = len(newly_found_tuples)
+        for sbn, count, complete, seconds in counted_results:
+            buckets[count_bucket(count, complete)] += 1
+        print("Solution counts: " + ", ".join(f"{name}: {n}" for name, n in buckets.items() if n))
+        if counted_results:
+            counting_seconds = sum(result[3] for result in counted_results)
+            print(f"Counted {len(counted_results)} non-unique puzzles in {counting_seconds:.2f} solver seconds "
+                  f"({counting_seconds / len(counted_results) * 1000:.1f} ms each).")
+            with open(COUNTS_FILE, "a") as f:
+                for sbn, count, complete, seconds in counted_results:
+                    f.write(f"{sbn} {count}{'' if complete else '+'} {seconds:.3f}\n")
+            print(f"\033[96m[SAVED]\033[0m Saved {len(counted_results)} solution counts to '{COUNTS_FILE}'.")
+
     if delete_from_source:
         print(f"\n--delete-from-source enabled. Removing {len(all_checked_puzzles)} checked puzzles from input files.")
         if all_checked_puzzles:
@@ -483,11 +741,29 @@ if __name__ == "__main__":
         help="DANGER: Permanently delete ALL CHECKED puzzles (good or bad)\nfrom their original input files. Use with caution."
     )
 
+    parser.add_argument(
+        "--count-solutions",
+        action='store_true',
+        help=f"Count every puzzle's solutions instead of stopping at two, and record the\n"
+             f"counts of non-unique puzzles in '{COUNTS_FILE}'. Implies --find-all."
+    )
+    parser.add_argument("--count-limit", type=int, default=DEFAULT_COUNT_LIMIT,
+                        help=f"Stop counting a puzzle at this many solutions; 0 for no limit (default {DEFAULT_COUNT_LIMIT}).")
+    parser.add_argument("--count-backend", choices=['auto', 'z3', 'bitmask'], default='auto',
+                        help=f"Solver used for counting. 'auto' uses the bitmask solver up to {BITMASK_MAX_DIM}x{BITMASK_MAX_DIM}\n"
+                             "and Z3 above that (default: auto).")
+    parser.add_argument("--count-timeout", type=int, default=DEFAULT_COUNT_TIMEOUT_MS,
+                        help=f"Milliseconds allowed for counting one puzzle (default {DEFAULT_COUNT_TIMEOUT_MS}).")
+
     args = parser.parse_args()
 
     main(
         args.input_path,
         workers=args.workers,
         stop_after_first=not args.find_all,
-        delete_from_source=args.delete_from_source
+        delete_from_source=args.delete_from_source,
+        count_solutions=args.count_solutions,
+        count_limit=args.count_limit or None,
+        count_backend=args.count_backend,
+        count_timeout_ms=args.count_timeout
     )
\ No newline at end of file
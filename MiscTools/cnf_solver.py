@@ -0,0 +1,717 @@
+# ==================================================================================================
+#
+#   CNF Encoder and SAT Backends for Star Battle Puzzles
+#
+#   Author: Isaiah Tadrous
+#   Version: 1.0.0
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Description:
+#   This module encodes the rules of Star Battle as plain CNF clauses and solves them with a
+#   pluggable SAT backend, instead of building PbEq, Implies and And objects one Python API
+#   call at a time as the Z3 path does.
+#
+#   - Cells are variables 1..dim*dim (cell (r, c) is r * dim + c + 1).
+#   - No two stars may touch: one binary clause per pair of neighbouring cells.
+#   - "Exactly `stars` stars" per row, column and region: a totalizer (a tree of unary
+#     adders whose outputs are cut off at stars + 1) or a sequential counter.
+#   - The row, column and no-touch clauses depend only on (dim, stars), so they are built
+#     once per size and cached; a puzzle only adds the clauses of its regions.
+#
+#   Backends: 'pysat' and 'pycosat' are used if those libraries are installed. 'cdcl' is a
+#   small conflict-driven clause-learning solver bundled here in pure Python (two watched
+#   literals, first-UIP learning, VSIDS, phase saving, Luby restarts and learnt clause
+#   reduction), so the module works without any dependency.
+#
+#   Run as a script, it benchmarks clause counts and solve times against Z3.
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Usage:
+#   from cnf_solver import CNFStarBattleSolver
+#   solutions, meta = CNFStarBattleSolver(region_grid, stars).solve()
+#   is_unique = len(solutions) == 1 and not meta['timed_out']
+#
+#   python cnf_solver.py <puzzle_file> [<puzzle_file> ...] [--puzzles P] [--backends B ...]
+#
+#   Arguments:
+#     puzzle_file      .txt puzzle files, one SBN per line.
+#     --puzzles        Puzzles sampled per file (default 5).
+#     --backends       SAT backends to time (default: every available one).
+#     --seed           Seed for sampling the puzzles (default 0).
+#
+# ==================================================================================================
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+
+# External dependencies (both optional):
+#   - PySAT: Bindings to several C/C++ SAT solvers. (pip install python-sat)
+#   - pycosat: Bindings to the PicoSAT solver. (pip install pycosat)
+try:
+    from pysat.solvers import Solver as PySATSolver
+except ImportError:
+    PySATSolver = None
+try:
+    import pycosat
+except ImportError:
+    pycosat = None
+
+# --- Solver Settings ---
+CARDINALITY_ENCODINGS = ('totalizer', 'sequential')
+PYSAT_SOLVER_NAME = 'cadical153'
+VAR_DECAY = 0.95           # VSIDS activity decay per conflict.
+RESTART_BASE = 100         # Conflicts in one unit of the Luby restart sequence.
+LEARNT_LIMIT = 2000        # Learnt clauses kept before the first reduction.
+DEADLINE_CHECK_INTERVAL = 256  # Conflicts between deadline checks.
+
+
+# --- Cardinality Encodings ---
+
+def totalizer(literals, stars, top, clauses):
+    """
+    Encodes "exactly `stars` of the literals are true" with a totalizer.
+
+    The literals are counted in unary by a tree of adders; output i of a node is
+    true exactly when at least i + 1 of its inputs are. Outputs above stars + 1
+    are cut off, so each node has at most stars + 1 of them.
+
+    Args:
+        literals (list[int]): The literals to count.
+        stars (int): The required count.
+        top (int): The highest variable used so far.
+        clauses (list): Receives the clauses.
+
+    Returns:
+        int: The highest variable used afterwards.
+    """
+    cap = stars + 1
+
+    def count(part, top):
+        if len(part) == 1:
+            return part, top
+        half = len(part) // 2
+        left, top = count(part[:half], top)
+        right, top = count(part[half:], top)
+        size = min(len(left) + len(right), cap)
+        out = list(range(top + 1, top + size + 1))
+        for i in range(len(left) + 1):
+            for j in range(len(right) + 1):
+                # i of the left and j of the right inputs set at least i + j outputs...
+                if 0 < i + j <= size:
+                    clauses.append(([-left[i - 1]] if i else []) + ([-right[j - 1]] if j else []) + [out[i + j - 1]])
+                # ...and at most i of the left and j of the right clear output i + j + 1.
+                if i + j < size:
+                    clauses.append([-out[i + j]] + ([left[i]] if i < len(left) else [])
+                                   + ([right[j]] if j < len(right) else []))
+        return out, top + size
+
+    if not literals:
+        if stars:
+            clauses.append([])
+        return top
+    out, top = count(list(literals), top)
+    if len(out) < stars:
+        clauses.append([])  # Too few literals to ever reach the count.
+    elif stars:
+        clauses.append([out[stars - 1]])
+    if len(out) > stars:
+        clauses.append([-out[stars]])
+    return top
+
+
+def sequential_counter(literals, stars, top, clauses):
+    """
+    Encodes "exactly `stars` of the literals are true" with a sequential counter.
+
+    Register s[i][j] is true exactly when at least j + 1 of the first i + 1
+    literals are true. A literal may not push the count past `stars`, and the
+    last register row must reach it.
+
+    Args:
+        literals (list[int]): The literals to count.
+        stars (int): The required count.
+        top (int): The highest variable used so far.
+        clauses (list): Receives the clauses.
+
+    Returns:
+        int: The highest variable used afterwards.
+    """
+    if not stars:
+        clauses.extend([-literal] for literal in literals)
+        return top
+    if len(literals) < stars:
+        clauses.append([])  # Too few literals to ever reach the count.
+        return top
+    registers = []
+    for i, literal in enumerate(literals):
+        row = list(range(top + 1, top + stars + 1))
+        top += stars
+        for j, s in enumerate(row):
+            if i == 0:
+                clauses.append([-s, literal] if j == 0 else [-s])
+                if j == 0:
+                    clauses.append([-literal, s])
+                continue
+            previous = registers[-1]
+            clauses.append([-previous[j], s])
+            clauses.append([-s, previous[j], literal])
+            if j == 0:
+                clauses.append([-literal, s])
+            else:
+                clauses.append([-literal, -previous[j - 1], s])
+                clauses.append([-s, previous[j], previous[j - 1]])
+        if i:
+            clauses.append([-literal, -registers[-1][stars - 1]])
+        registers.append(row)
+    clauses.append([registers[-1][stars - 1]])
+    return top
+
+
+CARDINALITY = {'totalizer': totalizer, 'sequential': sequential_counter}
+
+
+@lru_cache(maxsize=None)
+def static_clauses(dim, stars, cardinality):
+    """
+    Builds the clauses shared by every puzzle of a size: rows, columns and no-touch.
+
+    Args:
+        dim (int): The size of the grid.
+        stars (int): The number of stars per row, column and region.
+        cardinality (str): One of CARDINALITY_ENCODINGS.
+
+    Returns:
+        tuple: (clauses as a tuple of tuples, highest variable used).
+    """
+    clauses, top = [], dim * dim
+    def cell(r, c): return r * dim + c + 1
+    for r in range(dim):
+        top = CARDINALITY[cardinality]([cell(r, c) for c in range(dim)], stars, top, clauses)
+    for c in range(dim):
+        top = CARDINALITY[cardinality]([cell(r, c) for r in range(dim)], stars, top, clauses)
+    for r in range(dim):
+        for c in range(dim):
+            for dr, dc in ((0, 1), (1, -1), (1, 0), (1, 1)):
+                if 0 <= r + dr < dim and 0 <= c + dc < dim:
+                    clauses.append([-cell(r, c), -cell(r + dr, c + dc)])
+    return tuple(map(tuple, clauses)), top
+
+
+def encode(region_grid, stars, cardinality='totalizer'):
+    """
+    Encodes a puzzle as CNF.
+
+    Args:
+        region_grid (list[list[int]]): The puzzle's region layout.
+        stars (int): The number of stars per row, column and region.
+        cardinality (str): One of CARDINALITY_ENCODINGS.
+
+    Returns:
+        tuple: (list of clauses, number of variables).
+    """
+    dim = len(region_grid)
+    shared, top = static_clauses(dim, stars, cardinality)
+    regions = {}
+    for r, row in enumerate(region_grid):
+        for c, region in enumerate(row):
+            regions.setdefault(region, []).append(r * dim + c + 1)
+    clauses = list(shared)
+    for cells in regions.values():
+        top = CARDINALITY[cardinality](cells, stars, top, clauses)
+    # With a different number of regions than rows, the star totals cannot agree.
+    if len(regions) != dim:
+        clauses.append(())
+    return clauses, top
+
+
+# --- SAT Backends ---
+# Every backend takes the clauses and the number of variables, and offers
+# add_clause(clause), solve(deadline) -> True / False / None (out of time), and
+# `model`, the set of true variables after a satisfiable solve().
+
+class CDCLSolver:
+    """A conflict-driven clause-learning SAT solver in pure Python."""
+    name = 'cdcl'
+
+    def __init__(self, clauses=(), num_vars=0):
+        """
+        Initializes the solver.
+
+        Args:
+            clauses (iterable): The clauses, as lists of non-zero integer literals.
+            num_vars (int): The number of variables.
+        """
+        self.num_vars = num_vars
+        self.values = [0] * (num_vars + 1)      # 1 true, -1 false, 0 unassigned.
+        self.levels = [0] * (num_vars + 1)
+        self.reasons = [None] * (num_vars + 1)  # Index of the clause that implied the variable.
+        self.activity = [0.0] * (num_vars + 1)
+        self.phase = [-1] * (num_vars + 1)      # Most stars are absent, so guess false first.
+        self.watches = [[] for _ in range(2 * num_vars + 2)]
+        self.clauses, self.learnt = [], []      # Learnt clauses as [lbd, index].
+        self.trail, self.trail_lim, self.qhead = [], [], 0
+        self.heap = [(0.0, v) for v in range(1, num_vars + 1)]
+        self.var_inc, self.learnt_limit = 1.0, LEARNT_LIMIT
+        self.unsat, self.model = False, set()
+        self.conflicts = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    @staticmethod
+    def _watch(literal):
+        """Returns the watch list index of a literal."""
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+    def _value(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def _enqueue(self, literal, reason):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def _attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[self._watch(clause[0])].append(index)
+        self.watches[self._watch(clause[1])].append(index)
+        return index
+
+    def add_clause(self, clause):
+        """
+        Adds a clause. Literals already decided at the top level are simplified away.
+
+        Args:
+            clause (iterable): Non-zero integer literals.
+        """
+        self._backtrack(0)
+        literals = []
+        for literal in dict.fromkeys(clause):
+            value = self._value(literal)
+            if value == 1 or -literal in literals:
+                return
+            if value == 0:
+                literals.append(literal)
+        if not literals:
+            self.unsat = True
+        elif len(literals) == 1:
+            self._enqueue(literals[0], None)
+            if self._propagate() is not None:
+                self.unsat = True
+        else:
+            self._attach(literals)
+
+    def _propagate(self):
+        """
+        Applies unit propagation with two watched literals per clause.
+
+        Returns:
+            int | None: The index of a conflicting clause, or None.
+        """
+        values, watches, clauses, trail = self.values, self.watches, self.clauses, self.trail
+        levels, reasons, level = self.levels, self.reasons, len(self.trail_lim)
+        while self.qhead < len(trail):
+            false_literal = -trail[self.qhead]
+            self.qhead += 1
+            watching = watches[2 * false_literal if false_literal > 0 else -2 * false_literal + 1]
+            i = j = 0
+            end = len(watching)
+            while i < end:
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                first_value = values[first] if first > 0 else -values[-first]
+                if first_value == 1:
+                    watching[j] = index
+                    j += 1
+                    continue
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[literal] if literal > 0 else -values[-literal]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        watches[2 * literal if literal > 0 else -2 * literal + 1].append(index)
+                        break
+                else:
+                    watching[j] = index
+                    j += 1
+                    if first_value == -1:
+                        watching[j:] = watching[i:end]
+                        self.qhead = len(trail)
+                        return index
+                    # Inlined _enqueue(): this is the solver's hottest line.
+                    if first > 0:
+                        values[first], levels[first], reasons[first] = 1, level, index
+                    else:
+                        values[-first], levels[-first], reasons[-first] = -1, level, index
+                    trail.append(first)
+            del watching[j:]
+        return None
+
+    def _bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.num_vars + 1) if not self.values[v]]
+            heapq.heapify(self.heap)
+
+    def _analyze(self, conflict):
+        """
+        Derives the first-UIP clause of a conflict.
+
+        Returns:
+            tuple: (learnt clause with the asserting literal first, backjump level, lbd).
+        """
+        levels, trail, current = self.levels, self.trail, len(self.trail_lim)
+        seen, learnt, pending = set(), [None], 0
+        clause, literal, position = self.clauses[conflict], None, len(trail) - 1
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                var = abs(other)
+                if var not in seen and levels[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if levels[var] >= current:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+            while abs(trail[position]) not in seen:
+                position -= 1
+            literal = trail[position]
+            position -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+        learnt[0] = -literal
+        # Drop the literals whose reason only contains literals already accounted for.
+        reasons, clauses = self.reasons, self.clauses
+        learnt[1:] = [other for other in learnt[1:] if reasons[abs(other)] is None or any(
+            abs(x) not in seen and levels[abs(x)] > 0 for x in clauses[reasons[abs(other)]][1:])]
+        if len(learnt) == 1:
+            return learnt, 0, 1
+        deepest = max(range(1, len(learnt)), key=lambda k: levels[abs(learnt[k])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, levels[abs(learnt[1])], len({levels[abs(other)] for other in learnt})
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        values, reasons, phase, activity, heap = self.values, self.reasons, self.phase, self.activity, self.heap
+        for literal in self.trail[self.trail_lim[level]:]:
+            var = abs(literal)
+            phase[var] = 1 if literal > 0 else -1
+            values[var] = 0
+            reasons[var] = None
+            heapq.heappush(heap, (-activity[var], var))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _decide(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        values, heap = self.values, self.heap
+        while heap:
+            var = heapq.heappop(heap)[1]
+            if not values[var]:
+                return var
+        return None
+
+    def _reduce(self):
+        """Drops the half of the learnt clauses with the highest lbd. Called at level 0."""
+        self.learnt.sort()
+        kept = {index for lbd, index in self.learnt[:len(self.learnt) // 2]} | {
+            index for lbd, index in self.learnt if lbd <= 2}
+        dropped = {index for _, index in self.learnt} - kept
+        remap, clauses = {}, []
+        for index, clause in enumerate(self.clauses):
+            if index not in dropped:
+                remap[index] = len(clauses)
+                clauses.append(clause)
+        self.clauses = clauses
+        self.learnt = [[lbd, remap[index]] for lbd, index in self.learnt if index in kept]
+        # Only top-level assignments remain, and their reasons are never looked at again.
+        self.reasons = [None] * (self.num_vars + 1)
+        self.watches = [[] for _ in range(2 * self.num_vars + 2)]
+        for index, clause in enumerate(clauses):
+            self.watches[self._watch(clause[0])].append(index)
+            self.watches[self._watch(clause[1])].append(index)
+        self.learnt_limit = int(self.learnt_limit * 1.1)
+
+    @staticmethod
+    def _luby(i):
+        """Returns the i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+        while True:
+            k = 1
+            while (1 << k) - 1 < i:
+                k += 1
+            if i == (1 << k) - 1:
+                return 1 << (k - 1)
+            i -= (1 << (k - 1)) - 1
+
+    def solve(self, deadline=None):
+        """
+        Searches for a satisfying assignment.
+
+        Args:
+            deadline (float, optional): A time.monotonic() value to give up at.
+
+        Returns:
+            bool | None: True if satisfiable (see `model`), False if not, None if the
+                         deadline passed first.
+        """
+        if self.unsat:
+            return False
+        self._backtrack(0)
+        restarts, budget = 1, RESTART_BASE
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    self.unsat = True
+                    return False
+                learnt, level, lbd = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    index = self._attach(learnt)
+                    self.learnt.append([lbd, index])
+                    self._enqueue(learnt[0], index)
+                self.var_inc /= VAR_DECAY
+                budget -= 1
+                if deadline is not None and self.conflicts % DEADLINE_CHECK_INTERVAL == 0 \
+                        and time.monotonic() > deadline:
+                    self._backtrack(0)
+                    return None
+                if budget <= 0:
+                    restarts += 1
+                    budget = RESTART_BASE * self._luby(restarts)
+                    self._backtrack(0)
+                    if len(self.learnt) > self.learnt_limit:
+                        self._reduce()
+                continue
+            var = self._decide()
+            if var is None:
+                self.model = {v for v in range(1, self.num_vars + 1) if self.values[v] == 1}
+                return True
+            self.trail_lim.append(len(self.trail))
+            self._enqueue(var * self.phase[var], None)
+
+
+class PycosatBackend:
+    """PicoSAT through pycosat. Not incremental: every solve() passes all clauses again."""
+    name = 'pycosat'
+
+    def __init__(self, clauses=(), num_vars=0):
+        self.clauses = [list(clause) for clause in clauses]
+        self.model = set()
+
+    def add_clause(self, clause):
+        self.clauses.append(list(clause))
+
+    def solve(self, deadline=None):
+        # PicoSAT has no wall-clock limit; the deadline is only checked before starting.
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        if any(not clause for clause in self.clauses):
+            return False
+        result = pycosat.solve(self.clauses)
+        if result == 'UNKNOWN':
+            return None
+        if result == 'UNSAT':
+            return False
+        self.model = {literal for literal in result if literal > 0}
+        return True
+
+
+class PySATBackend:
+    """An incremental solver from PySAT (PYSAT_SOLVER_NAME)."""
+    name = 'pysat'
+
+    def __init__(self, clauses=(), num_vars=0):
+        self.unsat = any(not clause for clause in clauses)
+        self.solver = PySATSolver(name=PYSAT_SOLVER_NAME, bootstrap_with=[list(c) for c in clauses if c])
+        self.model = set()
+
+    def add_clause(self, clause):
+        self.solver.add_clause(list(clause))
+
+    def solve(self, deadline=None):
+        if self.unsat:
+            return False
+        if deadline is None:
+            result = self.solver.solve()
+        else:
+            timer = threading.Timer(max(0.0, deadline - time.monotonic()), self.solver.interrupt)
+            timer.start()
+            result = self.solver.solve_limited(expect_interrupt=True)
+            timer.cancel()
+            self.solver.clear_interrupt()
+        if result:
+            self.model = {literal for literal in self.solver.get_model() if literal > 0}
+        return result
+
+
+BACKENDS = {'pysat': PySATBackend, 'pycosat': PycosatBackend, 'cdcl': CDCLSolver}
+
+
+def available_backends():
+    """Lists the backends that can run here, fastest first."""
+    return [name for name, ok in (('pysat', PySATSolver), ('pycosat', pycosat), ('cdcl', True)) if ok]
+
+
+# --- Solver Class ---
+
+class CNFStarBattleSolver:
+    """
+    Solves Star Battle puzzles through a CNF encoding and a SAT backend.
+
+    The interface mirrors Z3StarBattleSolver: solve() returns the solutions found
+    (as 0/1 grids) and a metadata dictionary.
+    """
+    def __init__(self, region_grid, stars_per_region, cardinality='totalizer', backend='auto'):
+        """
+        Initializes the solver and encodes the puzzle.
+
+        Args:
+            region_grid (list[list[int]]): A 2D list representing the puzzle, where each
+                                           cell contains an integer ID for its region.
+            stars_per_region (int): The number of stars required per region, row, and column.
+            cardinality (str): 'totalizer' or 'sequential'.
+            backend (str): 'auto' (the first of available_backends()), 'pysat',
+                           'pycosat' or 'cdcl'.
+        """
+        self.region_grid = region_grid
+        self.dim = len(region_grid)
+        self.stars_per_region = stars_per_region
+        self.backend = available_backends()[0] if backend == 'auto' else backend
+        self.clauses, self.num_vars = encode(region_grid, stars_per_region, cardinality)
+
+    def solve(self, timeout_ms=None, max_solutions=2):
+        """
+        Searches for up to `max_solutions` solutions.
+
+        Each solution found is blocked by forbidding its star set, as in the Z3 path.
+
+        Args:
+            timeout_ms (int, optional): A time budget in milliseconds. If it runs out,
+                                        the search stops and 'timed_out' is set.
+            max_solutions (int, optional): The number of solutions to stop at. The
+                                           default of two is enough to decide uniqueness.
+
+        Returns:
+            A tuple containing:
+            - list: A list of solutions found. Each solution is a 2D grid.
+            - dict: Metadata: {'timed_out': bool, 'backend': str, 'vars': int,
+                    'clauses': int}.
+        """
+        dim = self.dim
+        deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        sat = BACKENDS[self.backend](self.clauses, self.num_vars)
+        solutions, timed_out = [], False
+        while len(solutions) < max_solutions:
+            result = sat.solve(deadline)
+            if result is None:
+                timed_out = True
+                break
+            if not result:
+                break
+            stars = [v for v in range(1, dim * dim + 1) if v in sat.model]
+            solutions.append([[1 if r * dim + c + 1 in sat.model else 0 for c in range(dim)] for r in range(dim)])
+            sat.add_clause([-v for v in stars])
+        return solutions, {'timed_out': timed_out, 'backend': self.backend, 'vars': self.num_vars,
+                           'clauses': len(self.clauses)}
+
+
+# --- Benchmark ---
+
+def benchmark(paths, puzzles, backends, seed):
+    """
+    Prints clause counts and solve times of the CNF encodings next to Z3.
+
+    Args:
+        paths (list[str]): The puzzle files.
+        puzzles (int): The number of puzzles sampled per file.
+        backends (list[str]): The SAT backends to time.
+        seed (int): The seed for sampling the puzzles.
+    """
+    # Imported here: SBNBatchValidator itself imports this module.
+    from SBNBatchValidator import Z3StarBattleSolver, decode_sbn, parse_and_validate_grid
+
+    rng = random.Random(seed)
+    columns = [(encoding, backend) for encoding in CARDINALITY_ENCODINGS for backend in backends]
+    print(f"{'file':<20}{'z3 cons':>8}{'z3 ms':>9}"
+          + ''.join(f"{encoding[:3] + ' vars':>10}{encoding[:3] + ' cls':>9}" for encoding in CARDINALITY_ENCODINGS)
+          + ''.join(f"{f'{encoding[:3]}/{backend} ms':>16}" for encoding, backend in columns))
+    for path in paths:
+        with open(path, 'r') as f:
+            lines = [line.split()[0] for line in f if line.strip()]
+        totals, sizes, count = {}, {}, 0
+        for sbn in rng.sample(lines, min(puzzles, len(lines))):
+            decoded = decode_sbn(sbn)
+            region_grid, dim = parse_and_validate_grid(decoded['task'])
+            stars = decoded['stars']
+            start = time.perf_counter()
+            expected, _ = Z3StarBattleSolver(region_grid, stars).solve()
+            totals['z3'] = totals.get('z3', 0.0) + time.perf_counter() - start
+            for encoding in CARDINALITY_ENCODINGS:
+                static_clauses(dim, stars, encoding)  # Cached per size, as in a long-running process.
+                for backend in backends:
+                    start = time.perf_counter()
+                    solver = CNFStarBattleSolver(region_grid, stars, encoding, backend)
+                    solutions, meta = solver.solve()
+                    totals[(encoding, backend)] = totals.get((encoding, backend), 0.0) + time.perf_counter() - start
+                    sizes[encoding] = (meta['vars'], meta['clauses'])
+                    if len(solutions) != len(expected) or (len(expected) == 1 and solutions != expected):
+                        print(f"Warning: {encoding}/{backend} disagrees with Z3 on {sbn}", file=sys.stderr)
+            count += 1
+        # Z3 gets one PbEq per row, column and region, and one Implies per cell.
+        print(f"{os.path.basename(path):<20}{3 * dim + dim * dim:>8}{1000 * totals['z3'] / count:>9.1f}"
+              + ''.join(f"{sizes[encoding][0]:>10}{sizes[encoding][1]:>9}" for encoding in CARDINALITY_ENCODINGS)
+              + ''.join(f"{1000 * totals[column] / count:>16.1f}" for column in columns))
+
+
+def main():
+    """
+    Main function to run the benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare the CNF encodings and SAT backends with the Z3 solver.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('puzzle_files', nargs='+', help=".txt puzzle files, one SBN per line.")
+    parser.add_argument('--puzzles', type=int, default=5, help="Puzzles sampled per file (default 5).")
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=available_backends(),
+                        help="SAT backends to time (default: every available one).")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for sampling the puzzles (default 0).")
+    args = parser.parse_args()
+
+    missing = [name for name in args.backends if name not in available_backends()]
+    if missing:
+        print(f"Error: backend(s) not installed: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    for path in args.puzzle_files:
+        if not os.path.isfile(path):
+            print(f"Error: Puzzle file not found at '{path}'", file=sys.stderr)
+            sys.exit(1)
+    benchmark(args.puzzle_files, args.puzzles, args.backends, args.seed)
+
+
+if __name__ == "__main__":
+    main()
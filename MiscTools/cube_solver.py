@@ -0,0 +1,396 @@
+# ==================================================================================================
+#
+#   Cube-and-Conquer Parallel Solver for Star Battle Puzzles
+#
+#   Author: Isaiah Tadrous
+#   Version: 1.0.0
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Description:
+#   A single Z3 check runs on one core, so a large puzzle leaves the rest of the machine idle.
+#   This module splits one puzzle's search space into independent "cubes" and solves them
+#   across a process pool. A cube fixes the stars of a few rows, columns or regions: the
+#   unit with the fewest legal star placements is chosen, one cube is made for each of its
+#   placements, and cubes are split again until there are enough to keep every worker busy.
+#   Because a cube fixes every cell of the units it branches on, the cubes are disjoint and
+#   together cover every solution, so their solution counts simply add up.
+#
+#   Each worker builds the Z3 model once and then solves cubes with push/pop. As soon as
+#   two solutions have been found in total, the pool is terminated and the remaining cubes
+#   are abandoned. A unique puzzle has to finish every cube, so its speedup is bounded by
+#   the hardest cube.
+#
+#   Run as a script, it benchmarks the slowest puzzles of a puzzle file against a single
+#   Z3 solve with 1 to N worker processes and prints the speedup curve.
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Usage:
+#   from cube_solver import CubeAndConquerSolver
+#   solutions, meta = CubeAndConquerSolver(region_grid, stars).solve(workers=8)
+#
+#   python cube_solver.py <puzzle_file> [--puzzles P] [--sample S] [--max-workers N]
+#                         [--cubes-per-worker K] [--timeout MS]
+#
+#   Arguments:
+#     puzzle_file          A .txt puzzle file, one SBN per line (e.g. 14-3-hard.txt).
+#     --puzzles            Number of puzzles to benchmark (default 3).
+#     --sample             Puzzles timed with plain Z3 to pick the slowest from (default 20).
+#     --max-workers        Largest worker count on the curve (default: all CPU cores).
+#     --cubes-per-worker   Cubes to create per worker (default 8).
+#     --timeout            Time budget per solve in milliseconds (default: none).
+#
+# ==================================================================================================
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import defaultdict, deque
+
+from SBNBatchValidator import Z3StarBattleSolver, decode_sbn, parse_and_validate_grid, sat, unknown, Not, Or
+
+# --- Cube Settings ---
+CUBES_PER_WORKER = 8    # More cubes than workers evens out cubes of different difficulty.
+MAX_CUBE_DEPTH = 6      # Splits made by one cube at most; forced units are not counted.
+PLACEMENT_CAP = 64      # Placements counted per unit before it is considered unconstrained.
+
+# Set in each worker process by _init_worker().
+_worker_solver = None
+
+
+def _init_worker(region_grid, stars):
+    """
+    Builds the Z3 model once per worker process.
+
+    Args:
+        region_grid (list[list[int]]): The puzzle's region layout.
+        stars (int): The number of stars per row, column and region.
+    """
+    global _worker_solver
+    _worker_solver = Z3StarBattleSolver(region_grid, stars)
+    _worker_solver._add_constraints()
+
+
+def _solve_cube(task):
+    """
+    Finds up to `limit` solutions inside one cube. Designed to run in a worker process.
+
+    Args:
+        task (tuple): (index, star cells, empty cells, limit, deadline) where deadline
+                      is a time.time() value or None.
+
+    Returns:
+        tuple: (index, list of star cell lists, True if the deadline was hit, seconds).
+    """
+    index, star_cells, empty_cells, limit, deadline = task
+    start = time.time()
+    model_solver, X = _worker_solver.solver, _worker_solver.X
+    model_solver.push()
+    for r, c in star_cells:
+        model_solver.add(X[r][c])
+    for r, c in empty_cells:
+        model_solver.add(Not(X[r][c]))
+    found, timed_out = [], False
+    while len(found) < limit:
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                timed_out = True
+                break
+            model_solver.set(timeout=max(1, int(remaining * 1000)))
+        result = model_solver.check()
+        if result == unknown:
+            timed_out = True
+            break
+        if result != sat:
+            break
+        model = model_solver.model()
+        stars = [(r, c) for r, row in enumerate(X) for c, cell in enumerate(row) if model.evaluate(cell)]
+        found.append(stars)
+        model_solver.add(Or([Not(X[r][c]) for r, c in stars]))
+    model_solver.pop()
+    return index, found, timed_out, time.time() - start
+
+
+class CubeAndConquerSolver:
+    """
+    Decides how many solutions a puzzle has (0, 1 or 2+) by solving disjoint cubes in parallel.
+
+    The interface mirrors Z3StarBattleSolver: solve() returns the solutions found
+    (as 0/1 grids) and a metadata dictionary.
+    """
+    def __init__(self, region_grid, stars_per_region):
+        """
+        Initializes the solver and indexes the puzzle's units.
+
+        Args:
+            region_grid (list[list[int]]): A 2D list representing the puzzle, where each
+                                           cell contains an integer ID for its region.
+            stars_per_region (int): The number of stars required per region, row, and column.
+        """
+        self.region_grid = region_grid
+        self.dim = dim = len(region_grid)
+        self.stars_per_region = stars_per_region
+
+        regions = defaultdict(list)
+        for r in range(dim):
+            for c in range(dim):
+                regions[region_grid[r][c]].append((r, c))
+        # Every row, column and region is a unit; each cell belongs to three of them.
+        self.units = ([[(r, c) for c in range(dim)] for r in range(dim)]
+                      + [[(r, c) for r in range(dim)] for c in range(dim)]
+                      + list(regions.values()))
+        self.units_of = defaultdict(list)
+        for index, cells in enumerate(self.units):
+            for cell in cells:
+                self.units_of[cell].append(index)
+
+    def _placements(self, unit, blocked, empties, counts, cap):
+        """
+        Lists the ways a unit can receive its missing stars within a cube.
+
+        Args:
+            unit (int): The unit index.
+            blocked (set): The cube's star cells and their neighbours.
+            empties (frozenset): The cube's empty cells.
+            counts (list[int]): Stars per unit in the cube.
+            cap (int): Stop after cap + 1 placements.
+
+        Returns:
+            list[tuple]: Each placement as a tuple of new star cells.
+        """
+        quota = self.stars_per_region
+        need = quota - counts[unit]
+        free = [cell for cell in self.units[unit]
+                if cell not in empties and cell not in blocked
+                and all(counts[other] < quota for other in self.units_of[cell])]
+        placements, chosen, added = [], [], defaultdict(int)
+
+        def extend(start):
+            if len(placements) > cap: return
+            if len(chosen) == need:
+                placements.append(tuple(chosen))
+                return
+            for i in range(start, len(free) - (need - len(chosen)) + 1):
+                r, c = cell = free[i]
+                if any(abs(r - pr) <= 1 and abs(c - pc) <= 1 for pr, pc in chosen): continue
+                others = [other for other in self.units_of[cell] if other != unit]
+                if any(counts[other] + added[other] >= quota for other in others): continue
+                chosen.append(cell)
+                for other in others: added[other] += 1
+                extend(i + 1)
+                for other in others: added[other] -= 1
+                chosen.pop()
+
+        extend(0)
+        return placements
+
+    def _fix(self, stars, empties, unit, placement):
+        """Returns a cube's cells with a unit fixed to the given placement."""
+        stars = stars | frozenset(placement)
+        return stars, empties | frozenset(cell for cell in self.units[unit] if cell not in stars)
+
+    def _split(self, cube):
+        """
+        Splits a cube on the placements of its most constrained open unit.
+
+        Units with a single placement are fixed first without counting as a split, so
+        the depth of a cube is the number of real choices it makes.
+
+        Args:
+            cube (tuple): (star cells, empty cells, depth) with the cells as frozensets.
+
+        Returns:
+            tuple: (cube, children) where cube has its forced units fixed, and children
+                   are the cubes it splits into (empty if it holds no solution), or None
+                   if no unit has few enough placements to split on.
+        """
+        stars, empties, depth = cube
+        while True:
+            counts = [0] * len(self.units)
+            for cell in stars:
+                for unit in self.units_of[cell]:
+                    counts[unit] += 1
+            blocked = {(r + dr, c + dc) for r, c in stars for dr in (-1, 0, 1) for dc in (-1, 0, 1)}
+            best, best_placements = None, None
+            for unit in range(len(self.units)):
+                if counts[unit] == self.stars_per_region: continue
+                placements = self._placements(unit, blocked, empties, counts, PLACEMENT_CAP)
+                if best_placements is None or len(placements) < len(best_placements):
+                    best, best_placements = unit, placements
+                    if len(placements) <= 1: break
+            if best is None or len(best_placements) > PLACEMENT_CAP:
+                return (stars, empties, depth), None
+            if len(best_placements) != 1:
+                break
+            stars, empties = self._fix(stars, empties, best, best_placements[0])
+        children = [self._fix(stars, empties, best, placement) + (depth + 1,) for placement in best_placements]
+        return (stars, empties, depth), children
+
+    def make_cubes(self, target):
+        """
+        Splits the search space into at least `target` disjoint cubes where possible.
+
+        Cubes are split in breadth-first order, so they stay at similar depths.
+
+        Args:
+            target (int): The number of cubes to aim for.
+
+        Returns:
+            list[tuple]: (star cells, empty cells) of each cube, as sorted lists.
+        """
+        pending, final = deque([(frozenset(), frozenset(), 0)]), []
+        while pending and len(pending) + len(final) < target:
+            cube = pending.popleft()
+            if cube[2] >= MAX_CUBE_DEPTH:
+                final.append(cube)
+                continue
+            cube, children = self._split(cube)
+            if children is None:
+                final.append(cube)
+            else:
+                pending.extend(children)
+        return [(sorted(stars), sorted(empties)) for stars, empties, _ in final + list(pending)]
+
+    def solve(self, workers=None, max_solutions=2, timeout_ms=None, cubes_per_worker=CUBES_PER_WORKER):
+        """
+        Solves the cubes across a process pool, stopping once `max_solutions` are found.
+
+        Args:
+            workers (int, optional): The number of worker processes (default: all CPU
+                                     cores). With one worker the cubes are solved in
+                                     this process.
+            max_solutions (int, optional): The number of solutions to stop at. The
+                                           default of two is enough to decide uniqueness.
+            timeout_ms (int, optional): A time budget for the whole search in milliseconds.
+            cubes_per_worker (int, optional): The number of cubes to create per worker.
+
+        Returns:
+            A tuple containing:
+            - list: A list of solutions found. Each solution is a 2D grid.
+            - dict: Metadata: {'timed_out': bool, 'cubes': int, 'cubes_solved': int,
+                    'split_seconds': float, 'seconds': float}.
+        """
+        start = time.time()
+        workers = workers or os.cpu_count() or 1
+        deadline = start + timeout_ms / 1000 if timeout_ms else None
+        cubes = self.make_cubes(workers * cubes_per_worker)
+        split_seconds = time.time() - start
+        tasks = [(index, stars, empties, max_solutions, deadline) for index, (stars, empties) in enumerate(cubes)]
+
+        found, timed_out, solved = [], False, 0
+        def collect(results):
+            nonlocal timed_out, solved
+            for _, cube_solutions, cube_timed_out, _ in results:
+                solved += 1
+                found.extend(cube_solutions)
+                timed_out |= cube_timed_out
+                if len(found) >= max_solutions or timed_out:
+                    return
+
+        if workers == 1:
+            _init_worker(self.region_grid, self.stars_per_region)
+            collect(map(_solve_cube, tasks))
+        else:
+            # Leaving the with-block terminates the pool, which cancels the cubes still running.
+            with multiprocessing.Pool(workers, _init_worker, (self.region_grid, self.stars_per_region)) as pool:
+                collect(pool.imap_unordered(_solve_cube, tasks))
+
+        solutions = []
+        for stars in found[:max_solutions]:
+            board = [[0] * self.dim for _ in range(self.dim)]
+            for r, c in stars:
+                board[r][c] = 1
+            solutions.append(board)
+        return solutions, {'timed_out': timed_out, 'cubes': len(cubes), 'cubes_solved': solved,
+                           'split_seconds': split_seconds, 'seconds': time.time() - start}
+
+
+# --- Benchmark ---
+
+def load_puzzles(path):
+    """Reads the SBN of every non-empty line in a puzzle file."""
+    with open(path, 'r') as f:
+        return [line.split()[0] for line in f if line.strip()]
+
+
+def z3_seconds(region_grid, stars, timeout_ms=None):
+    """Times a plain single-process Z3 uniqueness check."""
+    start = time.time()
+    Z3StarBattleSolver(region_grid, stars).solve(timeout_ms)
+    return time.time() - start
+
+
+def benchmark(path, puzzles, sample, max_workers, cubes_per_worker, timeout_ms):
+    """
+    Prints the speedup of cube-and-conquer over plain Z3 for the slowest puzzles of a file.
+
+    Args:
+        path (str): The puzzle file.
+        puzzles (int): The number of puzzles to benchmark.
+        sample (int): The number of puzzles timed with plain Z3 to pick the slowest from.
+        max_workers (int): The largest worker count on the curve.
+        cubes_per_worker (int): The number of cubes to create per worker.
+        timeout_ms (int | None): A time budget per solve in milliseconds.
+    """
+    lines = load_puzzles(path)
+    candidates = []
+    for sbn in random.Random(0).sample(lines, min(sample, len(lines))):
+        decoded = decode_sbn(sbn)
+        region_grid, _ = parse_and_validate_grid(decoded['task'])
+        candidates.append((z3_seconds(region_grid, decoded['stars'], timeout_ms), sbn, region_grid, decoded['stars']))
+    candidates.sort(reverse=True)
+    worker_counts = sorted({1, max_workers} | {2 ** i for i in range(max_workers.bit_length()) if 2 ** i <= max_workers})
+
+    print(f"\n{os.path.basename(path)}: the {puzzles} slowest of {len(candidates)} sampled puzzles, "
+          f"{os.cpu_count()} CPU cores")
+    print(f"{'puzzle':<28}{'z3 s':>8}" + ''.join(f"{f'{w}w s':>9}{'x':>6}" for w in worker_counts) + f"{'cubes':>8}")
+    totals = defaultdict(float)
+    for baseline, sbn, region_grid, stars in candidates[:puzzles]:
+        totals['z3'] += baseline
+        row, cubes = f"{sbn[:26]:<28}{baseline:>8.2f}", 0
+        for workers in worker_counts:
+            solutions, meta = CubeAndConquerSolver(region_grid, stars).solve(workers, timeout_ms=timeout_ms,
+                                                                            cubes_per_worker=cubes_per_worker)
+            totals[workers] += meta['seconds']
+            cubes = meta['cubes']
+            row += f"{meta['seconds']:>9.2f}{baseline / meta['seconds']:>6.2f}"
+        print(row + f"{cubes:>8}")
+    print(f"{'total':<28}{totals['z3']:>8.2f}"
+          + ''.join(f"{totals[w]:>9.2f}{totals['z3'] / totals[w]:>6.2f}" for w in worker_counts))
+
+
+def main():
+    """
+    Main function to run the benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark cube-and-conquer parallel solving against a single Z3 solve.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('puzzle_file', help="A .txt puzzle file, one SBN per line.")
+    parser.add_argument('--puzzles', type=int, default=3, help="Number of puzzles to benchmark (default 3).")
+    parser.add_argument('--sample', type=int, default=20,
+                        help="Puzzles timed with plain Z3 to pick the slowest from (default 20).")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help="Largest worker count on the curve (default: all CPU cores).")
+    parser.add_argument('--cubes-per-worker', type=int, default=CUBES_PER_WORKER,
+                        help=f"Cubes to create per worker (default {CUBES_PER_WORKER}).")
+    parser.add_argument('--timeout', type=int, default=None, help="Time budget per solve in milliseconds.")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.puzzle_file):
+        print(f"Error: Puzzle file not found at '{args.puzzle_file}'", file=sys.stderr)
+        sys.exit(1)
+    if args.max_workers < 1 or args.puzzles < 1:
+        print("Error: --max-workers and --puzzles must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+    benchmark(args.puzzle_file, args.puzzles, args.sample, args.max_workers, args.cubes_per_worker, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
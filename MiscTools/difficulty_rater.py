@@ -0,0 +1,165 @@
+# ==================================================================================================
+#
+#   Star Battle Difficulty Rater
+#
+#   Author: Isaiah Tadrous
+#   Version: 1.1.0
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Description:
+#   This script re-sorts a directory of puzzle files by how hard the puzzles are for a person
+#   to solve. Every puzzle is solved with the human-logic engine in logic_solver.py, which
+#   records the techniques needed and turns them into a score and a grade (ez, med, hard or
+#   expert). The puzzles are rated in parallel across a process pool and written to
+#   '<dim>-<stars>-<grade>.txt' files in the output directory, the same layout as the
+#   puzzle files in Main/puzzles/Files.
+#
+#   Puzzles that cannot be decoded, or that turn out to have no solution, are written to
+#   '<dim>-<stars>-invalid.txt' (or 'invalid.txt' if their size is unknown). A summary of how
+#   each input file was re-graded is printed at the end, along with the rating throughput.
+#   For input files already named after a grade (e.g. 10-2-med.txt) it also shows the share
+#   of puzzles that kept that grade, so a --dry-run over the labelled files checks the
+#   grading calibration in logic_solver.py before any shipped set is re-sorted.
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Usage:
+#   python difficulty_rater.py <input_dir> <output_dir> [--workers W] [--scores] [--dry-run]
+#
+#   Arguments:
+#     input_dir        Directory of .txt puzzle files, one SBN per line.
+#     output_dir       Directory to write the re-graded puzzle files to.
+#     --workers        Number of worker processes (default: all CPU cores).
+#     --scores         Append the score and hardest technique to each output line.
+#     --dry-run        Rate the puzzles and print the summary without writing any files.
+#
+# ==================================================================================================
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from logic_solver import LogicSolver, DIFFICULTY_GRADES
+from puzzle_variator import decode_sbn
+
+# --- Rater Settings ---
+CHUNK_SIZE = 64          # Puzzles handed to a worker at a time.
+INVALID_GRADE = 'invalid'
+
+
+def rate_worker(line):
+    """
+    Rates one puzzle. Designed to run in a separate process.
+
+    Args:
+        line (str): A line from a puzzle file, starting with the SBN string.
+
+    Returns:
+        tuple: (line, dim, stars, grade, score, hardest technique); dim and stars are
+               None if the SBN could not be decoded.
+    """
+    decoded = decode_sbn(line.split()[0])
+    if not decoded:
+        return line, None, None, INVALID_GRADE, 0, None
+    dim, stars = len(decoded['grid']), decoded['stars']
+    result = LogicSolver(decoded['grid'], stars).rate()
+    grade = result['grade'] if result['valid'] else INVALID_GRADE
+    return line, dim, stars, grade, result['score'], result['hardest']
+
+
+def read_puzzles(input_dir):
+    """
+    Reads every non-empty line of the .txt files in a directory.
+
+    Args:
+        input_dir (str): The directory to read.
+
+    Returns:
+        list[tuple[str, str]]: (file name, line) pairs, in file name order.
+    """
+    puzzles = []
+    for name in sorted(os.listdir(input_dir)):
+        if not name.endswith('.txt'):
+            continue
+        with open(os.path.join(input_dir, name), 'r') as f:
+            puzzles.extend((name, line.strip()) for line in f if line.strip())
+    return puzzles
+
+
+def rate_directory(input_dir, output_dir, workers, scores=False, dry_run=False):
+    """
+    Rates all puzzles in a directory and writes them out by grade.
+
+    Args:
+        input_dir (str): The directory of puzzle files to read.
+        output_dir (str): The directory to write '<dim>-<stars>-<grade>.txt' files to.
+        workers (int): The number of worker processes.
+        scores (bool): Append the score and hardest technique to each output line.
+        dry_run (bool): Do not write any files.
+
+    Returns:
+        tuple: (summary, count, seconds) where summary maps each input file name to a
+               {grade: count} dictionary.
+    """
+    puzzles = read_puzzles(input_dir)
+    buckets, summary = {}, {}
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes=workers) as pool:
+        results = pool.imap(rate_worker, (line for _, line in puzzles), chunksize=CHUNK_SIZE)
+        for (source, _), (line, dim, stars, grade, score, hardest) in zip(puzzles, results):
+            counts = summary.setdefault(source, {})
+            counts[grade] = counts.get(grade, 0) + 1
+            name = f"{dim}-{stars}-{grade}.txt" if dim else f"{INVALID_GRADE}.txt"
+            buckets.setdefault(name, []).append(f"{line} {score} {hardest}" if scores else line)
+    elapsed = time.perf_counter() - start
+
+    if not dry_run:
+        os.makedirs(output_dir, exist_ok=True)
+        for name, lines in sorted(buckets.items()):
+            with open(os.path.join(output_dir, name), 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            print(f"Wrote {len(lines)} puzzles to '{os.path.join(output_dir, name)}'.")
+    return summary, len(puzzles), elapsed
+
+
+def main():
+    """
+    Main function to run the script from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Re-sort a directory of Star Battle puzzles by human-logic difficulty.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('input_dir', help="Directory of .txt puzzle files, one SBN per line.")
+    parser.add_argument('output_dir', help="Directory to write the re-graded puzzle files to.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: all CPU cores).")
+    parser.add_argument('--scores', action='store_true',
+                        help="Append the score and hardest technique to each output line.")
+    parser.add_argument('--dry-run', action='store_true', help="Print the summary without writing files.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: Input directory not found at '{args.input_dir}'", file=sys.stderr)
+        sys.exit(1)
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+
+    summary, count, elapsed = rate_directory(args.input_dir, args.output_dir, args.workers,
+                                             args.scores, args.dry_run)
+    grades = DIFFICULTY_GRADES + [INVALID_GRADE]
+    print(f"\n{'input file':<24}" + ''.join(f"{grade:>9}" for grade in grades) + f"{'agree':>9}")
+    for source, counts in summary.items():
+        label = os.path.splitext(source)[0].split('-')[-1]
+        agree = f"{counts.get(label, 0) / sum(counts.values()):.0%}" if label in DIFFICULTY_GRADES else '-'
+        print(f"{source:<24}" + ''.join(f"{counts.get(grade, 0):>9}" for grade in grades) + f"{agree:>9}")
+    rate = count / elapsed if elapsed else 0.0
+    print(f"\nRated {count} puzzles in {elapsed:.1f} s ({rate:.0f} puzzles/s with {args.workers} workers).")
+
+
+if __name__ == "__main__":
+    main()
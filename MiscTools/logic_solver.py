@@ -0,0 +1,588 @@
+# ==================================================================================================
+#
+#   Human-Logic Deduction Engine for Star Battle Puzzles
+#
+#   Author: Isaiah Tadrous
+#   Version: 1.1.0
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Description:
+#   This module solves Star Battle puzzles the way a person does: one deduction at a time,
+#   always using the simplest technique that makes progress, and it records which techniques
+#   were needed. The techniques, from simplest to hardest, are:
+#
+#   - singles       A row, column or region has exactly as many open cells as missing stars.
+#   - no_touch      A cell touches every open cell of a unit that needs one more star, so a
+#                   star there would leave that unit empty.
+#   - confinement   A region's open cells lie in one row (column): the row's other cells
+#                   are eliminated.
+#   - pigeonhole    A row's (column's) open cells lie in regions that need exactly as many
+#                   stars as the row: those regions' other cells are eliminated.
+#   - bands         Confinement and pigeonhole over k > 1 consecutive rows or columns.
+#   - blocks        A star on a cell would leave a unit fewer non-touching cells (a 2x2 block
+#                   holds at most one star) than it needs stars.
+#   - trial         Placing a star on a cell leads to a contradiction with the techniques
+#                   above (one level of trial and error).
+#
+#   The grid is held as two integers used as bitboards (placed stars and open cells, one bit
+#   per cell), and rows, columns, regions and cell neighbourhoods are precomputed masks, so
+#   every technique is a handful of integer operations per unit.
+#
+#   A puzzle's difficulty score is the sum of the weights of the deductions needed to solve
+#   it. Its grade comes from the score per star and the hardest technique needed, against
+#   thresholds calibrated per puzzle size (see GRADING).
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Usage:
+#   from logic_solver import LogicSolver
+#   result = LogicSolver(region_grid, stars).rate()
+#   print(result['grade'], result['score'], result['techniques'])
+#
+# ==================================================================================================
+
+import functools
+import math
+
+# --- Technique Settings ---
+# Techniques in the order they are tried, with the weight each deduction adds to the score.
+TECHNIQUE_WEIGHTS = {
+    'singles': 1,
+    'no_touch': 2,
+    'confinement': 3,
+    'pigeonhole': 3,
+    'bands': 5,
+    'blocks': 8,
+    'trial': 20,
+}
+# Grades, named after the suffixes of the puzzle files (e.g. 10-2-ez.txt).
+DIFFICULTY_GRADES = ['ez', 'med', 'hard', 'expert']
+# Per (dim, stars): the score per star (score / (dim * stars)) at which each grade after the
+# first begins, and the techniques that make a puzzle at least a given grade whatever its
+# score. Scores per star run much lower on 1-star puzzles, where the hardest technique
+# separates the grades better than the score does. Calibrated on samples of the labelled
+# files in Main/puzzles/Files; other sizes use the calibrated size nearest to them (see
+# grading_for()).
+GRADING = {
+    (8, 1): ((6.5, 6.5, 6.5), {'confinement': 'med', 'pigeonhole': 'med', 'bands': 'hard',
+                               'blocks': 'hard', 'trial': 'hard'}),
+    (9, 1): ((1.35, 4.35, math.inf), {'pigeonhole': 'hard', 'bands': 'hard', 'blocks': 'hard',
+                                      'trial': 'hard'}),
+    (9, 2): ((3.1, 7.5, 11.2), {'trial': 'hard'}),
+    (10, 2): ((3.5, 6.0, 12.0), {'trial': 'hard'}),
+    (14, 3): ((2.65, 6.05, math.inf), {'trial': 'hard'}),
+}
+UNSOLVED_GRADE = 'expert'  # Puzzles that need more than one level of trial and error.
+
+
+class Contradiction(Exception):
+    """Raised when the current state can no longer be completed to a solution."""
+
+
+def grading_for(dim, stars):
+    """
+    Looks up the grading of a puzzle size.
+
+    Sizes without labelled puzzles use the calibrated size with the same number of stars
+    and the nearest dimension, or failing that the nearest dimension of any size.
+
+    Args:
+        dim (int): The size of the grid.
+        stars (int): The number of stars per row, column and region.
+
+    Returns:
+        tuple: (thresholds, minimum grades) as in GRADING.
+    """
+    if (dim, stars) in GRADING:
+        return GRADING[(dim, stars)]
+    same_stars = [size for size in GRADING if size[1] == stars]
+    nearest = min(same_stars or GRADING, key=lambda size: (abs(size[0] - dim), size))
+    return GRADING[nearest]
+
+
+@functools.lru_cache(maxsize=None)
+def board_masks(dim):
+    """
+    Builds the masks that depend only on the grid size.
+
+    Args:
+        dim (int): The size of the grid.
+
+    Returns:
+        tuple: (rows, columns, row_windows, column_windows, halo) where rows[r] and
+               columns[c] are the cells of each line, row_windows[k][i] the cells of rows
+               i..i+k-1 (likewise for columns) and halo[i] the up to eight cells touching
+               cell i.
+    """
+    rows = [((1 << dim) - 1) << (r * dim) for r in range(dim)]
+    column = sum(1 << (r * dim) for r in range(dim))
+    columns = [column << c for c in range(dim)]
+    row_windows, column_windows = [[]], [[]]
+    for size in range(1, dim + 1):
+        row_windows.append([sum(rows[first:first + size]) for first in range(dim - size + 1)])
+        column_windows.append([sum(columns[first:first + size]) for first in range(dim - size + 1)])
+    halo = []
+    for r in range(dim):
+        for c in range(dim):
+            mask = 0
+            for nr in range(max(0, r - 1), min(dim, r + 2)):
+                for nc in range(max(0, c - 1), min(dim, c + 2)):
+                    mask |= 1 << (nr * dim + nc)
+            halo.append(mask & ~(1 << (r * dim + c)))
+    return rows, columns, row_windows, column_windows, halo
+
+
+class LogicSolver:
+    """
+    A rule-based Star Battle solver over bitboard state.
+
+    Cell (r, c) is bit r * dim + c. A state is a pair of integers: the cells that
+    hold stars and the cells that are still open (neither a star nor eliminated).
+    """
+    def __init__(self, region_grid, stars_per_region):
+        """
+        Initializes the solver and precomputes the unit and neighbourhood masks.
+
+        Args:
+            region_grid (list[list[int]]): A 2D list representing the puzzle, where each
+                                           cell contains an integer ID for its region.
+            stars_per_region (int): The number of stars required per region, row, and column.
+        """
+        self.dim = dim = len(region_grid)
+        self.stars = stars_per_region
+        self.full = (1 << dim * dim) - 1
+
+        self.rows, self.columns, self.row_windows, self.column_windows, self.halo = board_masks(dim)
+        self.row_bits = (1 << dim) - 1
+        regions = {}
+        for r, row in enumerate(region_grid):
+            for c, region in enumerate(row):
+                regions[region] = regions.get(region, 0) | 1 << (r * dim + c)
+        self.regions = list(regions.values())
+        self.units = self.rows + self.columns + self.regions
+        region_of = {cell: region for region in self.regions for cell in self.cells(region)}
+        self.cell_units = [(self.rows[i // dim], self.columns[i % dim], region_of[i]) for i in range(dim * dim)]
+
+        # can_fit() results depend only on its arguments, so they are kept for the whole solve.
+        self.fit_memo = {}
+        # Per-unit results that depend only on a unit's open cells (and the stars it still
+        # needs) are kept too, so a pass only recomputes the units the last deduction changed.
+        self.line_memo = {}   # open cells -> (rows, columns) they lie in
+        self.touch_memo = {}  # open cells -> cells touching all of them
+        self.block_memo = {}  # (open cells, need) -> cells a star on which leaves too little room
+        self._unit_key, self._unit_state = None, None
+
+        self.rules = [
+            ('singles', self._singles),
+            ('no_touch', self._no_touch),
+            ('confinement', lambda stars, open_cells: self._bands(stars, open_cells, 1, 1)),
+            ('pigeonhole', lambda stars, open_cells: self._bands(stars, open_cells, 1, 1, pigeonhole=True)),
+            ('bands', lambda stars, open_cells: self._bands(stars, open_cells, 2, dim - 1)
+                or self._bands(stars, open_cells, 2, dim - 1, pigeonhole=True)),
+            ('blocks', self._blocks),
+            ('trial', self._trial),
+        ]
+
+    # --- State Helpers ---
+
+    def cells(self, mask):
+        """
+        Yields the index of every set bit of a mask, lowest first.
+
+        Args:
+            mask (int): A bitboard.
+
+        Yields:
+            int: The cell index r * dim + c.
+        """
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def state_from_grid(self, player_grid=None):
+        """
+        Builds a state from a grid of player marks.
+
+        Args:
+            player_grid (list[list[int]], optional): 1 for a star, 2 for an eliminated
+                                                     cell, 0 for an open cell.
+
+        Returns:
+            tuple[int, int]: The (stars, open_cells) bitboards, with the cells touching
+                             each star and the rest of every full unit eliminated.
+        """
+        stars, open_cells = 0, self.full
+        for r, row in enumerate(player_grid or []):
+            for c, mark in enumerate(row):
+                bit = 1 << (r * self.dim + c)
+                if mark == 1:
+                    stars |= bit
+                elif mark == 2:
+                    open_cells &= ~bit
+        return self.place(stars, open_cells & ~stars, stars)
+
+    def place(self, stars, open_cells, new_stars):
+        """
+        Places stars and eliminates the cells they touch and the rest of any full unit.
+
+        Args:
+            stars (int): The stars already placed.
+            open_cells (int): The open cells.
+            new_stars (int): The cells to place stars on.
+
+        Returns:
+            tuple[int, int]: The new (stars, open_cells).
+
+        Raises:
+            Contradiction: If two stars touch or a unit gets too many stars.
+        """
+        halo = self.halo
+        for i in self.cells(new_stars):
+            if stars & halo[i]:
+                raise Contradiction
+            stars |= 1 << i
+            open_cells &= ~(halo[i] | 1 << i)
+        # Only the units of the new stars can have filled up.
+        for i in self.cells(new_stars):
+            for unit in self.cell_units[i]:
+                placed = (stars & unit).bit_count()
+                if placed >= self.stars:
+                    if placed > self.stars:
+                        raise Contradiction
+                    open_cells &= ~unit
+        return stars, open_cells
+
+    def unit_state(self, stars, open_cells):
+        """
+        Returns how many stars each unit still needs and its open cells.
+
+        The result is kept for the last state asked for, so the techniques tried
+        on one state share it.
+
+        Args:
+            stars (int): The placed stars.
+            open_cells (int): The open cells.
+
+        Returns:
+            tuple[list[int], list[int]]: The needs and the open cells, in the order of self.units.
+        """
+        key = (stars, open_cells)
+        if key != self._unit_key:
+            quota = self.stars
+            self._unit_key = key
+            self._unit_state = ([quota - (stars & unit).bit_count() for unit in self.units],
+                                [open_cells & unit for unit in self.units])
+        return self._unit_state
+
+    def is_solved(self, stars):
+        """
+        Checks whether every unit has its full number of stars.
+
+        Args:
+            stars (int): The placed stars.
+
+        Returns:
+            bool: True if the puzzle is complete.
+        """
+        return stars.bit_count() == self.dim * self.stars
+
+    # --- Techniques ---
+    # Each technique takes (stars, open_cells) and returns (new_stars, eliminated) for
+    # the first deduction it finds, or None. It raises Contradiction if the state is
+    # impossible.
+
+    def _singles(self, stars, open_cells):
+        for need, candidates in zip(*self.unit_state(stars, open_cells)):
+            if need > 0:
+                count = candidates.bit_count()
+                if count < need:
+                    raise Contradiction
+                if count == need:
+                    return candidates, 0
+        return None
+
+    def _no_touch(self, stars, open_cells):
+        halo, memo = self.halo, self.touch_memo
+        for unit, need, candidates in zip(self.units, *self.unit_state(stars, open_cells)):
+            if need != 1:
+                continue
+            common = memo.get(candidates)
+            if common is None:
+                common, rest = self.full, candidates
+                while rest and common:
+                    low = rest & -rest
+                    common &= halo[low.bit_length() - 1]
+                    rest ^= low
+                memo[candidates] = common
+            touching = open_cells & ~unit & common
+            if touching:
+                return 0, touching
+        return None
+
+    def _line_masks(self, candidates):
+        """
+        Finds the rows and columns a set of cells lies in.
+
+        Args:
+            candidates (int): A bitboard.
+
+        Returns:
+            tuple[int, int]: Bit k of the first (second) value is set if a cell lies in row (column) k.
+        """
+        lines = self.line_memo.get(candidates)
+        if lines is None:
+            dim, row_bits, rows, columns = self.dim, self.row_bits, 0, 0
+            for r in range(dim):
+                row = candidates >> (r * dim) & row_bits
+                if row:
+                    rows |= 1 << r
+                    columns |= row
+            lines = self.line_memo[candidates] = (rows, columns)
+        return lines
+
+    def _bands(self, stars, open_cells, smallest, largest, pigeonhole=False):
+        """
+        Confinement (or pigeonhole) over windows of `smallest`..`largest` consecutive lines.
+
+        Each needy region is packed into one integer: its open cells, plus `need` token bits
+        of its own above the board. Regions are disjoint, so the regions inside (touching) a
+        window are the OR of their packed values, with the stars they need as the token
+        count. Every window is built from the windows one line narrower.
+        """
+        dim = self.dim
+        shift = dim * dim
+        needs, open_units = self.unit_state(stars, open_cells)
+        needy = []  # (rows touched, columns touched, packed open cells and need tokens)
+        tokens = 0
+        for need, candidates in zip(needs[2 * dim:], open_units[2 * dim:]):
+            if need > 0:
+                if not candidates:
+                    raise Contradiction
+                rows, columns = self._line_masks(candidates)
+                needy.append((rows, columns, candidates | ((1 << need) - 1) << (shift + tokens)))
+                tokens += need
+        full = self.full
+        for axis, windows in ((0, self.row_windows), (1, self.column_windows)):
+            total = [0]  # Prefix sums of the stars missing from each line.
+            for need in needs[axis * dim:(axis + 1) * dim]:
+                total.append(total[-1] + need)
+            # Packed regions per single line they touch, or per exact span of lines.
+            lines = [0] * dim
+            spans = {}
+            for region in needy:
+                touched = region[axis]
+                if pigeonhole:
+                    while touched:
+                        low = touched & -touched
+                        lines[low.bit_length() - 1] |= region[2]
+                        touched ^= low
+                else:
+                    span = ((touched & -touched).bit_length() - 1, touched.bit_length() - 1)
+                    spans[span] = spans.get(span, 0) | region[2]
+            current = None
+            for size in range(1, largest + 1):
+                if pigeonhole:
+                    current = lines if size == 1 else [current[first] | lines[first + size - 1]
+                                                       for first in range(dim - size + 1)]
+                elif size == 1:
+                    current = [spans.get((first, first), 0) for first in range(dim)]
+                else:
+                    current = [spans.get((first, first + size - 1), 0) | current[first] | current[first + 1]
+                               for first in range(dim - size + 1)]
+                if size < smallest:
+                    continue
+                for first, window in enumerate(windows[size]):
+                    window_need = total[first + size] - total[first]
+                    if not window_need:
+                        continue
+                    packed = current[first]
+                    need_in, cells_in = (packed >> shift).bit_count(), packed & full
+                    if not pigeonhole:
+                        # Regions whose open cells all lie inside the window fill it.
+                        if need_in > window_need:
+                            raise Contradiction
+                        eliminated = open_cells & window & ~cells_in
+                    else:
+                        # The window can only be filled by the regions it touches.
+                        if need_in < window_need:
+                            raise Contradiction
+                        eliminated = cells_in & ~window
+                    if need_in == window_need and eliminated:
+                        return 0, eliminated
+        return None
+
+    def can_fit(self, candidates, count):
+        """
+        Checks whether `count` stars fit on a set of cells without touching each other.
+
+        Args:
+            candidates (int): The available cells.
+            count (int): The number of stars to place.
+
+        Returns:
+            bool: True if some `count` of the cells are pairwise non-touching.
+        """
+        if count <= 0:
+            return True
+        if candidates.bit_count() < count:
+            return False
+        key = (candidates, count)
+        memo = self.fit_memo
+        if key not in memo:
+            low = candidates & -candidates
+            i = low.bit_length() - 1
+            memo[key] = (self.can_fit(candidates & ~(self.halo[i] | low), count - 1)
+                         or self.can_fit(candidates & ~low, count))
+        return memo[key]
+
+    def _blocks(self, stars, open_cells):
+        halo, memo = self.halo, self.block_memo
+        for need, candidates in zip(*self.unit_state(stars, open_cells)):
+            if need <= 0:
+                continue
+            key = (candidates, need)
+            doomed = memo.get(key)
+            if doomed is None:
+                if not self.can_fit(candidates, need):
+                    doomed = -1
+                else:
+                    # Cells of the unit and cells touching it can both cost it room.
+                    nearby = candidates
+                    for i in self.cells(candidates):
+                        nearby |= halo[i]
+                    doomed = 0
+                    for i in self.cells(nearby):
+                        inside = candidates >> i & 1
+                        if not self.can_fit(candidates & ~(halo[i] | 1 << i), need - inside):
+                            doomed |= 1 << i
+                memo[key] = doomed
+            if doomed < 0:
+                raise Contradiction
+            eliminated = doomed & open_cells
+            if eliminated:
+                return 0, eliminated
+        return None
+
+    def _trial(self, stars, open_cells):
+        # Try the cells of the units with the fewest open cells first.
+        order = sorted(
+            (candidates for need, candidates in zip(*self.unit_state(stars, open_cells)) if need > 0),
+            key=int.bit_count)
+        tried = 0
+        for candidates in order:
+            for i in self.cells(candidates & ~tried):
+                tried |= 1 << i
+                try:
+                    state = self.place(stars, open_cells & ~(1 << i), 1 << i)
+                    self.propagate(*state, max_rule=len(self.rules) - 1)
+                except Contradiction:
+                    return 0, 1 << i
+        return None
+
+    # --- Solving ---
+
+    def deduce(self, stars, open_cells, max_rule=None):
+        """
+        Finds the next deduction using the simplest technique that makes progress.
+
+        Args:
+            stars (int): The placed stars.
+            open_cells (int): The open cells.
+            max_rule (int, optional): Only use the first `max_rule` techniques.
+
+        Returns:
+            tuple | None: (technique, new_stars, eliminated), or None if no technique applies.
+
+        Raises:
+            Contradiction: If the state cannot be completed.
+        """
+        for name, rule in self.rules[:max_rule]:
+            found = rule(stars, open_cells)
+            if found:
+                return (name,) + found
+        return None
+
+    def apply(self, stars, open_cells, deduction):
+        """
+        Applies a deduction returned by deduce().
+
+        Returns:
+            tuple[int, int]: The new (stars, open_cells).
+        """
+        _, new_stars, eliminated = deduction
+        return self.place(stars, open_cells & ~eliminated, new_stars)
+
+    def propagate(self, stars, open_cells, max_rule=None, log=None):
+        """
+        Applies deductions until the puzzle is solved or no technique applies.
+
+        Args:
+            stars (int): The placed stars.
+            open_cells (int): The open cells.
+            max_rule (int, optional): Only use the first `max_rule` techniques.
+            log (list, optional): Receives the name of each technique used.
+
+        Returns:
+            tuple[int, int]: The final (stars, open_cells).
+
+        Raises:
+            Contradiction: If the state cannot be completed.
+        """
+        while not self.is_solved(stars):
+            deduction = self.deduce(stars, open_cells, max_rule)
+            if deduction is None:
+                break
+            if log is not None:
+                log.append(deduction[0])
+            stars, open_cells = self.apply(stars, open_cells, deduction)
+        return stars, open_cells
+
+    def rate(self):
+        """
+        Solves the puzzle by logic alone and rates its difficulty.
+
+        Returns:
+            dict: {
+                'solved': bool,        # False if the techniques ran out or the puzzle is invalid
+                'valid': bool,         # False if a contradiction was found
+                'score': int,          # Sum of the weights of the deductions made
+                'hardest': str | None, # The hardest technique used
+                'grade': str,          # One of DIFFICULTY_GRADES; UNSOLVED_GRADE if not solved
+                'techniques': dict,    # Technique name -> number of deductions
+                'solution': int,       # The placed stars as a bitboard
+            }
+        """
+        log = []
+        try:
+            if len(self.regions) != self.dim:
+                raise Contradiction
+            stars, _ = self.propagate(*self.state_from_grid(), log=log)
+            valid = True
+        except Contradiction:
+            stars, valid = 0, False
+        solved = valid and self.is_solved(stars)
+        counts = {}
+        for name in log:
+            counts[name] = counts.get(name, 0) + 1
+        names = list(TECHNIQUE_WEIGHTS)
+        hardest = max(counts, key=names.index, default=None)
+        score = sum(TECHNIQUE_WEIGHTS[name] * count for name, count in counts.items())
+        if solved:
+            thresholds, minimum_grades = grading_for(self.dim, self.stars)
+            level = sum(score >= self.dim * self.stars * limit for limit in thresholds)
+            if hardest in minimum_grades:
+                level = max(level, DIFFICULTY_GRADES.index(minimum_grades[hardest]))
+            grade = DIFFICULTY_GRADES[level]
+        else:
+            grade = UNSOLVED_GRADE
+        return {
+            'solved': solved,
+            'valid': valid,
+            'score': score,
+            'hardest': hardest,
+            'grade': grade,
+            'techniques': counts,
+            'solution': stars,
+        }
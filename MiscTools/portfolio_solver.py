@@ -0,0 +1,237 @@
+# ==================================================================================================
+#
+#   Solver Portfolio for Star Battle Puzzles
+#
+#   Author: Isaiah Tadrous
+#   Version: 1.1.0
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Description:
+#   No single solver is fastest on every puzzle: Z3's pseudo-boolean constraints, the
+#   row-by-row bitmask backtracker, the CNF encoding in cnf_solver.py and the human-logic
+#   engine each have puzzles they are slow on. This module races several strategies on one
+#   puzzle, each in its own process, takes the first definitive uniqueness verdict ('none',
+#   'unique' or 'multiple') and terminates the rest. A strategy that cannot decide (the
+#   logic engine running out of techniques, or a timeout) simply drops out of the race.
+#
+#   Run as a script, it races a sample of puzzles from each puzzle file, appends the winner
+#   of every race to 'portfolio_log.txt', and prints how often each strategy won per
+#   (dim, stars) over the whole log. With --table it also prints the winners as a
+#   STRATEGY_TABLE literal. That table is kept by hand in SBNBatchValidator.py and in the
+#   API's backend/constants.py, which use it to pick the solvers to run up front instead
+#   of racing. Races on a machine with fewer cores than strategies share the cores, so the
+#   table should be regenerated on hardware like the one it will be used on.
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Usage:
+#   from portfolio_solver import race
+#   result = race(region_grid, stars, timeout_ms=60000)  # {'verdict', 'winner', 'seconds', ...}
+#
+#   python portfolio_solver.py <input_path> [--puzzles P] [--strategies S ...] [--timeout MS]
+#                              [--seed N] [--table]
+#
+#   Arguments:
+#     input_path       A .txt puzzle file or a directory of them, one SBN per line.
+#     --puzzles        Puzzles raced per file (default 10).
+#     --strategies     Strategies to race (default: all of them).
+#     --timeout        Time budget per race in milliseconds (default 60000).
+#     --seed           Seed for sampling the puzzles (default 0).
+#     --table          Print the per-(dim, stars) winners as a STRATEGY_TABLE literal.
+#
+# ==================================================================================================
+
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from SBNBatchValidator import decode_sbn, parse_and_validate_grid, run_strategy
+
+# --- Portfolio Settings ---
+PORTFOLIO_LOG = "portfolio_log.txt"  # '<dim> <stars> <winner> <verdict> <seconds>' per race.
+DEFAULT_TIMEOUT_MS = 60000
+STRATEGIES = ('z3', 'bitmask', 'cnf', 'logic')  # See run_strategy() in SBNBatchValidator.py.
+COMPLETE_STRATEGIES = ('z3', 'bitmask', 'cnf')  # Strategies that can also prove a puzzle is not unique.
+
+
+def _race_worker(name, region_grid, stars, timeout_ms, results):
+    """
+    Runs one strategy and reports its verdict. Designed to run in a separate process.
+
+    Args:
+        name (str): The strategy name.
+        region_grid (list[list[int]]): The puzzle's region layout.
+        stars (int): The number of stars per row, column and region.
+        timeout_ms (int | None): The strategy's time budget in milliseconds.
+        results (multiprocessing.Queue): Receives (name, verdict, seconds).
+    """
+    start = time.perf_counter()
+    try:
+        verdict = run_strategy(name, region_grid, stars, timeout_ms)
+    except Exception:
+        verdict = None
+    results.put((name, verdict, time.perf_counter() - start))
+
+
+def race(region_grid, stars, strategies=None, timeout_ms=DEFAULT_TIMEOUT_MS):
+    """
+    Races strategies on one puzzle and returns the first definitive verdict.
+
+    Args:
+        region_grid (list[list[int]]): A 2D list representing the puzzle, where each
+                                       cell contains an integer ID for its region.
+        stars (int): The number of stars per row, column and region.
+        strategies (list[str], optional): The strategies to race (default: all).
+        timeout_ms (int, optional): A time budget for the race in milliseconds.
+
+    Returns:
+        dict: {
+            'verdict': str | None,  # One of VERDICTS, or None if no strategy decided in time
+            'winner': str | None,   # The strategy that decided first
+            'seconds': float,       # Wall time until the verdict
+            'undecided': list[str], # Strategies that finished without a verdict
+        }
+    """
+    strategies = list(strategies or STRATEGIES)
+    start = time.perf_counter()
+    deadline = start + timeout_ms / 1000 if timeout_ms else None
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_race_worker, args=(name, region_grid, stars, timeout_ms, results),
+                                         daemon=True)
+                 for name in strategies]
+    for process in processes:
+        process.start()
+
+    verdict, winner, undecided = None, None, []
+    try:
+        while len(undecided) < len(processes):
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                name, result, _ = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if result is not None:
+                verdict, winner = result, name
+                break
+            undecided.append(name)
+        seconds = time.perf_counter() - start
+    finally:
+        # The losers are still searching; stop them rather than wait for them.
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+    return {'verdict': verdict, 'winner': winner, 'seconds': seconds, 'undecided': undecided}
+
+
+# --- Benchmark & Strategy Table ---
+
+def puzzle_files(input_path):
+    """Lists the .txt puzzle files of a path, which may be a single file."""
+    if os.path.isfile(input_path):
+        return [input_path]
+    return [os.path.join(input_path, name) for name in sorted(os.listdir(input_path)) if name.endswith('.txt')]
+
+
+def read_log(path):
+    """
+    Reads the race log.
+
+    Returns:
+        dict: (dim, stars) -> Counter of strategy wins.
+    """
+    wins = defaultdict(Counter)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] != '-':
+                    wins[(int(parts[0]), int(parts[1]))][parts[2]] += 1
+    return wins
+
+
+def strategy_table(wins):
+    """
+    Builds the static strategy table from race wins.
+
+    The most frequent winner of each size comes first. If it cannot prove that a
+    puzzle is not unique, the complete strategy that won most often (or Z3) follows it.
+
+    Args:
+        wins (dict): (dim, stars) -> Counter of strategy wins, as read by read_log().
+
+    Returns:
+        dict: (dim, stars) -> tuple of strategy names.
+    """
+    table = {}
+    for size, counts in sorted(wins.items()):
+        ranked = [name for name, _ in counts.most_common()]
+        strategies = ranked[:1]
+        if strategies[0] not in COMPLETE_STRATEGIES:
+            strategies.append(next((name for name in ranked if name in COMPLETE_STRATEGIES), 'z3'))
+        table[size] = tuple(strategies)
+    return table
+
+
+def main():
+    """
+    Main function to run the portfolio benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Race solver strategies on sampled puzzles and log which one wins per size.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('input_path', help="A .txt puzzle file or a directory of them.")
+    parser.add_argument('--puzzles', type=int, default=10, help="Puzzles raced per file (default 10).")
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=list(STRATEGIES),
+                        help="Strategies to race (default: all).")
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT_MS,
+                        help=f"Time budget per race in milliseconds (default {DEFAULT_TIMEOUT_MS}).")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for sampling the puzzles (default 0).")
+    parser.add_argument('--table', action='store_true', help="Print the winners as a STRATEGY_TABLE literal.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_path):
+        print(f"Error: Input path not found at '{args.input_path}'", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    with open(PORTFOLIO_LOG, 'a') as log:
+        for path in puzzle_files(args.input_path):
+            with open(path, 'r') as f:
+                lines = [line.split()[0] for line in f if line.strip()]
+            run = Counter()
+            for sbn in rng.sample(lines, min(args.puzzles, len(lines))):
+                decoded = decode_sbn(sbn)
+                if not decoded:
+                    continue
+                region_grid, dim = parse_and_validate_grid(decoded['task'])
+                result = race(region_grid, decoded['stars'], args.strategies, args.timeout)
+                run[result['winner'] or '-'] += 1
+                log.write(f"{dim} {decoded['stars']} {result['winner'] or '-'} {result['verdict'] or '-'} "
+                          f"{result['seconds']:.3f}\n")
+                log.flush()
+            print(f"{os.path.basename(path):<24}" + ", ".join(f"{name}: {n}" for name, n in run.most_common()))
+
+    wins = read_log(PORTFOLIO_LOG)
+    print(f"\nWins per size over all of '{PORTFOLIO_LOG}':")
+    for (dim, stars), counts in sorted(wins.items()):
+        print(f"  {dim}x{dim} ({stars}*): " + ", ".join(f"{name} {n}" for name, n in counts.most_common()))
+    if args.table:
+        print("\nSTRATEGY_TABLE = {")
+        for size, strategies in strategy_table(wins).items():
+            print(f"    {size}: {strategies},")
+        print("}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,691 @@
+# ==================================================================================================
+#
+#   Star Battle Puzzle Generator
+#
+#   Author: Isaiah Tadrous
+#   Version: 1.0.0
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Description:
+#   This script generates new Star Battle puzzles with exactly one solution, for any of the
+#   sizes listed in PUZZLE_DEFINITIONS, and writes them in Star Battle Notation (SBN).
+#
+#   Each candidate is a random partition of the grid into `dim` regions, grown outwards from
+#   random seeds one cell at a time, with the larger regions growing faster so that sizes
+#   vary. By default the seeds come from a randomly planted star layout (every star starts
+#   a fragment and the fragments are joined `stars` at a time), so each candidate has at
+#   least one solution; with `--method random` the seeds are plain random cells, which is
+#   mostly useful as a baseline. Candidates are first screened with cheap necessary
+#   conditions:
+#
+#   - Region sizes: a region needs at least 2 * stars - 1 cells to hold `stars` stars.
+#   - 2x2 blocks: a 2x2 block holds at most one star, so a region must touch at least
+#     `stars` blocks under each of the four block alignments.
+#   - Bands: k consecutive rows (or columns) hold k * stars stars, so no more than k
+#     regions can lie entirely inside them.
+#
+#   The survivors are checked for uniqueness with the bitmask backtracking solver from
+#   bitmask_solver.py. When a second solution turns up, a cell that holds a star in it but
+#   not in the planted one is handed to a neighbouring region. The planted solution is
+#   unaffected, the second one is no longer valid, and the check is repeated. Candidates
+#   run across a process pool, and every puzzle written is unique up to rotation and
+#   reflection.
+#
+# --------------------------------------------------------------------------------------------------
+#
+#   Usage:
+#
+#   To generate puzzles for a size_id from PUZZLE_DEFINITIONS:
+#   python puzzle_generator.py generate <size_id> <output_path> [--count N] [--workers W]
+#                                       [--seed S] [--method planted|random] [-a]
+#
+#   To measure throughput (unique puzzles per core-minute) for 8x8, 10x10 and 14x14:
+#   python puzzle_generator.py bench [--seconds 60] [--workers W] [--size-ids 3 5 7]
+#
+#   Arguments:
+#     size_id          Index into PUZZLE_DEFINITIONS (e.g. 5 for 10x10 with 2 stars).
+#     output_path      File to write the new SBN strings to, one per line.
+#     --count          Number of unique puzzles to generate (default 100).
+#     --workers        Number of worker processes (default: all CPU cores).
+#     --seed           Base random seed, for reproducible runs.
+#     --method         'planted' (default) or 'random' region seeds.
+#     --max-repairs    Region edits allowed per candidate before it is discarded.
+#     -a, --append     Append to the output file, skipping puzzles it already holds.
+#     --verify         (bench) Re-check a sample of the output with Z3.
+#
+# ==================================================================================================
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import deque
+
+from bitmask_solver import BitmaskStarBattleSolver, row_patterns
+from puzzle_variator import encode_to_sbn, decode_sbn, generate_puzzle_variations
+
+# --- Puzzle Size Constants ---
+# (dim, stars) for each size_id; must be synchronized with PUZZLE_DEFINITIONS in the API
+# backend (LegacyImplementations/API-main/backend/constants.py).
+PUZZLE_DEFINITIONS = [
+    (5, 1), (6, 1), (6, 1), (8, 1), (8, 1), (10, 2),
+    (10, 2), (14, 3), (14, 3), (17, 4), (21, 5), (25, 6),
+]
+
+# --- Generator Settings ---
+DEFAULT_COUNT = 100
+DEFAULT_MAX_REPAIRS = 40          # Region edits per candidate before it is discarded.
+DEFAULT_SOLVE_TIMEOUT_MS = 20000  # Uniqueness checks that run longer count as failures.
+PLANT_STEPS = 2000                # Backtracking steps for planting a solution before giving up.
+GROWTH_CHOICES = 3                # Regions drawn per growth step; the largest of them grows.
+GROUPING_ATTEMPTS = 20            # Tries at joining star fragments into whole regions.
+BENCHMARK_SIZE_IDS = [3, 5, 7]    # 8x8, 10x10 and 14x14.
+BENCHMARK_SECONDS = 60
+VERIFY_SAMPLE = 10                # Puzzles per size re-checked with Z3 by 'bench --verify'.
+
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+# --- Candidate Generation ---
+
+def plant_solution(dim, stars, rng):
+    """
+    Places `stars` stars in every row and column at random, with no two stars touching.
+
+    Args:
+        dim (int): The size of the grid.
+        stars (int): The number of stars per row and column.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        list[int] | None: One bitmask per row, or None if the random search gave up.
+    """
+    patterns = row_patterns(dim, stars)
+    full_row = (1 << dim) - 1
+    rows, column_counts = [], [0] * dim
+    budget = PLANT_STEPS
+
+    def place(r, blocked):
+        nonlocal budget
+        if r == dim:
+            return True
+        remaining = dim - r  # Rows still to fill, including this one.
+        choices = [p for p in patterns if not p & blocked]
+        rng.shuffle(choices)
+        for p in choices:
+            budget -= 1
+            if budget < 0:
+                return False
+            columns = [c for c in range(dim) if p >> c & 1]
+            if any(column_counts[c] == stars for c in columns):
+                continue
+            for c in columns:
+                column_counts[c] += 1
+            # Every column, and every pair of neighbouring columns (which can take at
+            # most one star from any two consecutive rows), must still be able to reach
+            # its quota in the rows below.
+            below, shadow = remaining - 1, (p | p << 1 | p >> 1) & full_row
+            need = [stars - count for count in column_counts]
+            feasible = all(
+                need[c] <= (below if p >> c & 1 else below + 1) // 2 for c in range(dim)
+            ) and all(
+                need[c] + need[c + 1] <= (below if shadow >> c & 3 == 3 else below + 1) // 2
+                for c in range(dim - 1)
+            )
+            rows.append(p)
+            if feasible and place(r + 1, shadow):
+                return True
+            rows.pop()
+            for c in columns:
+                column_counts[c] -= 1
+        return False
+
+    return rows if place(0, 0) else None
+
+
+def grow_partition(dim, seeds, rng):
+    """
+    Grows one region from each seed cell until every cell belongs to a region.
+
+    At each step GROWTH_CHOICES regions are drawn at random and the largest one absorbs
+    a random unclaimed neighbour. This spreads region sizes out: the small regions that
+    result pin their stars down, and candidates need far fewer repairs to become unique
+    than with evenly sized regions.
+
+    Args:
+        dim (int): The size of the grid.
+        seeds (list[tuple[int, int]]): The (row, col) of the first cell of each region.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        list[list[int]]: The grid of region ids (0-based, in seed order).
+    """
+    grid = [[-1] * dim for _ in range(dim)]
+    frontiers, sizes = [[] for _ in seeds], [1] * len(seeds)
+
+    def claim(region, r, c):
+        grid[r][c] = region
+        for dr, dc in NEIGHBOURS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < dim and 0 <= nc < dim and grid[nr][nc] < 0:
+                frontiers[region].append((nr, nc))
+
+    for region, (r, c) in enumerate(seeds):
+        grid[r][c] = region
+    for region, (r, c) in enumerate(seeds):
+        claim(region, r, c)
+
+    unclaimed, active = dim * dim - len(seeds), list(range(len(seeds)))
+    while unclaimed:
+        region = max((rng.choice(active) for _ in range(GROWTH_CHOICES)), key=sizes.__getitem__)
+        frontier = frontiers[region]
+        while frontier:
+            i = rng.randrange(len(frontier))
+            frontier[i], frontier[-1] = frontier[-1], frontier[i]
+            r, c = frontier.pop()
+            if grid[r][c] < 0:
+                break
+        else:
+            active.remove(region)  # Boxed in by other regions.
+            continue
+        claim(region, r, c)
+        sizes[region] += 1
+        unclaimed -= 1
+    return grid
+
+
+def group_fragments(fragment_grid, count, size, rng):
+    """
+    Joins adjacent fragments into `count` connected groups of `size` fragments each.
+
+    Each group starts from the fragment with the fewest free neighbours and grows into
+    the most constrained of its free neighbours, since those are the likeliest to be
+    stranded. After each group, every connected set of free fragments must still be a
+    whole number of groups.
+
+    Args:
+        fragment_grid (list[list[int]]): The grid of fragment ids.
+        count (int): The number of groups to form.
+        size (int): The number of fragments per group.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        list[int] | None: The group of each fragment, or None if the fragments could
+                          not be split evenly.
+    """
+    dim = len(fragment_grid)
+    adjacent = [set() for _ in range(count * size)]
+    for r in range(dim):
+        for c in range(dim):
+            a = fragment_grid[r][c]
+            for nr, nc in ((r + 1, c), (r, c + 1)):
+                if nr < dim and nc < dim and fragment_grid[nr][nc] != a:
+                    b = fragment_grid[nr][nc]
+                    adjacent[a].add(b)
+                    adjacent[b].add(a)
+
+    group_of = [-1] * (count * size)
+    def constraint(f): return sum(group_of[n] < 0 for n in adjacent[f]), rng.random()
+    for group in range(count):
+        free = [f for f in range(count * size) if group_of[f] < 0]
+        start = min(free, key=constraint)
+        members, group_of[start] = [start], group
+        while len(members) < size:
+            options = {n for m in members for n in adjacent[m] if group_of[n] < 0}
+            if not options:
+                return None
+            chosen = min(options, key=constraint)
+            group_of[chosen] = group
+            members.append(chosen)
+        unvisited = {f for f in free if group_of[f] < 0}
+        while unvisited:
+            stack, reached = [unvisited.pop()], 1
+            while stack:
+                for n in adjacent[stack.pop()]:
+                    if n in unvisited:
+                        unvisited.discard(n)
+                        stack.append(n)
+                        reached += 1
+            if reached % size:
+                return None
+    return group_of
+
+
+def grow_regions(dim, stars, rng, method='planted'):
+    """
+    Builds a random region partition, optionally around a planted solution.
+
+    Args:
+        dim (int): The size of the grid.
+        stars (int): The number of stars per row, column and region.
+        rng (random.Random): The random number generator.
+        method (str): 'planted' to seed regions from a random star layout, 'random'
+                      to seed them from random cells.
+
+    Returns:
+        tuple: (region_grid, planted) where planted is the star layout as row
+               bitmasks, or None for the 'random' method. region_grid is None if
+               no partition could be built.
+    """
+    if method == 'random':
+        seeds = [divmod(i, dim) for i in rng.sample(range(dim * dim), dim)]
+        return grow_partition(dim, seeds, rng), None
+
+    planted = plant_solution(dim, stars, rng)
+    if planted is None:
+        return None, None
+    seeds = [(r, c) for r in range(dim) for c in range(dim) if planted[r] >> c & 1]
+    fragments = grow_partition(dim, seeds, rng)
+    if stars == 1:
+        return fragments, planted
+    for _ in range(GROUPING_ATTEMPTS):
+        group_of = group_fragments(fragments, dim, stars, rng)
+        if group_of is not None:
+            return [[group_of[f] for f in row] for row in fragments], planted
+    return None, None
+
+
+# --- Necessary Conditions ---
+
+def region_cells(region_grid):
+    """
+    Groups the cells of a grid by region.
+
+    Args:
+        region_grid (list[list[int]]): The grid of region ids.
+
+    Returns:
+        dict[int, list[tuple[int, int]]]: The (row, col) cells of each region.
+    """
+    cells = {}
+    for r, row in enumerate(region_grid):
+        for c, region in enumerate(row):
+            cells.setdefault(region, []).append((r, c))
+    return cells
+
+
+def passes_necessary_conditions(region_grid, stars):
+    """
+    Applies cheap checks that every solvable puzzle passes.
+
+    Args:
+        region_grid (list[list[int]]): The grid of region ids.
+        stars (int): The number of stars per row, column and region.
+
+    Returns:
+        str | None: The name of the first failed check, or None if all pass.
+    """
+    dim = len(region_grid)
+    cells = region_cells(region_grid)
+    if len(cells) != dim:
+        return 'region count'
+    for members in cells.values():
+        if len(members) < 2 * stars - 1:
+            return 'region size'
+        for dr in (0, 1):
+            for dc in (0, 1):
+                if len({((r + dr) // 2, (c + dc) // 2) for r, c in members}) < stars:
+                    return '2x2 blocks'
+    for axis in (0, 1):
+        spans = [(min(cell[axis] for cell in members), max(cell[axis] for cell in members))
+                 for members in cells.values()]
+        for first in range(dim):
+            for last in range(first, dim):
+                inside = sum(1 for low, high in spans if first <= low and high <= last)
+                if inside > last - first + 1:
+                    return 'bands'
+    return None
+
+
+# --- Uniqueness Repair ---
+
+def components(cells):
+    """
+    Splits a set of cells into groups that are connected through shared edges.
+
+    Args:
+        cells (set[tuple[int, int]]): The (row, col) cells.
+
+    Returns:
+        list[set[tuple[int, int]]]: The connected groups.
+    """
+    groups, unvisited = [], set(cells)
+    while unvisited:
+        start = unvisited.pop()
+        group, queue = {start}, deque([start])
+        while queue:
+            r, c = queue.popleft()
+            for dr, dc in NEIGHBOURS:
+                cell = (r + dr, c + dc)
+                if cell in unvisited:
+                    unvisited.discard(cell)
+                    group.add(cell)
+                    queue.append(cell)
+        groups.append(group)
+    return groups
+
+
+def break_solution(region_grid, planted, other, rng):
+    """
+    Moves cells to a neighbouring region so that `other` is no longer a solution.
+
+    A cell that holds a star in `other` but not in `planted` is handed to another
+    region, together with the shortest path of cells linking it to that region when
+    it lies inside its own. None of the moved cells holds a planted star, so the
+    planted solution keeps the same number of stars in every region, while `other`
+    ends up with one star too few in the old region and one too many in the new one.
+    Any part of the old region cut off by the move goes along with it, as long as it
+    holds no planted star.
+
+    Args:
+        region_grid (list[list[int]]): The grid of region ids, modified in place.
+        planted (list[list[int]]): The solution to keep, as a 0/1 grid.
+        other (list[list[int]]): The solution to rule out, as a 0/1 grid.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        bool: True if any cells were moved.
+    """
+    dim = len(region_grid)
+    candidates = [(r, c) for r in range(dim) for c in range(dim) if other[r][c] and not planted[r][c]]
+    rng.shuffle(candidates)
+    cells = {key: set(members) for key, members in region_cells(region_grid).items()}
+    for start in candidates:
+        region = region_grid[start[0]][start[1]]
+        # Breadth-first search from the cell, through cells of its region without a
+        # planted star, to the nearest one that borders another region.
+        parents, queue, path, target = {start: None}, deque([start]), None, None
+        while queue and path is None:
+            cell = queue.popleft()
+            neighbours = [(cell[0] + dr, cell[1] + dc) for dr, dc in NEIGHBOURS]
+            neighbours = [(r, c) for r, c in neighbours if 0 <= r < dim and 0 <= c < dim]
+            rng.shuffle(neighbours)
+            for r, c in neighbours:
+                if region_grid[r][c] != region:
+                    path, target = [], region_grid[r][c]
+                    while cell is not None:
+                        path.append(cell)
+                        cell = parents[cell]
+                    break
+                if (r, c) not in parents and not planted[r][c]:
+                    parents[(r, c)] = cell
+                    queue.append((r, c))
+        if path is None:
+            continue
+        moved = set(path)
+        for group in components(cells[region] - moved):
+            if not any(planted[r][c] for r, c in group):
+                moved |= group
+        if len(components(cells[region] - moved)) != 1:
+            continue  # The planted stars of the region would be split apart.
+        for r, c in moved:
+            region_grid[r][c] = target
+        return True
+    return False
+
+
+def make_unique(region_grid, stars, planted, rng, max_repairs, timeout_ms):
+    """
+    Checks a candidate for uniqueness, repairing it while a second solution exists.
+
+    Args:
+        region_grid (list[list[int]]): The grid of region ids, modified in place.
+        stars (int): The number of stars per row, column and region.
+        planted (list[int] | None): The planted solution as row bitmasks, if any.
+        rng (random.Random): The random number generator.
+        max_repairs (int): The number of cells that may be moved.
+        timeout_ms (int): The time budget for each uniqueness check.
+
+    Returns:
+        tuple: (outcome, repairs, solve_seconds) where outcome is 'unique',
+               'unsolvable', 'ambiguous' or 'timeout'.
+    """
+    dim = len(region_grid)
+    keep = None if planted is None else [[row >> c & 1 for c in range(dim)] for row in planted]
+    solve_seconds = 0.0
+    for repairs in range(max_repairs + 1):
+        start = time.perf_counter()
+        solutions, meta = BitmaskStarBattleSolver(region_grid, stars).solve(timeout_ms=timeout_ms)
+        solve_seconds += time.perf_counter() - start
+        if meta['timed_out']:
+            return 'timeout', repairs, solve_seconds
+        if not solutions:
+            return 'unsolvable', repairs, solve_seconds
+        if len(solutions) == 1:
+            return 'unique', repairs, solve_seconds
+        if keep is None:
+            keep = solutions[0]  # Without a planted solution, keep the first one found.
+        other = solutions[1] if solutions[0] == keep else solutions[0]
+        if repairs == max_repairs or not break_solution(region_grid, keep, other, rng):
+            break
+    return 'ambiguous', repairs, solve_seconds
+
+
+# --- Worker Processes ---
+
+def generation_worker(task):
+    """
+    Builds and checks one candidate puzzle. Designed to run in a separate process.
+
+    Args:
+        task (tuple): (dim, stars, seed, method, max_repairs, timeout_ms).
+
+    Returns:
+        tuple: (sbn, stats) where sbn is the unique puzzle or None, and stats counts
+               the outcome, the repairs made and the time spent solving.
+    """
+    dim, stars, seed, method, max_repairs, timeout_ms = task
+    rng = random.Random(seed)
+    stats = {'candidates': 1, 'repairs': 0, 'solve_seconds': 0.0}
+    region_grid, planted = grow_regions(dim, stars, rng, method)
+    if region_grid is None:
+        stats['no partition'] = 1
+        return None, stats
+    failed = passes_necessary_conditions(region_grid, stars)
+    if failed:
+        stats[f'rejected: {failed}'] = 1
+        return None, stats
+    outcome, stats['repairs'], stats['solve_seconds'] = make_unique(
+        region_grid, stars, planted, rng, max_repairs, timeout_ms)
+    stats[outcome] = 1
+    return (encode_to_sbn(region_grid, stars) if outcome == 'unique' else None), stats
+
+
+def canonical_sbn(sbn):
+    """
+    Returns a representative SBN shared by all rotations and reflections of a puzzle.
+
+    Args:
+        sbn (str): The SBN string.
+
+    Returns:
+        str: The smallest SBN among the puzzle's symmetrical variations.
+    """
+    return min(generate_puzzle_variations(sbn), default=sbn)
+
+
+def generate(dim, stars, count, workers, seed, method, max_repairs, timeout_ms,
+             seen=None, deadline=None, on_puzzle=None):
+    """
+    Generates unique puzzles across a process pool.
+
+    Args:
+        dim (int): The size of the grid.
+        stars (int): The number of stars per row, column and region.
+        count (int | None): The number of puzzles to generate; None for no limit.
+        workers (int): The number of worker processes.
+        seed (int): The base seed; candidate i uses seed + i.
+        method (str): 'planted' or 'random'.
+        max_repairs (int): The number of cells each candidate may have moved.
+        timeout_ms (int): The time budget for each uniqueness check.
+        seen (set[str], optional): Canonical SBNs to skip; new puzzles are added to it.
+        deadline (float, optional): A time.monotonic() value at which to stop.
+        on_puzzle (callable, optional): Called with each new SBN as it is found.
+
+    Returns:
+        tuple: (list of new SBN strings, aggregated stats dictionary).
+    """
+    seen = set() if seen is None else seen
+    found, totals = [], {}
+    batch = max(1, workers) * 4
+    next_seed = seed
+    with multiprocessing.Pool(processes=workers) as pool:
+        while (count is None or len(found) < count) and (deadline is None or time.monotonic() < deadline):
+            tasks = [(dim, stars, s, method, max_repairs, timeout_ms) for s in range(next_seed, next_seed + batch)]
+            next_seed += batch
+            results = pool.imap_unordered(generation_worker, tasks)
+            for _ in tasks:
+                try:
+                    sbn, stats = results.next(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                except multiprocessing.TimeoutError:
+                    break  # Leaving the pool terminates the candidates still running.
+                for key, value in stats.items():
+                    totals[key] = totals.get(key, 0) + value
+                if sbn is None:
+                    continue
+                key = canonical_sbn(sbn)
+                if key in seen:
+                    totals['duplicates'] = totals.get('duplicates', 0) + 1
+                    continue
+                seen.add(key)
+                found.append(sbn)
+                if on_puzzle:
+                    on_puzzle(sbn)
+                if count is not None and len(found) >= count:
+                    break
+    return found, totals
+
+
+def format_stats(totals):
+    """
+    Formats the aggregated worker statistics for display.
+
+    Args:
+        totals (dict): The stats returned by generate().
+
+    Returns:
+        str: One "name: value" pair per outcome, comma separated.
+    """
+    order = ['candidates', 'unique', 'ambiguous', 'unsolvable', 'timeout', 'duplicates', 'no partition']
+    keys = order + sorted(k for k in totals if k not in order and k not in ('repairs', 'solve_seconds'))
+    parts = [f"{key}: {totals[key]}" for key in keys if totals.get(key)]
+    if totals.get('candidates'):
+        parts.append(f"repairs/candidate: {totals.get('repairs', 0) / totals['candidates']:.1f}")
+    return ", ".join(parts)
+
+
+# --- Commands ---
+
+def do_generate(args):
+    """
+    Runs the 'generate' command: writes `--count` unique puzzles to the output file.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+    """
+    dim, stars = PUZZLE_DEFINITIONS[args.size_id]
+    seen = set()
+    if args.append and os.path.exists(args.output_path):
+        with open(args.output_path, 'r') as f:
+            seen = {canonical_sbn(line.split()[0]) for line in f if line.strip()}
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    print(f"Generating {args.count} unique {dim}x{dim} puzzles with {stars} star(s) "
+          f"using {args.workers} workers (seed {seed}, method '{args.method}')...")
+
+    start = time.monotonic()
+    with open(args.output_path, 'a' if args.append else 'w') as f:
+        def write(sbn):
+            f.write(sbn + '\n')
+            f.flush()
+        found, totals = generate(dim, stars, args.count, args.workers, seed, args.method,
+                                 args.max_repairs, args.timeout, seen=seen, on_puzzle=write)
+    elapsed = time.monotonic() - start
+    print(f"Wrote {len(found)} puzzles to '{args.output_path}' in {elapsed:.1f} s.")
+    print(f"  {format_stats(totals)}")
+
+
+def do_bench(args):
+    """
+    Runs the 'bench' command: measures unique puzzles per core-minute for several sizes.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+    """
+    seed = args.seed if args.seed is not None else 0
+    print(f"Benchmark: {args.seconds:.0f} s per size, {args.workers} workers, method '{args.method}'.")
+    print(f"{'size':<12}{'unique':>8}{'candidates':>12}{'per core-min':>14}{'solve share':>13}")
+    results = []
+    for size_id in args.size_ids:
+        dim, stars = PUZZLE_DEFINITIONS[size_id]
+        start = time.monotonic()
+        found, totals = generate(dim, stars, None, args.workers, seed, args.method,
+                                 args.max_repairs, args.timeout, deadline=start + args.seconds)
+        elapsed = time.monotonic() - start
+        core_minutes = elapsed * args.workers / 60
+        solve_share = totals.get('solve_seconds', 0.0) / (elapsed * args.workers)
+        print(f"{f'{dim}x{dim} ({stars}*)':<12}{len(found):>8}{totals.get('candidates', 0):>12}"
+              f"{len(found) / core_minutes:>14.1f}{solve_share:>12.0%}")
+        print(f"  {format_stats(totals)}")
+        results.append((dim, stars, found))
+
+    if args.verify:
+        from SBNBatchValidator import Z3StarBattleSolver, Z3_AVAILABLE
+        if not Z3_AVAILABLE:
+            print("Skipping verification: Z3 is not available.")
+            return
+        for dim, stars, found in results:
+            sample = found[:VERIFY_SAMPLE]
+            unique = sum(len(Z3StarBattleSolver(decode_sbn(sbn)['grid'], stars).solve()[0]) == 1 for sbn in sample)
+            print(f"Z3 check {dim}x{dim}: {unique}/{len(sample)} unique.")
+
+
+def main():
+    """
+    Main function to run the script from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate unique Star Battle puzzles in SBN format.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: all CPU cores).")
+    common.add_argument('--seed', type=int, default=None, help="Base random seed for reproducible runs.")
+    common.add_argument('--method', choices=['planted', 'random'], default='planted',
+                        help="Seed regions from a planted solution (default) or from random cells.")
+    common.add_argument('--max-repairs', type=int, default=DEFAULT_MAX_REPAIRS,
+                        help=f"Region edits allowed per candidate (default {DEFAULT_MAX_REPAIRS}).")
+    common.add_argument('--timeout', type=int, default=DEFAULT_SOLVE_TIMEOUT_MS,
+                        help=f"Milliseconds allowed per uniqueness check (default {DEFAULT_SOLVE_TIMEOUT_MS}).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', parents=[common], help="Generate unique puzzles.")
+    generate_parser.add_argument('size_id', type=int, choices=range(len(PUZZLE_DEFINITIONS)),
+                                 help="Index into PUZZLE_DEFINITIONS.")
+    generate_parser.add_argument('output_path', help="File to write the SBN strings to.")
+    generate_parser.add_argument('--count', type=int, default=DEFAULT_COUNT,
+                                 help=f"Number of puzzles to generate (default {DEFAULT_COUNT}).")
+    generate_parser.add_argument('-a', '--append', action='store_true',
+                                 help="Append to the output file, skipping puzzles it already holds.")
+    generate_parser.set_defaults(func=do_generate)
+
+    bench_parser = subparsers.add_parser('bench', parents=[common], help="Measure unique puzzles per core-minute.")
+    bench_parser.add_argument('--seconds', type=float, default=BENCHMARK_SECONDS,
+                              help=f"Time spent on each size (default {BENCHMARK_SECONDS}).")
+    bench_parser.add_argument('--size-ids', type=int, nargs='+', default=BENCHMARK_SIZE_IDS,
+                              help="Sizes to benchmark (default: 3 5 7, i.e. 8x8, 10x10 and 14x14).")
+    bench_parser.add_argument('--verify', action='store_true', help="Re-check a sample of each size with Z3.")
+    bench_parser.set_defaults(func=do_bench)
+
+    args = parser.parse_args()
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
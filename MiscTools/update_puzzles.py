@@ -13,6 +13,15 @@
 #               facilitating common data management tasks such as batch
 #               conversion, insertion, addition, and deletion of puzzle data.
 #
+#               Every command works on either a single puzzles.json file or a
+#               sharded store: a directory holding one JSONL shard per index
+#               plus a small manifest that maps indices to shards. In a store,
+#               'add' appends to one shard, 'insert' writes one new shard and
+#               renumbers the manifest, and 'delete' touches a single shard,
+#               so large databases are never re-read or rewritten as a whole.
+#               'export' writes a store back to the puzzles.json layout used
+#               by the web frontend.
+#
 # -----------------------------------------------------------------------------
 #
 # Usage & Commands:
@@ -43,15 +52,65 @@
 #      example (delete index): python update_puzzles.py delete puzzles.json --index 7
 #      example (delete puzzle): python update_puzzles.py delete puzzles.json --index 4 --puzzle "puzzle_A"
 #
+#   6. shard: Split a puzzles.json file into a sharded store directory.
+#      usage: python update_puzzles.py shard <json_file> <store_dir>
+#      example: python update_puzzles.py shard puzzles.json puzzle_store
+#
+#   7. export: Write a sharded store back to a single puzzles.json file.
+#      usage: python update_puzzles.py export <store_dir> <json_file>
+#      example: python update_puzzles.py export puzzle_store puzzles.json
+#
+#   8. build: Write paged, precompressed puzzle bundles for static hosting.
+#      usage: python update_puzzles.py build <json_file> --out-dir <dir> [--page-size <N>]
+#      example: python update_puzzles.py build puzzle_store --out-dir site/puzzles --page-size 500
+#
+#   Validation: 'add' and 'insert' accept --validate, which decodes every
+#   incoming SBN, checks its size and star count against the index, rejects
+#   puzzles that duplicate one already in the database (including rotations
+#   and reflections) and checks uniqueness with Z3 in a process pool.
+#      example: python update_puzzles.py add puzzles.json --index 4 --puzzles "AA2W..." --validate
+#      example: python update_puzzles.py insert puzzle_store --index 5 --from-file new.txt --validate --timeout 5
+#
+#   Any command that takes a <json_file> also accepts a store directory,
+#   e.g. python update_puzzles.py add puzzle_store --index 4 --puzzles "puzzle_A"
+#
 # =============================================================================
 
 import argparse
+import gzip
+import hashlib
 import json
+import math
+import multiprocessing
 import os
 import sys
 import shutil
+import time
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+# Brotli is optional: without it, 'build' only emits the .gz variants.
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# --- Sharded Store Layout ---
+MANIFEST_NAME = 'manifest.json'  # Maps each index to its shard file.
+SHARD_DIR_NAME = 'shards'        # Holds one JSONL file per index, one puzzle per line.
+
+# --- Static Bundle Layout ---
+BUNDLE_MANIFEST_NAME = 'bundles.json'  # Lists every bundle and page written by 'build'.
+DEFAULT_PAGE_SIZE = 500                # Puzzles per page.
+HASH_PREFIX_LENGTH = 12                # Hex digits of the content hash kept in file names.
+
+# --- Validation-on-Ingest ---
+KEY_INDEX_SUFFIX = '.keys.json'           # Canonical-key cache next to a JSON file.
+KEY_INDEX_NAME = 'canonical_keys.json'    # Canonical-key cache inside a store.
+DEFAULT_VALIDATE_TIMEOUT = 10.0           # Seconds allowed per uniqueness check.
 
 # --- Core Helper Functions for File I/O & Data Validation ---
 
@@ -160,6 +219,486 @@ def save_json_data(file_path: Path, data: Dict[str, Any], dry_run: bool, no_back
         print(f"Error: Could not write to '{file_path}': {e}", file=sys.stderr)
         sys.exit(1)
 
+# --- Sharded Store Helpers ---
+
+def is_sharded_store(path: Path) -> bool:
+    """
+    Checks whether a path refers to a sharded store rather than a JSON file.
+
+    Args:
+        path (Path): The path given on the command line.
+
+    Returns:
+        bool: True if the path is a directory (an existing or empty store).
+    """
+    return path.is_dir()
+
+def atomic_write_text(file_path: Path, text: str) -> None:
+    """
+    Replaces a file's contents in one step, so an interrupted write never
+    leaves a half-written shard or manifest behind.
+
+    Args:
+        file_path (Path): The file to write.
+        text (str): The complete new contents.
+    """
+    temp_path = file_path.with_suffix(file_path.suffix + '.tmp')
+    with temp_path.open('w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, file_path)
+
+def backup_file(file_path: Path, no_backup: bool) -> None:
+    """
+    Copies a file to a .bak file next to it before it is modified.
+
+    Args:
+        file_path (Path): The file about to be modified.
+        no_backup (bool): If True, no backup is made.
+    """
+    if no_backup or not file_path.exists():
+        return
+    backup_path = file_path.with_suffix(file_path.suffix + '.bak')
+    try:
+        shutil.copy2(file_path, backup_path)
+    except Exception as e:
+        print(f"Warning: Could not create backup for '{file_path}': {e}", file=sys.stderr)
+
+def load_manifest(store_dir: Path) -> Dict[str, Any]:
+    """
+    Loads the manifest of a sharded store.
+
+    The manifest has the form {"next_shard": N, "indices": {"<index>": "<shard file>"}}.
+    Shard file names are never reused, so a renumbered index keeps its shard.
+
+    Args:
+        store_dir (Path): The store directory.
+
+    Returns:
+        Dict[str, Any]: The manifest. An empty manifest is returned for a
+                        directory that has none yet.
+
+    Raises:
+        SystemExit: If the manifest is unreadable or has non-integer indices.
+    """
+    manifest_path = store_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {'next_shard': 0, 'indices': {}}
+    try:
+        with manifest_path.open('r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for key in manifest['indices'].keys():
+            int(key)
+        return manifest
+    except (json.JSONDecodeError, KeyError, TypeError):
+        print(f"Error: The manifest '{manifest_path}' is invalid.", file=sys.stderr)
+        sys.exit(1)
+    except ValueError:
+        print(f"Error: All indices in '{manifest_path}' must be strings representing integers.", file=sys.stderr)
+        sys.exit(1)
+    except IOError as e:
+        print(f"Error: Could not read file '{manifest_path}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+def save_manifest(store_dir: Path, manifest: Dict[str, Any], no_backup: bool) -> None:
+    """
+    Writes the manifest of a sharded store, sorted by integer index.
+
+    Args:
+        store_dir (Path): The store directory.
+        manifest (Dict[str, Any]): The manifest to write.
+        no_backup (bool): If True, the previous manifest is not backed up.
+    """
+    manifest_path = store_dir / MANIFEST_NAME
+    manifest['indices'] = dict(sorted(manifest['indices'].items(), key=lambda item: int(item[0])))
+    backup_file(manifest_path, no_backup)
+    try:
+        atomic_write_text(manifest_path, json.dumps(manifest, indent=4))
+    except IOError as e:
+        print(f"Error: Could not write to '{manifest_path}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+def new_shard_name(manifest: Dict[str, Any]) -> str:
+    """
+    Allocates a fresh shard file name from the manifest's counter.
+
+    Args:
+        manifest (Dict[str, Any]): The store manifest (its counter is advanced).
+
+    Returns:
+        str: The new shard file name.
+    """
+    name = f"{manifest['next_shard']:04d}.jsonl"
+    manifest['next_shard'] += 1
+    return name
+
+def shard_path(store_dir: Path, shard_name: str) -> Path:
+    """
+    Returns the path of a shard file inside a store.
+
+    Args:
+        store_dir (Path): The store directory.
+        shard_name (str): The shard file name from the manifest.
+
+    Returns:
+        Path: The path of the shard file.
+    """
+    return store_dir / SHARD_DIR_NAME / shard_name
+
+def read_shard(store_dir: Path, shard_name: str) -> List[str]:
+    """
+    Reads every puzzle from one shard.
+
+    Args:
+        store_dir (Path): The store directory.
+        shard_name (str): The shard file name from the manifest.
+
+    Returns:
+        List[str]: The puzzles, in order. A missing shard yields an empty list.
+    """
+    path = shard_path(store_dir, shard_name)
+    if not path.exists():
+        return []
+    with path.open('r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def write_shard(store_dir: Path, shard_name: str, puzzles: List[str], no_backup: bool) -> None:
+    """
+    Replaces the contents of one shard.
+
+    Args:
+        store_dir (Path): The store directory.
+        shard_name (str): The shard file name.
+        puzzles (List[str]): The puzzles to store, one JSON string per line.
+        no_backup (bool): If True, the previous shard is not backed up.
+    """
+    path = shard_path(store_dir, shard_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    backup_file(path, no_backup)
+    atomic_write_text(path, ''.join(json.dumps(puzzle) + '\n' for puzzle in puzzles))
+
+def append_to_shard(store_dir: Path, shard_name: str, puzzles: List[str]) -> None:
+    """
+    Appends puzzles to the end of one shard without reading it.
+
+    Args:
+        store_dir (Path): The store directory.
+        shard_name (str): The shard file name.
+        puzzles (List[str]): The puzzles to append.
+    """
+    path = shard_path(store_dir, shard_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(puzzle) + '\n' for puzzle in puzzles))
+
+def load_store_data(store_dir: Path) -> Dict[str, List[str]]:
+    """
+    Reads a whole sharded store into the same dictionary layout as puzzles.json.
+
+    Args:
+        store_dir (Path): The store directory.
+
+    Returns:
+        Dict[str, List[str]]: The puzzles of every index, keyed by index string.
+    """
+    manifest = load_manifest(store_dir)
+    return {index: read_shard(store_dir, name) for index, name in manifest['indices'].items()}
+
+def load_puzzle_data(path: Path) -> Dict[str, Any]:
+    """
+    Loads a puzzle database from either a JSON file or a sharded store.
+
+    Args:
+        path (Path): A puzzles.json file or a store directory.
+
+    Returns:
+        Dict[str, Any]: The puzzles of every index, keyed by index string.
+    """
+    return load_store_data(path) if is_sharded_store(path) else load_json_data(path)
+
+# --- Validation-on-Ingest ---
+
+def sbn_module():
+    """
+    Imports the SBN decoder and Z3 solver from SBNBatchValidator on first use,
+    so that commands which do not validate never need Z3.
+
+    Returns:
+        module: The SBNBatchValidator module.
+    """
+    import SBNBatchValidator
+    return SBNBatchValidator
+
+@lru_cache(maxsize=None)
+def symmetry_permutations(dim: int) -> List[itemgetter]:
+    """
+    Builds, for each of the 8 rotations and reflections of a square grid, the
+    permutation that maps an SBN border bit string to the bit string of the
+    transformed puzzle.
+
+    SBN stores the region borders as dim*(dim-1) vertical bits (row-major)
+    followed by dim*(dim-1) horizontal bits (column-major). Borders carry no
+    region labels, so transforming them is enough to compare layouts.
+
+    Args:
+        dim (int): The grid dimension.
+
+    Returns:
+        List[itemgetter]: One getter per transform; applying it to the bit
+                          string yields the transformed bits in order.
+    """
+    last, half = dim - 1, dim * (dim - 1)
+    edges = [((r, c), (r, c + 1)) for r in range(dim) for c in range(dim - 1)] + \
+            [((r, c), (r + 1, c)) for c in range(dim) for r in range(dim - 1)]
+
+    def edge_index(a, b):
+        (r1, c1), (r2, c2) = sorted((a, b))
+        return r1 * (dim - 1) + c1 if r1 == r2 else half + c1 * (dim - 1) + r1
+
+    transforms = [lambda r, c: (r, c), lambda r, c: (c, last - r), lambda r, c: (last - r, last - c),
+                  lambda r, c: (last - c, r), lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+                  lambda r, c: (c, r), lambda r, c: (last - c, last - r)]
+    getters = []
+    for transform in transforms:
+        source = [0] * len(edges)
+        for i, (a, b) in enumerate(edges):
+            source[edge_index(transform(*a), transform(*b))] = i
+        getters.append(itemgetter(*source))
+    return getters
+
+def puzzle_keys(sbn: str) -> Optional[Tuple[int, int, str, str]]:
+    """
+    Decodes an SBN's header and borders and computes its duplicate-detection keys.
+
+    Args:
+        sbn (str): The SBN puzzle string.
+
+    Returns:
+        Optional[Tuple[int, int, str, str]]: (dim, stars, canonical key, exact key),
+            or None if the string is not a valid SBN. The canonical key is the
+            same for every rotation and reflection of a layout; the exact key
+            only matches the identical layout. Both are 64-bit hashes.
+    """
+    sbv = sbn_module()
+    dim = sbv.SBN_CODE_TO_DIM_MAP.get(sbn[0:2])
+    if not dim or len(sbn) < 4 or not sbn[2].isdigit():
+        return None
+    stars = int(sbn[2])
+    bits_needed = 2 * dim * (dim - 1)
+    chars = sbn[4:4 + math.ceil(bits_needed / 6)]
+    if len(chars) * 6 < bits_needed or any(char not in sbv.SBN_CHAR_TO_INT for char in chars):
+        return None
+    field = ''.join(format(sbv.SBN_CHAR_TO_INT[char], '06b') for char in chars)[-bits_needed:]
+    canonical = min(''.join(getter(field)) for getter in symmetry_permutations(dim))
+
+    def digest(bits):
+        return hashlib.blake2b(f"{dim}:{stars}:{bits}".encode('ascii'), digest_size=8).hexdigest()
+    return dim, stars, digest(canonical), digest(field)
+
+def key_index_path(path: Path) -> Path:
+    """
+    Returns where the canonical-key cache of a database is kept.
+
+    Args:
+        path (Path): A puzzles.json file or a store directory.
+
+    Returns:
+        Path: The cache file path.
+    """
+    return path / KEY_INDEX_NAME if is_sharded_store(path) else path.with_name(path.name + KEY_INDEX_SUFFIX)
+
+def database_signature(path: Path) -> List[Any]:
+    """
+    Summarises the files of a database, to tell whether a cached key index is stale.
+
+    Args:
+        path (Path): A puzzles.json file or a store directory.
+
+    Returns:
+        List[Any]: The (name, size, mtime_ns) of every file the puzzles are read from.
+    """
+    files = [path] if not is_sharded_store(path) else \
+        [path / MANIFEST_NAME] + [shard_path(path, name) for name in sorted(load_manifest(path)['indices'].values())]
+    return [[f.name, f.stat().st_size, f.stat().st_mtime_ns] for f in files if f.exists()]
+
+def load_key_index(path: Path) -> Dict[str, str]:
+    """
+    Returns the canonical-key index of a database, mapping canonical key -> exact key.
+
+    The index is read from its cache file when the database has not changed
+    since it was written; otherwise it is rebuilt from every puzzle and cached.
+
+    Args:
+        path (Path): A puzzles.json file or a store directory.
+
+    Returns:
+        Dict[str, str]: The key index.
+    """
+    cache_path = key_index_path(path)
+    if cache_path.exists():
+        try:
+            with cache_path.open('r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('signature') == database_signature(path):
+                return cached['keys']
+        except (json.JSONDecodeError, KeyError, IOError):
+            pass
+    start = time.perf_counter()
+    keys: Dict[str, str] = {}
+    count = 0
+    for puzzles in load_puzzle_data(path).values():
+        for puzzle in puzzles:
+            decoded = puzzle_keys(puzzle)
+            if decoded:
+                keys.setdefault(decoded[2], decoded[3])
+                count += 1
+    print(f"Built canonical-key index of {count} puzzles in {time.perf_counter() - start:.1f} s.")
+    if path.exists():
+        save_key_index(path, keys)
+    return keys
+
+def save_key_index(path: Path, keys: Dict[str, str]) -> None:
+    """
+    Caches a key index together with the database's current signature.
+
+    Args:
+        path (Path): A puzzles.json file or a store directory.
+        keys (Dict[str, str]): The key index to cache.
+    """
+    try:
+        atomic_write_text(key_index_path(path), json.dumps({'signature': database_signature(path), 'keys': keys}))
+    except IOError as e:
+        print(f"Warning: Could not cache the key index: {e}", file=sys.stderr)
+
+def first_puzzle(path: Path, index_str: str) -> Optional[str]:
+    """
+    Returns the first puzzle stored at an index, as a sample of its dim and stars.
+
+    Args:
+        path (Path): A puzzles.json file or a store directory.
+        index_str (str): The index.
+
+    Returns:
+        Optional[str]: The puzzle, or None if the index is missing or empty.
+    """
+    if is_sharded_store(path):
+        shard_name = load_manifest(path)['indices'].get(index_str)
+        if not shard_name or not shard_path(path, shard_name).exists():
+            return None
+        with shard_path(path, shard_name).open('r', encoding='utf-8') as f:
+            line = f.readline()
+        return json.loads(line) if line.strip() else None
+    puzzles = load_json_data(path).get(index_str)
+    return puzzles[0] if puzzles else None
+
+def uniqueness_worker(task: Tuple[int, str, float]) -> Tuple[int, str]:
+    """
+    Checks one puzzle for a unique solution. Runs in a worker process.
+
+    Args:
+        task (Tuple[int, str, float]): The puzzle's position, its SBN and the timeout in seconds.
+
+    Returns:
+        Tuple[int, str]: The position and a status: 'unique', 'multiple',
+                         'unsolvable', 'timeout' or 'error'.
+    """
+    position, sbn, timeout = task
+    try:
+        sbv = sbn_module()
+        puzzle_data = sbv.decode_sbn(sbn)
+        region_grid, _ = sbv.parse_and_validate_grid(puzzle_data['task'])
+        solutions, stats = sbv.Z3StarBattleSolver(region_grid, puzzle_data['stars']).solve(timeout_ms=int(timeout * 1000))
+    except Exception:
+        return position, 'error'
+    if stats.get('timed_out'):
+        return position, 'timeout'
+    return position, {0: 'unsolvable', 1: 'unique'}.get(len(solutions), 'multiple')
+
+def validate_incoming(args: argparse.Namespace, puzzles: List[str], sample: Optional[str]) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Runs the validation pipeline on puzzles about to be added or inserted.
+
+    Each puzzle is decoded and checked against the expected size and star
+    count (from --dim/--stars, the index's existing puzzles or the first
+    valid incoming puzzle), then looked up in the canonical-key index to
+    reject exact and rotated/reflected duplicates of the database and of
+    earlier incoming puzzles. The survivors are checked for a unique solution
+    in a process pool, with a time limit per puzzle.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+        puzzles (List[str]): The incoming puzzles.
+        sample (Optional[str]): A puzzle already at the target index, if any.
+
+    Returns:
+        Tuple[List[str], Dict[str, str]]: The accepted puzzles, in their
+            original order, and the key index including them.
+
+    Raises:
+        SystemExit: If Z3 is not available.
+    """
+    sbv = sbn_module()
+    if not sbv.Z3_AVAILABLE:
+        sys.exit(1)
+    start = time.perf_counter()
+    expected = (args.dim, args.stars)
+    sample_keys = puzzle_keys(sample) if sample else None
+    if sample_keys:
+        expected = (expected[0] or sample_keys[0], expected[1] or sample_keys[1])
+    key_index = load_key_index(args.json_file)
+    screen_start = time.perf_counter()
+
+    rejected: Dict[str, int] = {}
+    candidates: List[Tuple[int, str, str, str]] = []
+    batch_keys: Dict[str, str] = {}
+    for position, puzzle in enumerate(puzzles):
+        decoded = puzzle_keys(puzzle)
+        if not decoded:
+            reason = 'invalid SBN'
+        else:
+            dim, stars, canonical, exact = decoded
+            expected = (expected[0] or dim, expected[1] or stars)
+            if (dim, stars) != expected:
+                reason = f'not {expected[0]}x{expected[0]} with {expected[1]} star(s)'
+            elif canonical in key_index or canonical in batch_keys:
+                previous = key_index.get(canonical) or batch_keys[canonical]
+                reason = 'exact duplicate' if previous == exact else 'symmetric duplicate'
+            else:
+                batch_keys[canonical] = exact
+                candidates.append((position, puzzle, canonical, exact))
+                continue
+        rejected[reason] = rejected.get(reason, 0) + 1
+        if args.verbose:
+            print(f"Rejected ({reason}): {puzzle}")
+    screened = time.perf_counter()
+
+    accepted_positions = set()
+    if candidates:
+        tasks = [(position, puzzle, args.timeout) for position, puzzle, _, _ in candidates]
+        with multiprocessing.Pool(processes=args.workers) as pool:
+            for position, status in pool.imap_unordered(uniqueness_worker, tasks, chunksize=4):
+                if status == 'unique':
+                    accepted_positions.add(position)
+                else:
+                    reason = {'multiple': 'multiple solutions', 'unsolvable': 'no solution',
+                              'timeout': f'timed out after {args.timeout:g} s'}.get(status, 'solver error')
+                    rejected[reason] = rejected.get(reason, 0) + 1
+                    if args.verbose:
+                        print(f"Rejected ({reason}): {puzzles[position]}")
+    for position, _, canonical, exact in candidates:
+        if position in accepted_positions:
+            key_index[canonical] = exact
+    accepted = [puzzle for position, puzzle in enumerate(puzzles) if position in accepted_positions]
+
+    elapsed = time.perf_counter() - start
+    print(f"Validated {len(puzzles)} puzzle(s) in {elapsed:.1f} s: {len(accepted)} accepted, "
+          f"{len(puzzles) - len(accepted)} rejected.")
+    for reason, count in sorted(rejected.items(), key=lambda item: -item[1]):
+        print(f"  - {reason}: {count}")
+    print(f"  Screening: {len(puzzles) / max(screened - screen_start, 1e-9):.0f} puzzles/s; "
+          f"uniqueness: {len(candidates) / max(time.perf_counter() - screened, 1e-9):.1f} puzzles/s "
+          f"with {args.workers} worker(s).")
+    return accepted, key_index
+
 # --- Command-Specific Functions ---
 
 def do_convert(args: argparse.Namespace) -> None:
@@ -214,6 +753,29 @@ def do_insert(args: argparse.Namespace) -> None:
     with args.puzzles_file.open('r') as f:
         new_puzzles = [line.strip() for line in f if line.strip()]
 
+    key_index = None
+    if args.validate:
+        new_puzzles, key_index = validate_incoming(args, new_puzzles, None)
+        if not new_puzzles:
+            print("No puzzles passed validation; nothing to insert.")
+            return
+
+    if is_sharded_store(args.json_file):
+        insert_sharded(args, new_puzzles)
+    else:
+        insert_json(args, new_puzzles)
+    # Keep the key cache in step with the database so the next ingest skips the rebuild.
+    if key_index is not None and not args.dry_run:
+        save_key_index(args.json_file, key_index)
+
+def insert_json(args: argparse.Namespace, new_puzzles: List[str]) -> None:
+    """
+    Implements 'insert' for a single JSON file.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+        new_puzzles (List[str]): The puzzles to insert.
+    """
     # Load the existing data and prepare a new dictionary for the restructured data.
     data = load_json_data(args.json_file)
     new_data: Dict[str, Any] = {}
@@ -243,6 +805,28 @@ def do_add(args: argparse.Namespace) -> None:
     Controller function for the 'add' command.
     Appends one or more puzzles to an existing or new index without shifting.
     
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+    """
+    key_index = None
+    if args.validate:
+        args.puzzles, key_index = validate_incoming(args, args.puzzles, first_puzzle(args.json_file, str(args.index)))
+        if not args.puzzles:
+            print("No puzzles passed validation; nothing to add.")
+            return
+
+    if is_sharded_store(args.json_file):
+        add_sharded(args)
+    else:
+        add_json(args)
+    # Keep the key cache in step with the database so the next ingest skips the rebuild.
+    if key_index is not None and not args.dry_run:
+        save_key_index(args.json_file, key_index)
+
+def add_json(args: argparse.Namespace) -> None:
+    """
+    Implements 'add' for a single JSON file.
+
     Args:
         args (argparse.Namespace): The command-line arguments object.
     """
@@ -267,6 +851,10 @@ def do_delete(args: argparse.Namespace) -> None:
     Args:
         args (argparse.Namespace): The command-line arguments object.
     """
+    if is_sharded_store(args.json_file):
+        delete_sharded(args)
+        return
+
     data = load_json_data(args.json_file)
     index_str = str(args.index)
 
@@ -300,7 +888,7 @@ def do_list(args: argparse.Namespace) -> None:
     Args:
         args (argparse.Namespace): The command-line arguments object.
     """
-    data = load_json_data(args.json_file)
+    data = load_puzzle_data(args.json_file)
     if not data:
         print(f"File '{args.json_file}' is empty or does not exist.")
         return
@@ -312,6 +900,294 @@ def do_list(args: argparse.Namespace) -> None:
         count = len(data[str(key)])
         print(f"  - Index {key}: {count} puzzle(s)")
 
+# --- Sharded Store Commands ---
+
+def insert_sharded(args: argparse.Namespace, new_puzzles: List[str]) -> None:
+    """
+    Implements 'insert' for a sharded store.
+
+    The new puzzles go into a fresh shard; existing shards are untouched and
+    only the manifest is renumbered.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+        new_puzzles (List[str]): The puzzles to insert.
+    """
+    manifest = load_manifest(args.json_file)
+    insert_idx = args.index
+    indices = {str(int(key) + 1) if int(key) >= insert_idx else key: name
+               for key, name in manifest['indices'].items()}
+    print(f"Injecting {len(new_puzzles)} new puzzles from '{args.puzzles_file}' at index '{insert_idx}'.")
+    print(f"Indices from '{insert_idx}' onwards will be shifted up by one.")
+    if args.dry_run:
+        print("--- DRY RUN MODE: No files will be modified. ---")
+        return
+    shard_name = new_shard_name(manifest)
+    write_shard(args.json_file, shard_name, new_puzzles, args.no_backup)
+    indices[str(insert_idx)] = shard_name
+    manifest['indices'] = indices
+    save_manifest(args.json_file, manifest, args.no_backup)
+    print(f"Successfully saved changes to '{args.json_file}'.")
+
+def add_sharded(args: argparse.Namespace) -> None:
+    """
+    Implements 'add' for a sharded store by appending to the index's shard.
+
+    Appends are not backed up, as they never modify existing puzzles.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+    """
+    manifest = load_manifest(args.json_file)
+    index_str = str(args.index)
+    if index_str not in manifest['indices']:
+        print(f"Warning: Index '{index_str}' does not exist. It will be created.")
+    print(f"Appending {len(args.puzzles)} puzzle(s) to index '{index_str}'.")
+    if args.dry_run:
+        print("--- DRY RUN MODE: No files will be modified. ---")
+        return
+    if index_str not in manifest['indices']:
+        manifest['indices'][index_str] = new_shard_name(manifest)
+        save_manifest(args.json_file, manifest, args.no_backup)
+    append_to_shard(args.json_file, manifest['indices'][index_str], args.puzzles)
+    print(f"Successfully saved changes to '{args.json_file}'.")
+
+def delete_sharded(args: argparse.Namespace) -> None:
+    """
+    Implements 'delete' for a sharded store.
+
+    Deleting a puzzle rewrites only its index's shard; deleting an index
+    removes it from the manifest and moves its shard aside as a backup.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+    """
+    manifest = load_manifest(args.json_file)
+    index_str = str(args.index)
+    if index_str not in manifest['indices']:
+        print(f"Error: Index '{index_str}' not found in '{args.json_file}'.", file=sys.stderr)
+        sys.exit(1)
+    shard_name = manifest['indices'][index_str]
+
+    if args.puzzle:
+        puzzles = read_shard(args.json_file, shard_name)
+        try:
+            puzzles.remove(args.puzzle)
+        except ValueError:
+            print(f"Error: Puzzle '{args.puzzle}' not found in index '{index_str}'.", file=sys.stderr)
+            sys.exit(1)
+        print(f"Removed puzzle from index '{index_str}'.")
+        if args.dry_run:
+            print("--- DRY RUN MODE: No files will be modified. ---")
+            return
+        write_shard(args.json_file, shard_name, puzzles, args.no_backup)
+    else:
+        print(f"Deleted entire index '{index_str}'.")
+        if args.dry_run:
+            print("--- DRY RUN MODE: No files will be modified. ---")
+            return
+        del manifest['indices'][index_str]
+        save_manifest(args.json_file, manifest, args.no_backup)
+        path = shard_path(args.json_file, shard_name)
+        if path.exists():
+            if args.no_backup:
+                path.unlink()
+            else:
+                os.replace(path, path.with_suffix(path.suffix + '.bak'))
+    print(f"Successfully saved changes to '{args.json_file}'.")
+
+def do_shard(args: argparse.Namespace) -> None:
+    """
+    Controller function for the 'shard' command.
+    Splits a puzzles.json file into a sharded store, one shard per index.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+    """
+    data = load_json_data(args.json_file)
+    if args.store_dir.exists() and (args.store_dir / MANIFEST_NAME).exists():
+        print(f"Error: '{args.store_dir}' already contains a store.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Splitting '{args.json_file}' ({len(data)} indices) into '{args.store_dir}'.")
+    if args.dry_run:
+        print("--- DRY RUN MODE: No files will be modified. ---")
+        return
+    args.store_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {'next_shard': 0, 'indices': {}}
+    for index_str, puzzles in sorted(data.items(), key=lambda item: int(item[0])):
+        shard_name = new_shard_name(manifest)
+        write_shard(args.store_dir, shard_name, puzzles, no_backup=True)
+        manifest['indices'][index_str] = shard_name
+    save_manifest(args.store_dir, manifest, no_backup=True)
+    print(f"Successfully created store '{args.store_dir}'.")
+
+def do_export(args: argparse.Namespace) -> None:
+    """
+    Controller function for the 'export' command.
+    Writes a sharded store back to the single-file puzzles.json layout.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+    """
+    if not is_sharded_store(args.store_dir):
+        print(f"Error: '{args.store_dir}' is not a store directory.", file=sys.stderr)
+        sys.exit(1)
+    data = load_store_data(args.store_dir)
+    print(f"Exporting {len(data)} indices from '{args.store_dir}'.")
+    save_json_data(args.json_file, data, args.dry_run, args.no_backup)
+
+# --- Static Bundle Builder ---
+
+def content_hash(data: bytes) -> str:
+    """
+    Computes the SHA-256 content hash used for cache-busting.
+
+    Args:
+        data (bytes): The file contents.
+
+    Returns:
+        str: The hex digest.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def write_bundle_file(out_dir: Path, stem: str, data: bytes, encodings: List[str]) -> Dict[str, Any]:
+    """
+    Writes one content-addressed text file and its precompressed variants.
+
+    The file name carries a prefix of the content hash, so an unchanged page
+    keeps its URL across builds and a changed page gets a new one.
+
+    Args:
+        out_dir (Path): The output directory.
+        stem (str): The file name without hash or extension (may include a subdirectory).
+        data (bytes): The uncompressed, newline-separated puzzles.
+        encodings (List[str]): The compressed variants to write ('gz', 'br').
+
+    Returns:
+        Dict[str, Any]: The file name (relative to 'out_dir'), its hash and
+                        the byte size of each variant.
+    """
+    digest = content_hash(data)
+    name = f"{stem}.{digest[:HASH_PREFIX_LENGTH]}.txt"
+    path = out_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    sizes = {'txt': len(data)}
+    if 'gz' in encodings:
+        # mtime=0 keeps the output byte-identical between builds.
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        (out_dir / f"{name}.gz").write_bytes(compressed)
+        sizes['gz'] = len(compressed)
+    if 'br' in encodings:
+        compressed = brotli.compress(data, quality=11)
+        (out_dir / f"{name}.br").write_bytes(compressed)
+        sizes['br'] = len(compressed)
+    return {'file': name, 'sha256': digest, 'bytes': sizes}
+
+def build_bundles(data: Dict[str, List[str]], out_dir: Path, page_size: int) -> Dict[str, Any]:
+    """
+    Writes the static puzzle bundles for every index and returns their manifest.
+
+    Each index (size_id) gets one bundle file with all of its puzzles, one per
+    line, and that list is also split into pages of 'page_size' puzzles that
+    are written as separate files. The manifest records, for every bundle and
+    page, the puzzle count, the content hash, the byte size of each variant
+    and, for pages, the byte range the page occupies inside its bundle, so a
+    client can fetch a single page (or a Range of the bundle) to pick a
+    random puzzle.
+
+    Args:
+        data (Dict[str, List[str]]): The puzzles of every index.
+        out_dir (Path): The output directory.
+        page_size (int): The number of puzzles per page.
+
+    Returns:
+        Dict[str, Any]: The bundle manifest.
+    """
+    encodings = ['gz', 'br'] if BROTLI_AVAILABLE else ['gz']
+    manifest: Dict[str, Any] = {'version': 1, 'page_size': page_size, 'encodings': encodings, 'indices': {}}
+    for index_str, puzzles in sorted(data.items(), key=lambda item: int(item[0])):
+        lines = [f"{puzzle}\n".encode('utf-8') for puzzle in puzzles]
+        entry = write_bundle_file(out_dir, index_str, b''.join(lines), encodings)
+        entry['count'] = len(puzzles)
+        entry['pages'] = []
+        offset = 0
+        for page_number, start in enumerate(range(0, len(lines), page_size)):
+            page_data = b''.join(lines[start:start + page_size])
+            page = write_bundle_file(out_dir, f"{index_str}/{index_str}-{page_number}", page_data, encodings)
+            page['count'] = min(page_size, len(lines) - start)
+            page['first'] = start
+            page['range'] = [offset, offset + len(page_data)]
+            offset += len(page_data)
+            entry['pages'].append(page)
+        manifest['indices'][index_str] = entry
+    return manifest
+
+def bundle_files(manifest: Dict[str, Any]) -> List[str]:
+    """
+    Lists every file written for a bundle manifest, including compressed variants.
+
+    Args:
+        manifest (Dict[str, Any]): A bundle manifest from build_bundles.
+
+    Returns:
+        List[str]: The file names, relative to the output directory.
+    """
+    files = []
+    for entry in manifest.get('indices', {}).values():
+        for item in [entry] + entry.get('pages', []):
+            files.append(item['file'])
+            files.extend(f"{item['file']}.{encoding}" for encoding in item['bytes'] if encoding != 'txt')
+    return files
+
+def do_build(args: argparse.Namespace) -> None:
+    """
+    Controller function for the 'build' command.
+    Writes paged, precompressed bundles and a manifest for static hosting.
+
+    Files from a previous build in the same directory that are no longer
+    referenced are removed, so the directory can be deployed as is.
+
+    Args:
+        args (argparse.Namespace): The command-line arguments object.
+    """
+    if args.page_size < 1:
+        print("Error: --page-size must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+    data = load_puzzle_data(args.json_file)
+    if not data:
+        print(f"Error: '{args.json_file}' is empty or does not exist.", file=sys.stderr)
+        sys.exit(1)
+    total = sum(len(puzzles) for puzzles in data.values())
+    pages = sum(-(-len(puzzles) // args.page_size) for puzzles in data.values())
+    print(f"Building {len(data)} bundles ({total} puzzles, {pages} pages of up to {args.page_size}) in '{args.out_dir}'.")
+    if not BROTLI_AVAILABLE:
+        print("Warning: 'brotli' is not installed; only .gz variants will be written. (pip install brotli)")
+    if args.dry_run:
+        print("--- DRY RUN MODE: No files will be modified. ---")
+        return
+
+    manifest_path = args.out_dir / BUNDLE_MANIFEST_NAME
+    previous = {}
+    if manifest_path.exists():
+        try:
+            with manifest_path.open('r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            print(f"Warning: Ignoring unreadable manifest '{manifest_path}'.", file=sys.stderr)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = build_bundles(data, args.out_dir, args.page_size)
+    atomic_write_text(manifest_path, json.dumps(manifest, indent=4))
+
+    # --- Remove stale files from the previous build ---
+    current = set(bundle_files(manifest))
+    for name in set(bundle_files(previous)) - current:
+        try:
+            (args.out_dir / name).unlink()
+        except (FileNotFoundError, IsADirectoryError):
+            pass
+    print(f"Successfully wrote {len(current)} files and '{manifest_path}'.")
+
 # --- Main Execution Block & Argument Parser Setup ---
 
 def main():
@@ -341,6 +1217,15 @@ def main():
         help="Disable the automatic creation of a .bak file before saving."
     )
 
+    # --- Validation Options (shared by 'add' and 'insert') ---
+    validation = argparse.ArgumentParser(add_help=False)
+    validation.add_argument('--validate', action='store_true', help='Decode, deduplicate and check uniqueness of incoming puzzles (requires z3-solver).')
+    validation.add_argument('--dim', type=int, help='With --validate: the required grid size (default: taken from the index).')
+    validation.add_argument('--stars', type=int, help='With --validate: the required stars per region (default: taken from the index).')
+    validation.add_argument('--workers', type=int, default=os.cpu_count(), help='With --validate: number of uniqueness-check processes (default: all cores).')
+    validation.add_argument('--timeout', type=float, default=DEFAULT_VALIDATE_TIMEOUT, help=f'With --validate: seconds allowed per uniqueness check (default: {DEFAULT_VALIDATE_TIMEOUT:g}).')
+    validation.add_argument('--verbose', action='store_true', help='With --validate: print every rejected puzzle and the reason.')
+
     # --- Subparser Configuration ---
     # Subparsers are used to create distinct commands (like git's `commit`, `push`, etc.).
     subparsers = parser.add_subparsers(dest='command', required=True, help='Available commands')
@@ -355,30 +1240,49 @@ def main():
     
     # --- 'list' Command ---
     p_list = subparsers.add_parser('list', help='List all puzzle indices and their counts.')
-    p_list.add_argument('json_file', type=Path, help='Path to the JSON file to inspect.')
+    p_list.add_argument('json_file', type=Path, help='Path to the JSON file to inspect (or a store directory).')
     p_list.set_defaults(func=do_list)
 
     # --- 'insert' Command ---
-    p_insert = subparsers.add_parser('insert', help='Insert puzzles from a file at an index, shifting others down.')
-    p_insert.add_argument('json_file', type=Path, help='Path to the JSON file to modify.')
+    p_insert = subparsers.add_parser('insert', parents=[validation], help='Insert puzzles from a file at an index, shifting others down.')
+    p_insert.add_argument('json_file', type=Path, help='Path to the JSON file to modify (or a store directory).')
     p_insert.add_argument('--index', type=int, required=True, help='The integer index at which to insert the puzzles.')
     p_insert.add_argument('--from-file', dest='puzzles_file', type=Path, required=True, help='The .txt file containing new puzzles, one per line.')
     p_insert.set_defaults(func=do_insert)
 
     # --- 'add' Command ---
-    p_add = subparsers.add_parser('add', help='Add one or more puzzles to an existing index.')
-    p_add.add_argument('json_file', type=Path, help='Path to the JSON file to modify.')
+    p_add = subparsers.add_parser('add', parents=[validation], help='Add one or more puzzles to an existing index.')
+    p_add.add_argument('json_file', type=Path, help='Path to the JSON file to modify (or a store directory).')
     p_add.add_argument('--index', type=int, required=True, help='The index to add the puzzle(s) to.')
     p_add.add_argument('--puzzles', type=str, nargs='+', required=True, help='The new puzzle string(s) to add.')
     p_add.set_defaults(func=do_add)
 
     # --- 'delete' Command ---
     p_delete = subparsers.add_parser('delete', help='Delete an entire index or a specific puzzle within it.')
-    p_delete.add_argument('json_file', type=Path, help='Path to the JSON file to modify.')
+    p_delete.add_argument('json_file', type=Path, help='Path to the JSON file to modify (or a store directory).')
     p_delete.add_argument('--index', type=int, required=True, help='The index to modify.')
     p_delete.add_argument('--puzzle', type=str, help='Optional: The specific puzzle string to remove from the index.')
     p_delete.set_defaults(func=do_delete)
 
+    # --- 'shard' Command ---
+    p_shard = subparsers.add_parser('shard', help='Split a puzzles.json file into a sharded store directory.')
+    p_shard.add_argument('json_file', type=Path, help='Path to the JSON file to split.')
+    p_shard.add_argument('store_dir', type=Path, help='Path to the store directory to create.')
+    p_shard.set_defaults(func=do_shard)
+
+    # --- 'export' Command ---
+    p_export = subparsers.add_parser('export', help='Write a sharded store back to a single puzzles.json file.')
+    p_export.add_argument('store_dir', type=Path, help='Path to the store directory to read.')
+    p_export.add_argument('json_file', type=Path, help='Path to the output JSON file to create/overwrite.')
+    p_export.set_defaults(func=do_export)
+
+    # --- 'build' Command ---
+    p_build = subparsers.add_parser('build', help='Write paged, precompressed puzzle bundles for static hosting.')
+    p_build.add_argument('json_file', type=Path, help='Path to the JSON file to read (or a store directory).')
+    p_build.add_argument('--out-dir', type=Path, required=True, help='Directory to write the bundles and manifest to.')
+    p_build.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help=f'Puzzles per page (default: {DEFAULT_PAGE_SIZE}).')
+    p_build.set_defaults(func=do_build)
+
     # Parse the command-line arguments provided by the user.
     args = parser.parse_args()
     